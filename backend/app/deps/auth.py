@@ -4,12 +4,19 @@ Authentication dependencies.
 Handles authentication for API requests from WordPress.
 """
 
-from fastapi import Header, HTTPException, status
+from typing import AsyncIterator, Optional, TypeVar
+from fastapi import Depends, Header, HTTPException, Request, Response, status
+import hashlib
 import os
 import logging
 
+from app.services.rate_limit import RateLimiter, retry_after_header
+from app.services.usage import UsageStats, track_usage, use_usage
+
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
 # Get APP_SECRET from environment
 APP_SECRET = os.getenv("APP_SECRET", "")
 
@@ -76,18 +83,162 @@ async def verify_token(authorization: str = Header(None)) -> str:
     return token
 
 
-# Optional: Rate limiting dependency
-# Can be implemented with Redis or in-memory store
-async def rate_limit(token: str = Header(None)):
+def limiter_key(token: str) -> str:
+    """
+    Get the rate-limiter key of an API token.
+    
+    Hashed so raw secrets never end up in limiter keys.
+    
+    Args:
+        token: Verified authentication token
+        
+    Returns:
+        Limiter key
+    """
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()[:32]
+
+
+class UsageCharge:
     """
-    Rate limiting for API requests.
+    Charges the LLM tokens of one request to its token's TPM budget.
     
-    TODO: Implement actual rate limiting logic.
-    For now, this is a placeholder.
+    Only the tokens recorded since the last flush are charged, so the
+    streamed body and the rate_limit dependency can both flush without
+    charging anything twice, whichever of them finishes last.
     """
-    # In production, implement rate limiting with Redis
-    # Example: Check if token has exceeded rate limit
-    # If exceeded, raise HTTPException with 429 status
-    pass
+    
+    def __init__(self, limiter: Optional[RateLimiter], key: str, usage: UsageStats):
+        """
+        Initialize charge.
+        
+        Args:
+            limiter: Rate limiter to charge (None disables charging)
+            key: Limiter key of the token
+            usage: Usage scope of the request
+        """
+        self.limiter = limiter
+        self.key = key
+        self.usage = usage
+        self.charged = 0
+    
+    async def flush(self) -> None:
+        """Charge the tokens recorded since the last flush."""
+        tokens = self.usage.tokens_used - self.charged
+        if self.limiter is None or tokens <= 0:
+            return
+        self.charged += tokens
+        await self.limiter.charge(self.key, tokens)
+    
+    async def stream(self, body: AsyncIterator[T]) -> AsyncIterator[T]:
+        """
+        Wrap a streamed response body so its tokens are charged.
+        
+        Since FastAPI 0.106 dependencies with yield may exit before the
+        response body is sent, so the body records into the request's
+        usage scope itself and charges once it is done (or aborted).
+        
+        Args:
+            body: Response body generator
+            
+        Yields:
+            Chunks of the body
+        """
+        iterator = body.__aiter__()
+        try:
+            while True:
+                # Only active while the body runs, never across our own yield
+                with use_usage(self.usage):
+                    try:
+                        chunk = await iterator.__anext__()
+                    except StopAsyncIteration:
+                        return
+                yield chunk
+        finally:
+            aclose = getattr(iterator, "aclose", None)
+            if aclose is not None:
+                with use_usage(self.usage):
+                    await aclose()
+            await self.flush()
 
 
+async def rate_limit(
+    request: Request,
+    response: Response,
+    token: str = Depends(verify_token)
+) -> AsyncIterator[str]:
+    """
+    Enforce per-token request and LLM token budgets.
+    
+    Admits the request against the token's RPM/TPM buckets and opens a
+    usage scope so every LLM token the request consumes is charged to
+    the token's budget afterwards. Streaming endpoints charge their body
+    through get_usage_charge().
+    
+    Args:
+        request: Incoming request (limiter lives on app.state)
+        response: Response receiving the X-RateLimit-* headers
+        token: Verified authentication token
+        
+    Yields:
+        Verified token
+        
+    Raises:
+        HTTPException: 429 if a budget is exhausted
+    """
+    limiter = getattr(request.app.state, "rate_limiter", None)
+    if limiter is None:
+        yield token
+        return
+    
+    key = limiter_key(token)
+    result = await limiter.acquire(key)
+    
+    headers = {
+        "X-RateLimit-Limit": str(result.limit),
+        "X-RateLimit-Remaining": str(result.remaining),
+        "X-RateLimit-Reset": str(result.reset),
+    }
+    
+    if not result.allowed:
+        logger.warning(f"Rate limit exceeded: retry_after={result.retry_after:.1f}s")
+        headers["Retry-After"] = retry_after_header(result)
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail={
+                "code": "RATE_LIMIT_EXCEEDED",
+                "message": "Too many requests",
+                "retry_after": int(headers["Retry-After"]),
+            },
+            headers=headers,
+        )
+    
+    response.headers.update(headers)
+    
+    with track_usage() as usage:
+        charge = UsageCharge(limiter, key, usage)
+        request.state.usage_charge = charge
+        try:
+            yield token
+        finally:
+            # Failed generations still consumed tokens
+            await charge.flush()
+
+
+async def get_usage_charge(
+    request: Request,
+    token: str = Depends(rate_limit)
+) -> UsageCharge:
+    """
+    Get the usage charge of a rate-limited request.
+    
+    Args:
+        request: Incoming request
+        token: Verified authentication token
+        
+    Returns:
+        UsageCharge of the request (a no-op one without a rate limiter)
+    """
+    charge: Optional[UsageCharge] = getattr(request.state, "usage_charge", None)
+    if charge is None:
+        return UsageCharge(None, "", UsageStats())
+    return charge
@@ -0,0 +1,36 @@
+"""
+Job dependencies.
+"""
+
+from typing import Optional
+
+from fastapi import HTTPException, Request, status
+
+from app.services.jobs import JobManager
+
+
+def get_job_manager(request: Request) -> JobManager:
+    """
+    Get the job manager started with the application.
+
+    Args:
+        request: Incoming request
+
+    Returns:
+        Job manager attached to the application
+
+    Raises:
+        HTTPException: If background jobs are not running
+    """
+    manager: Optional[JobManager] = getattr(request.app.state, "job_manager", None)
+
+    if manager is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail={
+                "code": "JOBS_UNAVAILABLE",
+                "message": "Background jobs are not running",
+            },
+        )
+
+    return manager
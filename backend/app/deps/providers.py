@@ -0,0 +1,29 @@
+"""
+Provider dependencies.
+
+Hands routers the process-wide provider registry created at startup.
+"""
+
+from fastapi import Request
+
+from app.services.provider_registry import ProviderRegistry
+
+
+def get_provider_registry(request: Request) -> ProviderRegistry:
+    """
+    Get the shared provider registry.
+
+    Args:
+        request: Incoming request
+
+    Returns:
+        Provider registry attached to the application
+    """
+    registry = getattr(request.app.state, "provider_registry", None)
+
+    # Startup hook did not run (e.g. app mounted without lifespan)
+    if registry is None:
+        registry = ProviderRegistry()
+        request.app.state.provider_registry = registry
+
+    return registry
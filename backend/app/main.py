@@ -12,7 +12,12 @@ import logging
 import time
 import os
 
-from app.routers import content, product, seo, brand, image
+from app.routers import content, product, seo, brand, image, jobs
+from app.services.cache import create_cache
+from app.services.images import close_image_fetcher
+from app.services.jobs import JobManager, create_job_store
+from app.services.provider_registry import ProviderRegistry
+from app.services.rate_limit import create_rate_limiter
 from app.utils.logger import setup_logging
 
 # Setup logging
@@ -114,6 +119,7 @@ app.include_router(product.router, prefix="/api", tags=["Product"])
 app.include_router(seo.router, prefix="/api", tags=["SEO"])
 app.include_router(brand.router, prefix="/api", tags=["Brand"])
 app.include_router(image.router, prefix="/api", tags=["Image"])
+app.include_router(jobs.router, prefix="/api", tags=["Jobs"])
 
 
 # Health check endpoint
@@ -122,25 +128,34 @@ async def health_check():
     """
     Health check endpoint.
     
-    Returns system status and configuration.
+    Returns system status and configuration. Responds with 503 when the
+    default provider is unavailable (circuit open or not configured) so
+    load balancers stop routing to this instance.
     """
     provider = os.getenv("PROVIDER", "openai")
+    registry = getattr(app.state, "provider_registry", None)
     
-    # Check provider availability
+    # Check provider availability from its circuit breaker
     provider_status = "unknown"
-    try:
-        # TODO: Add actual provider health check
-        provider_status = "connected"
-    except Exception:
-        provider_status = "unavailable"
+    if registry is not None:
+        try:
+            provider_status = registry.get().status
+        except Exception:
+            provider_status = "unavailable"
     
-    return {
-        "status": "healthy",
-        "version": VERSION,
-        "provider": provider,
-        "provider_status": provider_status,
-        "uptime_seconds": int(time.time() - app.state.start_time) if hasattr(app.state, "start_time") else 0,
-    }
+    healthy = provider_status != "unavailable"
+    
+    return JSONResponse(
+        status_code=status.HTTP_200_OK if healthy else status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={
+            "status": "healthy" if healthy else "unhealthy",
+            "version": VERSION,
+            "provider": provider,
+            "provider_status": provider_status,
+            "uptime_seconds": int(time.time() - app.state.start_time) if hasattr(app.state, "start_time") else 0,
+            "providers": registry.stats() if registry is not None else {},
+        },
+    )
 
 
 # Root endpoint
@@ -163,6 +178,25 @@ async def startup_event():
     logger.info(f"ContentCraft AI API v{VERSION} starting...")
     logger.info(f"Provider: {os.getenv('PROVIDER', 'openai')}")
     logger.info(f"Model: {os.getenv('MODEL_NAME', 'gpt-4o-mini')}")
+    
+    # Shared providers reuse HTTP connection pools across requests
+    app.state.provider_registry = ProviderRegistry(cache=create_cache())
+    try:
+        app.state.provider_registry.get()
+    except Exception as e:
+        logger.warning(f"Default provider not initialized at startup: {str(e)}")
+    
+    # Per-token request/token budgets (None when disabled)
+    app.state.rate_limiter = create_rate_limiter()
+    
+    # Background workers for long-running generations
+    app.state.job_manager = JobManager(
+        create_job_store(),
+        app.state.provider_registry,
+        workers=int(os.getenv("JOB_WORKERS", "2")),
+        rate_limiter=app.state.rate_limiter,
+    )
+    await app.state.job_manager.start()
 
 
 # Shutdown event
@@ -170,6 +204,20 @@ async def startup_event():
 async def shutdown_event():
     """Run on application shutdown."""
     logger.info("ContentCraft AI API shutting down...")
+    
+    job_manager = getattr(app.state, "job_manager", None)
+    if job_manager is not None:
+        await job_manager.stop()
+    
+    registry = getattr(app.state, "provider_registry", None)
+    if registry is not None:
+        await registry.aclose()
+    
+    rate_limiter = getattr(app.state, "rate_limiter", None)
+    if rate_limiter is not None:
+        await rate_limiter.aclose()
+    
+    await close_image_fetcher()
 
 
 if __name__ == "__main__":
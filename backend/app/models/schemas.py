@@ -3,7 +3,7 @@ Pydantic schemas for request/response models.
 """
 
 from pydantic import BaseModel, Field
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Union
 
 
 # Common Models
@@ -30,12 +30,32 @@ class FAQ(BaseModel):
 class ResponseMetadata(BaseModel):
     """Response metadata."""
     tokens_used: int = Field(default=0, description="Tokens consumed")
+    prompt_tokens: int = Field(default=0, description="Input tokens consumed")
+    completion_tokens: int = Field(default=0, description="Output tokens generated")
+    cached_input_tokens: int = Field(
+        default=0, description="Input tokens served from the provider's prompt cache"
+    )
     latency_ms: int = Field(default=0, description="Latency in milliseconds")
     model: str = Field(default="", description="Model used")
     cached: bool = Field(default=False, description="Whether result was cached")
+    attempts: int = Field(default=0, description="Upstream LLM attempts, including retries")
 
 
 # Content Generation
+class ExistingContent(BaseModel):
+    """Previously generated article, for regenerating some of its sections."""
+    title: Optional[str] = Field(None, description="Content title")
+    excerpt: Optional[str] = Field(None, description="Content excerpt")
+    outline: List[str] = Field(default_factory=list, description="Content outline")
+    body_html: Optional[str] = Field(None, description="Content body (HTML)")
+    meta: Optional[Dict[str, Any]] = Field(None, description="SEO metadata")
+    headings: List[str] = Field(default_factory=list, description="Headings in content")
+    internal_links: List[Dict[str, Any]] = Field(
+        default_factory=list, description="Suggested internal links"
+    )
+    schema_ld_json: Optional[str] = Field(None, description="Schema.org JSON-LD")
+
+
 class ContentRequest(BaseModel):
     """Content generation request."""
     topic: str = Field(..., min_length=5, max_length=200, description="Content topic")
@@ -49,6 +69,10 @@ class ContentRequest(BaseModel):
         default_factory=lambda: ["title", "excerpt", "body", "meta"],
         description="Sections to generate"
     )
+    existing: Optional[ExistingContent] = Field(
+        None, description="Current article; sections not requested are kept from it"
+    )
+    no_cache: bool = Field(default=False, description="Skip cached responses and generate anew")
 
 
 class ContentData(BaseModel):
@@ -63,10 +87,19 @@ class ContentData(BaseModel):
     schema_ld_json: Optional[str] = Field(None, description="Schema.org JSON-LD")
 
 
+class ContentSectionsData(ContentData):
+    """Content of a section regeneration without meta (neither requested nor in existing)."""
+    meta: Optional[MetaData] = Field(  # type: ignore[assignment]
+        None, description="SEO metadata (null: not generated or given)"
+    )
+
+
 class ContentResponse(BaseModel):
     """Content generation response."""
     success: bool = Field(..., description="Whether request was successful")
-    data: Optional[ContentData] = Field(None, description="Generated content")
+    data: Optional[Union[ContentData, ContentSectionsData]] = Field(
+        None, description="Generated content"
+    )
     error: Optional[Dict[str, Any]] = Field(None, description="Error details")
     metadata: Optional[ResponseMetadata] = Field(None, description="Response metadata")
 
@@ -85,6 +118,7 @@ class ProductRequest(BaseModel):
     tone: str = Field(default="professional", description="Content tone")
     language: str = Field(default="en", description="Target language")
     brand_profile: Optional[Dict[str, Any]] = Field(None, description="Brand voice profile")
+    no_cache: bool = Field(default=False, description="Skip cached responses and generate anew")
 
 
 class CrossSellSuggestion(BaseModel):
@@ -113,6 +147,26 @@ class ProductResponse(BaseModel):
     metadata: Optional[ResponseMetadata] = Field(None, description="Response metadata")
 
 
+class ProductBatchRequest(BaseModel):
+    """Bulk product content generation request."""
+    items: List[ProductRequest] = Field(
+        ..., min_length=1, max_length=500, description="Products to generate"
+    )
+    concurrency: Optional[int] = Field(
+        None, ge=1, description="Maximum products generated in parallel"
+    )
+
+
+class ProductBatchItemResult(BaseModel):
+    """Result for one product of a bulk generation request."""
+    index: int = Field(..., description="Position of the product in the request items")
+    product_id: Optional[int] = Field(None, description="Product ID from the request")
+    success: bool = Field(..., description="Whether this product was generated")
+    data: Optional[ProductData] = Field(None, description="Generated product content")
+    error: Optional[Dict[str, Any]] = Field(None, description="Error details")
+    metadata: Optional[ResponseMetadata] = Field(None, description="Response metadata")
+
+
 # Image Analysis
 class ImageRequest(BaseModel):
     """Image analysis request."""
@@ -120,6 +174,7 @@ class ImageRequest(BaseModel):
     attachment_id: Optional[int] = Field(None, description="WordPress attachment ID")
     language: str = Field(default="en", description="Target language")
     context: str = Field(default="product", description="Image context (product/blog/etc)")
+    no_cache: bool = Field(default=False, description="Skip cached responses and generate anew")
 
 
 class ImageData(BaseModel):
@@ -141,6 +196,35 @@ class ImageResponse(BaseModel):
     metadata: Optional[ResponseMetadata] = Field(None, description="Response metadata")
 
 
+class ImageBatchItem(BaseModel):
+    """One media-library image of a bulk analysis request."""
+    attachment_id: int = Field(..., description="WordPress attachment ID")
+    image_url: str = Field(..., description="Image URL")
+
+
+class ImageBatchRequest(BaseModel):
+    """Bulk image analysis request (e.g. alt-text backfill)."""
+    items: List[ImageBatchItem] = Field(
+        ..., min_length=1, max_length=1000, description="Images to analyze"
+    )
+    language: str = Field(default="en", description="Target language")
+    context: str = Field(default="product", description="Image context (product/blog/etc)")
+    no_cache: bool = Field(default=False, description="Skip cached responses and generate anew")
+
+
+class ImageBatchItemResult(BaseModel):
+    """Result for one image of a bulk analysis request."""
+    index: int = Field(..., description="Position of the image in the request items")
+    attachment_id: int = Field(..., description="Attachment ID from the request")
+    success: bool = Field(..., description="Whether this image was analyzed")
+    data: Optional[ImageData] = Field(None, description="Image analysis data")
+    error: Optional[Dict[str, Any]] = Field(None, description="Error details")
+    duplicate_of: Optional[int] = Field(
+        None, description="Attachment whose identical image was analyzed instead"
+    )
+    metadata: Optional[ResponseMetadata] = Field(None, description="Response metadata")
+
+
 # SEO Optimization
 class SEORequest(BaseModel):
     """SEO optimization request."""
@@ -149,6 +233,7 @@ class SEORequest(BaseModel):
     keywords: List[str] = Field(default_factory=list, description="Target keywords")
     language: str = Field(default="en", description="Content language")
     post_type: str = Field(default="post", description="Post type (post/product)")
+    no_cache: bool = Field(default=False, description="Skip cached responses and generate anew")
 
 
 class SEOHeading(BaseModel):
@@ -158,6 +243,12 @@ class SEOHeading(BaseModel):
     rationale: str = Field(..., description="Why this heading")
 
 
+class DocumentHeading(BaseModel):
+    """Heading found in the analyzed content."""
+    level: str = Field(..., description="Heading level (h1-h6)")
+    text: str = Field(..., description="Heading text")
+
+
 class SEOData(BaseModel):
     """SEO optimization data."""
     seo_title: str = Field(..., max_length=60, description="Optimized SEO title")
@@ -167,7 +258,15 @@ class SEOData(BaseModel):
     internal_links: List[InternalLink] = Field(default_factory=list, description="Internal link suggestions")
     schema_ld_json: Optional[Dict[str, Any]] = Field(None, description="Schema.org JSON-LD")
     readability_score: Optional[int] = Field(None, description="Readability score (0-100)")
+    readability_formula: Optional[str] = Field(
+        None, description="Reading ease formula used for the content language"
+    )
     keyword_density: Optional[Dict[str, float]] = Field(None, description="Keyword density percentages")
+    word_count: Optional[int] = Field(None, description="Words in the content")
+    sentence_count: Optional[int] = Field(None, description="Sentences in the content")
+    heading_structure: List[DocumentHeading] = Field(
+        default_factory=list, description="Existing headings in document order"
+    )
     suggestions: List[str] = Field(default_factory=list, description="General SEO suggestions")
 
 
@@ -191,6 +290,7 @@ class BrandTrainRequest(BaseModel):
     """Brand voice training request."""
     samples: List[BrandSample] = Field(..., min_items=10, description="Content samples for training")
     language: str = Field(default="en", description="Content language")
+    no_cache: bool = Field(default=False, description="Skip cached responses and generate anew")
 
 
 class BrandProfile(BaseModel):
@@ -228,6 +328,38 @@ class BrandTrainResponse(BaseModel):
     metadata: Optional[ResponseMetadata] = Field(None, description="Response metadata")
 
 
+# Background Jobs
+class JobRequest(BaseModel):
+    """Background job submission."""
+    type: str = Field(..., description="Job type (content/product/seo/image/brand)")
+    payload: Dict[str, Any] = Field(..., description="Request body for the matching endpoint")
+    webhook_url: Optional[str] = Field(
+        None, description="URL notified with the job when it finishes"
+    )
+
+
+class JobData(BaseModel):
+    """Background job state."""
+    job_id: str = Field(..., description="Job ID")
+    type: str = Field(..., description="Job type")
+    status: str = Field(
+        default="queued", description="Job status (queued/running/succeeded/failed)"
+    )
+    created_at: float = Field(..., description="Submission time (unix timestamp)")
+    started_at: Optional[float] = Field(None, description="Start time (unix timestamp)")
+    finished_at: Optional[float] = Field(None, description="Completion time (unix timestamp)")
+    result: Optional[Dict[str, Any]] = Field(None, description="Result data once succeeded")
+    error: Optional[Dict[str, Any]] = Field(None, description="Error details once failed")
+    metadata: Optional[ResponseMetadata] = Field(None, description="Generation metadata")
+
+
+class JobResponse(BaseModel):
+    """Background job response."""
+    success: bool = Field(..., description="Whether request was successful")
+    data: Optional[JobData] = Field(None, description="Job state")
+    error: Optional[Dict[str, Any]] = Field(None, description="Error details")
+
+
 # Error Response
 class ErrorResponse(BaseModel):
     """Standard error response."""
@@ -4,8 +4,10 @@ Brand voice training router.
 
 from fastapi import APIRouter, Depends
 from app.models.schemas import BrandTrainRequest, BrandTrainResponse, ResponseMetadata
-from app.deps.auth import verify_token
+from app.deps.auth import rate_limit
+from app.deps.providers import get_provider_registry
 from app.services.brand_service import BrandService
+from app.services.provider_registry import ProviderRegistry
 import logging
 import time
 
@@ -17,7 +19,8 @@ router = APIRouter()
 @router.post("/brand/train", response_model=BrandTrainResponse)
 async def train_brand(
     request: BrandTrainRequest,
-    token: str = Depends(verify_token)
+    token: str = Depends(rate_limit),
+    registry: ProviderRegistry = Depends(get_provider_registry)
 ) -> BrandTrainResponse:
     """
     Train brand voice from content samples.
@@ -25,6 +28,7 @@ async def train_brand(
     Args:
         request: Brand training parameters with content samples
         token: Verified authentication token
+        registry: Shared LLM provider registry
         
     Returns:
         Brand profile and prompt template
@@ -34,15 +38,19 @@ async def train_brand(
     logger.info(f"Brand training request: {len(request.samples)} samples, language='{request.language}'")
     
     try:
-        service = BrandService()
+        service = BrandService(registry.get())
         brand_data = await service.train(request)
         
         latency_ms = int((time.time() - start_time) * 1000)
         metadata = ResponseMetadata(
-            tokens_used=service.last_tokens_used,
+            tokens_used=service.usage.tokens_used,
+            prompt_tokens=service.usage.prompt_tokens,
+            completion_tokens=service.usage.completion_tokens,
+            cached_input_tokens=service.usage.cached_input_tokens,
             latency_ms=latency_ms,
-            model=service.model_name,
-            cached=False
+            model=service.usage.model or service.model_name,
+            cached=service.usage.cached,
+            attempts=service.usage.attempts
         )
         
         logger.info(f"Brand training complete: {latency_ms}ms")
@@ -3,9 +3,14 @@ Content generation router.
 """
 
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from app.models.schemas import ContentRequest, ContentResponse, ResponseMetadata
-from app.deps.auth import verify_token
+from app.deps.auth import UsageCharge, get_usage_charge, rate_limit
+from app.deps.providers import get_provider_registry
 from app.services.content_service import ContentService
+from app.services.provider_registry import ProviderRegistry
+from typing import Any, AsyncIterator
+import json
 import logging
 import time
 
@@ -17,7 +22,8 @@ router = APIRouter()
 @router.post("/content/generate", response_model=ContentResponse)
 async def generate_content(
     request: ContentRequest,
-    token: str = Depends(verify_token)
+    token: str = Depends(rate_limit),
+    registry: ProviderRegistry = Depends(get_provider_registry)
 ) -> ContentResponse:
     """
     Generate SEO-optimized content for posts/pages.
@@ -25,6 +31,7 @@ async def generate_content(
     Args:
         request: Content generation parameters
         token: Verified authentication token
+        registry: Shared LLM provider registry
         
     Returns:
         Generated content data
@@ -35,7 +42,7 @@ async def generate_content(
     
     try:
         # Initialize service
-        service = ContentService()
+        service = ContentService(registry.get())
         
         # Generate content
         content_data = await service.generate(request)
@@ -43,10 +50,14 @@ async def generate_content(
         # Calculate metadata
         latency_ms = int((time.time() - start_time) * 1000)
         metadata = ResponseMetadata(
-            tokens_used=service.last_tokens_used,
+            tokens_used=service.usage.tokens_used,
+            prompt_tokens=service.usage.prompt_tokens,
+            completion_tokens=service.usage.completion_tokens,
+            cached_input_tokens=service.usage.cached_input_tokens,
             latency_ms=latency_ms,
-            model=service.model_name,
-            cached=False
+            model=service.usage.model or service.model_name,
+            cached=service.usage.cached,
+            attempts=service.usage.attempts
         )
         
         logger.info(f"Content generated successfully: {metadata.tokens_used} tokens, {latency_ms}ms")
@@ -79,3 +90,99 @@ async def generate_content(
         )
 
 
+def _sse(event: str, data: Any) -> str:
+    """Format a server-sent event."""
+    return f"event: {event}\ndata: {data}\n\n"
+
+
+@router.post("/content/generate/stream")
+async def generate_content_stream(
+    request: ContentRequest,
+    token: str = Depends(rate_limit),
+    charge: UsageCharge = Depends(get_usage_charge),
+    registry: ProviderRegistry = Depends(get_provider_registry)
+) -> StreamingResponse:
+    """
+    Generate content as a server-sent event stream.
+    
+    Emits a "field" event for each top-level field (title, excerpt,
+    outline, body_html, meta, ...) as soon as the model finishes it, then
+    a final "result" event carrying the same ContentResponse envelope as
+    /content/generate.
+    
+    Args:
+        request: Content generation parameters
+        token: Verified authentication token
+        charge: Charges the streamed body's tokens to the token's budget
+        registry: Shared LLM provider registry
+        
+    Returns:
+        text/event-stream response
+    """
+    logger.info(f"Content stream request: topic='{request.topic}', language='{request.language}'")
+    
+    async def events() -> AsyncIterator[str]:
+        start_time = time.time()
+        
+        try:
+            service = ContentService(registry.get())
+            
+            async for event in service.generate_stream(request):
+                if event["event"] == "field":
+                    payload = {"field": event["field"], "value": event["value"]}
+                    yield _sse("field", json.dumps(payload))
+                    continue
+                
+                latency_ms = int((time.time() - start_time) * 1000)
+                metadata = ResponseMetadata(
+                    tokens_used=service.usage.tokens_used,
+                    prompt_tokens=service.usage.prompt_tokens,
+                    completion_tokens=service.usage.completion_tokens,
+                    cached_input_tokens=service.usage.cached_input_tokens,
+                    latency_ms=latency_ms,
+                    model=service.usage.model or service.model_name,
+                    cached=service.usage.cached,
+                    attempts=service.usage.attempts
+                )
+                
+                logger.info(
+                    f"Content streamed successfully: {metadata.tokens_used} tokens, {latency_ms}ms"
+                )
+                
+                response = ContentResponse(
+                    success=True,
+                    data=event["data"],
+                    error=None,
+                    metadata=metadata
+                )
+                yield _sse("result", response.model_dump_json())
+                
+        except Exception as e:
+            logger.error(f"Content streaming failed: {str(e)}", exc_info=True)
+            
+            latency_ms = int((time.time() - start_time) * 1000)
+            
+            response = ContentResponse(
+                success=False,
+                data=None,
+                error={
+                    "code": "GENERATION_FAILED",
+                    "message": str(e)
+                },
+                metadata=ResponseMetadata(
+                    tokens_used=0,
+                    latency_ms=latency_ms,
+                    model="",
+                    cached=False
+                )
+            )
+            yield _sse("result", response.model_dump_json())
+    
+    return StreamingResponse(
+        charge.stream(events()),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+        },
+    )
@@ -3,9 +3,13 @@ Image analysis router.
 """
 
 from fastapi import APIRouter, Depends
-from app.models.schemas import ImageRequest, ImageResponse, ResponseMetadata
-from app.deps.auth import verify_token
+from fastapi.responses import StreamingResponse
+from app.models.schemas import ImageRequest, ImageResponse, ImageBatchRequest, ResponseMetadata
+from app.deps.auth import UsageCharge, get_usage_charge, rate_limit
+from app.deps.providers import get_provider_registry
 from app.services.image_service import ImageService
+from app.services.provider_registry import ProviderRegistry
+from typing import AsyncIterator
 import logging
 import time
 
@@ -17,7 +21,8 @@ router = APIRouter()
 @router.post("/image/analyze", response_model=ImageResponse)
 async def analyze_image(
     request: ImageRequest,
-    token: str = Depends(verify_token)
+    token: str = Depends(rate_limit),
+    registry: ProviderRegistry = Depends(get_provider_registry)
 ) -> ImageResponse:
     """
     Analyze image and generate descriptions/alt-text.
@@ -25,6 +30,7 @@ async def analyze_image(
     Args:
         request: Image analysis parameters
         token: Verified authentication token
+        registry: Shared LLM provider registry
         
     Returns:
         Image analysis data including alt-text
@@ -34,15 +40,19 @@ async def analyze_image(
     logger.info(f"Image analysis request: context='{request.context}', language='{request.language}'")
     
     try:
-        service = ImageService()
+        service = ImageService(registry.get())
         image_data = await service.analyze(request)
         
         latency_ms = int((time.time() - start_time) * 1000)
         metadata = ResponseMetadata(
-            tokens_used=service.last_tokens_used,
+            tokens_used=service.usage.tokens_used,
+            prompt_tokens=service.usage.prompt_tokens,
+            completion_tokens=service.usage.completion_tokens,
+            cached_input_tokens=service.usage.cached_input_tokens,
             latency_ms=latency_ms,
-            model=service.model_name,
-            cached=False
+            model=service.usage.model or service.model_name,
+            cached=service.usage.cached,
+            attempts=service.usage.attempts
         )
         
         logger.info(f"Image analysis complete: {latency_ms}ms")
@@ -75,3 +85,52 @@ async def analyze_image(
         )
 
 
+@router.post("/image/analyze/batch")
+async def analyze_image_batch(
+    request: ImageBatchRequest,
+    token: str = Depends(rate_limit),
+    charge: UsageCharge = Depends(get_usage_charge),
+    registry: ProviderRegistry = Depends(get_provider_registry)
+) -> StreamingResponse:
+    """
+    Analyze many media-library images, e.g. to backfill alt-text.
+    
+    Results are streamed as newline-delimited JSON, one
+    ImageBatchItemResult per line in completion order, so the plugin can
+    write each attachment's alt-text as soon as it is ready. Identical
+    images are analyzed once (see duplicate_of).
+    
+    Args:
+        request: Images (attachment_id/image_url) with language and context
+        token: Verified authentication token
+        charge: Charges the streamed body's tokens to the token's budget
+        registry: Shared LLM provider registry
+        
+    Returns:
+        application/x-ndjson response
+    """
+    logger.info(f"Image batch request: {len(request.items)} images, context='{request.context}'")
+    
+    service = ImageService(registry.get())
+    
+    async def results() -> AsyncIterator[str]:
+        start_time = time.time()
+        succeeded = 0
+        duplicates = 0
+        
+        async for result in service.analyze_batch(request):
+            succeeded += int(result.success)
+            duplicates += int(result.duplicate_of is not None)
+            yield result.model_dump_json() + "\n"
+        
+        latency_ms = int((time.time() - start_time) * 1000)
+        logger.info(
+            f"Image batch complete: {succeeded}/{len(request.items)} succeeded, "
+            f"{duplicates} duplicates, {service.usage.tokens_used} tokens, {latency_ms}ms"
+        )
+    
+    return StreamingResponse(
+        charge.stream(results()),
+        media_type="application/x-ndjson",
+        headers={"X-Accel-Buffering": "no"},
+    )
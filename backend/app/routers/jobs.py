@@ -0,0 +1,92 @@
+"""
+Background job router.
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
+from app.models.schemas import JobRequest, JobResponse
+from app.deps.auth import limiter_key, rate_limit, verify_token
+from app.deps.jobs import get_job_manager
+from app.services.jobs import JobManager
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+@router.post("/jobs", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def submit_job(
+    request: JobRequest,
+    token: str = Depends(rate_limit),
+    manager: JobManager = Depends(get_job_manager)
+) -> JobResponse:
+    """
+    Queue a generation job and return immediately.
+    
+    The payload is the request body of the matching endpoint
+    (content/product/seo/image/brand). Poll /jobs/{job_id} or pass a
+    webhook_url to be notified when the job finishes. The job's LLM
+    tokens are charged to the token's rate-limit budget when it finishes.
+    
+    Args:
+        request: Job type, payload and optional webhook URL
+        token: Verified authentication token
+        manager: Background job manager
+        
+    Returns:
+        Queued job state
+    """
+    logger.info(f"Job submission: type='{request.type}'")
+    
+    try:
+        job = await manager.submit(
+            request.type,
+            request.payload,
+            request.webhook_url,
+            rate_limit_key=limiter_key(token)
+        )
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={
+                "code": "INVALID_REQUEST",
+                "message": str(e),
+            },
+        )
+    
+    return JobResponse(success=True, data=job.public(), error=None)
+
+
+@router.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job(
+    job_id: str,
+    token: str = Depends(verify_token),
+    manager: JobManager = Depends(get_job_manager)
+) -> JobResponse:
+    """
+    Get job status and, once finished, its result.
+    
+    Args:
+        job_id: Job ID returned on submission
+        token: Verified authentication token
+        manager: Background job manager
+        
+    Returns:
+        Job state
+    """
+    job = await manager.get(job_id)
+    
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={
+                "code": "JOB_NOT_FOUND",
+                "message": f"Job not found: {job_id}",
+            },
+        )
+    
+    return JobResponse(success=True, data=job.public(), error=None)
@@ -3,21 +3,38 @@ Product content generation router.
 """
 
 from fastapi import APIRouter, Depends
-from app.models.schemas import ProductRequest, ProductResponse, ResponseMetadata
-from app.deps.auth import verify_token
+from fastapi.responses import StreamingResponse
+from app.models.schemas import (
+    ProductRequest,
+    ProductResponse,
+    ProductBatchRequest,
+    ProductBatchItemResult,
+    ResponseMetadata,
+)
+from app.deps.auth import UsageCharge, get_usage_charge, rate_limit
+from app.deps.providers import get_provider_registry
 from app.services.product_service import ProductService
+from app.services.provider_registry import ProviderRegistry
+from app.utils.concurrency import map_as_completed
+from typing import AsyncIterator
 import logging
+import os
 import time
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Bulk generation concurrency (default and upper bound per request)
+BATCH_CONCURRENCY = int(os.getenv("PRODUCT_BATCH_CONCURRENCY", "4"))
+BATCH_MAX_CONCURRENCY = int(os.getenv("PRODUCT_BATCH_MAX_CONCURRENCY", "16"))
+
 
 @router.post("/product/generate", response_model=ProductResponse)
 async def generate_product(
     request: ProductRequest,
-    token: str = Depends(verify_token)
+    token: str = Depends(rate_limit),
+    registry: ProviderRegistry = Depends(get_provider_registry)
 ) -> ProductResponse:
     """
     Generate product content (descriptions, features, FAQs).
@@ -25,6 +42,7 @@ async def generate_product(
     Args:
         request: Product generation parameters
         token: Verified authentication token
+        registry: Shared LLM provider registry
         
     Returns:
         Generated product content
@@ -34,15 +52,19 @@ async def generate_product(
     logger.info(f"Product generation request: name='{request.name}', category='{request.category}'")
     
     try:
-        service = ProductService()
+        service = ProductService(registry.get())
         product_data = await service.generate(request)
         
         latency_ms = int((time.time() - start_time) * 1000)
         metadata = ResponseMetadata(
-            tokens_used=service.last_tokens_used,
+            tokens_used=service.usage.tokens_used,
+            prompt_tokens=service.usage.prompt_tokens,
+            completion_tokens=service.usage.completion_tokens,
+            cached_input_tokens=service.usage.cached_input_tokens,
             latency_ms=latency_ms,
-            model=service.model_name,
-            cached=False
+            model=service.usage.model or service.model_name,
+            cached=service.usage.cached,
+            attempts=service.usage.attempts
         )
         
         logger.info(f"Product content generated: {metadata.tokens_used} tokens, {latency_ms}ms")
@@ -75,3 +97,94 @@ async def generate_product(
         )
 
 
+@router.post("/product/generate/batch")
+async def generate_product_batch(
+    request: ProductBatchRequest,
+    token: str = Depends(rate_limit),
+    charge: UsageCharge = Depends(get_usage_charge),
+    registry: ProviderRegistry = Depends(get_provider_registry)
+) -> StreamingResponse:
+    """
+    Generate content for many products with bounded concurrency.
+    
+    Results are streamed as newline-delimited JSON, one
+    ProductBatchItemResult per line in completion order, so fast products
+    are returned without waiting for the slowest one.
+    
+    Args:
+        request: Products to generate and optional concurrency cap
+        token: Verified authentication token
+        charge: Charges the streamed body's tokens to the token's budget
+        registry: Shared LLM provider registry
+        
+    Returns:
+        application/x-ndjson response
+    """
+    concurrency = min(request.concurrency or BATCH_CONCURRENCY, BATCH_MAX_CONCURRENCY)
+    
+    logger.info(f"Product batch request: {len(request.items)} items, concurrency={concurrency}")
+    
+    async def generate_item(item: ProductRequest) -> ProductBatchItemResult:
+        start_time = time.time()
+        
+        try:
+            service = ProductService(registry.get())
+            product_data = await service.generate(item)
+            
+            return ProductBatchItemResult(
+                index=0,
+                product_id=item.product_id,
+                success=True,
+                data=product_data,
+                error=None,
+                metadata=ResponseMetadata(
+                    tokens_used=service.usage.tokens_used,
+                    prompt_tokens=service.usage.prompt_tokens,
+                    completion_tokens=service.usage.completion_tokens,
+                    cached_input_tokens=service.usage.cached_input_tokens,
+                    latency_ms=int((time.time() - start_time) * 1000),
+                    model=service.usage.model or service.model_name,
+                    cached=service.usage.cached,
+                    attempts=service.usage.attempts
+                )
+            )
+            
+        except Exception as e:
+            logger.error(f"Batch item failed: name='{item.name}': {str(e)}")
+            
+            return ProductBatchItemResult(
+                index=0,
+                product_id=item.product_id,
+                success=False,
+                data=None,
+                error={
+                    "code": "GENERATION_FAILED",
+                    "message": str(e)
+                },
+                metadata=ResponseMetadata(
+                    tokens_used=0,
+                    latency_ms=int((time.time() - start_time) * 1000),
+                    model="",
+                    cached=False
+                )
+            )
+    
+    async def results() -> AsyncIterator[str]:
+        start_time = time.time()
+        succeeded = 0
+        
+        async for index, result in map_as_completed(generate_item, request.items, concurrency):
+            result.index = index
+            succeeded += int(result.success)
+            yield result.model_dump_json() + "\n"
+        
+        latency_ms = int((time.time() - start_time) * 1000)
+        logger.info(
+            f"Product batch complete: {succeeded}/{len(request.items)} succeeded, {latency_ms}ms"
+        )
+    
+    return StreamingResponse(
+        charge.stream(results()),
+        media_type="application/x-ndjson",
+        headers={"X-Accel-Buffering": "no"},
+    )
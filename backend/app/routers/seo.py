@@ -4,8 +4,10 @@ SEO optimization router.
 
 from fastapi import APIRouter, Depends
 from app.models.schemas import SEORequest, SEOResponse, ResponseMetadata
-from app.deps.auth import verify_token
+from app.deps.auth import rate_limit
+from app.deps.providers import get_provider_registry
 from app.services.seo_service import SEOService
+from app.services.provider_registry import ProviderRegistry
 import logging
 import time
 
@@ -17,7 +19,8 @@ router = APIRouter()
 @router.post("/seo/optimize", response_model=SEOResponse)
 async def optimize_seo(
     request: SEORequest,
-    token: str = Depends(verify_token)
+    token: str = Depends(rate_limit),
+    registry: ProviderRegistry = Depends(get_provider_registry)
 ) -> SEOResponse:
     """
     Optimize content for SEO.
@@ -25,6 +28,7 @@ async def optimize_seo(
     Args:
         request: SEO optimization parameters
         token: Verified authentication token
+        registry: Shared LLM provider registry
         
     Returns:
         SEO optimization suggestions
@@ -34,15 +38,19 @@ async def optimize_seo(
     logger.info(f"SEO optimization request: post_type='{request.post_type}', language='{request.language}'")
     
     try:
-        service = SEOService()
+        service = SEOService(registry.get())
         seo_data = await service.optimize(request)
         
         latency_ms = int((time.time() - start_time) * 1000)
         metadata = ResponseMetadata(
-            tokens_used=service.last_tokens_used,
+            tokens_used=service.usage.tokens_used,
+            prompt_tokens=service.usage.prompt_tokens,
+            completion_tokens=service.usage.completion_tokens,
+            cached_input_tokens=service.usage.cached_input_tokens,
             latency_ms=latency_ms,
-            model=service.model_name,
-            cached=False
+            model=service.usage.model or service.model_name,
+            cached=service.usage.cached,
+            attempts=service.usage.attempts
         )
         
         logger.info(f"SEO optimization complete: {latency_ms}ms")
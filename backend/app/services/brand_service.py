@@ -2,27 +2,79 @@
 Brand voice training service.
 """
 
-from app.models.schemas import BrandTrainRequest, BrandTrainData, BrandProfile, BrandAnalysis
-from app.services.llm_provider import get_provider
+from app.models.schemas import (
+    BrandTrainRequest,
+    BrandTrainData,
+    BrandProfile,
+    BrandAnalysis,
+    BrandSample,
+)
+from app.services.cache import bypass_cache, cache_bypassed, make_cache_key
+from app.services.llm_provider import LLMProvider, TruncatedResponse, get_provider
+from app.services.output_schema import response_schema
+from app.services.stylometry import analyze_samples
+from app.services.usage import UsageStats, track_usage
 from app.services import prompts
+from app.utils.concurrency import map_bounded
+from app.utils.text import html_to_text
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import hashlib
 import logging
+import os
 
 logger = logging.getLogger(__name__)
 
+# Corpora up to this many tokens are profiled in a single call
+BRAND_SINGLE_PASS_TOKENS = int(os.getenv("BRAND_SINGLE_PASS_TOKENS", "6000"))
+
+# Token budget of one sample group in map-reduce mode
+BRAND_GROUP_TOKENS = int(os.getenv("BRAND_GROUP_TOKENS", "3000"))
+
+# Maximum concurrent partial-profile calls
+BRAND_MAP_CONCURRENCY = int(os.getenv("BRAND_MAP_CONCURRENCY", "4"))
+
+# Seconds partial profiles stay cached (per sample) for incremental retraining
+BRAND_PARTIAL_TTL = int(os.getenv("BRAND_PARTIAL_TTL", "2592000"))
+
 
 class BrandService:
     """Service for brand voice training."""
     
-    def __init__(self):
-        """Initialize brand service."""
-        self.provider = get_provider()
+    # Expected top-level response fields; streamed output is aborted on mismatch
+    RESPONSE_FIELD_TYPES: Dict[str, type] = {
+        "brand_profile": dict,
+        "prompt_template": str,
+    }
+    
+    PARTIAL_FIELD_TYPES: Dict[str, type] = {
+        "brand_profile": dict,
+    }
+    
+    # JSON schemas the provider constrains responses to
+    RESPONSE_SCHEMA = response_schema(BrandTrainData, RESPONSE_FIELD_TYPES, "brand_training")
+    PARTIAL_SCHEMA = response_schema(BrandTrainData, PARTIAL_FIELD_TYPES, "brand_partial")
+    
+    def __init__(self, provider: Optional[LLMProvider] = None):
+        """
+        Initialize brand service.
+        
+        Args:
+            provider: Shared LLM provider (defaults to a new PROVIDER instance)
+        """
+        self.provider = provider or get_provider()
         self.model_name = self.provider.model_name
-        self.last_tokens_used = 0
+        self.usage = UsageStats()
     
     async def train(self, request: BrandTrainRequest) -> BrandTrainData:
         """
         Train brand voice from content samples.
         
+        Stylometric metrics (BrandAnalysis) are computed locally over the
+        full corpus; the LLM only describes the qualitative profile. Corpora
+        over BRAND_SINGLE_PASS_TOKENS are profiled map-reduce style: sample
+        groups are profiled concurrently and the partials merged.
+        
         Args:
             request: Brand training parameters
             
@@ -35,31 +87,25 @@ class BrandService:
         logger.info(f"Training brand voice: {len(request.samples)} samples, language='{request.language}'")
         
         try:
-            # Concatenate samples
-            samples_text = self._concatenate_samples(request.samples)
-            
-            # Build prompt
-            prompt = prompts.build_brand_training_prompt(
-                samples_text=samples_text,
-                language=request.language,
-                num_samples=len(request.samples)
-            )
+            # CPU-bound over the whole corpus; keep it off the event loop
+            analysis = await asyncio.to_thread(analyze_samples, request.samples, request.language)
             
-            system_message = prompts.get_system_message("brand")
+            single_pass_tokens, group_tokens = self._budgets(request.language, analysis)
+            documents = [self._format_sample(sample, group_tokens) for sample in request.samples]
+            total_tokens = sum(self.provider.tokenizer.count(document) for document in documents)
             
-            # Generate with LLM
-            response_json = await self.provider.generate_json(
-                prompt=prompt,
-                system_message=system_message,
-                temperature=0.3,  # Low temperature for consistent analysis
-                max_tokens=2000
-            )
-            
-            # Track tokens
-            self.last_tokens_used = self.provider.last_tokens_used
+            with track_usage() as self.usage, bypass_cache(request.no_cache):
+                if total_tokens <= single_pass_tokens:
+                    response_json = await self._train_single_pass(
+                        documents, request.language, analysis
+                    )
+                else:
+                    response_json = await self._train_map_reduce(
+                        request.samples, documents, group_tokens, request.language, analysis
+                    )
             
             # Parse response
-            brand_data = self._parse_brand_response(response_json)
+            brand_data = self._parse_brand_response(response_json, analysis)
             
             logger.info(f"Brand voice training complete")
             
@@ -69,32 +115,256 @@ class BrandService:
             logger.error(f"Brand training failed: {str(e)}")
             raise Exception(f"Failed to train brand voice: {str(e)}")
     
-    def _concatenate_samples(self, samples: list) -> str:
+    async def _train_single_pass(
+        self,
+        documents: List[str],
+        language: str,
+        analysis: BrandAnalysis
+    ) -> Dict[str, Any]:
+        """
+        Profile the whole corpus in one call.
+        
+        Args:
+            documents: Formatted samples
+            language: Content language
+            analysis: Locally computed corpus metrics
+            
+        Returns:
+            LLM JSON response
+        """
+        prompt = prompts.build_brand_training_prompt(
+            samples_text=self._concatenate_samples(documents),
+            language=language,
+            num_samples=len(documents),
+            analysis=analysis.model_dump()
+        )
+        
+        return await self.provider.generate_json(
+            prompt=prompt,
+            system_message=prompts.get_system_message("brand"),
+            temperature=0.3,  # Low temperature for consistent analysis
+            max_tokens=2000,
+            field_types=self.RESPONSE_FIELD_TYPES,
+            response_schema=self.RESPONSE_SCHEMA
+        )
+    
+    async def _train_map_reduce(
+        self,
+        samples: List[BrandSample],
+        documents: List[str],
+        group_tokens: int,
+        language: str,
+        analysis: BrandAnalysis
+    ) -> Dict[str, Any]:
         """
-        Concatenate content samples for analysis.
+        Profile a large corpus by merging partial profiles of sample groups.
+        
+        A partial profile covers a whole group of samples and is cached
+        under each member's key together with the keys of all members. It
+        is reused only while every member is still in the corpus unchanged,
+        so retraining after adding samples only profiles the new ones, and
+        a deleted or edited sample never leaks into the profile through an
+        old partial; the remaining members of such a group are profiled
+        again.
         
         Args:
-            samples: List of BrandSample objects
+            samples: Brand content samples
+            documents: Formatted samples (same order)
+            group_tokens: Token budget of one sample group
+            language: Content language
+            analysis: Locally computed corpus metrics
+            
+        Returns:
+            LLM JSON response of the merge step
+        """
+        system_message = prompts.get_system_message("brand")
+        keys = [self._partial_cache_key(sample, language) for sample in samples]
+        
+        # Reuse partials of groups whose members are all still present (one entry per group)
+        present = set(keys)
+        partials: Dict[str, Dict[str, Any]] = {}
+        pending: List[int] = []
+        cache = None if cache_bypassed() else self.provider.cache
+        for index, key in enumerate(keys):
+            cached = await cache.get(key) if cache is not None else None
+            if cached and present.issuperset(cached.get("keys", ())):
+                partials.setdefault(cached["id"], cached)
+            else:
+                pending.append(index)
+        
+        groups = self._group_documents(pending, documents, group_tokens)
+        logger.info(
+            f"Brand map-reduce: {len(samples)} samples, {len(samples) - len(pending)} cached, "
+            f"{len(groups)} groups to profile"
+        )
+        
+        async def extract(group: List[int]) -> Dict[str, Any]:
+            """Profile one sample group and cache the partial under each sample."""
+            response = await self.provider.generate_json(
+                prompt=prompts.build_brand_partial_prompt(
+                    samples_text=self._concatenate_samples([documents[i] for i in group]),
+                    language=language,
+                    num_samples=len(group)
+                ),
+                system_message=system_message,
+                temperature=0.3,
+                max_tokens=800,
+                field_types=self.PARTIAL_FIELD_TYPES,
+                response_schema=self.PARTIAL_SCHEMA
+            )
+            
+            members = [keys[i] for i in group]
+            partial = {
+                "id": hashlib.sha256("|".join(members).encode("utf-8")).hexdigest(),
+                "keys": members,
+                "samples": len(group),
+                "profile": response.get("brand_profile", {}),
+            }
+            # Partials recovered from a cut-off response are not kept
+            if self.provider.cache is not None and not isinstance(response, TruncatedResponse):
+                for i in group:
+                    await self.provider.cache.set(keys[i], partial, ttl=BRAND_PARTIAL_TTL)
+            return partial
+        
+        for partial in await map_bounded(extract, groups, BRAND_MAP_CONCURRENCY):
+            partials[partial["id"]] = partial
+        
+        prompt = prompts.build_brand_merge_prompt(
+            # Stable order keeps the merge prompt (and its cache entry) identical across runs
+            partials=sorted(partials.values(), key=lambda partial: partial["id"]),
+            language=language,
+            num_samples=len(samples),
+            analysis=analysis.model_dump()
+        )
+        
+        return await self.provider.generate_json(
+            prompt=prompt,
+            system_message=system_message,
+            temperature=0.3,
+            max_tokens=2000,
+            field_types=self.RESPONSE_FIELD_TYPES,
+            response_schema=self.RESPONSE_SCHEMA
+        )
+    
+    def _budgets(self, language: str, analysis: BrandAnalysis) -> Tuple[int, int]:
+        """
+        Size sample text for the model's context window.
+        
+        Args:
+            language: Content language
+            analysis: Locally computed corpus metrics
+            
+        Returns:
+            (single-pass corpus budget, per-group budget) in tokens
+        """
+        count = self.provider.tokenizer.count
+        system_tokens = count(prompts.get_system_message("brand"))
+        
+        single_pass_prompt = prompts.build_brand_training_prompt(
+            "", language, 0, analysis.model_dump()
+        )
+        partial_prompt = prompts.build_brand_partial_prompt("", language, 0)
+        
+        single_pass_tokens = min(
+            BRAND_SINGLE_PASS_TOKENS,
+            self.provider.prompt_budget(2000, system_tokens + count(single_pass_prompt))
+        )
+        group_tokens = min(
+            BRAND_GROUP_TOKENS,
+            self.provider.prompt_budget(800, system_tokens + count(partial_prompt))
+        )
+        
+        return single_pass_tokens, group_tokens
+    
+    def _format_sample(self, sample: BrandSample, max_tokens: int) -> str:
+        """
+        Format one sample for a prompt, capped at a token budget.
+        
+        Args:
+            sample: Brand content sample
+            max_tokens: Token budget of the sample
+            
+        Returns:
+            Sample text with title, excerpt and plain-text body
+        """
+        text = f"TITLE: {sample.title}\n"
+        if sample.excerpt:
+            text += f"EXCERPT: {sample.excerpt}\n"
+        text += f"BODY: {html_to_text(sample.body)}\n"
+        
+        return self.provider.tokenizer.truncate(text, max_tokens)
+    
+    def _concatenate_samples(self, documents: List[str]) -> str:
+        """
+        Concatenate formatted samples for analysis.
+        
+        Args:
+            documents: Formatted samples
             
         Returns:
             Concatenated text
         """
-        texts = []
-        for sample in samples:
-            text = f"TITLE: {sample.title}\n"
-            if sample.excerpt:
-                text += f"EXCERPT: {sample.excerpt}\n"
-            text += f"BODY: {sample.body[:500]}...\n\n"
-            texts.append(text)
+        return "\n---\n".join(documents)
+    
+    def _group_documents(
+        self,
+        indexes: List[int],
+        documents: List[str],
+        max_tokens: int
+    ) -> List[List[int]]:
+        """
+        Pack samples greedily into groups within a token budget.
+        
+        Args:
+            indexes: Sample indexes to group
+            documents: Formatted samples
+            max_tokens: Token budget of one group
+            
+        Returns:
+            Groups of sample indexes
+        """
+        groups: List[List[int]] = []
+        budget = 0
         
-        return "\n---\n".join(texts)
+        for index in indexes:
+            tokens = self.provider.tokenizer.count(documents[index])
+            if not groups or budget + tokens > max_tokens:
+                groups.append([])
+                budget = 0
+            groups[-1].append(index)
+            budget += tokens
+        
+        return groups
     
-    def _parse_brand_response(self, response: dict) -> BrandTrainData:
+    def _partial_cache_key(self, sample: BrandSample, language: str) -> str:
+        """
+        Build cache key of a sample's partial profile.
+        
+        Args:
+            sample: Brand content sample
+            language: Content language
+            
+        Returns:
+            Cache key
+        """
+        return make_cache_key(
+            provider=self.provider.name,
+            model=self.model_name,
+            system_message=None,
+            prompt="\n".join([sample.title, sample.excerpt or "", sample.body]),
+            temperature=0.3,
+            max_tokens=800,
+            kind="brand_partial",
+            language=language,
+        )
+    
+    def _parse_brand_response(self, response: dict, analysis: BrandAnalysis) -> BrandTrainData:
         """
         Parse LLM response into BrandTrainData.
         
         Args:
             response: LLM JSON response
+            analysis: Locally computed corpus metrics
             
         Returns:
             Parsed BrandTrainData
@@ -113,17 +383,6 @@ class BrandService:
                 content_structure=profile_dict.get("content_structure")
             )
             
-            # Extract analysis (optional)
-            analysis = None
-            if "analysis" in response:
-                analysis_dict = response["analysis"]
-                analysis = BrandAnalysis(
-                    avg_sentence_length=analysis_dict.get("avg_sentence_length", 0.0),
-                    avg_paragraph_length=analysis_dict.get("avg_paragraph_length", 0.0),
-                    flesch_reading_ease=analysis_dict.get("flesch_reading_ease"),
-                    common_words=analysis_dict.get("common_words", [])
-                )
-            
             # Create BrandTrainData
             brand_data = BrandTrainData(
                 brand_profile=brand_profile,
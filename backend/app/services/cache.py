@@ -0,0 +1,261 @@
+"""
+Response cache for LLM JSON generations.
+
+Identical requests (same provider, model, system message, prompt and
+sampling parameters) are served from cache instead of paying a full LLM
+round trip. Supports an in-process LRU cache and Redis.
+"""
+
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional, Dict, Any, Tuple
+import copy
+import hashlib
+import json
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+_bypass: ContextVar[bool] = ContextVar("cache_bypass", default=False)
+
+
+class ResponseCache(ABC):
+    """Abstract base class for response caches."""
+
+    def __init__(self, ttl: int = 600):
+        """
+        Initialize cache.
+
+        Args:
+            ttl: Default time-to-live in seconds
+        """
+        self.ttl = ttl
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Get cached value.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Cached value or None on miss
+        """
+        pass
+
+    @abstractmethod
+    async def set(self, key: str, value: Dict[str, Any], ttl: Optional[int] = None) -> None:
+        """
+        Store value.
+
+        Args:
+            key: Cache key
+            value: JSON-serializable value
+            ttl: Time-to-live in seconds (defaults to cache TTL)
+        """
+        pass
+
+    async def aclose(self) -> None:
+        """Release resources held by the cache."""
+        pass
+
+
+class MemoryCache(ResponseCache):
+    """In-process LRU cache with TTL and size-bounded eviction."""
+
+    def __init__(self, ttl: int = 600, max_entries: int = 1000):
+        """
+        Initialize memory cache.
+
+        Args:
+            ttl: Default time-to-live in seconds
+            max_entries: Maximum number of entries before LRU eviction
+        """
+        super().__init__(ttl)
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Get cached value, dropping it if expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return copy.deepcopy(value)
+
+    async def set(self, key: str, value: Dict[str, Any], ttl: Optional[int] = None) -> None:
+        """Store value, evicting least recently used entries when full."""
+        expires_at = time.monotonic() + (ttl if ttl is not None else self.ttl)
+        self._entries[key] = (expires_at, copy.deepcopy(value))
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        """Number of stored entries (including not yet purged expired ones)."""
+        return len(self._entries)
+
+
+class RedisCache(ResponseCache):
+    """Redis-backed cache shared between worker processes."""
+
+    def __init__(self, url: str, ttl: int = 600, prefix: str = "contentcraft:llm:"):
+        """
+        Initialize Redis cache.
+
+        Args:
+            url: Redis connection URL
+            ttl: Default time-to-live in seconds
+            prefix: Key prefix
+
+        Raises:
+            ImportError: If redis package is not installed
+        """
+        super().__init__(ttl)
+        self.prefix = prefix
+
+        try:
+            from redis import asyncio as aioredis
+        except ImportError:
+            raise ImportError("redis package not installed. Run: pip install redis")
+
+        self.client = aioredis.from_url(url)
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Get cached value (cache errors are treated as misses)."""
+        try:
+            raw = await self.client.get(self.prefix + key)
+        except Exception as e:
+            logger.warning(f"Redis cache get failed: {str(e)}")
+            return None
+
+        if raw is None:
+            return None
+
+        value: Dict[str, Any] = json.loads(raw)
+        return value
+
+    async def set(self, key: str, value: Dict[str, Any], ttl: Optional[int] = None) -> None:
+        """Store value (cache errors are logged and ignored)."""
+        try:
+            await self.client.set(
+                self.prefix + key,
+                json.dumps(value),
+                ex=ttl if ttl is not None else self.ttl
+            )
+        except Exception as e:
+            logger.warning(f"Redis cache set failed: {str(e)}")
+
+    async def aclose(self) -> None:
+        """Close Redis connection pool."""
+        await self.client.close()
+
+
+@contextmanager
+def bypass_cache(enabled: bool = True) -> Iterator[None]:
+    """
+    Skip cache reads for LLM calls made by the current task.
+
+    Responses are still written, so the fresh result replaces the cached
+    one for later requests. Tasks spawned inside the block inherit it.
+
+    Args:
+        enabled: Whether to bypass the cache (no-op when False)
+    """
+    token = _bypass.set(enabled or _bypass.get())
+    try:
+        yield
+    finally:
+        _bypass.reset(token)
+
+
+def cache_bypassed() -> bool:
+    """Whether cache reads are bypassed in the current task."""
+    return _bypass.get()
+
+
+def make_cache_key(
+    provider: str,
+    model: str,
+    system_message: Optional[str],
+    prompt: str,
+    temperature: float,
+    max_tokens: int,
+    **params
+) -> str:
+    """
+    Build cache key for a generation request.
+
+    Prompts are whitespace-normalized so formatting-only differences
+    map to the same entry.
+
+    Args:
+        provider: Provider name
+        model: Model name
+        system_message: System message
+        prompt: User prompt
+        temperature: Sampling temperature
+        max_tokens: Maximum tokens to generate
+        **params: Other provider parameters affecting the output
+
+    Returns:
+        Hex digest cache key
+    """
+    payload = {
+        "provider": provider,
+        "model": model,
+        "system": " ".join((system_message or "").split()),
+        "prompt": " ".join(prompt.split()),
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+        "params": params,
+    }
+
+    encoded = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def create_cache() -> Optional[ResponseCache]:
+    """
+    Create response cache from environment.
+
+    CACHE_BACKEND selects memory/redis/none (defaults to redis when
+    REDIS_URL is set, memory otherwise). CACHE_TTL=0 disables caching.
+
+    Returns:
+        Cache instance or None if caching is disabled
+    """
+    ttl = int(os.getenv("CACHE_TTL", "600"))
+    redis_url = os.getenv("REDIS_URL")
+    backend = os.getenv("CACHE_BACKEND", "redis" if redis_url else "memory").lower()
+
+    if ttl <= 0 or backend == "none":
+        logger.info("Response cache disabled")
+        return None
+
+    if backend == "redis":
+        if not redis_url:
+            raise ValueError("REDIS_URL environment variable not set")
+
+        try:
+            cache = RedisCache(redis_url, ttl=ttl)
+            logger.info(f"Response cache: redis (ttl={ttl}s)")
+            return cache
+        except ImportError as e:
+            logger.warning(f"{str(e)}; falling back to in-memory cache")
+
+    max_entries = int(os.getenv("CACHE_MAX_ENTRIES", "1000"))
+    logger.info(f"Response cache: memory (ttl={ttl}s, max_entries={max_entries})")
+    return MemoryCache(ttl=ttl, max_entries=max_entries)
@@ -0,0 +1,168 @@
+"""
+Circuit breaker for upstream LLM providers.
+
+When a provider's recent error rate or latency exceeds its limits the
+circuit opens and calls fail immediately instead of holding a connection
+until the upstream times out. After a cool-down a single probe call is let
+through (half-open); its outcome closes or re-opens the circuit.
+"""
+
+from typing import Any, Dict
+import logging
+import os
+import time
+
+from app.services.provider_health import BackendHealth
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a provider whose circuit is open."""
+    pass
+
+
+class CircuitBreaker:
+    """Closed/open/half-open breaker driven by rolling error rate and latency."""
+
+    def __init__(
+        self,
+        name: str,
+        error_rate: float = 0.5,
+        slow_call: float = 0.0,
+        min_calls: int = 10,
+        window: float = 60.0,
+        open_seconds: float = 30.0
+    ):
+        """
+        Initialize closed breaker.
+
+        Args:
+            name: Provider name used in logs and errors
+            error_rate: Rolling error rate that opens the circuit
+            slow_call: p95 latency in seconds that opens the circuit (0 disables)
+            min_calls: Calls in the window required before the circuit can open
+            window: Seconds of traffic considered
+            open_seconds: Cool-down before a probe call is allowed
+        """
+        self.name = name
+        self.open_seconds = open_seconds
+        self.health = BackendHealth(
+            window=window,
+            min_samples=min_calls,
+            max_error_rate=error_rate,
+            latency_slo=slow_call,
+        )
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self._probing = False
+
+    @classmethod
+    def from_env(cls, name: str) -> "CircuitBreaker":
+        """Create breaker from CIRCUIT_BREAKER_* environment variables."""
+        return cls(
+            name,
+            error_rate=float(os.getenv("CIRCUIT_BREAKER_ERROR_RATE", "0.5")),
+            slow_call=float(os.getenv("CIRCUIT_BREAKER_SLOW_CALL", "0")),
+            min_calls=int(os.getenv("CIRCUIT_BREAKER_MIN_CALLS", "10")),
+            window=float(os.getenv("CIRCUIT_BREAKER_WINDOW", "60")),
+            open_seconds=float(os.getenv("CIRCUIT_BREAKER_OPEN_SECONDS", "30")),
+        )
+
+    @property
+    def available(self) -> bool:
+        """Whether a call would currently be let through."""
+        if self.state == OPEN:
+            return time.monotonic() - self.opened_at >= self.open_seconds
+        if self.state == HALF_OPEN:
+            return not self._probing
+        return True
+
+    def ensure_available(self) -> None:
+        """
+        Fail fast without claiming the probe slot (e.g. before queueing).
+
+        Raises:
+            CircuitOpenError: If a call would currently be rejected
+        """
+        if not self.available:
+            raise CircuitOpenError(f"{self.name} circuit {self.state}; failing fast")
+
+    def check(self) -> None:
+        """
+        Admit a call or fail fast.
+
+        Raises:
+            CircuitOpenError: If the circuit is open or a probe is in flight
+        """
+        if self.state == CLOSED:
+            return
+
+        if self.state == OPEN:
+            remaining = self.open_seconds - (time.monotonic() - self.opened_at)
+            if remaining > 0:
+                raise CircuitOpenError(
+                    f"{self.name} circuit open; retry in {remaining:.0f}s"
+                )
+            self._transition(HALF_OPEN)
+
+        if self._probing:
+            raise CircuitOpenError(f"{self.name} circuit half-open; probe in flight")
+
+        self._probing = True
+
+    def record(self, ok: bool, latency: float) -> None:
+        """
+        Record the outcome of an admitted call.
+
+        Args:
+            ok: Whether the upstream call succeeded
+            latency: Call duration in seconds
+        """
+        if self.state == HALF_OPEN:
+            self._probing = False
+            slow = self.health.latency_slo > 0 and latency > self.health.latency_slo
+            if ok and not slow:
+                self.health = BackendHealth(
+                    window=self.health.window,
+                    min_samples=self.health.min_samples,
+                    max_error_rate=self.health.max_error_rate,
+                    latency_slo=self.health.latency_slo,
+                )
+                self._transition(CLOSED)
+            else:
+                self._open()
+            return
+
+        self.health.record(ok, latency)
+
+        if self.state == CLOSED and not self.health.healthy:
+            self._open()
+
+    def release(self) -> None:
+        """Forget an admitted call that was cancelled before it finished."""
+        if self.state == HALF_OPEN:
+            self._probing = False
+
+    def _open(self) -> None:
+        """Open the circuit and start the cool-down."""
+        self.opened_at = time.monotonic()
+        self._transition(OPEN)
+
+    def _transition(self, state: str) -> None:
+        """Change state and log it."""
+        if state != self.state:
+            log = logger.warning if state == OPEN else logger.info
+            log(f"Circuit {self.name}: {self.state} -> {state}")
+            self.state = state
+
+    def stats(self) -> Dict[str, Any]:
+        """Get breaker state and rolling metrics."""
+        return {
+            "state": self.state,
+            **{key: value for key, value in self.health.stats().items() if key != "healthy"},
+        }
@@ -2,28 +2,144 @@
 Content generation service.
 """
 
-from app.models.schemas import ContentRequest, ContentData, MetaData, InternalLink
-from app.services.llm_provider import get_provider
+from app.models.schemas import (
+    ContentRequest,
+    ContentData,
+    ContentSectionsData,
+    MetaData,
+    InternalLink,
+)
+from app.services.cache import bypass_cache
+from app.services.field_repair import field_limits, fit_fields, repair_fields
+from app.services.llm_provider import LLMProvider, get_provider
+from app.services.output_schema import response_schema
+from app.services.usage import UsageStats, track_usage
 from app.services import prompts
+from app.utils.concurrency import map_as_completed, map_bounded
+from app.utils.text import html_to_text, parse_html
+from typing import Optional, Dict, Any, AsyncIterator, List, Tuple
+import html
 import logging
 import json
+import os
 
 logger = logging.getLogger(__name__)
 
+# Article text (tokens) given to the title/excerpt/meta prompts in section mode
+CONTENT_CONTEXT_TOKENS = int(os.getenv("CONTENT_CONTEXT_TOKENS", "1500"))
+
+# Lengths whose body is outlined first and written section by section
+# (comma-separated; empty writes every body in one call)
+CONTENT_OUTLINE_FIRST_LENGTHS = {
+    length.strip()
+    for length in os.getenv("CONTENT_OUTLINE_FIRST_LENGTHS", "long").split(",")
+    if length.strip()
+}
+
+# Max concurrent H2 section calls of an outlined article
+CONTENT_SECTION_CONCURRENCY = int(os.getenv("CONTENT_SECTION_CONCURRENCY", "8"))
+
 
 class ContentService:
     """Service for generating blog post/page content."""
     
-    def __init__(self):
-        """Initialize content service."""
-        self.provider = get_provider()
+    # Expected top-level response fields; streamed output is aborted on mismatch
+    RESPONSE_FIELD_TYPES: Dict[str, type] = {
+        "title": str,
+        "excerpt": str,
+        "outline": list,
+        "body_html": str,
+        "meta": dict,
+        "headings": list,
+        "internal_links": list,
+    }
+    
+    # JSON schema the provider constrains the response to
+    RESPONSE_SCHEMA = response_schema(
+        ContentData, [*RESPONSE_FIELD_TYPES, "schema_ld_json"], "content"
+    )
+    
+    # Length limits fixed after generation (meta title/description)
+    FIELD_LIMITS = field_limits(ContentData)
+    
+    # Response fields produced by each ContentRequest section (body first:
+    # the other sections are written from the article)
+    SECTION_FIELDS = {
+        "body": ("outline", "body_html", "headings", "internal_links"),
+        "title": ("title",),
+        "excerpt": ("excerpt",),
+        "meta": ("meta", "schema_ld_json"),
+    }
+    
+    # Completion budget per section
+    SECTION_MAX_TOKENS = {"body": 3000, "title": 100, "excerpt": 250, "meta": 400}
+    
+    SECTION_SCHEMAS = {
+        section: response_schema(ContentData, fields, f"content_{section}")
+        for section, fields in SECTION_FIELDS.items()
+    }
+    
+    # Outline-first body: H2 plan with key points, then one call per section
+    OUTLINE_MAX_TOKENS = 1000
+    OUTLINE_SECTION_MAX_TOKENS = 1500
+    
+    OUTLINE_SCHEMA = {
+        "name": "content_outline",
+        "schema": {
+            "type": "object",
+            "properties": {
+                "outline": {
+                    "type": "array",
+                    # Also cut per length in code: not every backend enforces it
+                    "maxItems": max(high for _, high in prompts.CONTENT_OUTLINE_SECTIONS.values()),
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "heading": {"type": "string"},
+                            "points": {"type": "array", "items": {"type": "string"}},
+                        },
+                        "required": ["heading", "points"],
+                        "additionalProperties": False,
+                    },
+                },
+                "internal_links": SECTION_SCHEMAS["body"]["schema"]["properties"]["internal_links"],
+            },
+            "required": ["outline", "internal_links"],
+            "additionalProperties": False,
+        },
+        "strict": True,
+    }
+    
+    OUTLINE_SECTION_SCHEMA = {
+        "name": "content_outline_section",
+        "schema": {
+            "type": "object",
+            "properties": {"html": {"type": "string"}},
+            "required": ["html"],
+            "additionalProperties": False,
+        },
+        "strict": True,
+    }
+    
+    def __init__(self, provider: Optional[LLMProvider] = None):
+        """
+        Initialize content service.
+        
+        Args:
+            provider: Shared LLM provider (defaults to a new PROVIDER instance)
+        """
+        self.provider = provider or get_provider()
         self.model_name = self.provider.model_name
-        self.last_tokens_used = 0
+        self.usage = UsageStats()
     
     async def generate(self, request: ContentRequest) -> ContentData:
         """
         Generate blog post/page content.
         
+        A new article with all sections is written in one call. Otherwise
+        only the requested sections are generated (see _generate_sections)
+        and the rest is kept from request.existing.
+        
         Args:
             request: Content generation parameters
             
@@ -36,32 +152,32 @@ class ContentService:
         logger.info(f"Generating content: topic='{request.topic}', language='{request.language}'")
         
         try:
-            # Build prompt
-            prompt = prompts.build_content_prompt(
-                topic=request.topic,
-                keywords=request.keywords,
-                tone=request.tone,
-                length=request.length,
-                language=request.language,
-                audience=request.audience,
-                brand_profile=request.brand_profile
-            )
-            
+            sections = self._sections(request)
             system_message = prompts.get_system_message("general")
             
             # Generate with LLM
-            response_json = await self.provider.generate_json(
-                prompt=prompt,
-                system_message=system_message,
-                temperature=0.7,
-                max_tokens=3000
-            )
-            
-            # Track tokens
-            self.last_tokens_used = self.provider.last_tokens_used
+            with track_usage() as self.usage, bypass_cache(request.no_cache):
+                if self._is_full_generation(request, sections):
+                    response_json = await self.provider.generate_json(
+                        prompt=self._build_prompt(request),
+                        system_message=system_message,
+                        temperature=0.7,
+                        max_tokens=3000,
+                        field_types=self.RESPONSE_FIELD_TYPES,
+                        response_schema=self.RESPONSE_SCHEMA
+                    )
+                else:
+                    response_json = self._existing_fields(request, sections)
+                    fields = self._generate_sections(request, sections, system_message)
+                    async for field, value in fields:
+                        response_json[field] = value
+                
+                response_json = await self._repair_response(
+                    response_json, request, sections, system_message
+                )
             
             # Parse and validate response
-            content_data = self._parse_content_response(response_json)
+            content_data = self._parse_content_response(response_json, sections)
             
             logger.info(f"Content generated successfully: {len(content_data.body_html)} chars")
             
@@ -71,24 +187,374 @@ class ContentService:
             logger.error(f"Content generation failed: {str(e)}")
             raise Exception(f"Failed to generate content: {str(e)}")
     
-    def _parse_content_response(self, response: dict) -> ContentData:
+    async def generate_stream(self, request: ContentRequest) -> AsyncIterator[Dict[str, Any]]:
         """
-        Parse LLM response into ContentData.
+        Generate content, yielding each top-level field as it completes.
+        
+        Args:
+            request: Content generation parameters
+            
+        Yields:
+            {"event": "field", "field": name, "value": value} for each
+            completed field, then {"event": "complete", "data": ContentData}
+            
+        Raises:
+            Exception: If generation fails
+        """
+        logger.info(f"Streaming content: topic='{request.topic}', language='{request.language}'")
+        
+        try:
+            sections = self._sections(request)
+            system_message = prompts.get_system_message("general")
+            
+            if self._is_full_generation(request, sections):
+                response_json = {}
+                fields: AsyncIterator[Tuple[str, Any]] = self.provider.stream_json(
+                    prompt=self._build_prompt(request),
+                    system_message=system_message,
+                    temperature=0.7,
+                    max_tokens=3000,
+                    field_types=self.RESPONSE_FIELD_TYPES,
+                    response_schema=self.RESPONSE_SCHEMA
+                )
+            else:
+                response_json = self._existing_fields(request, sections)
+                fields = self._generate_sections(request, sections, system_message)
+            
+            with track_usage() as self.usage, bypass_cache(request.no_cache):
+                async for field, value in fields:
+                    response_json[field] = value
+                    yield {"event": "field", "field": field, "value": value}
+                
+                response_json = await self._repair_response(
+                    response_json, request, sections, system_message
+                )
+            
+            content_data = self._parse_content_response(response_json, sections)
+            
+            logger.info(f"Content streamed successfully: {len(content_data.body_html)} chars")
+            
+            yield {"event": "complete", "data": content_data}
+            
+        except Exception as e:
+            logger.error(f"Content streaming failed: {str(e)}")
+            raise Exception(f"Failed to generate content: {str(e)}")
+    
+    def _build_prompt(self, request: ContentRequest) -> str:
+        """
+        Build content generation prompt.
+        
+        Args:
+            request: Content generation parameters
+            
+        Returns:
+            Formatted prompt
+        """
+        return prompts.build_content_prompt(
+            topic=request.topic,
+            keywords=request.keywords,
+            tone=request.tone,
+            length=request.length,
+            language=request.language,
+            audience=request.audience,
+            brand_profile=request.brand_profile
+        )
+    
+    def _sections(self, request: ContentRequest) -> List[str]:
+        """
+        Validate the requested sections.
+        
+        Returns:
+            Requested sections in generation order (body first)
+            
+        Raises:
+            ValueError: If no or unknown sections are requested
+        """
+        unknown = set(request.sections) - set(self.SECTION_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown content sections: {', '.join(sorted(unknown))}")
+        if not request.sections:
+            raise ValueError("No content sections requested")
+        
+        return [section for section in self.SECTION_FIELDS if section in request.sections]
+    
+    def _is_full_generation(self, request: ContentRequest, sections: List[str]) -> bool:
+        """Whether a whole new article is requested in one combined call."""
+        return (
+            request.existing is None
+            and len(sections) == len(self.SECTION_FIELDS)
+            and request.length not in CONTENT_OUTLINE_FIRST_LENGTHS
+        )
+    
+    def _existing_fields(self, request: ContentRequest, sections: List[str]) -> Dict[str, Any]:
+        """Fields of request.existing kept because their section is not regenerated."""
+        if request.existing is None:
+            return {}
+        
+        existing = request.existing.model_dump()
+        return {
+            field: existing[field]
+            for section, fields in self.SECTION_FIELDS.items() if section not in sections
+            for field in fields if existing[field] is not None
+        }
+    
+    async def _generate_sections(
+        self,
+        request: ContentRequest,
+        sections: List[str],
+        system_message: str
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Generate the requested sections with one compact prompt each.
+        
+        The body is written first (outline-first for lengths in
+        CONTENT_OUTLINE_FIRST_LENGTHS); title, excerpt and meta are then
+        written concurrently from the article text (new or existing), each
+        with its own small token budget.
+        
+        Args:
+            request: Content generation parameters
+            sections: Sections to generate (body first)
+            system_message: System message
+            
+        Yields:
+            (field, value) pairs as each section completes
+        """
+        existing = request.existing
+        body_html = existing.body_html if existing else None
+        
+        if "body" in sections:
+            if request.length in CONTENT_OUTLINE_FIRST_LENGTHS:
+                response = {}
+                async for field, value in self._generate_outlined_body(request, system_message):
+                    response[field] = value
+                    yield field, value
+            else:
+                response = await self._generate_section("body", request, system_message)
+                for field, value in response.items():
+                    yield field, value
+            body_html = response.get("body_html")
+        
+        article = None
+        if body_html:
+            text = html_to_text(body_html)
+            if existing and existing.title and "title" not in sections:
+                text = f"TITLE: {existing.title}\n\n{text}"
+            article = self.provider.tokenizer.truncate(text, CONTENT_CONTEXT_TOKENS)
+        
+        async def generate(section: str) -> Dict[str, Any]:
+            return await self._generate_section(section, request, system_message, article)
+        
+        summaries = [section for section in sections if section != "body"]
+        async for _, response in map_as_completed(generate, summaries, len(summaries)):
+            for field, value in response.items():
+                yield field, value
+    
+    async def _generate_outlined_body(
+        self,
+        request: ContentRequest,
+        system_message: str
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Generate the body from an outline, writing the H2 sections concurrently.
+        
+        One call plans the H2 sections and their key points; each section is
+        then written by its own call with the whole outline as context, and
+        the sections are joined in outline order. Latency is about two
+        section-sized calls instead of one article-sized call.
+        
+        Args:
+            request: Content generation parameters
+            system_message: System message
+            
+        Yields:
+            outline and internal_links once planned, then body_html and headings
+            
+        Raises:
+            ValueError: If the outline has no sections
+        """
+        plan = await self.provider.generate_json(
+            prompt=prompts.build_content_outline_prompt(
+                topic=request.topic,
+                keywords=request.keywords,
+                tone=request.tone,
+                length=request.length,
+                language=request.language,
+                audience=request.audience,
+                brand_profile=request.brand_profile
+            ),
+            system_message=system_message,
+            temperature=0.7,
+            max_tokens=self.OUTLINE_MAX_TOKENS,
+            field_types={"outline": list, "internal_links": list},
+            response_schema=self.OUTLINE_SCHEMA
+        )
+        
+        outline = [
+            item for item in plan.get("outline", [])
+            if isinstance(item, dict)
+            and isinstance(item.get("heading"), str)
+            and item["heading"].strip()
+        ]
+        if not outline:
+            raise ValueError("Outline has no sections")
+        
+        # Every section is a call of its own
+        _, max_sections = prompts.CONTENT_OUTLINE_SECTIONS.get(
+            request.length, prompts.CONTENT_OUTLINE_SECTIONS["medium"]
+        )
+        outline = outline[:max_sections]
+        
+        yield "outline", [item["heading"] for item in outline]
+        yield "internal_links", plan.get("internal_links", [])
+        
+        async def write(index: int) -> str:
+            response = await self.provider.generate_json(
+                prompt=prompts.build_content_outline_section_prompt(
+                    outline=outline,
+                    index=index,
+                    topic=request.topic,
+                    keywords=request.keywords,
+                    tone=request.tone,
+                    length=request.length,
+                    language=request.language,
+                    audience=request.audience,
+                    brand_profile=request.brand_profile
+                ),
+                system_message=system_message,
+                temperature=0.7,
+                max_tokens=self.OUTLINE_SECTION_MAX_TOKENS,
+                field_types={"html": str},
+                response_schema=self.OUTLINE_SECTION_SCHEMA
+            )
+            
+            section_html = str(response.get("html", "")).strip()
+            headings = parse_html(section_html)[1]
+            if not headings or headings[0][0] != "h2":
+                section_html = f"<h2>{html.escape(outline[index]['heading'])}</h2>\n{section_html}"
+            return section_html
+        
+        parts = await map_bounded(write, range(len(outline)), CONTENT_SECTION_CONCURRENCY)
+        body_html = "\n".join(parts)
+        
+        yield "body_html", body_html
+        yield "headings", [text for _, text in parse_html(body_html)[1]]
+    
+    async def _generate_section(
+        self,
+        section: str,
+        request: ContentRequest,
+        system_message: str,
+        article: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Generate one section.
+        
+        Args:
+            section: Section name
+            request: Content generation parameters
+            system_message: System message
+            article: Plain text of the article (title/excerpt/meta)
+            
+        Returns:
+            Section fields of the LLM JSON response
+        """
+        fields = self.SECTION_FIELDS[section]
+        response = await self.provider.generate_json(
+            prompt=prompts.build_content_section_prompt(
+                section=section,
+                topic=request.topic,
+                keywords=request.keywords,
+                tone=request.tone,
+                length=request.length,
+                language=request.language,
+                audience=request.audience,
+                brand_profile=request.brand_profile,
+                article=article
+            ),
+            system_message=system_message,
+            temperature=0.7,
+            max_tokens=self.SECTION_MAX_TOKENS[section],
+            field_types={
+                field: self.RESPONSE_FIELD_TYPES[field]
+                for field in fields if field in self.RESPONSE_FIELD_TYPES
+            },
+            response_schema=self.SECTION_SCHEMAS[section]
+        )
+        
+        return {field: response[field] for field in fields if field in response}
+    
+    async def _repair_response(
+        self,
+        response: Dict[str, Any],
+        request: ContentRequest,
+        sections: List[str],
+        system_message: str
+    ) -> Dict[str, Any]:
+        """
+        Fit meta title/description to their limits.
+        
+        Short descriptions are extended from the excerpt; fields that still
+        fail are re-generated on their own instead of the whole article.
+        Meta kept from an existing article is only fitted locally (extended
+        from the excerpt and body), never re-generated.
         
         Args:
             response: LLM JSON response
+            request: Content generation parameters
+            sections: Generated sections
+            system_message: System message
+            
+        Returns:
+            Repaired response
+        """
+        generated = {field for section in sections for field in self.SECTION_FIELDS[section]}
+        
+        kept = [
+            limit for limit in self.FIELD_LIMITS
+            if limit.path[0] not in generated and response.get(limit.path[0]) is not None
+        ]
+        if kept:
+            article = html_to_text(response.get("body_html") or "")
+            filler = f"{response.get('excerpt') or ''} {article}"
+            fit_fields(response, kept, {"meta.meta_desc": filler})
+        
+        return await repair_fields(
+            self.provider,
+            response,
+            [limit for limit in self.FIELD_LIMITS if limit.path[0] in generated],
+            language=request.language,
+            context=(
+                f"{response.get('title') or request.topic} "
+                f"(keywords: {', '.join(request.keywords)})"
+            ),
+            system_message=system_message,
+            fillers={"meta.meta_desc": response.get("excerpt", "")}
+        )
+    
+    def _parse_content_response(self, response: dict, sections: List[str]) -> ContentData:
+        """
+        Parse LLM response into ContentData.
+        
+        Args:
+            response: LLM JSON response (merged with kept existing fields)
+            sections: Generated sections (meta is required when generated)
             
         Returns:
-            Parsed ContentData
+            Parsed ContentData (ContentSectionsData if meta was neither
+            generated nor kept)
         """
         try:
             # Extract meta
-            meta_dict = response.get("meta", {})
-            meta = MetaData(
-                seo_title=meta_dict.get("seo_title", ""),
-                meta_desc=meta_dict.get("meta_desc", ""),
-                slug=meta_dict.get("slug", "")
-            )
+            meta = None
+            meta_dict = response.get("meta")
+            if meta_dict is not None or "meta" in sections:
+                meta_dict = meta_dict or {}
+                meta = MetaData(
+                    seo_title=meta_dict.get("seo_title", ""),
+                    meta_desc=meta_dict.get("meta_desc", ""),
+                    slug=meta_dict.get("slug", "")
+                )
             
             # Extract internal links
             internal_links = []
@@ -101,19 +567,20 @@ class ContentService:
                     )
                 )
             
-            # Create ContentData
-            content_data = ContentData(
+            fields = dict(
                 title=response.get("title", ""),
                 excerpt=response.get("excerpt", ""),
                 outline=response.get("outline", []),
                 body_html=response.get("body_html", ""),
-                meta=meta,
                 headings=response.get("headings", []),
                 internal_links=internal_links,
                 schema_ld_json=response.get("schema_ld_json")
             )
             
-            return content_data
+            # Create ContentData (meta is only optional for section regenerations)
+            if meta is not None:
+                return ContentData(meta=meta, **fields)
+            return ContentSectionsData(meta=None, **fields)
             
         except Exception as e:
             logger.error(f"Failed to parse content response: {str(e)}")
@@ -0,0 +1,216 @@
+"""
+Post-validation of length-limited response fields.
+
+Fields outside the length limits of their response model are fitted
+locally first (trimmed or extended at word boundaries). Only fields that
+are still invalid, or missing, are re-generated - one small request per
+field instead of regenerating the whole response.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Type, Union, get_args, get_origin
+import asyncio
+import logging
+
+from pydantic import BaseModel
+
+from app.services.llm_provider import LLMProvider
+from app.services import prompts
+from app.utils.text import fit_length
+
+logger = logging.getLogger(__name__)
+
+# Completion budget of a single-field re-ask
+FIELD_REPAIR_MAX_TOKENS = 300
+
+FIELD_REPAIR_SCHEMA = {
+    "name": "field_repair",
+    "schema": {
+        "type": "object",
+        "properties": {"value": {"type": "string"}},
+        "required": ["value"],
+        "additionalProperties": False,
+    },
+    "strict": True,
+}
+
+
+@dataclass
+class FieldLimit:
+    """Length limits of one string field of a response."""
+    path: Tuple[str, ...]
+    min_length: Optional[int] = None
+    max_length: Optional[int] = None
+
+    @property
+    def name(self) -> str:
+        """Dotted field path (e.g. "meta.meta_desc")."""
+        return ".".join(self.path)
+
+    def accepts(self, value: Any) -> bool:
+        """Whether value is a string within the limits."""
+        return (
+            isinstance(value, str)
+            and len(value) >= (self.min_length or 0)
+            and (self.max_length is None or len(value) <= self.max_length)
+        )
+
+
+def field_limits(
+    model: Type[BaseModel],
+    fields: Optional[Iterable[str]] = None
+) -> List[FieldLimit]:
+    """
+    Collect the length limits declared on a response model.
+
+    Nested models (e.g. ContentData.meta), also when optional, are
+    included with dotted paths.
+
+    Args:
+        model: Pydantic response model
+        fields: Top-level fields to include (default: all)
+
+    Returns:
+        Limits of every length-constrained string field
+    """
+    limits = []
+    names = list(fields) if fields is not None else list(model.model_fields)
+
+    for name in names:
+        info = model.model_fields[name]
+        annotation = _unwrap_optional(info.annotation)
+        if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+            for nested in field_limits(annotation):
+                path = (name,) + nested.path
+                limits.append(FieldLimit(path, nested.min_length, nested.max_length))
+            continue
+
+        min_length = next((m.min_length for m in info.metadata if hasattr(m, "min_length")), None)
+        max_length = next((m.max_length for m in info.metadata if hasattr(m, "max_length")), None)
+        if min_length is not None or max_length is not None:
+            limits.append(FieldLimit((name,), min_length, max_length))
+
+    return limits
+
+
+async def repair_fields(
+    provider: LLMProvider,
+    response: Dict[str, Any],
+    limits: List[FieldLimit],
+    language: str,
+    context: str,
+    system_message: Optional[str] = None,
+    fillers: Optional[Dict[str, str]] = None
+) -> Dict[str, Any]:
+    """
+    Bring length-limited fields of an LLM response within their limits.
+
+    Values are trimmed at word boundaries or extended from their filler
+    text; fields that still fail are re-generated concurrently, one small
+    LLM call each. A failed re-ask leaves the value as it is, so the
+    response model reports the problem.
+
+    Args:
+        provider: LLM provider for re-asks
+        response: LLM JSON response (updated in place)
+        limits: Field limits (see field_limits)
+        language: Content language
+        context: Short description of the content for re-ask prompts
+        system_message: System message for re-asks
+        fillers: Text to extend short values from, per dotted field path
+
+    Returns:
+        The repaired response
+    """
+    pending = fit_fields(response, limits, fillers)
+
+    async def reask(limit: FieldLimit, value: str) -> None:
+        """Re-generate one field."""
+        logger.info(f"Re-generating field '{limit.name}' ({len(value)} chars)")
+        try:
+            result = await provider.generate_json(
+                prompt=prompts.build_field_repair_prompt(
+                    field=limit.name,
+                    value=value,
+                    language=language,
+                    context=context,
+                    min_length=limit.min_length,
+                    max_length=limit.max_length
+                ),
+                system_message=system_message,
+                temperature=0.3,
+                max_tokens=FIELD_REPAIR_MAX_TOKENS,
+                field_types={"value": str},
+                response_schema=FIELD_REPAIR_SCHEMA
+            )
+        except Exception as e:
+            logger.warning(f"Re-generating field '{limit.name}' failed: {str(e)}")
+            return
+
+        fixed = fit_length(str(result.get("value", "")), limit.min_length, limit.max_length)
+        if limit.accepts(fixed) or not value:
+            _set(response, limit.path, fixed)
+
+    if pending:
+        await asyncio.gather(*(reask(limit, value) for limit, value in pending))
+
+    return response
+
+
+def fit_fields(
+    response: Dict[str, Any],
+    limits: List[FieldLimit],
+    fillers: Optional[Dict[str, str]] = None
+) -> List[Tuple[FieldLimit, str]]:
+    """
+    Fit length-limited fields locally, without LLM calls.
+
+    Args:
+        response: Response data (updated in place)
+        limits: Field limits (see field_limits)
+        fillers: Text to extend short values from, per dotted field path
+
+    Returns:
+        Fields still outside their limits, with their current value
+    """
+    fillers = fillers or {}
+    pending: List[Tuple[FieldLimit, str]] = []
+
+    for limit in limits:
+        value = _get(response, limit.path)
+        filler = fillers.get(limit.name, "")
+        if isinstance(value, str) or (value is None and filler):
+            value = fit_length(value or "", limit.min_length, limit.max_length, filler)
+            _set(response, limit.path, value)
+        if not limit.accepts(value):
+            pending.append((limit, value if isinstance(value, str) else ""))
+
+    return pending
+
+
+def _unwrap_optional(annotation: Any) -> Any:
+    """Inner type of Optional[X] (other annotations unchanged)."""
+    if get_origin(annotation) is Union:
+        args = [arg for arg in get_args(annotation) if arg is not type(None)]
+        if len(args) == 1:
+            return args[0]
+    return annotation
+
+
+def _get(data: Dict[str, Any], path: Tuple[str, ...]) -> Any:
+    """Value at a field path (None if missing)."""
+    value: Any = data
+    for key in path:
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def _set(data: Dict[str, Any], path: Tuple[str, ...], value: Any) -> None:
+    """Set the value at a field path, creating missing parent objects."""
+    for key in path[:-1]:
+        if not isinstance(data.get(key), dict):
+            data[key] = {}
+        data = data[key]
+    data[path[-1]] = value
@@ -2,27 +2,92 @@
 Image analysis service.
 """
 
-from app.models.schemas import ImageRequest, ImageData
-from app.services.llm_provider import get_provider
+from app.models.schemas import (
+    ImageRequest,
+    ImageData,
+    ImageBatchItem,
+    ImageBatchItemResult,
+    ImageBatchRequest,
+    ResponseMetadata,
+)
+from app.services.cache import bypass_cache
+from app.services.field_repair import field_limits, repair_fields
+from app.services.images import (
+    ImageError,
+    ImageFetcher,
+    ImageInput,
+    content_hash,
+    get_image_fetcher,
+    prepare_image,
+)
+from app.services.llm_provider import LLMProvider, get_provider
+from app.services.output_schema import response_schema
+from app.services.usage import UsageStats, track_usage
 from app.services import prompts
+from app.utils.concurrency import map_as_completed
+from typing import Optional, Dict, Any, AsyncIterator, Awaitable, Callable, Tuple
+import asyncio
 import logging
+import os
+import time
 
 logger = logging.getLogger(__name__)
 
+# Bulk analysis: concurrency per pipeline stage
+IMAGE_BATCH_DOWNLOAD_CONCURRENCY = int(os.getenv("IMAGE_BATCH_DOWNLOAD_CONCURRENCY", "16"))
+IMAGE_BATCH_PREPROCESS_CONCURRENCY = int(os.getenv("IMAGE_BATCH_PREPROCESS_CONCURRENCY", "4"))
+IMAGE_BATCH_ANALYZE_CONCURRENCY = int(os.getenv("IMAGE_BATCH_ANALYZE_CONCURRENCY", "8"))
+
+# Bulk analysis: images in the pipeline at once (bounds memory held by downloads)
+IMAGE_BATCH_WINDOW = int(os.getenv("IMAGE_BATCH_WINDOW", "64"))
+
 
 class ImageService:
     """Service for image analysis and alt-text generation."""
     
-    def __init__(self):
-        """Initialize image service."""
-        self.provider = get_provider()
+    # Expected top-level response fields; streamed output is aborted on mismatch
+    RESPONSE_FIELD_TYPES: Dict[str, type] = {
+        "description": str,
+        "features": list,
+        "audience": str,
+        "selling_points": list,
+        "alt_text": str,
+        "suggested_category": str,
+        "confidence": float,
+    }
+    
+    # JSON schema the provider constrains the response to
+    RESPONSE_SCHEMA = response_schema(ImageData, RESPONSE_FIELD_TYPES, "image_analysis")
+    
+    # Length limits fixed after generation (alt-text)
+    FIELD_LIMITS = field_limits(ImageData)
+    
+    def __init__(
+        self,
+        provider: Optional[LLMProvider] = None,
+        fetcher: Optional[ImageFetcher] = None
+    ):
+        """
+        Initialize image service.
+        
+        Args:
+            provider: Shared LLM provider (defaults to a new PROVIDER instance)
+            fetcher: Image downloader (defaults to the process-wide pool)
+        """
+        self.provider = provider or get_provider()
+        self.fetcher = fetcher or get_image_fetcher()
         self.model_name = self.provider.model_name
-        self.last_tokens_used = 0
+        self.usage = UsageStats()
     
     async def analyze(self, request: ImageRequest) -> ImageData:
         """
         Analyze image and generate descriptions/alt-text.
         
+        The image is downloaded, downscaled for the provider and sent as
+        vision input. Results are cached by the image's key (perceptual
+        hash, aspect ratio and colours), so other sizes of the same picture
+        are served from the cache.
+        
         Args:
             request: Image analysis parameters
             
@@ -35,40 +100,14 @@ class ImageService:
         logger.info(f"Analyzing image: context='{request.context}', language='{request.language}'")
         
         try:
-            # Build prompt
-            prompt = prompts.build_image_analysis_prompt(
-                context=request.context,
-                language=request.language
-            )
-            
-            # Add image URL to prompt
-            prompt_with_image = f"{prompt}\n\nIMAGE URL: {request.image_url}"
-            
-            system_message = prompts.get_system_message("image")
+            image = await self.load_image(request.image_url)
             
-            # For vision models (GPT-4 Vision, Claude with vision)
-            # Note: This requires special handling for image input
-            # For now, we'll use text-based analysis
-            # TODO: Implement actual vision model integration
-            
-            # Generate with LLM
-            response_json = await self.provider.generate_json(
-                prompt=prompt_with_image,
-                system_message=system_message,
-                temperature=0.5,
-                max_tokens=1000
-            )
-            
-            # Track tokens
-            self.last_tokens_used = self.provider.last_tokens_used
+            with track_usage() as self.usage, bypass_cache(request.no_cache):
+                response_json = await self.analyze_image(image, request)
             
             # Parse response
             image_data = self._parse_image_response(response_json)
             
-            # Ensure alt-text is under 125 characters
-            if len(image_data.alt_text) > 125:
-                image_data.alt_text = image_data.alt_text[:122] + "..."
-            
             logger.info(f"Image analysis complete")
             
             return image_data
@@ -77,6 +116,200 @@ class ImageService:
             logger.error(f"Image analysis failed: {str(e)}")
             raise Exception(f"Failed to analyze image: {str(e)}")
     
+    async def load_image(self, url: str) -> ImageInput:
+        """
+        Download an image and prepare it for the provider.
+        
+        Args:
+            url: Image URL
+            
+        Returns:
+            Image downscaled to the provider's vision size
+            
+        Raises:
+            ImageError: If the image cannot be downloaded or decoded
+        """
+        data = await self.fetcher.fetch(url)
+        
+        # Decoding and resizing are CPU-bound
+        return await asyncio.to_thread(prepare_image, data, self.provider.vision_max_side)
+    
+    async def analyze_image(self, image: ImageInput, request: ImageRequest) -> Dict[str, Any]:
+        """
+        Run the vision analysis of a prepared image.
+        
+        Args:
+            image: Prepared image (see load_image)
+            request: Image analysis parameters
+            
+        Returns:
+            LLM JSON response with the alt-text fitted to its limit
+        """
+        system_message = prompts.get_system_message("image")
+        
+        response_json = await self.provider.generate_json(
+            prompt=prompts.build_image_analysis_prompt(
+                context=request.context,
+                language=request.language
+            ),
+            system_message=system_message,
+            temperature=0.5,
+            max_tokens=1000,
+            field_types=self.RESPONSE_FIELD_TYPES,
+            response_schema=self.RESPONSE_SCHEMA,
+            images=[image]
+        )
+        
+        # Trim alt-text at a word boundary (re-generated if missing)
+        return await repair_fields(
+            self.provider,
+            response_json,
+            self.FIELD_LIMITS,
+            language=request.language,
+            context=f"{request.context} image: {response_json.get('description', '')}",
+            system_message=system_message
+        )
+    
+    async def analyze_batch(
+        self,
+        request: ImageBatchRequest
+    ) -> AsyncIterator[ImageBatchItemResult]:
+        """
+        Analyze many images, yielding each result as soon as it is ready.
+        
+        Images flow through download, preprocessing and analysis stages,
+        each with its own concurrency limit, while at most
+        IMAGE_BATCH_WINDOW images are in the pipeline. Identical images are
+        analyzed once: repeated URLs are downloaded once, identical bytes
+        are prepared once and images with the same key (perceptual hash,
+        aspect ratio and colours with Pillow) share one analysis. Failures are reported per image.
+        
+        Args:
+            request: Images to analyze with their language and context
+            
+        Yields:
+            One ImageBatchItemResult per image, in completion order
+        """
+        logger.info(
+            f"Analyzing image batch: {len(request.items)} images, context='{request.context}'"
+        )
+        
+        download_slots = asyncio.Semaphore(IMAGE_BATCH_DOWNLOAD_CONCURRENCY)
+        preprocess_slots = asyncio.Semaphore(IMAGE_BATCH_PREPROCESS_CONCURRENCY)
+        analyze_slots = asyncio.Semaphore(IMAGE_BATCH_ANALYZE_CONCURRENCY)
+        analysis_request = ImageRequest(
+            image_url="",
+            attachment_id=None,
+            language=request.language,
+            context=request.context
+        )
+        
+        # Shared stage results: image key by URL and by content hash,
+        # analysis by image key (with the index of the item that started it)
+        by_url: Dict[str, asyncio.Task] = {}
+        by_content: Dict[str, asyncio.Task] = {}
+        analyses: Dict[str, asyncio.Task] = {}
+        owners: Dict[str, int] = {}
+        
+        def once(
+            tasks: Dict[str, asyncio.Task],
+            key: str,
+            start: Callable[[], Awaitable[Any]]
+        ) -> asyncio.Task:
+            if key not in tasks:
+                tasks[key] = asyncio.ensure_future(start())
+            return tasks[key]
+        
+        async def analyze(image: ImageInput) -> Dict[str, Any]:
+            async with analyze_slots:
+                return await self.analyze_image(image, analysis_request)
+        
+        async def prepare(data: bytes, index: int) -> str:
+            async with preprocess_slots:
+                image = await asyncio.to_thread(prepare_image, data, self.provider.vision_max_side)
+            if image.key not in analyses:
+                owners[image.key] = index
+                analyses[image.key] = asyncio.ensure_future(analyze(image))
+            return image.key
+        
+        async def download(url: str, index: int) -> str:
+            async with download_slots:
+                data = await self.fetcher.fetch(url)
+            key: str = await once(by_content, content_hash(data), lambda: prepare(data, index))
+            return key
+        
+        async def process(entry: Tuple[int, ImageBatchItem]) -> ImageBatchItemResult:
+            index, item = entry
+            start_time = time.time()
+            
+            with track_usage() as usage:
+                try:
+                    key = await once(
+                        by_url, item.image_url, lambda: download(item.image_url, index)
+                    )
+                    response_json = await analyses[key]
+                    
+                    # Shared work runs in the usage scope of the item that started it:
+                    # that item carries the tokens, copies report none and cached=True
+                    owner = owners[key]
+                    duplicate_of = request.items[owner].attachment_id if owner != index else None
+                    
+                    return ImageBatchItemResult(
+                        index=index,
+                        attachment_id=item.attachment_id,
+                        success=True,
+                        data=self._parse_image_response(response_json),
+                        error=None,
+                        duplicate_of=duplicate_of,
+                        metadata=ResponseMetadata(
+                            tokens_used=usage.tokens_used,
+                            prompt_tokens=usage.prompt_tokens,
+                            completion_tokens=usage.completion_tokens,
+                            cached_input_tokens=usage.cached_input_tokens,
+                            latency_ms=int((time.time() - start_time) * 1000),
+                            model=usage.model or self.model_name,
+                            cached=usage.cached or owner != index,
+                            attempts=usage.attempts
+                        )
+                    )
+                    
+                except Exception as e:
+                    logger.error(
+                        f"Batch image failed: attachment_id={item.attachment_id}: {str(e)}"
+                    )
+                    
+                    return ImageBatchItemResult(
+                        index=index,
+                        attachment_id=item.attachment_id,
+                        success=False,
+                        data=None,
+                        error={
+                            "code": (
+                                "IMAGE_UNAVAILABLE" if isinstance(e, ImageError)
+                                else "ANALYSIS_FAILED"
+                            ),
+                            "message": str(e)
+                        },
+                        duplicate_of=None,
+                        metadata=ResponseMetadata(
+                            tokens_used=usage.tokens_used,
+                            latency_ms=int((time.time() - start_time) * 1000),
+                            model="",
+                            cached=False
+                        )
+                    )
+        
+        with track_usage() as self.usage, bypass_cache(request.no_cache):
+            try:
+                results = map_as_completed(process, enumerate(request.items), IMAGE_BATCH_WINDOW)
+                async for _, result in results:
+                    yield result
+            finally:
+                # Stop shared work when the client goes away
+                for tasks in (by_url, by_content, analyses):
+                    for task in tasks.values():
+                        task.cancel()
+    
     def _parse_image_response(self, response: dict) -> ImageData:
         """
         Parse LLM response into ImageData.
@@ -0,0 +1,299 @@
+"""
+Image fetching and preprocessing for vision requests.
+
+Images are downloaded through one pooled HTTP client, downscaled and
+re-encoded to the size the provider bills least for, and identified by a
+perceptual hash (dHash) combined with the aspect ratio and a coarse colour
+signature, so the same picture uploaded at several sizes maps to the same
+cache entries while colour variants of it do not. Resizing and hashing need Pillow
+(pip install pillow); without it images are sent as downloaded and
+identified by their content hash.
+"""
+
+from dataclasses import dataclass
+from io import BytesIO
+from typing import Optional
+import base64
+import hashlib
+import logging
+import os
+
+import httpx
+
+from app.utils.net import PublicTransport, UnsafeURLError, check_url
+
+logger = logging.getLogger(__name__)
+
+# Largest image accepted for download (bytes)
+IMAGE_MAX_BYTES = int(os.getenv("IMAGE_MAX_BYTES", str(20 * 1024 * 1024)))
+
+# Redirects followed per download (each hop is checked like the URL itself)
+IMAGE_MAX_REDIRECTS = int(os.getenv("IMAGE_MAX_REDIRECTS", "3"))
+
+# JPEG quality of re-encoded images
+IMAGE_JPEG_QUALITY = int(os.getenv("IMAGE_JPEG_QUALITY", "85"))
+
+# Media types sent without conversion, by file signature (WebP is checked separately)
+_SIGNATURES = (
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+)
+
+
+class ImageError(ValueError):
+    """Raised when an image cannot be downloaded or decoded."""
+    pass
+
+
+@dataclass(frozen=True)
+class ImageInput:
+    """Image attached to an LLM request."""
+    data: bytes
+    media_type: str
+    # Identity for caching: "img:<dhash>:<aspect>:<colours>" (perceptual) or "sha256:<hex>" (exact)
+    key: str
+    width: Optional[int] = None
+    height: Optional[int] = None
+
+    @property
+    def base64(self) -> str:
+        """Image data, base64-encoded."""
+        return base64.b64encode(self.data).decode("ascii")
+
+    @property
+    def data_url(self) -> str:
+        """Image as a data: URL."""
+        return f"data:{self.media_type};base64,{self.base64}"
+
+
+class ImageFetcher:
+    """
+    Downloads images over a shared keep-alive connection pool.
+
+    Only public addresses are contacted (see app.utils.net), on the first
+    request and on every redirect.
+    """
+
+    def __init__(
+        self,
+        max_connections: Optional[int] = None,
+        timeout: Optional[float] = None,
+        max_bytes: int = IMAGE_MAX_BYTES
+    ):
+        """
+        Initialize fetcher.
+
+        Args:
+            max_connections: Connection pool size (IMAGE_MAX_CONNECTIONS)
+            timeout: Request timeout in seconds (IMAGE_FETCH_TIMEOUT)
+            max_bytes: Largest image accepted
+        """
+        self.max_bytes = max_bytes
+        max_connections = max_connections or int(os.getenv("IMAGE_MAX_CONNECTIONS", "20"))
+        self.client = httpx.AsyncClient(
+            transport=PublicTransport(
+                limits=httpx.Limits(
+                    max_connections=max_connections,
+                    max_keepalive_connections=10,
+                ),
+            ),
+            timeout=timeout or float(os.getenv("IMAGE_FETCH_TIMEOUT", "15")),
+            follow_redirects=True,
+            max_redirects=IMAGE_MAX_REDIRECTS,
+        )
+
+    async def fetch(self, url: str) -> bytes:
+        """
+        Download an image.
+
+        Args:
+            url: Image URL (http/https)
+
+        Returns:
+            Image bytes
+
+        Raises:
+            ImageError: If the URL is not public, the download fails, or the
+                        response is not an image or too large
+        """
+        try:
+            check_url(url)
+        except UnsafeURLError as e:
+            raise ImageError(f"Refusing to download image: {str(e)}")
+
+        try:
+            async with self.client.stream("GET", url) as response:
+                response.raise_for_status()
+
+                content_type = response.headers.get("content-type", "")
+                accepted = ("image/", "application/octet-stream")
+                if content_type and not content_type.startswith(accepted):
+                    raise ImageError(f"Not an image ({content_type}): {url}")
+
+                length = int(response.headers.get("content-length") or 0)
+                if length > self.max_bytes:
+                    raise ImageError(f"Image too large ({length} bytes): {url}")
+
+                chunks = []
+                size = 0
+                async for chunk in response.aiter_bytes():
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        raise ImageError(f"Image too large (over {self.max_bytes} bytes): {url}")
+                    chunks.append(chunk)
+        except httpx.HTTPStatusError as e:
+            raise ImageError(f"Failed to download image {url}: HTTP {e.response.status_code}")
+        except httpx.HTTPError as e:
+            raise ImageError(f"Failed to download image {url}: {str(e)}")
+        except UnsafeURLError as e:
+            raise ImageError(f"Refusing to download image: {str(e)}")
+
+        return b"".join(chunks)
+
+    async def aclose(self) -> None:
+        """Close the connection pool."""
+        await self.client.aclose()
+
+
+_fetcher: Optional[ImageFetcher] = None
+
+
+def get_image_fetcher() -> ImageFetcher:
+    """Get the process-wide image fetcher, creating it on first use."""
+    global _fetcher
+    if _fetcher is None:
+        _fetcher = ImageFetcher()
+    return _fetcher
+
+
+async def close_image_fetcher() -> None:
+    """Close the process-wide image fetcher."""
+    global _fetcher
+    if _fetcher is not None:
+        await _fetcher.aclose()
+        _fetcher = None
+
+
+def content_hash(data: bytes) -> str:
+    """Exact identity of image bytes ("sha256:<hex>")."""
+    return f"sha256:{hashlib.sha256(data).hexdigest()}"
+
+
+def prepare_image(data: bytes, max_side: int) -> ImageInput:
+    """
+    Downscale and re-encode an image for a vision request.
+
+    With Pillow the image is rotated upright (EXIF), flattened onto white,
+    shrunk so its longest side is at most max_side and re-encoded as JPEG;
+    its key (see image_key) is shared by resized copies of the picture.
+    Without Pillow the bytes are sent unchanged (JPEG/PNG/GIF/WebP) and
+    keyed by content hash. CPU-bound: run it in a worker thread.
+
+    Args:
+        data: Downloaded image bytes
+        max_side: Longest side in pixels worth sending to the provider
+
+    Returns:
+        Prepared image
+
+    Raises:
+        ImageError: If the image cannot be decoded or has more pixels than
+                    Pillow's MAX_IMAGE_PIXELS
+    """
+    try:
+        from PIL import Image, ImageOps, UnidentifiedImageError
+    except ImportError:
+        media_type = next(
+            (media for signature, media in _SIGNATURES if data.startswith(signature)), None
+        )
+        if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+            media_type = "image/webp"
+        if media_type is None:
+            raise ImageError("Unsupported image format (install pillow to convert it)")
+        return ImageInput(data, media_type, content_hash(data))
+
+    try:
+        image: Image.Image = Image.open(BytesIO(data))
+        # Pillow only warns between MAX_IMAGE_PIXELS and twice that; a
+        # small download can still decode to gigabytes, so refuse it here
+        limit = Image.MAX_IMAGE_PIXELS
+        if limit and image.width * image.height > limit:
+            raise ImageError(
+                f"Image too large: {image.width}x{image.height} pixels (limit {limit})"
+            )
+
+        # Pixels are decoded from here on
+        image = ImageOps.exif_transpose(image)
+        if image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info):
+            rgba = image.convert("RGBA")
+            image = Image.new("RGB", rgba.size, (255, 255, 255))
+            image.paste(rgba, mask=rgba.getchannel("A"))
+        else:
+            image = image.convert("RGB")
+    except (Image.DecompressionBombError, Image.DecompressionBombWarning) as e:
+        raise ImageError(f"Image too large: {str(e)}")
+    except (UnidentifiedImageError, OSError) as e:
+        raise ImageError(f"Unsupported image format: {str(e)}")
+
+    key = image_key(image)
+
+    if max(image.size) > max_side:
+        image.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+
+    output = BytesIO()
+    image.save(output, format="JPEG", quality=IMAGE_JPEG_QUALITY, optimize=True)
+
+    return ImageInput(output.getvalue(), "image/jpeg", key, image.width, image.height)
+
+
+def image_key(image) -> str:
+    """
+    Cache identity of a Pillow RGB image.
+
+    The dHash only captures brightness structure, so a red and a blue
+    variant of one product shot (or a recoloured logo) share it. The key
+    adds the aspect ratio and the average colour of each image quadrant at
+    3 bits per channel: resized copies still match, colour variants do not.
+
+    Args:
+        image: Pillow image in RGB mode
+
+    Returns:
+        Key "img:<dhash>:<aspect>:<colours>"
+    """
+    from PIL import Image
+
+    aspect = image.width / image.height
+    quadrants = image.resize((2, 2), Image.Resampling.BOX).tobytes()
+    colours = bytes(channel >> 5 for channel in quadrants).hex()
+    return f"img:{dhash(image):016x}:{aspect:.2f}:{colours}"
+
+
+def dhash(image, size: int = 8) -> int:
+    """
+    Difference hash of a Pillow image.
+
+    The image is reduced to (size + 1) x size grayscale pixels and each
+    bit records whether a pixel is brighter than its right neighbour, so
+    scaling and re-encoding leave the hash (almost) unchanged.
+
+    Args:
+        image: Pillow image
+        size: Hash side (size * size bits)
+
+    Returns:
+        Hash as an integer
+    """
+    from PIL import Image
+
+    pixels = list(image.convert("L").resize((size + 1, size), Image.Resampling.LANCZOS).getdata())
+
+    value = 0
+    for row in range(size):
+        for col in range(size):
+            left = pixels[row * (size + 1) + col]
+            right = pixels[row * (size + 1) + col + 1]
+            value = (value << 1) | (left > right)
+    return value
@@ -0,0 +1,561 @@
+"""
+Background job subsystem.
+
+Long generations (long-form content, brand training) can outlive the
+WordPress HTTP timeout. Jobs are submitted and return an ID immediately;
+worker tasks run the regular service methods in the background and
+clients poll the job or receive a webhook when it finishes.
+
+A job stays claimed by the process running it until it finishes; jobs
+interrupted by a shutdown are queued again, and with Redis the jobs of a
+crashed process are recovered by the other processes.
+"""
+
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple, Type
+import asyncio
+import hashlib
+import hmac
+import logging
+import os
+import time
+import uuid
+
+import httpx
+from pydantic import BaseModel, Field
+
+from app.models.schemas import (
+    BrandTrainRequest,
+    ContentRequest,
+    ImageRequest,
+    JobData,
+    ProductRequest,
+    ResponseMetadata,
+    SEORequest,
+)
+from app.services.brand_service import BrandService
+from app.services.content_service import ContentService
+from app.services.image_service import ImageService
+from app.services.product_service import ProductService
+from app.services.provider_registry import ProviderRegistry
+from app.services.rate_limit import RateLimiter
+from app.services.seo_service import SEOService
+from app.services.usage import track_usage
+from app.utils.net import PublicTransport, ensure_public_url
+
+logger = logging.getLogger(__name__)
+
+# Seconds between worker heartbeats (a process silent for 3 intervals is presumed dead)
+JOB_HEARTBEAT_INTERVAL = float(os.getenv("JOB_HEARTBEAT_INTERVAL", "10"))
+
+# Job type -> (request model, service class, service method)
+JOB_TYPES: Dict[str, Tuple[Type[BaseModel], type, str]] = {
+    "content": (ContentRequest, ContentService, "generate"),
+    "product": (ProductRequest, ProductService, "generate"),
+    "seo": (SEORequest, SEOService, "optimize"),
+    "image": (ImageRequest, ImageService, "analyze"),
+    "brand": (BrandTrainRequest, BrandService, "train"),
+}
+
+
+class JobRecord(JobData):
+    """Stored job including its input."""
+    payload: Dict[str, Any] = Field(default_factory=dict, description="Validated request body")
+    webhook_url: Optional[str] = Field(None, description="Completion webhook URL")
+    rate_limit_key: Optional[str] = Field(
+        None, description="Rate-limiter key charged with the job's tokens"
+    )
+
+    def public(self) -> JobData:
+        """Get the client-facing job state."""
+        return JobData(**self.model_dump(exclude={"payload", "webhook_url", "rate_limit_key"}))
+
+
+class JobStore(ABC):
+    """Abstract job storage and queue."""
+
+    def __init__(self, ttl: int = 86400):
+        """
+        Initialize store.
+
+        Args:
+            ttl: Seconds a job is kept after its last update
+        """
+        self.ttl = ttl
+
+    @abstractmethod
+    async def save(self, job: JobRecord) -> None:
+        """Create or update a job."""
+        pass
+
+    @abstractmethod
+    async def get(self, job_id: str) -> Optional[JobRecord]:
+        """Get a job by ID."""
+        pass
+
+    @abstractmethod
+    async def enqueue(self, job_id: str) -> None:
+        """Queue a job for execution."""
+        pass
+
+    @abstractmethod
+    async def dequeue(self, timeout: float = 5.0) -> Optional[str]:
+        """
+        Wait for the next queued job and claim it for this process.
+
+        Args:
+            timeout: Maximum seconds to wait
+
+        Returns:
+            Job ID or None if nothing was queued in time
+        """
+        pass
+
+    @abstractmethod
+    async def ack(self, job_id: str) -> None:
+        """Release the claim on a finished job."""
+        pass
+
+    @abstractmethod
+    async def requeue(self, job_id: str) -> None:
+        """Put a claimed job back at the head of the queue."""
+        pass
+
+    async def heartbeat(self) -> None:
+        """Signal that this process is alive and its claims are valid."""
+        pass
+
+    async def recover(self) -> int:
+        """
+        Queue jobs again that were claimed by processes that died.
+
+        Returns:
+            Number of jobs queued again
+        """
+        return 0
+
+    async def aclose(self) -> None:
+        """Release resources held by the store."""
+        pass
+
+
+class MemoryJobStore(JobStore):
+    """In-process job store for single-node deployments."""
+
+    def __init__(self, ttl: int = 86400):
+        """Initialize empty store."""
+        super().__init__(ttl)
+        self._jobs: Dict[str, Tuple[float, JobRecord]] = {}
+        self._queue: "asyncio.Queue[str]" = asyncio.Queue()
+
+    async def save(self, job: JobRecord) -> None:
+        """Store job and purge expired ones."""
+        now = time.monotonic()
+        self._jobs[job.job_id] = (now + self.ttl, job.model_copy(deep=True))
+
+        expired = [job_id for job_id, (expires_at, _) in self._jobs.items() if expires_at <= now]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    async def get(self, job_id: str) -> Optional[JobRecord]:
+        """Get unexpired job."""
+        entry = self._jobs.get(job_id)
+        if entry is None or entry[0] <= time.monotonic():
+            return None
+        return entry[1].model_copy(deep=True)
+
+    async def enqueue(self, job_id: str) -> None:
+        """Queue job."""
+        await self._queue.put(job_id)
+
+    async def dequeue(self, timeout: float = 5.0) -> Optional[str]:
+        """Wait for queued job."""
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def ack(self, job_id: str) -> None:
+        """Nothing to release: claims live in this process only."""
+        pass
+
+    async def requeue(self, job_id: str) -> None:
+        """Queue job again."""
+        self._queue.put_nowait(job_id)
+
+
+class RedisJobStore(JobStore):
+    """
+    Redis job store shared by all uvicorn worker processes.
+
+    Reliable queue: dequeue atomically moves a job ID from the queue to
+    this process's processing list (BLMOVE, Redis 6.2+), where it stays
+    until the job is acknowledged. Each process refreshes a heartbeat key;
+    processing lists of processes whose heartbeat expired are moved back
+    to the queue by recover().
+    """
+
+    def __init__(self, url: str, ttl: int = 86400, prefix: str = "contentcraft:jobs:"):
+        """
+        Initialize Redis store.
+
+        Args:
+            url: Redis connection URL
+            ttl: Seconds a job is kept after its last update
+            prefix: Key prefix
+
+        Raises:
+            ImportError: If redis package is not installed
+        """
+        super().__init__(ttl)
+        self.prefix = prefix
+        self.queue_key = prefix + "queue"
+        self.owner = uuid.uuid4().hex
+        self.processing_key = f"{prefix}processing:{self.owner}"
+
+        try:
+            from redis import asyncio as aioredis
+        except ImportError:
+            raise ImportError("redis package not installed. Run: pip install redis")
+
+        self.client = aioredis.from_url(url)
+
+    async def save(self, job: JobRecord) -> None:
+        """Store job with expiry."""
+        await self.client.set(self.prefix + job.job_id, job.model_dump_json(), ex=self.ttl)
+
+    async def get(self, job_id: str) -> Optional[JobRecord]:
+        """Get job."""
+        raw = await self.client.get(self.prefix + job_id)
+        if raw is None:
+            return None
+        return JobRecord.model_validate_json(raw)
+
+    async def enqueue(self, job_id: str) -> None:
+        """Push job onto the shared queue."""
+        await self.client.lpush(self.queue_key, job_id)
+
+    async def dequeue(self, timeout: float = 5.0) -> Optional[str]:
+        """Move job from the shared queue to this process's processing list."""
+        item = await self.client.blmove(
+            self.queue_key, self.processing_key, max(1, int(timeout)), src="RIGHT", dest="LEFT"
+        )
+        if item is None:
+            return None
+        return item.decode("utf-8") if isinstance(item, bytes) else item
+
+    async def ack(self, job_id: str) -> None:
+        """Remove job from the processing list."""
+        await self.client.lrem(self.processing_key, 1, job_id)
+
+    async def requeue(self, job_id: str) -> None:
+        """Move job from the processing list back to the head of the queue."""
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.lrem(self.processing_key, 1, job_id)
+            pipe.rpush(self.queue_key, job_id)
+            await pipe.execute()
+
+    async def heartbeat(self) -> None:
+        """Refresh this process's heartbeat key."""
+        await self.client.set(
+            f"{self.prefix}worker:{self.owner}", 1, ex=max(1, int(JOB_HEARTBEAT_INTERVAL * 3))
+        )
+
+    async def recover(self) -> int:
+        """Move processing lists of dead processes back to the queue."""
+        recovered = 0
+
+        async for key in self.client.scan_iter(match=f"{self.prefix}processing:*"):
+            key = key.decode("utf-8") if isinstance(key, bytes) else key
+            owner = key.rsplit(":", 1)[-1]
+            if owner == self.owner or await self.client.exists(f"{self.prefix}worker:{owner}"):
+                continue
+
+            # Oldest claims end up next in line
+            while await self.client.lmove(key, self.queue_key, "LEFT", "RIGHT") is not None:
+                recovered += 1
+
+        if recovered:
+            logger.warning(f"Recovered {recovered} jobs claimed by stopped workers")
+        return recovered
+
+    async def aclose(self) -> None:
+        """Close Redis connection pool."""
+        await self.client.close()
+
+
+class JobManager:
+    """Submits jobs and runs them on background worker tasks."""
+
+    def __init__(
+        self,
+        store: JobStore,
+        registry: ProviderRegistry,
+        workers: int = 2,
+        webhook_timeout: float = 10.0,
+        rate_limiter: Optional[RateLimiter] = None
+    ):
+        """
+        Initialize job manager.
+
+        Args:
+            store: Job storage and queue backend
+            registry: Shared LLM provider registry
+            workers: Number of concurrent worker tasks in this process
+            webhook_timeout: Timeout for completion webhooks in seconds
+            rate_limiter: Limiter charged with the tokens of each job (optional)
+        """
+        self.store = store
+        self.registry = registry
+        self.workers = workers
+        self.rate_limiter = rate_limiter
+        # Webhooks only reach public addresses and never follow redirects
+        self._http = httpx.AsyncClient(timeout=webhook_timeout, transport=PublicTransport())
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self) -> None:
+        """Recover jobs of stopped workers and start worker tasks."""
+        await self.store.heartbeat()
+        await self.store.recover()
+
+        self._tasks.append(asyncio.ensure_future(self._maintain()))
+        for index in range(self.workers):
+            self._tasks.append(asyncio.ensure_future(self._worker(index)))
+        logger.info(f"Job workers started: {self.workers}")
+
+    async def stop(self) -> None:
+        """Stop workers (interrupted jobs are queued again) and release resources."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+        await self._http.aclose()
+        await self.store.aclose()
+
+    async def submit(
+        self,
+        job_type: str,
+        payload: Dict[str, Any],
+        webhook_url: Optional[str] = None,
+        rate_limit_key: Optional[str] = None
+    ) -> JobRecord:
+        """
+        Validate and queue a job.
+
+        Args:
+            job_type: Job type (content/product/seo/image/brand)
+            payload: Request body for the matching service
+            webhook_url: URL to notify on completion
+            rate_limit_key: Limiter key charged with the job's tokens
+
+        Returns:
+            Queued job
+
+        Raises:
+            ValueError: If job type is unknown
+            UnsafeURLError: If webhook_url is not a public http(s) URL
+            pydantic.ValidationError: If payload is invalid
+        """
+        if job_type not in JOB_TYPES:
+            raise ValueError(
+                f"Unknown job type: {job_type}. "
+                f"Supported types: {', '.join(JOB_TYPES.keys())}"
+            )
+
+        request_model = JOB_TYPES[job_type][0]
+        request = request_model.model_validate(payload)
+
+        if webhook_url:
+            await ensure_public_url(webhook_url)
+
+        job = JobRecord(
+            job_id=uuid.uuid4().hex,
+            type=job_type,
+            created_at=time.time(),
+            started_at=None,
+            finished_at=None,
+            result=None,
+            error=None,
+            metadata=None,
+            payload=request.model_dump(),
+            webhook_url=webhook_url,
+            rate_limit_key=rate_limit_key,
+        )
+
+        await self.store.save(job)
+        await self.store.enqueue(job.job_id)
+
+        logger.info(f"Job queued: id={job.job_id}, type={job_type}")
+
+        return job
+
+    async def get(self, job_id: str) -> Optional[JobRecord]:
+        """Get job by ID."""
+        return await self.store.get(job_id)
+
+    async def _maintain(self) -> None:
+        """Send heartbeats and recover jobs of dead workers until cancelled."""
+        while True:
+            await asyncio.sleep(JOB_HEARTBEAT_INTERVAL)
+            try:
+                await self.store.heartbeat()
+                await self.store.recover()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Job heartbeat failed: {str(e)}")
+
+    async def _worker(self, index: int) -> None:
+        """Consume and run queued jobs until cancelled."""
+        while True:
+            job_id = None
+            try:
+                job_id = await self.store.dequeue()
+                if job_id is not None:
+                    await self._run(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Job worker {index} error: {str(e)}", exc_info=True)
+                if job_id is not None:
+                    # The store failed around the job; give it to the next worker
+                    try:
+                        await self.store.requeue(job_id)
+                    except Exception as requeue_error:
+                        logger.error(f"Failed to requeue job {job_id}: {str(requeue_error)}")
+                await asyncio.sleep(1)
+
+    async def _run(self, job_id: str) -> None:
+        """Execute one job and record its outcome."""
+        job = await self.store.get(job_id)
+        if job is None or job.status in ("succeeded", "failed"):
+            # Expired, or recovered after it finished but before it was acknowledged
+            if job is None:
+                logger.warning(f"Job expired before it ran: {job_id}")
+            await self.store.ack(job_id)
+            return
+
+        request_model, service_class, method_name = JOB_TYPES[job.type]
+
+        job.status = "running"
+        job.started_at = time.time()
+        await self.store.save(job)
+
+        logger.info(f"Job started: id={job_id}, type={job.type}")
+
+        with track_usage() as usage:
+            try:
+                service = service_class(self.registry.get())
+                request = request_model.model_validate(job.payload)
+                result = await getattr(service, method_name)(request)
+
+                job.status = "succeeded"
+                job.result = result.model_dump()
+                job.metadata = ResponseMetadata(
+                    tokens_used=service.usage.tokens_used,
+                    prompt_tokens=service.usage.prompt_tokens,
+                    completion_tokens=service.usage.completion_tokens,
+                    cached_input_tokens=service.usage.cached_input_tokens,
+                    latency_ms=int((time.time() - job.started_at) * 1000),
+                    model=service.usage.model or service.model_name,
+                    cached=service.usage.cached,
+                    attempts=service.usage.attempts
+                )
+
+            except asyncio.CancelledError:
+                # Shutdown: hand the job to the next worker instead of leaving it "running"
+                logger.warning(f"Job interrupted: id={job_id}; queueing it again")
+
+                job.status = "queued"
+                job.started_at = None
+                await self.store.save(job)
+                await self.store.requeue(job_id)
+                raise
+
+            except Exception as e:
+                logger.error(f"Job failed: id={job_id}: {str(e)}")
+
+                job.status = "failed"
+                job.error = {
+                    "code": "JOB_FAILED",
+                    "message": str(e)
+                }
+
+            finally:
+                # Jobs run outside any request scope: charge the submitter's budget here
+                await self._charge(job, usage.tokens_used)
+
+        job.finished_at = time.time()
+        await self.store.save(job)
+        await self.store.ack(job_id)
+
+        logger.info(f"Job finished: id={job_id}, status={job.status}")
+
+        await self._notify(job)
+
+    async def _charge(self, job: JobRecord, tokens: int) -> None:
+        """Charge a job's LLM tokens to the rate-limit budget of its submitter."""
+        if self.rate_limiter is None or job.rate_limit_key is None or not tokens:
+            return
+
+        try:
+            await self.rate_limiter.charge(job.rate_limit_key, tokens)
+        except Exception as e:
+            logger.warning(f"Failed to charge job tokens: id={job.job_id}: {str(e)}")
+
+    async def _notify(self, job: JobRecord) -> None:
+        """
+        POST the finished job to its webhook.
+
+        The body is signed with HMAC-SHA256 of APP_SECRET in the
+        X-ContentCraft-Signature header so receivers can verify it.
+        """
+        if not job.webhook_url:
+            return
+
+        body = job.public().model_dump_json().encode("utf-8")
+        secret = os.getenv("APP_SECRET", "").encode("utf-8")
+        signature = hmac.new(secret, body, hashlib.sha256).hexdigest()
+
+        try:
+            response = await self._http.post(
+                job.webhook_url,
+                content=body,
+                headers={
+                    "Content-Type": "application/json",
+                    "X-ContentCraft-Signature": f"sha256={signature}",
+                },
+            )
+            response.raise_for_status()
+        except Exception as e:
+            logger.warning(f"Job webhook failed: id={job.job_id}, url={job.webhook_url}: {str(e)}")
+
+
+def create_job_store() -> JobStore:
+    """
+    Create job store from environment.
+
+    JOB_BACKEND selects memory/redis (defaults to redis when REDIS_URL is
+    set). JOB_TTL controls how long finished jobs can be polled.
+
+    Returns:
+        Job store instance
+    """
+    ttl = int(os.getenv("JOB_TTL", "86400"))
+    redis_url = os.getenv("REDIS_URL")
+    backend = os.getenv("JOB_BACKEND", "redis" if redis_url else "memory").lower()
+
+    if backend == "redis":
+        if not redis_url:
+            raise ValueError("REDIS_URL environment variable not set")
+
+        try:
+            store = RedisJobStore(redis_url, ttl=ttl)
+            logger.info("Job store: redis")
+            return store
+        except ImportError as e:
+            logger.warning(f"{str(e)}; falling back to in-memory job store")
+
+    logger.info("Job store: memory")
+    return MemoryJobStore(ttl=ttl)
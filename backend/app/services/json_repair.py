@@ -0,0 +1,158 @@
+"""
+Local repair of near-valid JSON from LLM responses.
+
+Fixes the usual ways an otherwise good response fails json.loads -
+markdown code fences, text around the object, trailing commas and a tail
+cut off by the token limit - so one malformed character does not cost a
+full regeneration.
+"""
+
+from typing import Any, List, Optional, Tuple
+import json
+
+_CLOSING = {"{": "}", "[": "]"}
+
+
+class JSONRepairError(ValueError):
+    """Raised when a response cannot be repaired into JSON."""
+    pass
+
+
+def loads_lenient(text: str) -> Any:
+    """
+    Parse JSON, repairing it first if strict parsing fails.
+
+    Args:
+        text: LLM response text
+
+    Returns:
+        Parsed JSON value
+
+    Raises:
+        JSONRepairError: If the text is not JSON even after repair
+    """
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError as e:
+        error = e
+
+    try:
+        return json.loads(repair_json(text))
+    except (json.JSONDecodeError, JSONRepairError):
+        raise JSONRepairError(str(error))
+
+
+def is_truncated(text: str) -> bool:
+    """
+    Whether text ends inside its JSON object or array (e.g. cut off at max_tokens).
+
+    Args:
+        text: LLM response text
+
+    Returns:
+        True if the first JSON document in text is never closed
+    """
+    try:
+        return _repair(text)[1]
+    except JSONRepairError:
+        return False
+
+
+def repair_json(text: str) -> str:
+    """
+    Repair near-valid JSON text.
+
+    - Text before the first "{" or "[" (e.g. "```json") and after the
+      matching close (e.g. a closing fence) is dropped.
+    - Commas directly before "}" or "]" are removed.
+    - A truncated document is cut back to its last complete value and
+      closed; the incomplete member is dropped.
+
+    Args:
+        text: LLM response text
+
+    Returns:
+        Repaired JSON text (not guaranteed valid if the damage is elsewhere)
+
+    Raises:
+        JSONRepairError: If the text contains no JSON object or array
+    """
+    return _repair(text)[0]
+
+
+def _repair(text: str) -> Tuple[str, bool]:
+    """Repair near-valid JSON text; also reports whether it was truncated."""
+    start = _find_start(text)
+    if start is None:
+        raise JSONRepairError("No JSON object or array in response")
+
+    out: List[str] = []
+    stack: List[str] = []
+    in_string = False
+    escape = False
+    expect_key = False
+    # Output length and open containers after the last complete value
+    safe: Tuple[int, Tuple[str, ...]] = (0, ())
+
+    for char in text[start:]:
+        if in_string:
+            out.append(char)
+            if escape:
+                escape = False
+            elif char == "\\":
+                escape = True
+            elif char == '"':
+                in_string = False
+                if not expect_key:
+                    safe = (len(out), tuple(stack))
+            continue
+
+        if char == '"':
+            in_string = True
+        elif char in _CLOSING:
+            stack.append(char)
+            expect_key = char == "{"
+            if len(stack) == 1:
+                safe = (len(out) + 1, tuple(stack))
+        elif char in "}]":
+            if not stack or _CLOSING[stack[-1]] != char:
+                raise JSONRepairError(f"Mismatched '{char}' in response")
+            _strip_trailing_comma(out)
+            stack.pop()
+            out.append(char)
+            if not stack:
+                return "".join(out), False
+            expect_key = False
+            safe = (len(out), tuple(stack))
+            continue
+        elif char == ",":
+            _strip_trailing_comma(out)
+            if stack:
+                expect_key = stack[-1] == "{"
+            if not out[-1:] or out[-1] not in _CLOSING:
+                # A number or literal ends here
+                safe = (len(out), tuple(stack))
+        elif char == ":":
+            expect_key = False
+
+        out.append(char)
+
+    # Truncated: cut back to the last complete value and close
+    length, open_containers = safe
+    repaired = "".join(out[:length]).rstrip()
+    return repaired + "".join(_CLOSING[c] for c in reversed(open_containers)), True
+
+
+def _find_start(text: str) -> Optional[int]:
+    """Index of the first "{" or "[" in text."""
+    positions = [pos for pos in (text.find("{"), text.find("[")) if pos >= 0]
+    return min(positions) if positions else None
+
+
+def _strip_trailing_comma(out: List[str]) -> None:
+    """Remove a comma (and following whitespace) at the end of out."""
+    index = len(out) - 1
+    while index >= 0 and out[index].isspace():
+        index -= 1
+    if index >= 0 and out[index] == ",":
+        del out[index:]
@@ -0,0 +1,218 @@
+"""
+Incremental JSON object parser for streamed LLM output.
+
+Consumes text chunks of a JSON object as they arrive and reports each
+top-level key as soon as its value is complete. Structural problems are
+raised as soon as they appear, so callers can abort the generation
+instead of paying for the remaining tokens.
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+import json
+
+from app.services.json_repair import loads_lenient
+
+# Text tolerated before the opening brace (e.g. "```json" fences)
+MAX_PREAMBLE_CHARS = 200
+
+_CLOSERS = {"}": "{", "]": "["}
+
+FieldValidator = Callable[[str, Any], None]
+
+
+class JSONStreamError(ValueError):
+    """Raised when streamed output can no longer become the expected object."""
+    pass
+
+
+class JSONFieldStream:
+    """Extracts completed top-level fields from a streamed JSON object."""
+
+    def __init__(
+        self,
+        field_types: Optional[Dict[str, type]] = None,
+        validator: Optional[FieldValidator] = None
+    ):
+        """
+        Initialize parser.
+
+        Args:
+            field_types: Expected Python type per top-level key
+                         (e.g. {"title": str, "outline": list})
+            validator: Callback run on each completed field; raise
+                       ValueError to abort the stream
+        """
+        self.field_types = field_types or {}
+        self.validator = validator
+        self.fields: Dict[str, Any] = {}
+        self.done = False
+
+        self._buffer = ""
+        self._pos = 0
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._started = False
+        self._expect_key = True
+        self._after_key = False
+        self._key_start = -1
+        self._key: Optional[str] = None
+        self._value_start = -1
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """
+        Consume a chunk of streamed text.
+
+        Args:
+            chunk: Next piece of the LLM response
+
+        Returns:
+            (key, value) pairs completed by this chunk, in order
+
+        Raises:
+            JSONStreamError: If the output is structurally broken or a
+                             completed field fails validation
+        """
+        self._buffer += chunk
+        completed = []
+
+        while self._pos < len(self._buffer) and not self.done:
+            char = self._buffer[self._pos]
+
+            if not self._started:
+                self._scan_preamble(char)
+            elif self._in_string:
+                self._scan_string(char)
+            else:
+                field = self._scan_structure(char)
+                if field is not None:
+                    completed.append(field)
+
+            self._pos += 1
+
+        return completed
+
+    def close(self) -> Dict[str, Any]:
+        """
+        Finish parsing after the stream ended.
+
+        Returns:
+            Complete top-level object
+
+        Raises:
+            JSONStreamError: If the object was never closed
+        """
+        if not self.done:
+            raise JSONStreamError("Stream ended before JSON object was closed")
+
+        return self.fields
+
+    @property
+    def text(self) -> str:
+        """Full text received so far."""
+        return self._buffer
+
+    def _scan_preamble(self, char: str) -> None:
+        """Skip text before the opening brace of the root object."""
+        if char == "{":
+            self._started = True
+            self._stack.append("{")
+        elif char == "[":
+            raise JSONStreamError("Expected a JSON object, got an array")
+        elif self._pos >= MAX_PREAMBLE_CHARS:
+            raise JSONStreamError("Response does not start with a JSON object")
+
+    def _scan_string(self, char: str) -> None:
+        """Advance through a string literal."""
+        if self._escape:
+            self._escape = False
+        elif char == "\\":
+            self._escape = True
+        elif char == '"':
+            self._in_string = False
+            if self._key_start >= 0:
+                self._key = json.loads(self._buffer[self._key_start:self._pos + 1])
+                self._key_start = -1
+                self._after_key = True
+                if self._key in self.fields:
+                    raise JSONStreamError(f"Duplicate key '{self._key}'")
+
+    def _scan_structure(self, char: str) -> Optional[Tuple[str, Any]]:
+        """Advance through structural characters outside strings."""
+        depth = len(self._stack)
+
+        if depth == 1 and (self._expect_key or self._after_key):
+            return self._scan_key_position(char)
+
+        if char == '"':
+            self._in_string = True
+        elif char in "{[":
+            self._stack.append(char)
+        elif char in _CLOSERS:
+            if self._stack.pop() != _CLOSERS[char]:
+                raise JSONStreamError(f"Mismatched '{char}' at position {self._pos}")
+            if not self._stack:
+                self.done = True
+                return self._complete_field()
+        elif depth == 1 and char == ",":
+            field = self._complete_field()
+            self._expect_key = True
+            return field
+
+        return None
+
+    def _scan_key_position(self, char: str) -> Optional[Tuple[str, Any]]:
+        """Handle characters between values of the root object."""
+        if char.isspace():
+            return None
+
+        if self._after_key:
+            if char != ":":
+                raise JSONStreamError(f"Expected ':' after key '{self._key}'")
+            self._after_key = False
+            self._expect_key = False
+            self._value_start = self._pos + 1
+        elif char == '"':
+            self._in_string = True
+            self._key_start = self._pos
+        elif char == "}":
+            # Empty object or trailing comma
+            self._stack.pop()
+            self.done = True
+        elif char != ",":
+            raise JSONStreamError(f"Unexpected '{char}' where a key was expected")
+
+        return None
+
+    def _complete_field(self) -> Optional[Tuple[str, Any]]:
+        """Decode, check and store the value that just ended."""
+        if self._value_start < 0 or self._key is None:
+            return None
+
+        raw = self._buffer[self._value_start:self._pos].strip()
+        key = self._key
+        self._key = None
+        self._value_start = -1
+
+        try:
+            # Tolerates trailing commas inside nested values
+            value = loads_lenient(raw)
+        except ValueError as e:
+            raise JSONStreamError(f"Invalid JSON value for '{key}': {str(e)}")
+
+        expected: Union[type, Tuple[type, ...], None] = self.field_types.get(key)
+        if expected is float:
+            expected = (int, float)
+        if expected is not None and value is not None and not isinstance(value, expected):
+            raise JSONStreamError(
+                f"Field '{key}' has unexpected type {type(value).__name__}"
+            )
+
+        if self.validator is not None:
+            try:
+                self.validator(key, value)
+            except ValueError as e:
+                raise JSONStreamError(f"Field '{key}' failed validation: {str(e)}")
+
+        self.fields[key] = value
+        return key, value
@@ -5,18 +5,179 @@ Supports multiple AI providers: OpenAI, Anthropic, Ollama.
 """
 
 from abc import ABC, abstractmethod
-from typing import Optional, Dict, Any
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import (
+    Optional, Dict, Any, AsyncGenerator, Awaitable, Callable, List, Mapping, Tuple, TypeVar
+)
+import asyncio
+import importlib.util
 import os
 import logging
 import json
+import random
+import time
 import httpx
 
+from app.services.cache import ResponseCache, cache_bypassed, make_cache_key
+from app.services.circuit_breaker import CLOSED, CircuitBreaker, CircuitOpenError
+from app.services.images import ImageInput
+from app.services.json_repair import JSONRepairError, is_truncated, loads_lenient
+from app.services.json_stream import JSONFieldStream, JSONStreamError, FieldValidator
+from app.services.provider_health import BackendHealth
+from app.services.singleflight import SingleFlight
+from app.services.tokenizer import Tokenizer, context_window, fit_max_tokens, get_tokenizer
+from app.services.usage import record_attempt, record_call, record_model, record_tokens
+from app.utils.concurrency import ConcurrencyLimiter
+
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+# HTTP statuses worth retrying (plus every 5xx)
+RETRYABLE_STATUS = {408, 409, 425, 429}
+
+# Longest image side (px) sent to vision models (0 = provider default)
+IMAGE_MAX_SIDE = int(os.getenv("IMAGE_MAX_SIDE", "0"))
+
+
+class ProviderError(Exception):
+    """Failed upstream LLM call, classified for the retry policy."""
+    
+    def __init__(
+        self,
+        message: str,
+        retryable: bool = False,
+        status_code: Optional[int] = None,
+        retry_after: Optional[float] = None
+    ):
+        """
+        Initialize error.
+        
+        Args:
+            message: Error message
+            retryable: Whether repeating the call may succeed
+            status_code: Upstream HTTP status, if any
+            retry_after: Delay requested by the upstream Retry-After header
+        """
+        super().__init__(message)
+        self.retryable = retryable
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+def counts_as_outage(error: BaseException) -> bool:
+    """
+    Whether an error says the upstream is unhealthy.
+    
+    Transient provider errors (429/5xx), timeouts, connection failures and
+    open circuits count against a provider's breaker and health and make
+    FailoverProvider try the next backend. Fatal 4xx responses and invalid
+    output (ValueError) fail fast without either.
+    
+    Args:
+        error: Exception raised by an upstream call
+        
+    Returns:
+        True if the error should count as an upstream failure
+    """
+    if isinstance(error, ProviderError):
+        return error.retryable
+    return isinstance(error, (CircuitOpenError, asyncio.TimeoutError, httpx.TransportError))
+
+
+class TruncatedResponse(dict):
+    """JSON object recovered from a response cut off before it closed; never cached."""
+    pass
+
+
+@dataclass
+class RetryPolicy:
+    """Jittered exponential backoff bounded by attempts and a total deadline."""
+    max_attempts: int = 4
+    base_delay: float = 0.5
+    max_delay: float = 8.0
+    deadline: float = 60.0
+    
+    @classmethod
+    def from_env(cls) -> "RetryPolicy":
+        """Create policy from LLM_RETRY_* environment variables."""
+        return cls(
+            max_attempts=max(1, int(os.getenv("LLM_RETRY_MAX_ATTEMPTS", "4"))),
+            base_delay=float(os.getenv("LLM_RETRY_BASE_DELAY", "0.5")),
+            max_delay=float(os.getenv("LLM_RETRY_MAX_DELAY", "8")),
+            deadline=float(os.getenv("LLM_RETRY_DEADLINE", "60")),
+        )
+    
+    def delay(self, error: ProviderError, attempt: int, elapsed: float) -> Optional[float]:
+        """
+        Get the wait before the next attempt.
+        
+        Args:
+            error: Error raised by the failed attempt
+            attempt: Number of attempts made so far
+            elapsed: Seconds since the first attempt started
+            
+        Returns:
+            Seconds to wait, or None if the call should not be retried
+        """
+        if not error.retryable or attempt >= self.max_attempts:
+            return None
+        
+        # Full jitter spreads retries of concurrent callers apart
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+        if error.retry_after is not None:
+            delay = max(delay, error.retry_after)
+        
+        if elapsed + delay >= self.deadline:
+            return None
+        
+        return delay
+
+
+def parse_retry_after(headers: Optional[Mapping[str, str]]) -> Optional[float]:
+    """
+    Parse Retry-After (seconds or HTTP date) or retry-after-ms headers.
+    
+    Args:
+        headers: Response headers (case-insensitive mapping)
+        
+    Returns:
+        Delay in seconds or None if absent/invalid
+    """
+    if not headers:
+        return None
+    
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return max(0.0, float(value) / 1000)
+        except ValueError:
+            pass
+    
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
 
 class LLMProvider(ABC):
     """Abstract base class for LLM providers."""
     
+    name = "base"
+    supports_streaming = False
+    # Longest image side worth sending; larger images only cost more tokens
+    VISION_MAX_SIDE = 768
+    
     def __init__(self, model_name: Optional[str] = None):
         """
         Initialize provider.
@@ -25,13 +186,93 @@ class LLMProvider(ABC):
             model_name: Override default model name
         """
         self.model_name = model_name or self.get_default_model()
-        self.last_tokens_used = 0
+        self.cache: Optional[ResponseCache] = None
+        self.inflight = SingleFlight()
+        # Shared by all requests: caps concurrent upstream calls per provider
+        self.concurrency = ConcurrencyLimiter(int(os.getenv("LLM_MAX_CONCURRENCY", "8")))
+        self.retry_policy = RetryPolicy.from_env()
+        self.breaker = CircuitBreaker.from_env(self.name)
+        self.tokenizer: Tokenizer = get_tokenizer(self.name, self.model_name)
+        self.context_window = context_window(self.model_name)
+    
+    @property
+    def available(self) -> bool:
+        """Whether the provider currently accepts calls (circuit not open)."""
+        return self.breaker.available
+    
+    @property
+    def vision_max_side(self) -> int:
+        """Longest image side (px) to downscale vision inputs to (IMAGE_MAX_SIDE)."""
+        return IMAGE_MAX_SIDE or self.VISION_MAX_SIDE
+    
+    @property
+    def status(self) -> str:
+        """Health status: connected, degraded (probing) or unavailable (circuit open)."""
+        if not self.available:
+            return "unavailable"
+        return "connected" if self.breaker.state == CLOSED else "degraded"
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get runtime metrics for health reporting."""
+        return {
+            "model": self.model_name,
+            "circuit": self.breaker.stats(),
+            "coalescing": self.inflight.stats(),
+            "concurrency": self.concurrency.stats(),
+        }
+    
+    @staticmethod
+    def _split_prompt(prompt: str) -> Tuple[str, str]:
+        """
+        Split a prompt into its static prefix and variable suffix.
+        
+        Prompts rendered from a PromptTemplate carry their static prefix;
+        plain strings have none.
+        
+        Returns:
+            (prefix, suffix); prefix is "" when unknown
+        """
+        prefix = getattr(prompt, "prefix", "")
+        if prefix and len(prefix) < len(prompt) and prompt.startswith(prefix):
+            return prefix, prompt[len(prefix):]
+        return "", prompt
+    
+    def prompt_budget(self, max_tokens: int, reserved: int = 0) -> int:
+        """
+        Get the tokens left for prompt content in the context window.
+        
+        Args:
+            max_tokens: Completion tokens to leave room for
+            reserved: Tokens already taken by fixed prompt parts (instructions, system message)
+            
+        Returns:
+            Token budget for variable prompt content (at least 0)
+        """
+        return max(0, self.context_window - max_tokens - reserved)
+    
+    def fit_max_tokens(self, prompt: str, system_message: Optional[str], max_tokens: int) -> int:
+        """
+        Clamp max_tokens to the room the prompt leaves in the context window.
+        
+        Raises:
+            ProviderError: If the prompt does not fit the context window (not retryable)
+        """
+        try:
+            return fit_max_tokens(
+                self.tokenizer, self.context_window, prompt, system_message, max_tokens
+            )
+        except ValueError as e:
+            raise ProviderError(f"{self.name}: {str(e)}", retryable=False)
     
     @abstractmethod
     def get_default_model(self) -> str:
         """Get default model name for this provider."""
         pass
     
+    async def aclose(self) -> None:
+        """Release network resources held by the provider."""
+        pass
+    
     @abstractmethod
     async def generate(
         self,
@@ -62,22 +303,438 @@ class LLMProvider(ABC):
         self,
         prompt: str,
         system_message: Optional[str] = None,
+        use_cache: bool = True,
+        coalesce: bool = True,
+        field_types: Optional[Dict[str, type]] = None,
+        validator: Optional[FieldValidator] = None,
         **kwargs
     ) -> Dict[str, Any]:
         """
         Generate JSON response.
         
+        Responses are served from the response cache when one is attached
+        and an identical request was answered before (unless the caller
+        runs inside cache.bypass_cache, which only refreshes the entry).
+        Identical requests that are already in flight share a single
+        upstream call. Upstream calls wait for a free slot once
+        LLM_MAX_CONCURRENCY calls are running on this provider. Transient
+        upstream failures are retried according to the provider's
+        RetryPolicy.
+        
+        On streaming-capable providers the response is parsed incrementally
+        and the generation is aborted as soon as its structure is broken or
+        a completed field fails the type/validator checks.
+        
+        A response_schema (see output_schema.response_schema) is passed to
+        the provider's structured-output mode, so the model can only emit
+        JSON of that shape; providers without one ignore it.
+        
+        images (a list of images.ImageInput) are sent as vision input; they
+        are identified by their key in the cache, so a resized copy of an
+        image hits the entry of the original.
+        
         Args:
             prompt: User prompt
             system_message: System message
-            **kwargs: Additional parameters
+            use_cache: Whether to read/write the response cache
+            coalesce: Whether to share identical in-flight calls
+            field_types: Expected Python type per top-level key
+            validator: Callback checking each completed top-level field
+            **kwargs: Additional parameters (temperature, max_tokens,
+                response_schema, images, ...)
             
         Returns:
             Parsed JSON dict
             
         Raises:
             ValueError: If response is not valid JSON
+            ProviderError: If the upstream call failed after all retries
+        """
+        request_key = self._request_key(prompt, system_message, **kwargs)
+        cache = self.cache if use_cache else None
+        
+        if cache is not None and not cache_bypassed():
+            cached = await cache.get(request_key)
+            if cached is not None:
+                logger.debug(f"Response cache hit: {request_key[:12]}")
+                record_call(cached=True)
+                return cached
+        
+        async def run() -> Dict[str, Any]:
+            result = await self._call_json(
+                prompt, system_message, field_types, validator, **kwargs
+            )
+            if cache is not None and not isinstance(result, TruncatedResponse):
+                await cache.set(request_key, result)
+            return result
+        
+        if coalesce:
+            flight_key = self._flight_key(request_key, field_types)
+            # Joining an identical call in flight costs no tokens, like a cache hit
+            record_call(cached=self.inflight.running(flight_key))
+            return await self.inflight.do(flight_key, run)
+        
+        record_call()
+        return await run()
+    
+    async def stream(
+        self,
+        prompt: str,
+        system_message: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 2000,
+        json_mode: bool = True,
+        **kwargs
+    ) -> AsyncGenerator[str, None]:
+        """
+        Stream generated text chunks.
+        
+        Providers without a streaming API yield the full response at once.
+        
+        Args:
+            prompt: User prompt
+            system_message: System message (optional)
+            temperature: Sampling temperature
+            max_tokens: Maximum tokens to generate
+            json_mode: Whether to enforce JSON output
+            **kwargs: Provider-specific parameters
+            
+        Yields:
+            Text chunks as they are generated
+        """
+        yield await self.generate(
+            prompt=prompt,
+            system_message=system_message,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            json_mode=json_mode,
+            **kwargs
+        )
+    
+    async def stream_json(
+        self,
+        prompt: str,
+        system_message: Optional[str] = None,
+        use_cache: bool = True,
+        field_types: Optional[Dict[str, type]] = None,
+        validator: Optional[FieldValidator] = None,
+        **kwargs
+    ) -> AsyncGenerator[Tuple[str, Any], None]:
+        """
+        Stream a JSON object response field by field.
+        
+        Each top-level key is yielded as soon as its value is complete.
+        Cache hits yield all fields immediately; completed responses are
+        written to the cache like generate_json results. Failed attempts
+        are retried only until the first field has been yielded.
+        
+        Args:
+            prompt: User prompt
+            system_message: System message
+            use_cache: Whether to read/write the response cache
+            field_types: Expected Python type per top-level key
+            validator: Callback checking each completed top-level field
+            **kwargs: Additional parameters (temperature, max_tokens,
+                response_schema, images, ...)
+            
+        Yields:
+            (key, value) pairs of the top-level JSON object
+            
+        Raises:
+            ValueError: If response is not a valid JSON object
+            ProviderError: If the upstream call failed
+        """
+        request_key = self._request_key(prompt, system_message, **kwargs)
+        cache = self.cache if use_cache else None
+        
+        if cache is not None and not cache_bypassed():
+            cached = await cache.get(request_key)
+            if cached is not None:
+                logger.debug(f"Response cache hit: {request_key[:12]}")
+                record_call(cached=True)
+                for key, value in cached.items():
+                    yield key, value
+                return
+        
+        record_call()
+        
+        result = {}
+        outcome: Dict[str, Any] = {}
+        fields = self._stream_fields(
+            prompt, system_message, field_types, validator, outcome=outcome, **kwargs
+        )
+        
+        try:
+            async for key, value in fields:
+                result[key] = value
+                yield key, value
+        finally:
+            await fields.aclose()
+        
+        if cache is not None and not outcome.get("truncated"):
+            await cache.set(request_key, result)
+    
+    def _request_key(
+        self,
+        prompt: str,
+        system_message: Optional[str] = None,
+        **kwargs
+    ) -> str:
+        """Build the cache/coalescing key for a generation request."""
+        params = dict(kwargs)
+        if params.get("images"):
+            params["images"] = [image.key for image in params["images"]]
+        return make_cache_key(
+            provider=self.name,
+            model=self.model_name,
+            system_message=system_message,
+            prompt=prompt,
+            temperature=params.pop("temperature", 0.7),
+            max_tokens=params.pop("max_tokens", 2000),
+            **params
+        )
+    
+    def _flight_key(
+        self,
+        request_key: str,
+        field_types: Optional[Dict[str, type]] = None
+    ) -> str:
+        """
+        Build the coalescing key for a generate_json call.
+        
+        Callers expecting different field types parse (and recover cut-off
+        responses) differently, so they must not share a call.
+        
+        Args:
+            request_key: Cache key of the generation request
+            field_types: Expected Python type per top-level key
+            
+        Returns:
+            Coalescing key
+        """
+        if not field_types:
+            return request_key
+        types = ",".join(f"{key}:{kind.__name__}" for key, kind in sorted(field_types.items()))
+        return f"{request_key}:{types}"
+    
+    async def _call_json(
+        self,
+        prompt: str,
+        system_message: Optional[str] = None,
+        field_types: Optional[Dict[str, type]] = None,
+        validator: Optional[FieldValidator] = None,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """Make the upstream JSON call within the concurrency cap, with retries."""
+        kwargs["max_tokens"] = self.fit_max_tokens(
+            prompt, system_message, kwargs.get("max_tokens", 2000)
+        )
+        
+        # Fail fast instead of queueing behind the concurrency cap
+        self.breaker.ensure_available()
+        
+        result = await self._with_retry(
+            lambda: self._generate_json_uncached(
+                prompt, system_message, field_types, validator, **kwargs
+            )
+        )
+        
+        record_model(self.model_name)
+        return result
+    
+    async def _stream_fields(
+        self,
+        prompt: str,
+        system_message: Optional[str] = None,
+        field_types: Optional[Dict[str, type]] = None,
+        validator: Optional[FieldValidator] = None,
+        outcome: Optional[Dict[str, Any]] = None,
+        **kwargs
+    ) -> AsyncGenerator[Tuple[str, Any], None]:
+        """
+        Stream upstream JSON fields within the concurrency cap, with retries.
+        
+        outcome["truncated"] is set when the fields were recovered from a
+        response that was cut off.
         """
+        started = time.monotonic()
+        attempt = 0
+        kwargs["max_tokens"] = self.fit_max_tokens(
+            prompt, system_message, kwargs.get("max_tokens", 2000)
+        )
+        
+        self.breaker.ensure_available()
+        
+        while True:
+            failure: Optional[ProviderError] = None
+            
+            # The slot is held per attempt, not while backing off
+            async with self.concurrency.acquire():
+                self.breaker.check()
+                attempt += 1
+                record_attempt()
+                attempt_started = time.monotonic()
+                
+                parser = JSONFieldStream(field_types, validator)
+                chunks = self.stream(
+                    prompt=prompt,
+                    system_message=system_message,
+                    json_mode=True,
+                    **kwargs
+                )
+                
+                try:
+                    async for chunk in chunks:
+                        for key, value in self._feed_parser(parser, chunk):
+                            yield key, value
+                    
+                    # A truncated stream is accepted only if no field is missing
+                    result = self._close_parser(parser, field_types)
+                    if isinstance(result, TruncatedResponse) and outcome is not None:
+                        outcome["truncated"] = True
+                except ProviderError as e:
+                    if counts_as_outage(e):
+                        self.breaker.record(False, time.monotonic() - attempt_started)
+                    else:
+                        self.breaker.release()
+                    # Fields already sent to the caller cannot be retracted
+                    if parser.fields:
+                        raise
+                    failure = e
+                except BaseException:
+                    # Invalid output or an aborted stream says nothing about upstream health
+                    self.breaker.release()
+                    raise
+                finally:
+                    # Closing the generator drops the upstream stream on abort
+                    await chunks.aclose()
+            
+            if failure is not None:
+                await self._backoff(failure, attempt, started)
+                continue
+            
+            self.breaker.record(True, time.monotonic() - attempt_started)
+            break
+        
+        record_model(self.model_name)
+    
+    async def _with_retry(self, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run an upstream call, retrying transient failures.
+        
+        Each attempt holds a slot of the provider's concurrency cap; the
+        slot is given back while backing off so waiting callers can run.
+        
+        Args:
+            fn: Zero-argument coroutine function making one attempt
+            
+        Returns:
+            Result of the first successful attempt
+            
+        Raises:
+            ProviderError: If the error is fatal or retries are exhausted
+            CircuitOpenError: If the provider's circuit is open
+        """
+        started = time.monotonic()
+        attempt = 0
+        
+        while True:
+            async with self.concurrency.acquire():
+                self.breaker.check()
+                attempt += 1
+                record_attempt()
+                attempt_started = time.monotonic()
+                
+                try:
+                    result = await fn()
+                except ProviderError as e:
+                    if counts_as_outage(e):
+                        self.breaker.record(False, time.monotonic() - attempt_started)
+                    else:
+                        self.breaker.release()
+                    failure = e
+                except BaseException:
+                    # Invalid output or cancellation says nothing about upstream health
+                    self.breaker.release()
+                    raise
+                else:
+                    self.breaker.record(True, time.monotonic() - attempt_started)
+                    return result
+            
+            await self._backoff(failure, attempt, started)
+    
+    async def _backoff(self, error: ProviderError, attempt: int, started: float) -> None:
+        """Sleep before the next attempt or re-raise if it should not happen."""
+        delay = self.retry_policy.delay(error, attempt, time.monotonic() - started)
+        if delay is None:
+            raise error
+        
+        logger.warning(
+            f"{self.name} attempt {attempt} failed ({str(error)}); "
+            f"retrying in {delay:.2f}s"
+        )
+        await asyncio.sleep(delay)
+    
+    def _classify_error(self, message: str, error: Exception) -> ProviderError:
+        """
+        Wrap a client exception as a ProviderError.
+        
+        HTTP 408/409/425/429 and 5xx responses, timeouts and connection
+        failures are retryable; everything else (bad request, auth,
+        invalid model) is fatal.
+        
+        Args:
+            message: Error message for the wrapped error
+            error: Exception raised by the client library
+            
+        Returns:
+            Classified error
+        """
+        if isinstance(error, ProviderError):
+            return error
+        
+        response = getattr(error, "response", None)
+        status_code = getattr(error, "status_code", None) or getattr(response, "status_code", None)
+        
+        if isinstance(status_code, int):
+            retryable = status_code in RETRYABLE_STATUS or status_code >= 500
+        else:
+            status_code = None
+            retryable = isinstance(error, (httpx.TransportError, asyncio.TimeoutError))
+        
+        return ProviderError(
+            message,
+            retryable=retryable,
+            status_code=status_code,
+            retry_after=parse_retry_after(getattr(response, "headers", None)),
+        )
+    
+    async def _generate_json_uncached(
+        self,
+        prompt: str,
+        system_message: Optional[str] = None,
+        field_types: Optional[Dict[str, type]] = None,
+        validator: Optional[FieldValidator] = None,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """Generate and parse a JSON response from the provider."""
+        if self.supports_streaming:
+            parser = JSONFieldStream(field_types, validator)
+            chunks = self.stream(
+                prompt=prompt,
+                system_message=system_message,
+                json_mode=True,
+                **kwargs
+            )
+            
+            try:
+                async for chunk in chunks:
+                    self._feed_parser(parser, chunk)
+            finally:
+                await chunks.aclose()
+            
+            return self._close_parser(parser, field_types)
+        
         response = await self.generate(
             prompt=prompt,
             system_message=system_message,
@@ -86,15 +743,104 @@ class LLMProvider(ABC):
         )
         
         try:
-            return json.loads(response)
-        except json.JSONDecodeError as e:
+            result = loads_lenient(response)
+        except JSONRepairError as e:
             logger.error(f"Failed to parse JSON response: {response}")
             raise ValueError(f"Invalid JSON response from LLM: {str(e)}")
+        
+        if not isinstance(result, dict):
+            raise ValueError("Invalid JSON response from LLM: expected an object")
+        
+        if is_truncated(response):
+            parser = JSONFieldStream(field_types, validator)
+            self._feed_parser(parser, response)
+            return self._recover_truncated(response, parser.fields, field_types)
+        
+        return result
+    
+    def _feed_parser(self, parser: JSONFieldStream, chunk: str) -> List[Tuple[str, Any]]:
+        """Feed a chunk to the parser, logging aborted generations."""
+        try:
+            return parser.feed(chunk)
+        except JSONStreamError as e:
+            logger.error(f"Aborting generation after {len(parser.text)} chars: {str(e)}")
+            raise ValueError(f"Invalid JSON response from LLM: {str(e)}")
+    
+    def _close_parser(
+        self,
+        parser: JSONFieldStream,
+        field_types: Optional[Mapping[str, type]] = None
+    ) -> Dict[str, Any]:
+        """
+        Finish parsing a completed stream.
+        
+        A stream cut off before the object closed (e.g. at max_tokens) is
+        accepted only if every expected field was completed before the
+        cut-off (see _recover_truncated).
+        """
+        try:
+            return parser.close()
+        except JSONStreamError:
+            return self._recover_truncated(parser.text, parser.fields, field_types)
+    
+    @staticmethod
+    def _recover_truncated(
+        text: str,
+        fields: Dict[str, Any],
+        field_types: Optional[Mapping[str, type]]
+    ) -> TruncatedResponse:
+        """
+        Accept the top-level fields completed before a response was cut off.
+        
+        The unfinished field is dropped, so the result is only usable if
+        every expected field was completed. It is returned as a
+        TruncatedResponse, which is never cached.
+        
+        Args:
+            text: Truncated response text
+            fields: Top-level fields completed before the cut-off
+            field_types: Expected Python type per top-level key
+        
+        Raises:
+            ValueError: If an expected field is missing or field_types is not given
+        """
+        missing = [key for key in field_types or () if key not in fields]
+        if not field_types or missing:
+            logger.error(
+                f"Truncated JSON response after {len(text)} chars; "
+                f"missing {', '.join(missing) or 'unknown fields'}"
+            )
+            raise ValueError(
+                "Invalid JSON response from LLM: response was cut off"
+                + (f" before {', '.join(missing)}" if missing else "")
+            )
+        
+        logger.warning(f"Repaired truncated JSON response after {len(text)} chars")
+        return TruncatedResponse(fields)
 
 
 class OpenAIProvider(LLMProvider):
     """OpenAI provider (GPT-4, GPT-3.5)."""
     
+    name = "openai"
+    supports_streaming = True
+    
+    # Model prefixes with structured outputs (json_schema response format)
+    STRUCTURED_OUTPUT_MODELS = ("gpt-4o", "gpt-4.1", "gpt-5", "o1", "o3", "o4")
+    # Snapshots of those families released before structured outputs
+    LEGACY_JSON_MODELS = {"gpt-4o-2024-05-13", "o1-preview", "o1-mini"}
+    # Model prefixes with plain JSON mode (json_object response format)
+    JSON_MODE_MODELS = ("gpt-4", "gpt-3.5-turbo")
+    # Reasoning model prefixes: max_completion_tokens (which also covers the
+    # hidden reasoning tokens) and no temperature
+    REASONING_MODELS = ("o1", "o3", "o4", "gpt-5")
+    # Chat variants of those families that still sample with temperature
+    NON_REASONING_MODELS = ("gpt-5-chat",)
+    # Early reasoning snapshots without system messages
+    NO_SYSTEM_MESSAGE_MODELS = {"o1-preview", "o1-mini"}
+    # "high" detail tiles images in 512px squares after scaling the short side to 768
+    VISION_MAX_SIDE = 768
+    
     def __init__(self, model_name: Optional[str] = None):
         """Initialize OpenAI provider."""
         self.api_key = os.getenv("OPENAI_API_KEY")
@@ -102,10 +848,13 @@ class OpenAIProvider(LLMProvider):
             raise ValueError("OPENAI_API_KEY environment variable not set")
         
         super().__init__(model_name)
+        # Vision detail: "low" is a flat 85 tokens per image at 512px
+        self.image_detail = os.getenv("OPENAI_IMAGE_DETAIL", "low").lower()
         
         try:
             from openai import AsyncOpenAI
-            self.client = AsyncOpenAI(api_key=self.api_key)
+            # Retries are handled by RetryPolicy, not the SDK
+            self.client = AsyncOpenAI(api_key=self.api_key, max_retries=0)
         except ImportError:
             raise ImportError("openai package not installed. Run: pip install openai")
     
@@ -113,38 +862,135 @@ class OpenAIProvider(LLMProvider):
         """Get default OpenAI model."""
         return os.getenv("MODEL_NAME", "gpt-4o-mini")
     
-    async def generate(
+    async def aclose(self) -> None:
+        """Close the underlying HTTP connection pool."""
+        await self.client.close()
+    
+    def _classify_error(self, message: str, error: Exception) -> ProviderError:
+        """Classify OpenAI SDK errors (exhausted quota is not transient)."""
+        from openai import APIConnectionError
+        
+        if getattr(error, "code", None) == "insufficient_quota":
+            return ProviderError(message, retryable=False, status_code=429)
+        
+        if isinstance(error, APIConnectionError):
+            return ProviderError(message, retryable=True)
+        
+        return super()._classify_error(message, error)
+    
+    @property
+    def vision_max_side(self) -> int:
+        """Longest image side: 512px at low detail (OpenAI's low-detail size)."""
+        if IMAGE_MAX_SIDE:
+            return IMAGE_MAX_SIDE
+        return 512 if self.image_detail == "low" else self.VISION_MAX_SIDE
+    
+    def _supports_json_schema(self) -> bool:
+        """Whether the model accepts json_schema response formats."""
+        return (
+            self.model_name.startswith(self.STRUCTURED_OUTPUT_MODELS)
+            and self.model_name not in self.LEGACY_JSON_MODELS
+        )
+    
+    def _is_reasoning_model(self) -> bool:
+        """Whether the model is a reasoning model (o-series, GPT-5)."""
+        return (
+            self.model_name.startswith(self.REASONING_MODELS)
+            and not self.model_name.startswith(self.NON_REASONING_MODELS)
+        )
+    
+    def _record_usage(self, usage: Any) -> None:
+        """
+        Record token usage of a completion.
+        
+        OpenAI caches prompt prefixes of 1024+ tokens automatically; the
+        cached part is reported in prompt_tokens_details.cached_tokens.
+        """
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached_tokens = getattr(details, "cached_tokens", None) or 0
+        
+        record_tokens(usage.prompt_tokens, usage.completion_tokens, cached_tokens)
+        logger.debug(f"OpenAI tokens used: {usage.total_tokens} ({cached_tokens} cached input)")
+    
+    def _build_request(
         self,
         prompt: str,
-        system_message: Optional[str] = None,
-        temperature: float = 0.7,
-        max_tokens: int = 2000,
-        json_mode: bool = True,
+        system_message: Optional[str],
+        temperature: float,
+        max_tokens: int,
+        json_mode: bool,
+        response_schema: Optional[Dict[str, Any]] = None,
+        images: Optional[List[ImageInput]] = None,
         **kwargs
-    ) -> str:
-        """Generate text using OpenAI API."""
+    ) -> Dict[str, Any]:
+        """
+        Build chat completion request parameters.
+        
+        Models with structured outputs are constrained to response_schema;
+        other GPT-4/GPT-3.5 models fall back to plain JSON mode. Images
+        follow the prompt text as data URLs, so the text prefix stays
+        cacheable. Reasoning models get max_completion_tokens and no
+        temperature, which they reject.
+        """
         messages = []
         
-        if system_message:
+        if system_message and self.model_name in self.NO_SYSTEM_MESSAGE_MODELS:
+            prompt = f"{system_message}\n\n{prompt}"
+        elif system_message:
             messages.append({"role": "system", "content": system_message})
         
-        messages.append({"role": "user", "content": prompt})
+        content: Any = prompt
+        if images:
+            content = [{"type": "text", "text": prompt}] + [
+                {
+                    "type": "image_url",
+                    "image_url": {"url": image.data_url, "detail": self.image_detail},
+                }
+                for image in images
+            ]
+        
+        messages.append({"role": "user", "content": content})
         
         # Build request parameters
-        request_params = {
+        request_params: Dict[str, Any] = {
             "model": self.model_name,
             "messages": messages,
-            "temperature": temperature,
-            "max_tokens": max_tokens,
         }
         
+        if self._is_reasoning_model():
+            request_params["max_completion_tokens"] = max_tokens
+        else:
+            request_params["temperature"] = temperature
+            request_params["max_tokens"] = max_tokens
+        
         # Enable JSON mode if supported and requested
-        if json_mode and self.model_name.startswith("gpt-4"):
+        if response_schema and self._supports_json_schema():
+            request_params["response_format"] = {
+                "type": "json_schema",
+                "json_schema": response_schema,
+            }
+        elif (json_mode or response_schema) and self.model_name.startswith(self.JSON_MODE_MODELS):
             request_params["response_format"] = {"type": "json_object"}
         
         # Add any extra kwargs
         request_params.update(kwargs)
         
+        return request_params
+    
+    async def generate(
+        self,
+        prompt: str,
+        system_message: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 2000,
+        json_mode: bool = True,
+        **kwargs
+    ) -> str:
+        """Generate text using OpenAI API."""
+        request_params = self._build_request(
+            prompt, system_message, temperature, max_tokens, json_mode, **kwargs
+        )
+        
         logger.debug(f"OpenAI request: model={self.model_name}, tokens={max_tokens}")
         
         try:
@@ -155,19 +1001,56 @@ class OpenAIProvider(LLMProvider):
             
             # Track token usage
             if response.usage:
-                self.last_tokens_used = response.usage.total_tokens
-                logger.debug(f"OpenAI tokens used: {self.last_tokens_used}")
+                self._record_usage(response.usage)
+            
+            return content
+            
+        except Exception as e:
+            logger.error(f"OpenAI API error: {str(e)}")
+            raise self._classify_error(f"OpenAI generation failed: {str(e)}", e)
+    
+    async def stream(
+        self,
+        prompt: str,
+        system_message: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 2000,
+        json_mode: bool = True,
+        **kwargs
+    ) -> AsyncGenerator[str, None]:
+        """Stream text using OpenAI API."""
+        request_params = self._build_request(
+            prompt, system_message, temperature, max_tokens, json_mode, **kwargs
+        )
+        request_params["stream"] = True
+        request_params["stream_options"] = {"include_usage": True}
+        
+        logger.debug(f"OpenAI stream: model={self.model_name}, tokens={max_tokens}")
+        
+        try:
+            response = await self.client.chat.completions.create(**request_params)
             
-            return content
+            async for chunk in response:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+                
+                # Usage arrives in the final chunk
+                if chunk.usage:
+                    self._record_usage(chunk.usage)
             
         except Exception as e:
             logger.error(f"OpenAI API error: {str(e)}")
-            raise Exception(f"OpenAI generation failed: {str(e)}")
+            raise self._classify_error(f"OpenAI generation failed: {str(e)}", e)
 
 
 class AnthropicProvider(LLMProvider):
     """Anthropic provider (Claude)."""
     
+    name = "anthropic"
+    supports_streaming = True
+    # Images cost about width * height / 750 tokens (under 800 at 768px square)
+    VISION_MAX_SIDE = 768
+    
     def __init__(self, model_name: Optional[str] = None):
         """Initialize Anthropic provider."""
         self.api_key = os.getenv("ANTHROPIC_API_KEY")
@@ -175,10 +1058,15 @@ class AnthropicProvider(LLMProvider):
             raise ValueError("ANTHROPIC_API_KEY environment variable not set")
         
         super().__init__(model_name)
+        # Mark the static prompt prefix for Anthropic's prompt cache
+        self.prompt_caching = (
+            os.getenv("ANTHROPIC_PROMPT_CACHING", "true").lower() in ("1", "true", "yes")
+        )
         
         try:
             from anthropic import AsyncAnthropic
-            self.client = AsyncAnthropic(api_key=self.api_key)
+            # Retries are handled by RetryPolicy, not the SDK
+            self.client = AsyncAnthropic(api_key=self.api_key, max_retries=0)
         except ImportError:
             raise ImportError("anthropic package not installed. Run: pip install anthropic")
     
@@ -186,72 +1074,292 @@ class AnthropicProvider(LLMProvider):
         """Get default Anthropic model."""
         return os.getenv("MODEL_NAME", "claude-3-5-sonnet-20241022")
     
-    async def generate(
+    async def aclose(self) -> None:
+        """Close the underlying HTTP connection pool."""
+        await self.client.close()
+    
+    def _classify_error(self, message: str, error: Exception) -> ProviderError:
+        """Classify Anthropic SDK errors (529 overloaded is retried as 5xx)."""
+        from anthropic import APIConnectionError
+        
+        if isinstance(error, APIConnectionError):
+            return ProviderError(message, retryable=True)
+        
+        return super()._classify_error(message, error)
+    
+    def _record_usage(self, usage: Any, output_tokens: int) -> None:
+        """
+        Record token usage of a message.
+        
+        input_tokens excludes prompt-cache writes and reads, which are
+        reported separately; all three count as prompt tokens.
+        """
+        cache_write = getattr(usage, "cache_creation_input_tokens", None) or 0
+        cache_read = getattr(usage, "cache_read_input_tokens", None) or 0
+        prompt_tokens = usage.input_tokens + cache_write + cache_read
+        
+        record_tokens(prompt_tokens, output_tokens, cache_read)
+        logger.debug(
+            f"Anthropic tokens used: {prompt_tokens + output_tokens} "
+            f"({cache_read} cached input, {cache_write} written to cache)"
+        )
+    
+    def _build_request(
         self,
         prompt: str,
-        system_message: Optional[str] = None,
-        temperature: float = 0.7,
-        max_tokens: int = 2000,
-        json_mode: bool = True,
+        system_message: Optional[str],
+        temperature: float,
+        max_tokens: int,
+        response_schema: Optional[Dict[str, Any]] = None,
+        images: Optional[List[ImageInput]] = None,
         **kwargs
-    ) -> str:
-        """Generate text using Anthropic API."""
+    ) -> Dict[str, Any]:
+        """
+        Build messages request parameters.
+        
+        With prompt caching on, a cache breakpoint is set after the static
+        prompt prefix (or the system message when the prompt has none), so
+        the system message and prefix are read from Anthropic's prompt
+        cache on later calls.
+        
+        Images are sent as base64 image blocks between the static prefix
+        and the request parameters.
+        
+        A response_schema becomes the input schema of a single tool the
+        model is forced to call; its arguments are the JSON response.
+        """
+        prefix, suffix = self._split_prompt(prompt)
+        cache_control = {"type": "ephemeral"} if self.prompt_caching else None
+        image_blocks = [
+            {
+                "type": "image",
+                "source": {"type": "base64", "media_type": image.media_type, "data": image.base64},
+            }
+            for image in images or []
+        ]
+        
+        if prefix and (cache_control or image_blocks):
+            prefix_block: Dict[str, Any] = {"type": "text", "text": prefix}
+            if cache_control:
+                prefix_block["cache_control"] = cache_control
+            content: Any = [prefix_block, *image_blocks, {"type": "text", "text": suffix}]
+        elif image_blocks:
+            content = [*image_blocks, {"type": "text", "text": str(prompt)}]
+        else:
+            content = str(prompt)
+        
         # Anthropic requires system message separately
         request_params = {
             "model": self.model_name,
             "max_tokens": max_tokens,
             "temperature": temperature,
-            "messages": [{"role": "user", "content": prompt}],
+            "messages": [{"role": "user", "content": content}],
         }
         
         if system_message:
-            request_params["system"] = system_message
+            system_block: Dict[str, Any] = {"type": "text", "text": system_message}
+            if cache_control and not prefix:
+                system_block["cache_control"] = cache_control
+            request_params["system"] = [system_block]
+        
+        if response_schema:
+            request_params["tools"] = [{
+                "name": response_schema["name"],
+                "description": "Return the response as this tool's input.",
+                "input_schema": response_schema["schema"],
+            }]
+            request_params["tool_choice"] = {"type": "tool", "name": response_schema["name"]}
         
         # Add any extra kwargs
         request_params.update(kwargs)
         
+        return request_params
+    
+    async def generate(
+        self,
+        prompt: str,
+        system_message: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 2000,
+        json_mode: bool = True,
+        **kwargs
+    ) -> str:
+        """Generate text using Anthropic API."""
+        request_params = self._build_request(
+            prompt, system_message, temperature, max_tokens, **kwargs
+        )
+        
         logger.debug(f"Anthropic request: model={self.model_name}, tokens={max_tokens}")
         
         try:
             response = await self.client.messages.create(**request_params)
             
-            # Extract content
-            content = response.content[0].text
+            # Extract content (forced tool calls carry the JSON as tool input)
+            content = next(
+                block.text if block.type == "text" else json.dumps(block.input)
+                for block in response.content
+                if block.type in ("text", "tool_use")
+            )
             
             # Track token usage
             if response.usage:
-                self.last_tokens_used = response.usage.input_tokens + response.usage.output_tokens
-                logger.debug(f"Anthropic tokens used: {self.last_tokens_used}")
+                self._record_usage(response.usage, response.usage.output_tokens)
             
             return content
             
         except Exception as e:
             logger.error(f"Anthropic API error: {str(e)}")
-            raise Exception(f"Anthropic generation failed: {str(e)}")
+            raise self._classify_error(f"Anthropic generation failed: {str(e)}", e)
+    
+    async def stream(
+        self,
+        prompt: str,
+        system_message: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 2000,
+        json_mode: bool = True,
+        **kwargs
+    ) -> AsyncGenerator[str, None]:
+        """Stream text using Anthropic API."""
+        request_params = self._build_request(
+            prompt, system_message, temperature, max_tokens, **kwargs
+        )
+        request_params["stream"] = True
+        
+        logger.debug(f"Anthropic stream: model={self.model_name}, tokens={max_tokens}")
+        
+        try:
+            response = await self.client.messages.create(**request_params)
+            
+            async for event in response:
+                if event.type == "message_start":
+                    self._record_usage(event.message.usage, 0)
+                elif event.type == "content_block_delta":
+                    if event.delta.type == "text_delta":
+                        yield event.delta.text
+                    elif event.delta.type == "input_json_delta":
+                        yield event.delta.partial_json
+                elif event.type == "message_delta" and event.usage:
+                    record_tokens(completion_tokens=event.usage.output_tokens)
+            
+        except Exception as e:
+            logger.error(f"Anthropic API error: {str(e)}")
+            raise self._classify_error(f"Anthropic generation failed: {str(e)}", e)
 
 
 class OllamaProvider(LLMProvider):
     """Ollama provider (local models)."""
     
-    def __init__(self, model_name: Optional[str] = None):
-        """Initialize Ollama provider."""
+    name = "ollama"
+    supports_streaming = True
+    # LLaVA-style models tile images in 336px squares
+    VISION_MAX_SIDE = 672
+    
+    def __init__(
+        self,
+        model_name: Optional[str] = None,
+        max_connections: Optional[int] = None,
+        max_keepalive_connections: Optional[int] = None,
+        connect_timeout: Optional[float] = None,
+        read_timeout: Optional[float] = None,
+    ):
+        """
+        Initialize Ollama provider.
+        
+        The HTTP client is created once and reused for every generation so
+        bulk runs keep warm connections to the Ollama host.
+        
+        Args:
+            model_name: Override default model name
+            max_connections: Connection pool size (OLLAMA_MAX_CONNECTIONS)
+            max_keepalive_connections: Idle connections kept open (OLLAMA_MAX_KEEPALIVE)
+            connect_timeout: Connect timeout in seconds (OLLAMA_CONNECT_TIMEOUT)
+            read_timeout: Read timeout in seconds (OLLAMA_READ_TIMEOUT)
+        """
         self.base_url = os.getenv("OLLAMA_HOST", "http://localhost:11434")
         super().__init__(model_name)
+        
+        # Ollama only uses the context size it is asked for; without
+        # OLLAMA_NUM_CTX the server default applies and budgets use the model table
+        self.num_ctx = int(os.getenv("OLLAMA_NUM_CTX", "0"))
+        if self.num_ctx:
+            self.context_window = self.num_ctx
+        
+        limits = httpx.Limits(
+            max_connections=max_connections or int(os.getenv("OLLAMA_MAX_CONNECTIONS", "20")),
+            max_keepalive_connections=(
+                max_keepalive_connections or int(os.getenv("OLLAMA_MAX_KEEPALIVE", "10"))
+            ),
+            keepalive_expiry=float(os.getenv("OLLAMA_KEEPALIVE_EXPIRY", "60")),
+        )
+        timeout = httpx.Timeout(
+            read_timeout or float(os.getenv("OLLAMA_READ_TIMEOUT", "120")),
+            connect=connect_timeout or float(os.getenv("OLLAMA_CONNECT_TIMEOUT", "5")),
+        )
+        
+        self.client = httpx.AsyncClient(
+            base_url=self.base_url,
+            limits=limits,
+            timeout=timeout,
+            http2=self._http2_available(),
+        )
+    
+    @staticmethod
+    def _http2_available() -> bool:
+        """
+        Check whether HTTP/2 can be enabled.
+        
+        httpx needs the optional h2 package; HTTP/2 is only negotiated over
+        TLS, so plain http:// hosts keep using HTTP/1.1 keep-alive.
+        """
+        if os.getenv("OLLAMA_HTTP2", "true").lower() not in ("1", "true", "yes"):
+            return False
+        
+        return importlib.util.find_spec("h2") is not None
     
     def get_default_model(self) -> str:
         """Get default Ollama model."""
         return os.getenv("MODEL_NAME", "llama2")
     
-    async def generate(
+    async def aclose(self) -> None:
+        """Close the pooled HTTP client."""
+        await self.client.aclose()
+    
+    def _record_usage(self, result: Dict[str, Any], prompt: str, content: str) -> None:
+        """
+        Record token usage from a final generate response.
+        
+        Ollama reports exact counts (prompt_eval_count, eval_count); the
+        tokenizer estimate is only used when they are missing. The prompt
+        count is omitted when Ollama reused the prompt from its KV cache.
+        """
+        prompt_tokens = result.get("prompt_eval_count")
+        completion_tokens = result.get("eval_count")
+        
+        if completion_tokens is None:
+            prompt_tokens = self.tokenizer.count(prompt)
+            completion_tokens = self.tokenizer.count(content)
+        
+        record_tokens(prompt_tokens or 0, completion_tokens)
+    
+    def _build_request(
         self,
         prompt: str,
-        system_message: Optional[str] = None,
-        temperature: float = 0.7,
-        max_tokens: int = 2000,
-        json_mode: bool = True,
-        **kwargs
-    ) -> str:
-        """Generate text using Ollama API."""
+        system_message: Optional[str],
+        temperature: float,
+        max_tokens: int,
+        json_mode: bool,
+        stream: bool = False,
+        response_schema: Optional[Dict[str, Any]] = None,
+        images: Optional[List[ImageInput]] = None
+    ) -> Dict[str, Any]:
+        """
+        Build generate request body.
+        
+        Output is constrained to response_schema when given (Ollama 0.5+
+        structured outputs), otherwise to any JSON in json_mode. Images
+        need a multimodal model (e.g. llava).
+        """
         # Build full prompt
         full_prompt = prompt
         if system_message:
@@ -264,38 +1372,106 @@ class OllamaProvider(LLMProvider):
             "model": self.model_name,
             "prompt": full_prompt,
             "temperature": temperature,
-            "stream": False,
+            "stream": stream,
             "options": {
                 "num_predict": max_tokens,
+                **({"num_ctx": self.num_ctx} if self.num_ctx else {}),
             }
         }
         
+        if response_schema:
+            request_data["format"] = response_schema["schema"]
+        elif json_mode:
+            request_data["format"] = "json"
+        
+        if images:
+            request_data["images"] = [image.base64 for image in images]
+        
+        return request_data
+    
+    async def generate(
+        self,
+        prompt: str,
+        system_message: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 2000,
+        json_mode: bool = True,
+        **kwargs
+    ) -> str:
+        """Generate text using Ollama API."""
+        request_data = self._build_request(
+            prompt, system_message, temperature, max_tokens, json_mode,
+            response_schema=kwargs.get("response_schema"),
+            images=kwargs.get("images")
+        )
+        
         logger.debug(f"Ollama request: model={self.model_name}, url={self.base_url}")
         
         try:
-            async with httpx.AsyncClient(timeout=120.0) as client:
-                response = await client.post(
-                    f"{self.base_url}/api/generate",
-                    json=request_data
-                )
+            response = await self.client.post("/api/generate", json=request_data)
+            response.raise_for_status()
+            
+            result = response.json()
+            content = result.get("response", "")
+            
+            self._record_usage(result, request_data["prompt"], content)
+            
+            return content
+            
+        except Exception as e:
+            logger.error(f"Ollama API error: {str(e)}")
+            raise self._classify_error(f"Ollama generation failed: {str(e)}", e)
+    
+    async def stream(
+        self,
+        prompt: str,
+        system_message: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 2000,
+        json_mode: bool = True,
+        **kwargs
+    ) -> AsyncGenerator[str, None]:
+        """Stream text using Ollama API (newline-delimited JSON chunks)."""
+        request_data = self._build_request(
+            prompt, system_message, temperature, max_tokens, json_mode, stream=True,
+            response_schema=kwargs.get("response_schema"),
+            images=kwargs.get("images")
+        )
+        
+        logger.debug(f"Ollama stream: model={self.model_name}, url={self.base_url}")
+        
+        try:
+            parts = []
+            final: Dict[str, Any] = {}
+            async with self.client.stream("POST", "/api/generate", json=request_data) as response:
                 response.raise_for_status()
                 
-                result = response.json()
-                content = result.get("response", "")
-                
-                # Estimate token usage (Ollama doesn't provide exact counts)
-                self.last_tokens_used = len(content.split()) * 1.3  # Rough estimate
-                
-                return content
-                
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    
+                    chunk = json.loads(line)
+                    text = chunk.get("response", "")
+                    if text:
+                        parts.append(text)
+                        yield text
+                    
+                    if chunk.get("done"):
+                        final = chunk
+                        break
+            
+            self._record_usage(final, request_data["prompt"], "".join(parts))
+            
         except Exception as e:
             logger.error(f"Ollama API error: {str(e)}")
-            raise Exception(f"Ollama generation failed: {str(e)}")
+            raise self._classify_error(f"Ollama generation failed: {str(e)}", e)
 
 
 class CustomProvider(LLMProvider):
     """Custom API provider."""
     
+    name = "custom"
+    
     def __init__(self, model_name: Optional[str] = None):
         """Initialize custom provider."""
         self.api_url = os.getenv("CUSTOM_API_URL")
@@ -325,10 +1501,374 @@ class CustomProvider(LLMProvider):
         raise NotImplementedError("Custom provider needs to be implemented for your specific API")
 
 
+class FailoverProvider(LLMProvider):
+    """
+    Composite provider that spreads calls over an ordered set of backends.
+    
+    Backends are tried in configured order, with backends that are
+    unhealthy according to recent traffic moved to the end. A call fails
+    over to the next backend when it hits an outage (see counts_as_outage)
+    or exceeds LLM_LATENCY_SLO; fatal 4xx errors and invalid output fail
+    the call right away.
+    With LLM_HEDGE enabled, a second backend is started once the first
+    one runs longer than its recent p95 latency and the first successful
+    response wins.
+    """
+    
+    name = "failover"
+    supports_streaming = True
+    
+    def __init__(
+        self,
+        backends: List[LLMProvider],
+        latency_slo: Optional[float] = None,
+        hedge: Optional[bool] = None,
+        hedge_delay: Optional[float] = None
+    ):
+        """
+        Initialize failover provider.
+        
+        Args:
+            backends: Backends in order of preference
+            latency_slo: Seconds after which a call fails over (LLM_LATENCY_SLO, 0 disables)
+            hedge: Whether to hedge slow calls (LLM_HEDGE)
+            hedge_delay: Hedge delay until enough latency samples exist (LLM_HEDGE_DELAY)
+        """
+        if not backends:
+            raise ValueError("FailoverProvider needs at least one backend")
+        
+        self.backends = backends
+        super().__init__(backends[0].model_name)
+        
+        self.latency_slo = (
+            latency_slo if latency_slo is not None
+            else float(os.getenv("LLM_LATENCY_SLO", "0"))
+        )
+        self.hedge = (
+            hedge if hedge is not None
+            else os.getenv("LLM_HEDGE", "false").lower() in ("1", "true", "yes")
+        )
+        self.hedge_delay = (
+            hedge_delay if hedge_delay is not None
+            else float(os.getenv("LLM_HEDGE_DELAY", "10"))
+        )
+        
+        window = float(os.getenv("LLM_HEALTH_WINDOW", "60"))
+        self.health: Dict[str, BackendHealth] = {
+            self._label(backend): BackendHealth(window=window, latency_slo=self.latency_slo)
+            for backend in backends
+        }
+        
+        # Backends enforce their own concurrency caps
+        self.concurrency = ConcurrencyLimiter(0)
+        
+        # Size prompts for the smallest window so any backend can serve them
+        self.tokenizer = backends[0].tokenizer
+        self.context_window = min(backend.context_window for backend in backends)
+    
+    def get_default_model(self) -> str:
+        """Get model of the preferred backend."""
+        return self.backends[0].model_name
+    
+    @property
+    def vision_max_side(self) -> int:
+        """Image size of the preferred backend."""
+        return self.backends[0].vision_max_side
+    
+    async def aclose(self) -> None:
+        """Close all backends."""
+        for backend in self.backends:
+            await backend.aclose()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get runtime metrics including per-backend health."""
+        stats = super().stats()
+        # Calls are guarded by the backends' own breakers
+        del stats["circuit"]
+        stats["backends"] = {
+            self._label(backend): {
+                **backend.stats(),
+                "health": self.health[self._label(backend)].stats(),
+            }
+            for backend in self.backends
+        }
+        return stats
+    
+    @staticmethod
+    def _label(backend: LLMProvider) -> str:
+        """Get unique backend label (provider:model)."""
+        return f"{backend.name}:{backend.model_name}"
+    
+    @property
+    def available(self) -> bool:
+        """Whether any backend accepts calls."""
+        return any(backend.available for backend in self.backends)
+    
+    @property
+    def status(self) -> str:
+        """Health status: degraded while any backend is not connected."""
+        statuses = {backend.status for backend in self.backends}
+        if statuses == {"connected"}:
+            return "connected"
+        return "degraded" if self.available else "unavailable"
+    
+    def _ordered_backends(self) -> List[LLMProvider]:
+        """Get backends in configured order, open circuits and unhealthy ones last."""
+        return sorted(
+            self.backends,
+            key=lambda backend: (
+                not backend.available,
+                not self.health[self._label(backend)].healthy,
+            )
+        )
+    
+    async def _timed(self, backend: LLMProvider, call: Callable[[LLMProvider], Awaitable[T]]) -> T:
+        """Run a call on one backend and record its outcome."""
+        health = self.health[self._label(backend)]
+        started = time.monotonic()
+        
+        try:
+            result = await call(backend)
+        except asyncio.CancelledError:
+            # A hedge that lost the race is not a backend failure
+            raise
+        except Exception as e:
+            if counts_as_outage(e):
+                health.record(False, time.monotonic() - started)
+            raise
+        
+        health.record(True, time.monotonic() - started)
+        return result
+    
+    async def _failover(self, call: Callable[[LLMProvider], Awaitable[T]]) -> T:
+        """
+        Try backends in order until one succeeds.
+        
+        Args:
+            call: Coroutine function making the call on a backend
+            
+        Returns:
+            Result of the first successful backend
+            
+        Raises:
+            Exception: Error of the last backend if all of them failed, or
+                       the first error that does not count as an outage
+        """
+        backends = self._ordered_backends()
+        
+        if self.hedge and len(backends) > 1:
+            return await self._hedged(backends, call)
+        
+        for index, backend in enumerate(backends):
+            # The last backend gets no SLO timeout: a slow answer beats none
+            is_last = index == len(backends) - 1
+            timeout = self.latency_slo if self.latency_slo > 0 and not is_last else None
+            
+            try:
+                return await asyncio.wait_for(self._timed(backend, call), timeout)
+            except asyncio.TimeoutError:
+                if is_last:
+                    raise
+                self.health[self._label(backend)].record(False, self.latency_slo)
+                logger.warning(
+                    f"{self._label(backend)} exceeded latency SLO of {timeout}s; failing over"
+                )
+            except Exception as e:
+                # Another backend would reject a bad request too
+                if is_last or not counts_as_outage(e):
+                    raise
+                logger.warning(f"{self._label(backend)} failed ({str(e)}); failing over")
+        
+        raise ProviderError("No LLM backends available", retryable=True)
+    
+    async def _hedged(
+        self,
+        backends: List[LLMProvider],
+        call: Callable[[LLMProvider], Awaitable[T]]
+    ) -> T:
+        """
+        Run a call with one hedge, taking the first successful response.
+        
+        The hedge starts when the primary backend exceeds its recent p95
+        latency; calls failing with an outage start the next backend
+        immediately.
+        
+        Args:
+            backends: Backends in order of preference
+            call: Coroutine function making the call on a backend
+            
+        Returns:
+            First successful result
+        """
+        queue = list(backends)
+        pending: Dict["asyncio.Task[T]", LLMProvider] = {}
+        hedged = False
+        last_error: Optional[BaseException] = None
+        
+        def launch() -> None:
+            backend = queue.pop(0)
+            pending[asyncio.ensure_future(self._timed(backend, call))] = backend
+        
+        primary = self.health[self._label(backends[0])]
+        delay = primary.latency_percentile(95) or self.hedge_delay
+        
+        launch()
+        
+        try:
+            while pending:
+                timeout = delay if queue and not hedged else None
+                done, _ = await asyncio.wait(
+                    set(pending), timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                
+                if not done:
+                    hedged = True
+                    logger.info(f"Hedging after {delay:.2f}s with {self._label(queue[0])}")
+                    launch()
+                    continue
+                
+                for task in done:
+                    backend = pending.pop(task)
+                    error = task.exception()
+                    if error is None:
+                        return task.result()
+                    
+                    last_error = error
+                    if not counts_as_outage(error):
+                        raise error
+                    logger.warning(
+                        f"{self._label(backend)} failed ({str(error)}); failing over"
+                    )
+                    if queue:
+                        launch()
+            
+            raise last_error or ProviderError("No LLM backends available", retryable=True)
+        finally:
+            for task in pending:
+                task.cancel()
+    
+    async def _call_json(
+        self,
+        prompt: str,
+        system_message: Optional[str] = None,
+        field_types: Optional[Dict[str, type]] = None,
+        validator: Optional[FieldValidator] = None,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """Make the upstream JSON call on the first backend that succeeds."""
+        return await self._failover(
+            lambda backend: backend._call_json(
+                prompt, system_message, field_types, validator, **kwargs
+            )
+        )
+    
+    async def _stream_fields(
+        self,
+        prompt: str,
+        system_message: Optional[str] = None,
+        field_types: Optional[Dict[str, type]] = None,
+        validator: Optional[FieldValidator] = None,
+        outcome: Optional[Dict[str, Any]] = None,
+        **kwargs
+    ) -> AsyncGenerator[Tuple[str, Any], None]:
+        """Stream fields from the first backend that starts successfully."""
+        backends = self._ordered_backends()
+        
+        for index, backend in enumerate(backends):
+            health = self.health[self._label(backend)]
+            started = time.monotonic()
+            sent = False
+            fields = backend._stream_fields(
+                prompt, system_message, field_types, validator, outcome=outcome, **kwargs
+            )
+            
+            try:
+                async for key, value in fields:
+                    sent = True
+                    yield key, value
+            except Exception as e:
+                outage = counts_as_outage(e)
+                if outage:
+                    health.record(False, time.monotonic() - started)
+                # Fields already sent to the caller cannot be retracted
+                if sent or not outage or index == len(backends) - 1:
+                    raise
+                logger.warning(f"{self._label(backend)} failed ({str(e)}); failing over")
+                continue
+            finally:
+                await fields.aclose()
+            
+            health.record(True, time.monotonic() - started)
+            return
+    
+    async def generate(
+        self,
+        prompt: str,
+        system_message: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 2000,
+        json_mode: bool = True,
+        **kwargs
+    ) -> str:
+        """Generate text on the first backend that succeeds."""
+        async def call(backend: LLMProvider) -> str:
+            return await backend._with_retry(
+                lambda: backend.generate(
+                    prompt=prompt,
+                    system_message=system_message,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    json_mode=json_mode,
+                    **kwargs
+                )
+            )
+        
+        return await self._failover(call)
+    
+    async def stream(
+        self,
+        prompt: str,
+        system_message: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 2000,
+        json_mode: bool = True,
+        **kwargs
+    ) -> AsyncGenerator[str, None]:
+        """Stream text from the first backend that starts successfully."""
+        backends = self._ordered_backends()
+        
+        for index, backend in enumerate(backends):
+            sent = False
+            chunks = backend.stream(
+                prompt=prompt,
+                system_message=system_message,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                json_mode=json_mode,
+                **kwargs
+            )
+            
+            try:
+                async for chunk in chunks:
+                    sent = True
+                    yield chunk
+                return
+            except Exception as e:
+                if sent or not counts_as_outage(e) or index == len(backends) - 1:
+                    raise
+                logger.warning(f"{self._label(backend)} failed ({str(e)}); failing over")
+            finally:
+                await chunks.aclose()
+
+
 def get_provider(provider_name: Optional[str] = None) -> LLMProvider:
     """
     Get LLM provider instance.
     
+    A comma-separated list (e.g. "openai,anthropic:claude-3-5-haiku-20241022")
+    returns a FailoverProvider over those backends; "name:model" selects a
+    model per backend instead of MODEL_NAME.
+    
     Args:
         provider_name: Provider name (openai/anthropic/ollama/custom)
                       If None, uses PROVIDER env var
@@ -342,7 +1882,23 @@ def get_provider(provider_name: Optional[str] = None) -> LLMProvider:
     if not provider_name:
         provider_name = os.getenv("PROVIDER", "openai")
     
-    provider_name = provider_name.lower()
+    if "," in provider_name:
+        backends = []
+        for backend_name in provider_name.split(","):
+            if not backend_name.strip():
+                continue
+            try:
+                backends.append(get_provider(backend_name.strip()))
+            except Exception as e:
+                logger.warning(f"Skipping failover backend {backend_name.strip()}: {str(e)}")
+        
+        if not backends:
+            raise ValueError(f"No failover backend could be initialized: {provider_name}")
+        
+        return FailoverProvider(backends)
+    
+    provider_name, _, model_name = provider_name.partition(":")
+    provider_name = provider_name.strip().lower()
     
     logger.info(f"Initializing LLM provider: {provider_name}")
     
@@ -360,8 +1916,7 @@ def get_provider(provider_name: Optional[str] = None) -> LLMProvider:
         )
     
     try:
-        return providers[provider_name]()
+        return providers[provider_name](model_name.strip() or None)
     except Exception as e:
         logger.error(f"Failed to initialize provider {provider_name}: {str(e)}")
         raise
-
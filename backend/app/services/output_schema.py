@@ -0,0 +1,99 @@
+"""
+JSON schemas for constrained LLM output.
+
+Response schemas are generated from the Pydantic response models, limited
+to the fields the LLM produces, and passed to the provider's native
+structured-output mode (OpenAI json_schema, Anthropic tool use, Ollama
+format) so the model cannot return malformed or mis-shaped JSON.
+"""
+
+from typing import Any, Dict, Iterable, Type
+
+from pydantic import BaseModel
+
+# Validation keywords most structured-output implementations reject; the
+# prompts state these limits and the response models still enforce them
+UNSUPPORTED_KEYWORDS = {
+    "default", "examples", "format", "maxItems", "maxLength", "minItems",
+    "minLength", "pattern", "title",
+}
+
+
+def response_schema(model: Type[BaseModel], fields: Iterable[str], name: str) -> Dict[str, Any]:
+    """
+    Build a response schema for the given model fields.
+
+    References are inlined, every property is required (fields defaulting
+    to None become nullable) and objects are closed. Free-form objects
+    (Dict[str, Any]) cannot be closed; such schemas are marked non-strict
+    and providers use them as guidance only.
+
+    Args:
+        model: Pydantic response model
+        fields: Top-level fields the LLM generates
+        name: Schema name (letters, digits, underscores)
+
+    Returns:
+        {"name": name, "schema": JSON schema, "strict": bool}
+    """
+    full = model.model_json_schema()
+    definitions = full.get("$defs", {})
+    wanted = list(fields)
+
+    top = dict(full)
+    top["properties"] = {key: full["properties"][key] for key in wanted}
+    top["required"] = [key for key in wanted if key in full.get("required", [])]
+
+    state = {"strict": True}
+    schema = _convert(top, definitions, state)
+
+    return {"name": name, "schema": schema, "strict": state["strict"]}
+
+
+def _convert(
+    node: Dict[str, Any],
+    definitions: Dict[str, Any],
+    state: Dict[str, bool]
+) -> Dict[str, Any]:
+    """Inline references and tighten one schema node (recursively)."""
+    if "$ref" in node:
+        target = definitions[node["$ref"].split("/")[-1]]
+        extra = {key: value for key, value in node.items() if key != "$ref"}
+        return _convert({**target, **extra}, definitions, state)
+
+    converted: Dict[str, Any] = {
+        key: value for key, value in node.items()
+        if key not in UNSUPPORTED_KEYWORDS and key != "$defs"
+    }
+
+    if "anyOf" in node:
+        converted["anyOf"] = [_convert(option, definitions, state) for option in node["anyOf"]]
+
+    if "items" in node:
+        converted["items"] = _convert(node["items"], definitions, state)
+
+    if node.get("type") == "object":
+        properties = node.get("properties")
+        if not properties or isinstance(node.get("additionalProperties"), dict):
+            # Free-form mapping: cannot be expressed as a closed object
+            state["strict"] = False
+            return converted
+
+        required = set(node.get("required", []))
+        converted["properties"] = {}
+        for key, value in properties.items():
+            prop = _convert(value, definitions, state)
+            if key not in required and value.get("default", ...) is None and not _nullable(prop):
+                prop = {"anyOf": [prop, {"type": "null"}]}
+            converted["properties"][key] = prop
+        converted["required"] = list(properties)
+        converted["additionalProperties"] = False
+
+    return converted
+
+
+def _nullable(node: Dict[str, Any]) -> bool:
+    """Whether a converted node already accepts null."""
+    return node.get("type") == "null" or any(
+        option.get("type") == "null" for option in node.get("anyOf", [])
+    )
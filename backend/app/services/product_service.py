@@ -3,8 +3,12 @@ Product content generation service.
 """
 
 from app.models.schemas import ProductRequest, ProductData, FAQ, CrossSellSuggestion
-from app.services.llm_provider import get_provider
+from app.services.cache import bypass_cache
+from app.services.llm_provider import LLMProvider, get_provider
+from app.services.output_schema import response_schema
+from app.services.usage import UsageStats, track_usage
 from app.services import prompts
+from typing import Dict, Optional
 import logging
 
 logger = logging.getLogger(__name__)
@@ -13,11 +17,31 @@ logger = logging.getLogger(__name__)
 class ProductService:
     """Service for generating WooCommerce product content."""
     
-    def __init__(self):
-        """Initialize product service."""
-        self.provider = get_provider()
+    # Expected top-level response fields; streamed output is aborted on mismatch
+    RESPONSE_FIELD_TYPES: Dict[str, type] = {
+        "seo_title": str,
+        "short_desc_html": str,
+        "long_desc_html": str,
+        "bullets": list,
+        "faqs": list,
+        "meta_desc": str,
+        "tags": list,
+        "cross_sell_suggestions": list,
+    }
+    
+    # JSON schema the provider constrains the response to
+    RESPONSE_SCHEMA = response_schema(ProductData, RESPONSE_FIELD_TYPES, "product")
+    
+    def __init__(self, provider: Optional[LLMProvider] = None):
+        """
+        Initialize product service.
+        
+        Args:
+            provider: Shared LLM provider (defaults to a new PROVIDER instance)
+        """
+        self.provider = provider or get_provider()
         self.model_name = self.provider.model_name
-        self.last_tokens_used = 0
+        self.usage = UsageStats()
     
     async def generate(self, request: ProductRequest) -> ProductData:
         """
@@ -52,15 +76,15 @@ class ProductService:
             system_message = prompts.get_system_message("product")
             
             # Generate with LLM
-            response_json = await self.provider.generate_json(
-                prompt=prompt,
-                system_message=system_message,
-                temperature=0.7,
-                max_tokens=2500
-            )
-            
-            # Track tokens
-            self.last_tokens_used = self.provider.last_tokens_used
+            with track_usage() as self.usage, bypass_cache(request.no_cache):
+                response_json = await self.provider.generate_json(
+                    prompt=prompt,
+                    system_message=system_message,
+                    temperature=0.7,
+                    max_tokens=2500,
+                    field_types=self.RESPONSE_FIELD_TYPES,
+                    response_schema=self.RESPONSE_SCHEMA
+                )
             
             # Parse response
             product_data = self._parse_product_response(response_json)
@@ -0,0 +1,113 @@
+"""
+Compiled prompt templates.
+
+A template is parsed once (at import) into static text segments and named
+slots. Static segments are interned and shared by every rendered prompt;
+rendering only fills the slots, without re-parsing the template or
+re-building the invariant instructions and JSON schema blocks.
+
+Templates put their invariant text first, so rendered prompts share a
+static prefix that providers can cache (see Prompt.prefix).
+"""
+
+from keyword import iskeyword
+from string import Formatter
+from typing import Any, Callable, Dict, List, Tuple
+import sys
+
+
+class Prompt(str):
+    """Rendered prompt that remembers its static (cacheable) prefix."""
+
+    prefix: str
+
+    def __new__(cls, text: str, prefix: str = "") -> "Prompt":
+        prompt = super().__new__(cls, text)
+        prompt.prefix = prefix
+        return prompt
+
+
+class PromptTemplate:
+    """
+    Prompt compiled into static segments and named variable slots.
+
+    render(**values) is generated at compile time as a single f-string over
+    the interned static segments, so rendering costs the same as a
+    hand-written f-string with the same slots. It returns a Prompt carrying
+    the template's static prefix.
+    """
+
+    __slots__ = ("fields", "prefix", "segments", "render")
+
+    def __init__(self, template: str):
+        """
+        Compile template.
+
+        Uses str.format syntax restricted to plain names: "{topic}" is a
+        slot, "{{" and "}}" are literal braces.
+
+        Args:
+            template: Template text
+
+        Raises:
+            ValueError: If a placeholder is not a plain public name (format
+                specs, conversions and expressions are not supported)
+        """
+        # Alternating static text (str) and slot names (Slot)
+        segments: List[Any] = []
+
+        for literal, field, spec, conversion in Formatter().parse(template):
+            if literal:
+                if segments and not isinstance(segments[-1], Slot):
+                    segments[-1] += literal
+                else:
+                    segments.append(literal)
+            if field is not None:
+                if (spec or conversion or not field.isidentifier() or iskeyword(field)
+                        or field.startswith("_")):
+                    raise ValueError(f"Unsupported placeholder in prompt template: {{{field}}}")
+                segments.append(Slot(field))
+
+        self.segments: Tuple[Any, ...] = tuple(
+            segment if isinstance(segment, Slot) else sys.intern(segment)
+            for segment in segments
+        )
+        self.fields: Tuple[str, ...] = tuple(
+            dict.fromkeys(segment.name for segment in self.segments if isinstance(segment, Slot))
+        )
+        # Text before the first slot: identical for every rendering
+        first = self.segments[0] if self.segments else ""
+        self.prefix: str = "" if isinstance(first, Slot) else first
+        self.render: Callable[..., str] = self._compile()
+
+    def _compile(self) -> Callable[..., str]:
+        """Generate render(): keyword-only slot arguments, one f-string body."""
+        namespace: Dict[str, Any] = {"Prompt": Prompt, "_prefix": self.prefix}
+        pieces = []
+        for index, segment in enumerate(self.segments):
+            if isinstance(segment, Slot):
+                pieces.append(f"{{{segment.name}}}")
+            else:
+                namespace[f"_static_{index}"] = segment
+                pieces.append(f"{{_static_{index}}}")
+
+        params = ", ".join(self.fields)
+        signature = f"*, {params}" if params else ""
+        source = f"def render({signature}):\n    return Prompt(f{''.join(pieces)!r}, _prefix)\n"
+        exec(source, namespace)
+
+        render: Callable[..., str] = namespace["render"]
+        render.__doc__ = f"Render prompt; slots: {', '.join(self.fields) or 'none'}."
+        return render
+
+
+class Slot:
+    """Named variable segment of a PromptTemplate."""
+
+    __slots__ = ("name",)
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __repr__(self) -> str:
+        return f"Slot({self.name!r})"
@@ -2,10 +2,15 @@
 Prompt templates for content generation.
 
 These prompts are carefully engineered to produce consistent,
-high-quality JSON outputs from LLMs.
+high-quality JSON outputs from LLMs. Templates are compiled once at import
+(see PromptTemplate); builders only compute the variable sections.
 """
 
 from typing import Optional, Dict, Any, List
+import json
+import sys
+
+from app.services.prompt_template import PromptTemplate
 
 
 # System messages (constant across all requests)
@@ -20,6 +25,110 @@ CRITICAL RULES:
 6. Use clear, accessible language appropriate for the target audience."""
 
 
+CONTENT_PROMPT = PromptTemplate("""Generate a comprehensive blog post/article for the PARAMETERS at
+the end of this prompt.
+
+REQUIREMENTS:
+- Create an engaging, SEO-optimized article
+- Include H2 and H3 subheadings for structure
+- Write in the given LANGUAGE
+- Use the given TONE
+- Target length: approximately the given LENGTH
+- Naturally incorporate the TARGET KEYWORDS
+- Follow the BRAND VOICE GUIDELINES when present
+- Include practical examples and actionable tips where appropriate
+- Use short paragraphs (3-4 sentences) for readability
+- Add bullet lists where helpful
+
+OUTPUT STRUCTURE (strict JSON):
+{{
+  "title": "Compelling article title (50-60 characters, include primary keyword)",
+  "excerpt": "Engaging summary (40-60 words) that hooks the reader",
+  "outline": [
+    "Introduction",
+    "Main Section 1 Title",
+    "Main Section 2 Title",
+    "Conclusion"
+  ],
+  "body_html": "<h2>Introduction</h2>\\n<p>Opening paragraph...</p>\\n<h2>Section 1</h2>\\n<p>Content...</p>",
+  "meta": {{
+    "seo_title": "SEO-optimized title (max 60 chars, include primary keyword)",
+    "meta_desc": "Compelling meta description (140-160 chars, include keywords, call-to-action)",
+    "slug": "url-friendly-slug-with-primary-keyword"
+  }},
+  "headings": ["Introduction", "Main Section 1", "Subsection 1.1", "Main Section 2", "Conclusion"],
+  "internal_links": [
+    {{
+      "anchor": "suggested anchor text",
+      "suggested_url": "/related-topic/",
+      "rationale": "Why this link is relevant"
+    }}
+  ],
+  "schema_ld_json": "{{\\"@context\\":\\"https://schema.org\\",\\"@type\\":\\"Article\\",\\"headline\\":\\"...\\",...}}"
+}}
+
+PARAMETERS:
+TOPIC: {topic}
+TARGET KEYWORDS: {keywords}
+TONE: {tone}
+LENGTH: {word_count}
+LANGUAGE: {language}
+{audience_section}
+{brand_instructions}
+
+Generate the complete article now in strict JSON format:""")
+
+
+# Target word count range per ContentRequest.length
+CONTENT_WORD_COUNTS = {
+    "short": (300, 500),
+    "medium": (800, 1200),
+    "long": (1500, 2500),
+}
+
+# H2 section count range of outlined articles per ContentRequest.length;
+# outlines are cut to the upper bound
+CONTENT_OUTLINE_SECTIONS = {
+    "short": (2, 4),
+    "medium": (3, 6),
+    "long": (5, 8),
+}
+
+
+def _content_parameters(
+    tone: str,
+    length: str,
+    audience: Optional[str],
+    brand_profile: Optional[Dict[str, Any]]
+) -> Dict[str, str]:
+    """Render the derived PARAMETERS values shared by the content prompts."""
+    # Length guidelines
+    low, high = CONTENT_WORD_COUNTS.get(length, CONTENT_WORD_COUNTS["medium"])
+    word_count = f"{low}-{high} words"
+    
+    # Brand voice section
+    brand_instructions = ""
+    if brand_profile and brand_profile.get("enabled"):
+        brand_instructions = f"""
+BRAND VOICE GUIDELINES:
+- Tone: {brand_profile.get('tone', tone)}
+- Sentence length: {brand_profile.get('sentence_length', 'medium')}
+- Vocabulary level: {brand_profile.get('vocabulary_level', 'intermediate')}
+- Writing style: {brand_profile.get('writing_style', 'clear and engaging')}
+{f"- Common phrases to use: {', '.join(brand_profile.get('common_phrases', []))}" if brand_profile.get('common_phrases') else ""}
+{f"- Content structure: {brand_profile.get('content_structure')}" if brand_profile.get('content_structure') else ""}
+"""
+    
+    # Audience section
+    audience_section = f"Target audience: {audience}" if audience else ""
+    
+    return {
+        "word_count": word_count,
+        "audience_section": audience_section,
+        "brand_instructions": brand_instructions,
+    }
+
+
 def build_content_prompt(
     topic: str,
     keywords: List[str],
@@ -44,157 +153,343 @@ def build_content_prompt(
     Returns:
         Formatted prompt
     """
-    # Length guidelines
-    length_map = {
-        "short": "300-500 words",
-        "medium": "800-1200 words",
-        "long": "1500-2500 words"
-    }
-    word_count = length_map.get(length, "800-1200 words")
-    
-    # Brand voice section
-    brand_instructions = ""
-    if brand_profile and brand_profile.get("enabled"):
-        brand_instructions = f"""
-BRAND VOICE GUIDELINES:
-- Tone: {brand_profile.get('tone', tone)}
-- Sentence length: {brand_profile.get('sentence_length', 'medium')}
-- Vocabulary level: {brand_profile.get('vocabulary_level', 'intermediate')}
-- Writing style: {brand_profile.get('writing_style', 'clear and engaging')}
-{f"- Common phrases to use: {', '.join(brand_profile.get('common_phrases', []))}" if brand_profile.get('common_phrases') else ""}
-{f"- Content structure: {brand_profile.get('content_structure')}" if brand_profile.get('content_structure') else ""}
-"""
+    prompt = CONTENT_PROMPT.render(
+        topic=topic,
+        keywords=", ".join(keywords),
+        tone=tone,
+        language=language,
+        **_content_parameters(tone, length, audience, brand_profile)
+    )
     
-    # Audience section
-    audience_section = f"Target audience: {audience}" if audience else ""
-    
-    prompt = f"""Generate a comprehensive blog post/article with the following parameters:
+    return prompt
 
+
+# Shared tail of the content section prompts
+_CONTENT_SECTION_PARAMETERS = """
+PARAMETERS:
 TOPIC: {topic}
-TARGET KEYWORDS: {', '.join(keywords)}
+TARGET KEYWORDS: {keywords}
 TONE: {tone}
 LENGTH: {word_count}
 LANGUAGE: {language}
 {audience_section}
 {brand_instructions}
+{article_section}
+"""
+
+# One compact prompt per ContentRequest section
+CONTENT_SECTION_PROMPTS = {
+    "body": PromptTemplate("""Write the body of a blog post/article for the PARAMETERS at the end of
+this prompt.
 
 REQUIREMENTS:
-- Create an engaging, SEO-optimized article
+- Create an engaging, SEO-optimized article body (no title, excerpt or meta data)
 - Include H2 and H3 subheadings for structure
-- Write in {language} language
-- Use a {tone} tone
-- Target length: approximately {word_count}
-- Naturally incorporate keywords: {', '.join(keywords)}
+- Write in the given LANGUAGE
+- Use the given TONE
+- Target length: approximately the given LENGTH
+- Naturally incorporate the TARGET KEYWORDS
+- Follow the BRAND VOICE GUIDELINES when present
 - Include practical examples and actionable tips where appropriate
 - Use short paragraphs (3-4 sentences) for readability
 - Add bullet lists where helpful
 
 OUTPUT STRUCTURE (strict JSON):
 {{
-  "title": "Compelling article title (50-60 characters, include primary keyword)",
-  "excerpt": "Engaging summary (40-60 words) that hooks the reader",
   "outline": [
     "Introduction",
     "Main Section 1 Title",
-    "Main Section 2 Title",
     "Conclusion"
   ],
   "body_html": "<h2>Introduction</h2>\\n<p>Opening paragraph...</p>\\n<h2>Section 1</h2>\\n<p>Content...</p>",
-  "meta": {{
-    "seo_title": "SEO-optimized title (max 60 chars, include primary keyword)",
-    "meta_desc": "Compelling meta description (140-160 chars, include keywords, call-to-action)",
-    "slug": "url-friendly-slug-with-primary-keyword"
-  }},
-  "headings": ["Introduction", "Main Section 1", "Subsection 1.1", "Main Section 2", "Conclusion"],
+  "headings": ["Introduction", "Main Section 1", "Subsection 1.1", "Conclusion"],
   "internal_links": [
     {{
       "anchor": "suggested anchor text",
       "suggested_url": "/related-topic/",
       "rationale": "Why this link is relevant"
     }}
-  ],
-  "schema_ld_json": "{{\\"@context\\":\\"https://schema.org\\",\\"@type\\":\\"Article\\",\\"headline\\":\\"...\\",...}}"
+  ]
 }}
+""" + _CONTENT_SECTION_PARAMETERS + """
+Generate the article body now in strict JSON format:"""),
+    "title": PromptTemplate("""Write the title of a blog post/article for the PARAMETERS at the end
+of this prompt.
 
-Generate the complete article now in strict JSON format:"""
-    
-    return prompt
+REQUIREMENTS:
+- 50-60 characters, compelling, with the primary keyword
+- Match the ARTICLE when present
+- Write in the given LANGUAGE and TONE
 
+OUTPUT STRUCTURE (strict JSON):
+{{
+  "title": "Compelling article title"
+}}
+""" + _CONTENT_SECTION_PARAMETERS + """
+Generate the title now in strict JSON format:"""),
+    "excerpt": PromptTemplate("""Write the excerpt of a blog post/article for the PARAMETERS at the
+end of this prompt.
 
-def build_product_prompt(
-    name: str,
-    category: str,
-    attributes: Dict[str, Any],
-    features: List[str],
-    usp: List[str],
-    price: Optional[float],
+REQUIREMENTS:
+- Engaging summary of 40-60 words that hooks the reader
+- Summarize the ARTICLE when present; do not add claims it does not make
+- Write in the given LANGUAGE and TONE
+
+OUTPUT STRUCTURE (strict JSON):
+{{
+  "excerpt": "Engaging summary"
+}}
+""" + _CONTENT_SECTION_PARAMETERS + """
+Generate the excerpt now in strict JSON format:"""),
+    "meta": PromptTemplate("""Write the SEO meta data of a blog post/article for the PARAMETERS at
+the end of this prompt.
+
+REQUIREMENTS:
+- SEO title: max 60 characters, include the primary keyword
+- Meta description: 140-160 characters, include keywords and a call-to-action
+- Slug: short, URL-friendly, with the primary keyword
+- Describe the ARTICLE when present
+- Write in the given LANGUAGE
+
+OUTPUT STRUCTURE (strict JSON):
+{{
+  "meta": {{
+    "seo_title": "SEO-optimized title",
+    "meta_desc": "Compelling meta description",
+    "slug": "url-friendly-slug-with-primary-keyword"
+  }},
+  "schema_ld_json": "{{\\"@context\\":\\"https://schema.org\\",\\"@type\\":\\"Article\\",\\"headline\\":\\"...\\",...}}"
+}}
+""" + _CONTENT_SECTION_PARAMETERS + """
+Generate the meta data now in strict JSON format:"""),
+}
+
+
+def build_content_section_prompt(
+    section: str,
+    topic: str,
     keywords: List[str],
     tone: str,
+    length: str,
     language: str,
-    brand_profile: Optional[Dict[str, Any]] = None
+    audience: Optional[str] = None,
+    brand_profile: Optional[Dict[str, Any]] = None,
+    article: Optional[str] = None
 ) -> str:
     """
-    Build prompt for product content generation.
+    Build prompt generating one section of a blog post/page.
     
     Args:
-        name: Product name
-        category: Product category
-        attributes: Product attributes/specs
-        features: Product features
-        usp: Unique selling points
-        price: Product price (optional)
+        section: Section name (body/title/excerpt/meta)
+        topic: Content topic
         keywords: Target keywords
         tone: Writing tone
+        length: Content length (short/medium/long)
         language: Target language
+        audience: Target audience
         brand_profile: Brand voice profile
+        article: Plain text of the article the section belongs to
         
     Returns:
         Formatted prompt
+        
+    Raises:
+        KeyError: If section is unknown
     """
-    # Format attributes
-    attrs_text = "\n".join([f"  - {k}: {v}" for k, v in attributes.items()])
-    
-    # Format features and USPs
-    features_text = "\n".join([f"  - {f}" for f in features])
-    usp_text = "\n".join([f"  - {u}" for u in usp])
+    article_section = f"ARTICLE:\n{article}" if article else ""
     
-    # Price section
-    price_section = f"PRICE: ${price}" if price else ""
+    prompt = CONTENT_SECTION_PROMPTS[section].render(
+        topic=topic,
+        keywords=", ".join(keywords),
+        tone=tone,
+        language=language,
+        article_section=article_section,
+        **_content_parameters(tone, length, audience, brand_profile)
+    )
     
-    # Brand voice
-    brand_instructions = ""
-    if brand_profile and brand_profile.get("enabled"):
-        brand_instructions = f"""
-BRAND VOICE:
-- Write in a {brand_profile.get('tone', tone)} tone
-- {brand_profile.get('writing_style', 'Clear and benefit-focused')}
-"""
-    
-    prompt = f"""Generate compelling WooCommerce product content with the following details:
+    return prompt
 
-PRODUCT NAME: {name}
-CATEGORY: {category}
-{price_section}
 
-ATTRIBUTES/SPECIFICATIONS:
-{attrs_text}
+CONTENT_OUTLINE_PROMPT = PromptTemplate("""Plan the outline of a long blog post/article for the
+PARAMETERS at the end of this prompt. Each H2 section will be written separately from this outline.
 
-KEY FEATURES:
-{features_text}
+REQUIREMENTS:
+- The number of H2 sections given as SECTIONS, starting with an introduction and ending with a
+  conclusion
+- Give each section 2-4 key points; points must not repeat across sections
+- Write headings in the given LANGUAGE, naturally including the TARGET KEYWORDS
+- Suggest internal links for the article as a whole
+
+OUTPUT STRUCTURE (strict JSON):
+{{
+  "outline": [
+    {{
+      "heading": "Introduction",
+      "points": ["What the reader will learn", "Why the topic matters now"]
+    }},
+    {{
+      "heading": "Main Section 1 Title",
+      "points": ["Key point", "Practical example"]
+    }}
+  ],
+  "internal_links": [
+    {{
+      "anchor": "suggested anchor text",
+      "suggested_url": "/related-topic/",
+      "rationale": "Why this link is relevant"
+    }}
+  ]
+}}
+""" + _CONTENT_SECTION_PARAMETERS + """SECTIONS: {section_count}
+
+Generate the outline now in strict JSON format:""")
 
-UNIQUE SELLING POINTS:
-{usp_text}
 
-TARGET KEYWORDS: {', '.join(keywords)}
+CONTENT_OUTLINE_SECTION_PROMPT = PromptTemplate("""Write one H2 section of a long blog post/article.
+The article parameters, its full outline and the section to write are given at the end of this
+prompt.
+
+REQUIREMENTS:
+- Write only the SECTION TO WRITE; other sections are written separately
+- Start with its HEADING as an <h2>; use <h3> subheadings where helpful
+- Cover its KEY POINTS without repeating what other outline sections cover
+- Do not introduce the whole article unless this is the first section, and
+  do not conclude it unless this is the last one
+- Write in the given LANGUAGE and TONE; follow the BRAND VOICE GUIDELINES when present
+- Target length: approximately the given SECTION LENGTH
+- Naturally incorporate the TARGET KEYWORDS
+- Use short paragraphs (3-4 sentences) and bullet lists where helpful
+
+OUTPUT STRUCTURE (strict JSON):
+{{
+  "html": "<h2>Section heading</h2>\\n<p>Content...</p>\\n<h3>Subsection</h3>\\n<p>Content...</p>"
+}}
+
+PARAMETERS:
+TOPIC: {topic}
+TARGET KEYWORDS: {keywords}
 TONE: {tone}
 LANGUAGE: {language}
+{audience_section}
 {brand_instructions}
 
+OUTLINE:
+{outline}
+
+SECTION TO WRITE:
+POSITION: {position} of {total_sections}
+HEADING: {heading}
+KEY POINTS:
+{points}
+SECTION LENGTH: {section_word_count}
+
+Generate the section now in strict JSON format:""")
+
+
+def build_content_outline_prompt(
+    topic: str,
+    keywords: List[str],
+    tone: str,
+    length: str,
+    language: str,
+    audience: Optional[str] = None,
+    brand_profile: Optional[Dict[str, Any]] = None
+) -> str:
+    """
+    Build prompt planning the H2 outline of a long article.
+    
+    Args:
+        topic: Content topic
+        keywords: Target keywords
+        tone: Writing tone
+        length: Content length (short/medium/long)
+        language: Target language
+        audience: Target audience
+        brand_profile: Brand voice profile
+        
+    Returns:
+        Formatted prompt
+    """
+    low, high = CONTENT_OUTLINE_SECTIONS.get(length, CONTENT_OUTLINE_SECTIONS["medium"])
+    
+    prompt = CONTENT_OUTLINE_PROMPT.render(
+        topic=topic,
+        keywords=", ".join(keywords),
+        tone=tone,
+        language=language,
+        article_section="",
+        section_count=f"{low}-{high}",
+        **_content_parameters(tone, length, audience, brand_profile)
+    )
+    
+    return prompt
+
+
+def build_content_outline_section_prompt(
+    outline: List[Dict[str, Any]],
+    index: int,
+    topic: str,
+    keywords: List[str],
+    tone: str,
+    length: str,
+    language: str,
+    audience: Optional[str] = None,
+    brand_profile: Optional[Dict[str, Any]] = None
+) -> str:
+    """
+    Build prompt writing one H2 section of an outlined article.
+    
+    Everything up to the outline is the same for all sections of an
+    article, so it can be served from the provider's prompt cache.
+    
+    Args:
+        outline: Outline sections ({"heading": str, "points": [str]})
+        index: 0-based index of the section to write
+        topic: Content topic
+        keywords: Target keywords
+        tone: Writing tone
+        length: Content length of the whole article (short/medium/long)
+        language: Target language
+        audience: Target audience
+        brand_profile: Brand voice profile
+        
+    Returns:
+        Formatted prompt
+    """
+    parameters = _content_parameters(tone, length, audience, brand_profile)
+    low, high = CONTENT_WORD_COUNTS.get(length, CONTENT_WORD_COUNTS["medium"])
+    section = outline[index]
+    
+    prompt = CONTENT_OUTLINE_SECTION_PROMPT.render(
+        topic=topic,
+        keywords=", ".join(keywords),
+        tone=tone,
+        language=language,
+        audience_section=parameters["audience_section"],
+        brand_instructions=parameters["brand_instructions"],
+        outline="\n".join(
+            f"{i}. {item['heading']}"
+            + "".join(f"\n   - {point}" for point in item.get("points", []))
+            for i, item in enumerate(outline, 1)
+        ),
+        position=index + 1,
+        total_sections=len(outline),
+        heading=section["heading"],
+        points="\n".join(f"- {point}" for point in section.get("points", [])),
+        section_word_count=f"{low // len(outline)}-{high // len(outline)} words"
+    )
+    
+    return prompt
+
+
+PRODUCT_PROMPT = PromptTemplate("""Generate compelling WooCommerce product content for the
+PRODUCT DETAILS at the end of this prompt.
+
 REQUIREMENTS:
 - Write benefit-focused, persuasive copy
 - Emphasize how features solve customer problems
-- Use {language} language
-- Maintain a {tone} tone
+- Use the given LANGUAGE
+- Maintain the given TONE (or the BRAND VOICE when present)
 - Create scannable content with clear sections
 - Focus on customer benefits, not just features
 - Generate realistic, helpful FAQs (5-7 questions)
@@ -226,32 +521,98 @@ OUTPUT STRUCTURE (strict JSON):
   ]
 }}
 
-Generate the complete product content now in strict JSON format:"""
-    
-    return prompt
+PRODUCT DETAILS:
+PRODUCT NAME: {name}
+CATEGORY: {category}
+{price_section}
 
+ATTRIBUTES/SPECIFICATIONS:
+{attrs_text}
 
-def build_image_analysis_prompt(
-    context: str,
-    language: str
+KEY FEATURES:
+{features_text}
+
+UNIQUE SELLING POINTS:
+{usp_text}
+
+TARGET KEYWORDS: {keywords}
+TONE: {tone}
+LANGUAGE: {language}
+{brand_instructions}
+
+Generate the complete product content now in strict JSON format:""")
+
+
+def build_product_prompt(
+    name: str,
+    category: str,
+    attributes: Dict[str, Any],
+    features: List[str],
+    usp: List[str],
+    price: Optional[float],
+    keywords: List[str],
+    tone: str,
+    language: str,
+    brand_profile: Optional[Dict[str, Any]] = None
 ) -> str:
     """
-    Build prompt for image analysis.
+    Build prompt for product content generation.
     
     Args:
-        context: Image context (product/blog/etc)
+        name: Product name
+        category: Product category
+        attributes: Product attributes/specs
+        features: Product features
+        usp: Unique selling points
+        price: Product price (optional)
+        keywords: Target keywords
+        tone: Writing tone
         language: Target language
+        brand_profile: Brand voice profile
         
     Returns:
         Formatted prompt
     """
-    prompt = f"""Analyze this image and provide detailed insights for {context} content.
+    # Format attributes
+    attrs_text = "\n".join([f"  - {k}: {v}" for k, v in attributes.items()])
+    
+    # Format features and USPs
+    features_text = "\n".join([f"  - {f}" for f in features])
+    usp_text = "\n".join([f"  - {u}" for u in usp])
+    
+    # Price section
+    price_section = f"PRICE: ${price}" if price else ""
+    
+    # Brand voice
+    brand_instructions = ""
+    if brand_profile and brand_profile.get("enabled"):
+        brand_instructions = f"""
+BRAND VOICE:
+- Write in a {brand_profile.get('tone', tone)} tone
+- {brand_profile.get('writing_style', 'Clear and benefit-focused')}
+"""
+    
+    prompt = PRODUCT_PROMPT.render(
+        name=name,
+        category=category,
+        price_section=price_section,
+        attrs_text=attrs_text,
+        features_text=features_text,
+        usp_text=usp_text,
+        keywords=", ".join(keywords),
+        tone=tone,
+        language=language,
+        brand_instructions=brand_instructions
+    )
+    
+    return prompt
 
-CONTEXT: {context}
-LANGUAGE: {language}
+
+IMAGE_ANALYSIS_PROMPT = PromptTemplate("""Analyze the attached image and provide detailed insights
+for the CONTEXT given at the end of this prompt.
 
 REQUIREMENTS:
-- Describe what you see in detail
+- Describe what you see in detail; report only what is visible in the image
 - Identify key visual features and elements
 - Determine the target audience based on the image
 - Extract selling points or key messages from the visual
@@ -261,7 +622,7 @@ REQUIREMENTS:
 
 OUTPUT STRUCTURE (strict JSON):
 {{
-  "description": "Detailed description of the image in {language}",
+  "description": "Detailed description of the image in the given LANGUAGE",
   "features": [
     "Visual feature 1 (color, shape, composition)",
     "Visual feature 2",
@@ -272,47 +633,39 @@ OUTPUT STRUCTURE (strict JSON):
     "Key selling point visible in image",
     "Another visual selling point"
   ],
-  "alt_text": "Concise, descriptive alt-text under 125 characters in {language}",
+  "alt_text": "Concise, descriptive alt-text under 125 characters in the given LANGUAGE",
   "suggested_category": "Product category if applicable",
   "confidence": 0.95
 }}
 
-Generate the image analysis now in strict JSON format:"""
-    
-    return prompt
+PARAMETERS:
+CONTEXT: {context}
+LANGUAGE: {language}
 
+Generate the image analysis now in strict JSON format:""")
 
-def build_seo_optimization_prompt(
-    content_html: str,
-    current_title: Optional[str],
-    keywords: List[str],
-    language: str,
-    post_type: str
+
+def build_image_analysis_prompt(
+    context: str,
+    language: str
 ) -> str:
     """
-    Build prompt for SEO optimization.
+    Build prompt for image analysis.
     
     Args:
-        content_html: Content HTML to optimize
-        current_title: Current title
-        keywords: Target keywords
-        language: Content language
-        post_type: Post type (post/product)
+        context: Image context (product/blog/etc)
+        language: Target language
         
     Returns:
         Formatted prompt
     """
-    current_title_section = f"CURRENT TITLE: {current_title}" if current_title else ""
+    prompt = IMAGE_ANALYSIS_PROMPT.render(context=context, language=language)
     
-    prompt = f"""Analyze and optimize this content for SEO:
+    return prompt
 
-{current_title_section}
-TARGET KEYWORDS: {', '.join(keywords)}
-LANGUAGE: {language}
-CONTENT TYPE: {post_type}
 
-CONTENT TO OPTIMIZE:
-{content_html[:3000]}  
+SEO_OPTIMIZATION_PROMPT = PromptTemplate("""Analyze and optimize the content at the end of this
+prompt for SEO.
 
 REQUIREMENTS:
 - Generate SEO-optimized title (max 60 characters, include primary keyword)
@@ -321,9 +674,8 @@ REQUIREMENTS:
 - Suggest improved H2/H3 headings for better structure
 - Recommend strategic internal linking opportunities
 - Create appropriate schema.org JSON-LD markup
-- Calculate readability metrics
-- Analyze keyword density
 - Provide actionable SEO improvement suggestions
+  (readability and keyword density are measured separately; do not report them)
 
 OUTPUT STRUCTURE (strict JSON):
 {{
@@ -346,49 +698,170 @@ OUTPUT STRUCTURE (strict JSON):
   ],
   "schema_ld_json": {{
     "@context": "https://schema.org",
-    "@type": "{{"Article" if post_type == "post" else "Product"}}",
+    "@type": "The given SCHEMA TYPE",
     "headline": "...",
     "author": {{"@type": "Person", "name": "Author"}},
     "datePublished": "2024-10-16"
   }},
-  "readability_score": 65,
-  "keyword_density": {{
-    "keyword1": 2.3,
-    "keyword2": 1.8
-  }},
   "suggestions": [
     "Add more subheadings to break up long sections",
-    "Reduce keyword density for 'keyword' from 3.5% to 2%",
     "Add internal links to related content"
   ]
 }}
 
-Generate the SEO optimization analysis now in strict JSON format:"""
+CONTENT DETAILS:
+{current_title_section}
+TARGET KEYWORDS: {keywords}
+LANGUAGE: {language}
+CONTENT TYPE: {post_type}
+SCHEMA TYPE: {schema_type}
+
+{content_section}
+
+Generate the SEO optimization analysis now in strict JSON format:""")
+
+
+def build_seo_optimization_prompt(
+    content_html: str,
+    current_title: Optional[str],
+    keywords: List[str],
+    language: str,
+    post_type: str,
+    outline: Optional[List[str]] = None
+) -> str:
+    """
+    Build prompt for SEO optimization.
+    
+    Args:
+        content_html: Content HTML to optimize (the opening section when outline is given)
+        current_title: Current title
+        keywords: Target keywords
+        language: Content language
+        post_type: Post type (post/product)
+        outline: Headings of the full document, for long content sent in sections
+        
+    Returns:
+        Formatted prompt
+    """
+    current_title_section = f"CURRENT TITLE: {current_title}" if current_title else ""
+    
+    content_section = f"CONTENT TO OPTIMIZE:\n{content_html}"
+    if outline is not None:
+        outline_text = "\n".join(f"- {heading}" for heading in outline) or "- (no headings)"
+        content_section = f"""DOCUMENT OUTLINE (full post; later sections are reviewed separately):
+{outline_text}
+
+OPENING SECTION:
+{content_html}"""
+    
+    prompt = SEO_OPTIMIZATION_PROMPT.render(
+        current_title_section=current_title_section,
+        keywords=", ".join(keywords),
+        language=language,
+        post_type=post_type,
+        content_section=content_section,
+        schema_type="Article" if post_type == "post" else "Product"
+    )
     
     return prompt
 
 
-def build_brand_training_prompt(
-    samples_text: str,
+SEO_SECTION_PROMPT = PromptTemplate("""Review one section of a long post for SEO. The section and
+its position are given at the end of this prompt.
+
+REQUIREMENTS:
+- Suggest improved H2/H3 headings for this section only
+- Recommend internal linking opportunities from this section's text
+- Provide actionable SEO suggestions specific to this section
+  (readability and keyword density are measured separately; do not report them)
+
+OUTPUT STRUCTURE (strict JSON):
+{{
+  "suggested_headings": [
+    {{
+      "level": "h2",
+      "text": "Clear, keyword-rich heading",
+      "rationale": "Why this heading improves SEO and readability"
+    }}
+  ],
+  "internal_links": [
+    {{
+      "anchor": "relevant anchor text",
+      "suggested_url": "/related-content/",
+      "rationale": "Why this link adds value"
+    }}
+  ],
+  "suggestions": [
+    "Section-specific improvement"
+  ]
+}}
+
+SECTION DETAILS:
+POSITION: {section_number} of {total_sections}
+TARGET KEYWORDS: {keywords}
+LANGUAGE: {language}
+
+SECTION:
+{section_html}
+
+Generate the section review now in strict JSON format:""")
+
+
+def build_seo_section_prompt(
+    section_html: str,
+    keywords: List[str],
     language: str,
-    num_samples: int
+    section_number: int,
+    total_sections: int
 ) -> str:
     """
-    Build prompt for brand voice training.
+    Build prompt reviewing one section of a long document for SEO.
     
     Args:
-        samples_text: Concatenated content samples
+        section_html: Section HTML
+        keywords: Target keywords
         language: Content language
-        num_samples: Number of samples provided
+        section_number: 1-based position of the section
+        total_sections: Number of sections in the document
         
     Returns:
         Formatted prompt
     """
-    prompt = f"""Analyze these {num_samples} content samples to extract the brand's unique writing voice and style:
+    prompt = SEO_SECTION_PROMPT.render(
+        section_number=section_number,
+        total_sections=total_sections,
+        keywords=", ".join(keywords),
+        language=language,
+        section_html=section_html
+    )
+    
+    return prompt
+
+
+BRAND_ANALYSIS_SECTION = PromptTemplate("""
+MEASURED ACROSS ALL SAMPLES (use these figures, do not re-estimate them):
+- Average sentence length: {avg_sentence_length} words
+- Average paragraph length: {avg_paragraph_length} sentences
+- Reading ease: {reading_ease}
+- Most frequent content words: {common_words}
+""")
+
+
+def _render_analysis_section(analysis: Optional[Dict[str, Any]]) -> str:
+    """Render measured corpus metrics for brand prompts ("" without analysis)."""
+    if not analysis:
+        return ""
+    
+    return BRAND_ANALYSIS_SECTION.render(
+        avg_sentence_length=analysis['avg_sentence_length'],
+        avg_paragraph_length=analysis['avg_paragraph_length'],
+        reading_ease=analysis.get('flesch_reading_ease') or 'n/a',
+        common_words=', '.join(analysis.get('common_words', []))
+    )
 
-LANGUAGE: {language}
-SAMPLES:
-{samples_text[:8000]}
+
+BRAND_TRAINING_PROMPT = PromptTemplate("""Analyze the content samples at the end of this prompt to
+extract the brand's unique writing voice and style.
 
 ANALYSIS REQUIREMENTS:
 1. Overall Tone: (professional, casual, friendly, authoritative, enthusiastic, etc.)
@@ -416,20 +889,252 @@ OUTPUT STRUCTURE (strict JSON):
     "punctuation_patterns": "Notable punctuation patterns",
     "content_structure": "How content is typically organized"
   }},
-  "prompt_template": "When writing content, adopt this voice: [tone] tone with [sentence_length] sentences. Use [vocabulary_level] vocabulary. Structure paragraphs as [paragraph_structure]. Incorporate phrases like: [common_phrases]. Follow a [writing_style] style. [Additional specific instructions based on analysis]",
-  "analysis": {{
-    "avg_sentence_length": 17.5,
-    "avg_paragraph_length": 3.2,
-    "flesch_reading_ease": 62.5,
-    "common_words": ["word1", "word2", "word3"]
+  "prompt_template": "When writing content, adopt this voice: [tone] tone with [sentence_length] sentences. Use [vocabulary_level] vocabulary. Structure paragraphs as [paragraph_structure]. Incorporate phrases like: [common_phrases]. Follow a [writing_style] style. [Additional specific instructions based on analysis]"
+}}
+
+SAMPLE COUNT: {num_samples}
+LANGUAGE: {language}
+{analysis_section}
+SAMPLES:
+{samples_text}
+
+Generate the brand voice analysis now in strict JSON format:""")
+
+
+def build_brand_training_prompt(
+    samples_text: str,
+    language: str,
+    num_samples: int,
+    analysis: Optional[Dict[str, Any]] = None
+) -> str:
+    """
+    Build prompt for brand voice training.
+    
+    Args:
+        samples_text: Concatenated content samples
+        language: Content language
+        num_samples: Number of samples provided
+        analysis: Metrics measured over the full corpus (optional)
+        
+    Returns:
+        Formatted prompt
+    """
+    analysis_section = _render_analysis_section(analysis)
+    
+    prompt = BRAND_TRAINING_PROMPT.render(
+        num_samples=num_samples,
+        language=language,
+        analysis_section=analysis_section,
+        samples_text=samples_text
+    )
+    
+    return prompt
+
+
+BRAND_PARTIAL_PROMPT = PromptTemplate("""Describe the writing voice of the content samples at the
+end of this prompt. They are one batch of a larger corpus; describe only what you observe there.
+
+OUTPUT STRUCTURE (strict JSON):
+{{
+  "brand_profile": {{
+    "tone": "Observed tone",
+    "sentence_length": "short/medium/long",
+    "vocabulary_level": "basic/intermediate/advanced",
+    "paragraph_structure": "Typical paragraph structure",
+    "common_phrases": ["Recurring phrase 1", "Recurring phrase 2"],
+    "writing_style": "Writing style",
+    "punctuation_patterns": "Notable punctuation patterns",
+    "content_structure": "How content is organized"
   }}
 }}
 
-Generate the brand voice analysis now in strict JSON format:"""
+SAMPLE COUNT: {num_samples}
+LANGUAGE: {language}
+SAMPLES:
+{samples_text}
+
+Generate the partial voice profile now in strict JSON format:""")
+
+
+def build_brand_partial_prompt(
+    samples_text: str,
+    language: str,
+    num_samples: int
+) -> str:
+    """
+    Build map-step prompt extracting a partial voice profile from a group of samples.
+    
+    Args:
+        samples_text: Concatenated samples of one group
+        language: Content language
+        num_samples: Number of samples in the group
+        
+    Returns:
+        Formatted prompt
+    """
+    prompt = BRAND_PARTIAL_PROMPT.render(
+        num_samples=num_samples,
+        language=language,
+        samples_text=samples_text
+    )
+    
+    return prompt
+
+
+BRAND_MERGE_PROMPT = PromptTemplate("""The partial voice profiles at the end of this prompt were
+extracted from batches of a brand's content samples. Merge them into one brand voice profile,
+weighting batches by their sample count and keeping traits that recur across batches.
+
+OUTPUT STRUCTURE (strict JSON):
+{{
+  "brand_profile": {{
+    "tone": "Identified overall tone",
+    "sentence_length": "short/medium/long (X-Y words average)",
+    "vocabulary_level": "basic/intermediate/advanced",
+    "paragraph_structure": "Typical paragraph structure observed",
+    "common_phrases": ["Recurring phrase 1", "Recurring phrase 2", "Recurring phrase 3"],
+    "writing_style": "Primary writing style description",
+    "punctuation_patterns": "Notable punctuation patterns",
+    "content_structure": "How content is typically organized"
+  }},
+  "prompt_template": "Instructions for writing in the merged voice (see PROMPT TEMPLATE)"
+}}
+
+PROMPT TEMPLATE: When writing content, adopt this voice: [tone] tone with [sentence_length]
+sentences. Use [vocabulary_level] vocabulary. Structure paragraphs as [paragraph_structure].
+Incorporate phrases like: [common_phrases]. Follow a [writing_style] style. [Additional specific
+instructions based on analysis]
+
+BATCHES: {num_partials}
+TOTAL SAMPLES: {num_samples}
+LANGUAGE: {language}
+{analysis_section}
+PARTIAL PROFILES:
+{partials_text}
+
+Generate the merged brand voice profile now in strict JSON format:""")
+
+
+def build_brand_merge_prompt(
+    partials: List[Dict[str, Any]],
+    language: str,
+    num_samples: int,
+    analysis: Optional[Dict[str, Any]] = None
+) -> str:
+    """
+    Build reduce-step prompt merging partial voice profiles into one.
+    
+    Args:
+        partials: Partial profiles with the number of samples each covers
+        language: Content language
+        num_samples: Total number of samples
+        analysis: Metrics measured over the full corpus (optional)
+        
+    Returns:
+        Formatted prompt
+    """
+    partials_text = "\n".join(
+        f"- Batch of {partial['samples']} samples: "
+        f"{json.dumps(partial['profile'], ensure_ascii=False)}"
+        for partial in partials
+    )
+    
+    analysis_section = _render_analysis_section(analysis)
+    
+    prompt = BRAND_MERGE_PROMPT.render(
+        num_partials=len(partials),
+        num_samples=num_samples,
+        language=language,
+        analysis_section=analysis_section,
+        partials_text=partials_text
+    )
+    
+    return prompt
+
+
+FIELD_REPAIR_PROMPT = PromptTemplate("""Rewrite one field of a generated response so it meets its
+length limit. The field, its current value and the context are given at the end of this prompt.
+
+REQUIREMENTS:
+- Keep the meaning, keywords and tone of the current value
+- Meet the LENGTH exactly (count every character, including spaces)
+- Write complete words and sentences; never end mid-word
+- Write in the given LANGUAGE
+
+OUTPUT STRUCTURE (strict JSON):
+{{
+  "value": "The rewritten field value"
+}}
+
+FIELD DETAILS:
+FIELD: {field}
+LENGTH: {length}
+LANGUAGE: {language}
+CONTEXT: {context}
+
+CURRENT VALUE:
+{value}
+
+Generate the rewritten value now in strict JSON format:""")
+
+
+def build_field_repair_prompt(
+    field: str,
+    value: str,
+    language: str,
+    context: str,
+    min_length: Optional[int] = None,
+    max_length: Optional[int] = None
+) -> str:
+    """
+    Build prompt re-generating a single field that failed its length limits.
+    
+    Args:
+        field: Field name (dotted path for nested fields)
+        value: Current value ("" when missing)
+        language: Content language
+        context: Short description of the content (title, topic, keywords)
+        min_length: Minimum characters
+        max_length: Maximum characters
+        
+    Returns:
+        Formatted prompt
+    """
+    if min_length and max_length is not None:
+        length = f"between {min_length} and {max_length} characters"
+    elif max_length is not None:
+        length = f"at most {max_length} characters"
+    else:
+        length = f"at least {min_length} characters"
+    
+    prompt = FIELD_REPAIR_PROMPT.render(
+        field=field,
+        length=length,
+        language=language,
+        context=context,
+        value=value or "(missing)"
+    )
     
     return prompt
 
 
+# Content-type specialization appended to SYSTEM_MESSAGE_BASE
+SYSTEM_MESSAGE_SPECIALIZATIONS = {
+    "product": (
+        "You specialize in e-commerce product descriptions that convert browsers into buyers."
+    ),
+    "seo": "You specialize in technical SEO optimization and search engine ranking strategies.",
+    "image": "You specialize in visual analysis and creating accessible image descriptions.",
+    "brand": "You specialize in analyzing writing styles and extracting brand voice patterns.",
+}
+
+# Full system message per content type, built once
+SYSTEM_MESSAGES = {
+    content_type: sys.intern(f"{SYSTEM_MESSAGE_BASE}\n\n{specific_instruction}".strip())
+    for content_type, specific_instruction in SYSTEM_MESSAGE_SPECIALIZATIONS.items()
+}
+
+
 def get_system_message(content_type: str = "general") -> str:
     """
     Get system message for specific content type.
@@ -440,14 +1145,4 @@ def get_system_message(content_type: str = "general") -> str:
     Returns:
         System message
     """
-    type_specific = {
-        "product": "You specialize in e-commerce product descriptions that convert browsers into buyers.",
-        "seo": "You specialize in technical SEO optimization and search engine ranking strategies.",
-        "image": "You specialize in visual analysis and creating accessible image descriptions.",
-        "brand": "You specialize in analyzing writing styles and extracting brand voice patterns.",
-    }
-    
-    specific_instruction = type_specific.get(content_type, "")
-    
-    return f"{SYSTEM_MESSAGE_BASE}\n\n{specific_instruction}".strip()
-
+    return SYSTEM_MESSAGES.get(content_type, SYSTEM_MESSAGE_BASE)
@@ -0,0 +1,112 @@
+"""
+Provider health tracking from live traffic.
+
+Outcomes and latencies of recent upstream calls are kept in a time-based
+rolling window, so a backend that stopped receiving traffic after being
+demoted is considered healthy again once its failures age out.
+"""
+
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+import math
+import time
+
+
+class BackendHealth:
+    """Rolling error rate and latency percentiles of one backend."""
+
+    def __init__(
+        self,
+        window: float = 60.0,
+        max_samples: int = 200,
+        min_samples: int = 5,
+        max_error_rate: float = 0.5,
+        latency_slo: float = 0.0
+    ):
+        """
+        Initialize empty record.
+
+        Args:
+            window: Seconds an outcome is remembered
+            max_samples: Maximum outcomes kept
+            min_samples: Outcomes required before judging the backend
+            max_error_rate: Error rate above which the backend is unhealthy
+            latency_slo: p95 latency in seconds above which the backend is
+                         unhealthy (0 disables)
+        """
+        self.window = window
+        self.min_samples = min_samples
+        self.max_error_rate = max_error_rate
+        self.latency_slo = latency_slo
+        self._samples: Deque[Tuple[float, bool, float]] = deque(maxlen=max_samples)
+
+    def record(self, ok: bool, latency: float) -> None:
+        """
+        Record the outcome of one call.
+
+        Args:
+            ok: Whether the call succeeded
+            latency: Call duration in seconds
+        """
+        self._samples.append((time.monotonic(), ok, latency))
+
+    def _recent(self) -> List[Tuple[float, bool, float]]:
+        """Drop outcomes older than the window and return the rest."""
+        cutoff = time.monotonic() - self.window
+        while self._samples and self._samples[0][0] < cutoff:
+            self._samples.popleft()
+        return list(self._samples)
+
+    @property
+    def error_rate(self) -> float:
+        """Share of failed calls in the window (0 when there is no traffic)."""
+        samples = self._recent()
+        if not samples:
+            return 0.0
+        return sum(1 for _, ok, _ in samples if not ok) / len(samples)
+
+    def latency_percentile(self, percentile: float) -> Optional[float]:
+        """
+        Get a latency percentile of successful calls in the window.
+
+        Args:
+            percentile: Percentile between 0 and 100
+
+        Returns:
+            Latency in seconds or None without enough samples
+        """
+        latencies = sorted(latency for _, ok, latency in self._recent() if ok)
+        if len(latencies) < self.min_samples:
+            return None
+
+        index = min(len(latencies) - 1, math.ceil(percentile / 100 * len(latencies)) - 1)
+        return latencies[max(0, index)]
+
+    @property
+    def healthy(self) -> bool:
+        """Whether recent traffic stayed within error rate and latency limits."""
+        samples = self._recent()
+        if len(samples) < self.min_samples:
+            return True
+
+        if self.error_rate > self.max_error_rate:
+            return False
+
+        if self.latency_slo > 0:
+            p95 = self.latency_percentile(95)
+            if p95 is not None and p95 > self.latency_slo:
+                return False
+
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        """Get health metrics."""
+        p50 = self.latency_percentile(50)
+        p95 = self.latency_percentile(95)
+        return {
+            "healthy": self.healthy,
+            "samples": len(self._recent()),
+            "error_rate": round(self.error_rate, 3),
+            "latency_p50_ms": int(p50 * 1000) if p50 is not None else None,
+            "latency_p95_ms": int(p95 * 1000) if p95 is not None else None,
+        }
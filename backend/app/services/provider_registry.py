@@ -0,0 +1,83 @@
+"""
+Process-wide LLM provider registry.
+
+Providers own HTTP clients with keep-alive connection pools, so they are
+created once per process and shared by all requests instead of being
+rebuilt by every service instance.
+"""
+
+from typing import Any, Dict, List, Optional
+import os
+import logging
+
+from app.services.cache import ResponseCache
+from app.services.llm_provider import LLMProvider, get_provider
+
+logger = logging.getLogger(__name__)
+
+
+class ProviderRegistry:
+    """Lazily initialized, shared LLM providers keyed by provider name."""
+
+    def __init__(self, cache: Optional[ResponseCache] = None):
+        """
+        Initialize empty registry.
+
+        Args:
+            cache: Response cache attached to every provider (optional)
+        """
+        self.cache = cache
+        self._providers: Dict[str, LLMProvider] = {}
+
+    def get(self, provider_name: Optional[str] = None) -> LLMProvider:
+        """
+        Get shared provider instance, creating it on first use.
+
+        Args:
+            provider_name: Provider name (openai/anthropic/ollama/custom)
+                          or comma-separated failover list
+                          If None, uses PROVIDER env var
+
+        Returns:
+            Shared LLM provider instance
+
+        Raises:
+            ValueError: If provider is unknown or not configured
+        """
+        provider_name = provider_name or os.getenv("PROVIDER") or "openai"
+        name = provider_name.lower()
+
+        provider = self._providers.get(name)
+        if provider is None:
+            provider = get_provider(provider_name)
+            provider.cache = self.cache
+            self._providers[name] = provider
+
+        return provider
+
+    @property
+    def providers(self) -> List[LLMProvider]:
+        """Get all initialized providers."""
+        return list(self._providers.values())
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get runtime metrics for each initialized provider.
+
+        Returns:
+            Metrics keyed by provider name
+        """
+        return {name: provider.stats() for name, provider in self._providers.items()}
+
+    async def aclose(self) -> None:
+        """Close all providers and their connection pools."""
+        for name, provider in self._providers.items():
+            try:
+                await provider.aclose()
+            except Exception as e:
+                logger.warning(f"Failed to close provider {name}: {str(e)}")
+
+        self._providers.clear()
+
+        if self.cache is not None:
+            await self.cache.aclose()
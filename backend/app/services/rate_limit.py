@@ -0,0 +1,363 @@
+"""
+Per-client rate limiting.
+
+Each API token gets two token buckets that refill continuously over a
+minute: one for requests (RATE_LIMIT_RPM) and one for LLM tokens
+(RATE_LIMIT_TPM). Requests are admitted while both buckets have capacity;
+LLM tokens are charged after the request finished, so a large generation
+can push its client into debt and delay the next request.
+"""
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+import logging
+import math
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RateLimitResult:
+    """Outcome of a rate limit check."""
+    allowed: bool
+    limit: int
+    remaining: int
+    retry_after: float = 0.0
+
+    @property
+    def reset(self) -> int:
+        """Unix time at which the request bucket is full again."""
+        if self.limit <= 0:
+            return int(time.time())
+        missing = self.limit - self.remaining
+        return int(time.time() + missing * 60.0 / self.limit)
+
+
+class TokenBucket:
+    """Bucket holding up to `capacity` units, refilled at capacity per minute."""
+
+    def __init__(self, capacity: int, now: float):
+        """
+        Initialize full bucket.
+
+        Args:
+            capacity: Maximum units (the per-minute budget)
+            now: Current monotonic time
+        """
+        self.capacity = capacity
+        self.level = float(capacity)
+        self.updated = now
+
+    def refill(self, now: float) -> float:
+        """Add units accrued since the last update and return the level."""
+        elapsed = max(0.0, now - self.updated)
+        self.level = min(float(self.capacity), self.level + elapsed * self.capacity / 60.0)
+        self.updated = now
+        return self.level
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until the level reaches `amount`."""
+        return max(0.0, (amount - self.level) * 60.0 / self.capacity)
+
+
+# (request bucket, token bucket) of a key; None where that budget is disabled
+Buckets = Tuple[Optional[TokenBucket], Optional[TokenBucket]]
+
+
+class RateLimiter(ABC):
+    """Abstract per-key request and token budget."""
+
+    def __init__(self, requests_per_minute: int = 60, tokens_per_minute: int = 0):
+        """
+        Initialize limiter.
+
+        Args:
+            requests_per_minute: Request budget per key (0 disables)
+            tokens_per_minute: LLM token budget per key (0 disables)
+        """
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+
+    @abstractmethod
+    async def acquire(self, key: str) -> RateLimitResult:
+        """
+        Admit one request for key if both budgets allow it.
+
+        Args:
+            key: Client identifier
+
+        Returns:
+            Rate limit result (retry_after is set when denied)
+        """
+        pass
+
+    @abstractmethod
+    async def charge(self, key: str, tokens: int) -> None:
+        """
+        Charge LLM tokens consumed by an admitted request.
+
+        Args:
+            key: Client identifier
+            tokens: Tokens consumed
+        """
+        pass
+
+    async def aclose(self) -> None:
+        """Release resources held by the limiter."""
+        pass
+
+
+class MemoryRateLimiter(RateLimiter):
+    """In-process limiter for single-worker deployments."""
+
+    def __init__(
+        self,
+        requests_per_minute: int = 60,
+        tokens_per_minute: int = 0,
+        max_keys: int = 10000
+    ):
+        """
+        Initialize limiter.
+
+        Args:
+            requests_per_minute: Request budget per key (0 disables)
+            tokens_per_minute: LLM token budget per key (0 disables)
+            max_keys: Idle keys are purged beyond this many
+        """
+        super().__init__(requests_per_minute, tokens_per_minute)
+        self.max_keys = max_keys
+        self._buckets: Dict[str, Buckets] = {}
+
+    def _get_buckets(self, key: str, now: float) -> Buckets:
+        """Get (request bucket, token bucket) for key, creating them full."""
+        buckets = self._buckets.get(key)
+        if buckets is None:
+            if len(self._buckets) >= self.max_keys:
+                self._purge(now)
+            rpm, tpm = self.requests_per_minute, self.tokens_per_minute
+            buckets = (
+                TokenBucket(rpm, now) if rpm > 0 else None,
+                TokenBucket(tpm, now) if tpm > 0 else None,
+            )
+            self._buckets[key] = buckets
+        return buckets
+
+    def _purge(self, now: float) -> None:
+        """Forget keys whose buckets refilled completely (same as new)."""
+        idle = [
+            key for key, buckets in self._buckets.items()
+            if all(b is None or b.refill(now) >= b.capacity for b in buckets)
+        ]
+        for key in idle:
+            del self._buckets[key]
+
+    async def acquire(self, key: str) -> RateLimitResult:
+        """Take one request from key's budget."""
+        now = time.monotonic()
+        requests, tokens = self._get_buckets(key, now)
+
+        if tokens is not None and tokens.refill(now) <= 0:
+            return RateLimitResult(
+                allowed=False,
+                limit=self.requests_per_minute,
+                remaining=0,
+                retry_after=tokens.wait_time(1),
+            )
+
+        if requests is None:
+            return RateLimitResult(allowed=True, limit=0, remaining=0)
+
+        if requests.refill(now) < 1:
+            return RateLimitResult(
+                allowed=False,
+                limit=self.requests_per_minute,
+                remaining=0,
+                retry_after=requests.wait_time(1),
+            )
+
+        requests.level -= 1
+        return RateLimitResult(
+            allowed=True,
+            limit=self.requests_per_minute,
+            remaining=int(requests.level),
+        )
+
+    async def charge(self, key: str, tokens: int) -> None:
+        """Deduct consumed tokens, allowing the bucket to go negative."""
+        if tokens <= 0:
+            return
+
+        now = time.monotonic()
+        bucket = self._get_buckets(key, now)[1]
+        if bucket is None:
+            # Token budget disabled
+            return
+
+        bucket.refill(now)
+        bucket.level -= tokens
+
+
+# Refill helper shared by the Redis scripts. Levels are stored as
+# strings because Lua numbers returned to Redis are truncated to integers.
+_REDIS_LEVEL = """
+local function level(key, capacity, now)
+    local data = redis.call('HMGET', key, 'level', 'ts')
+    local value = tonumber(data[1]) or capacity
+    local ts = tonumber(data[2]) or now
+    return math.min(capacity, value + math.max(0, now - ts) * capacity / 60)
+end
+local function store(key, value, capacity, now)
+    redis.call('HSET', key, 'level', tostring(value), 'ts', tostring(now))
+    local expiry = math.ceil((capacity - value) * 60 / capacity) + 1
+    redis.call('EXPIRE', key, math.max(expiry, 1))
+end
+"""
+
+# KEYS: request bucket, token bucket
+# ARGV: now, requests per minute, tokens per minute
+# Returns: {allowed, remaining, retry_after}
+_REDIS_ACQUIRE = _REDIS_LEVEL + """
+local now = tonumber(ARGV[1])
+local rpm = tonumber(ARGV[2])
+local tpm = tonumber(ARGV[3])
+if tpm > 0 then
+    local tokens = level(KEYS[2], tpm, now)
+    if tokens <= 0 then
+        return {0, 0, tostring((1 - tokens) * 60 / tpm)}
+    end
+end
+if rpm <= 0 then
+    return {1, 0, '0'}
+end
+local requests = level(KEYS[1], rpm, now)
+if requests < 1 then
+    return {0, 0, tostring((1 - requests) * 60 / rpm)}
+end
+requests = requests - 1
+store(KEYS[1], requests, rpm, now)
+return {1, math.floor(requests), '0'}
+"""
+
+# KEYS: token bucket
+# ARGV: now, tokens per minute, tokens consumed
+_REDIS_CHARGE = _REDIS_LEVEL + """
+local now = tonumber(ARGV[1])
+local tpm = tonumber(ARGV[2])
+local tokens = level(KEYS[1], tpm, now) - tonumber(ARGV[3])
+store(KEYS[1], tokens, tpm, now)
+return 1
+"""
+
+
+class RedisRateLimiter(RateLimiter):
+    """Redis limiter shared by all uvicorn worker processes."""
+
+    def __init__(
+        self,
+        url: str,
+        requests_per_minute: int = 60,
+        tokens_per_minute: int = 0,
+        prefix: str = "contentcraft:ratelimit:"
+    ):
+        """
+        Initialize Redis limiter.
+
+        Args:
+            url: Redis connection URL
+            requests_per_minute: Request budget per key (0 disables)
+            tokens_per_minute: LLM token budget per key (0 disables)
+            prefix: Key prefix
+
+        Raises:
+            ImportError: If redis package is not installed
+        """
+        super().__init__(requests_per_minute, tokens_per_minute)
+        self.prefix = prefix
+
+        try:
+            from redis import asyncio as aioredis
+        except ImportError:
+            raise ImportError("redis package not installed. Run: pip install redis")
+
+        self.client = aioredis.from_url(url)
+        self._acquire = self.client.register_script(_REDIS_ACQUIRE)
+        self._charge = self.client.register_script(_REDIS_CHARGE)
+
+    async def acquire(self, key: str) -> RateLimitResult:
+        """Take one request from key's budget atomically."""
+        try:
+            allowed, remaining, retry_after = await self._acquire(
+                keys=[self.prefix + key + ":requests", self.prefix + key + ":tokens"],
+                args=[time.time(), self.requests_per_minute, self.tokens_per_minute],
+            )
+        except Exception as e:
+            # Fail open: an unavailable limiter must not take the API down
+            logger.warning(f"Rate limiter error: {str(e)}")
+            return RateLimitResult(allowed=True, limit=self.requests_per_minute, remaining=0)
+
+        return RateLimitResult(
+            allowed=bool(allowed),
+            limit=self.requests_per_minute,
+            remaining=int(remaining),
+            retry_after=float(retry_after),
+        )
+
+    async def charge(self, key: str, tokens: int) -> None:
+        """Deduct consumed tokens atomically."""
+        if self.tokens_per_minute <= 0 or tokens <= 0:
+            return
+
+        try:
+            await self._charge(
+                keys=[self.prefix + key + ":tokens"],
+                args=[time.time(), self.tokens_per_minute, tokens],
+            )
+        except Exception as e:
+            logger.warning(f"Rate limiter error: {str(e)}")
+
+    async def aclose(self) -> None:
+        """Close Redis connection pool."""
+        await self.client.close()
+
+
+def retry_after_header(result: RateLimitResult) -> str:
+    """Format retry_after as a Retry-After header value (whole seconds)."""
+    return str(max(1, math.ceil(result.retry_after)))
+
+
+def create_rate_limiter() -> Optional[RateLimiter]:
+    """
+    Create rate limiter from environment.
+
+    RATE_LIMIT_RPM and RATE_LIMIT_TPM set the per-token budgets (0
+    disables a budget). RATE_LIMIT_BACKEND selects memory/redis/none
+    (defaults to redis when REDIS_URL is set).
+
+    Returns:
+        Rate limiter instance or None if rate limiting is disabled
+    """
+    rpm = int(os.getenv("RATE_LIMIT_RPM", "60"))
+    tpm = int(os.getenv("RATE_LIMIT_TPM", "200000"))
+    redis_url = os.getenv("REDIS_URL")
+    backend = os.getenv("RATE_LIMIT_BACKEND", "redis" if redis_url else "memory").lower()
+
+    if backend == "none" or (rpm <= 0 and tpm <= 0):
+        logger.info("Rate limiting disabled")
+        return None
+
+    if backend == "redis":
+        if not redis_url:
+            raise ValueError("REDIS_URL environment variable not set")
+
+        try:
+            limiter = RedisRateLimiter(redis_url, rpm, tpm)
+            logger.info(f"Rate limiter: redis, rpm={rpm}, tpm={tpm}")
+            return limiter
+        except ImportError as e:
+            logger.warning(f"{str(e)}; falling back to in-memory rate limiter")
+
+    logger.info(f"Rate limiter: memory, rpm={rpm}, tpm={tpm}")
+    return MemoryRateLimiter(rpm, tpm)
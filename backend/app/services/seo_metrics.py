@@ -0,0 +1,162 @@
+"""
+Local SEO metrics.
+
+Word counts, heading structure, keyword density and readability are
+computed directly from the content instead of being estimated by the LLM,
+so they are exact and identical across calls.
+"""
+
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.utils.text import count_syllables, parse_html, split_sentences, tokenize_words
+
+# Flesch reading ease and its language-specific recalibrations, as
+# functions of average sentence length (words) and syllables per word.
+READABILITY_FORMULAS: Dict[str, Tuple[str, Callable[[float, float], float]]] = {
+    "en": ("flesch_reading_ease", lambda asl, asw: 206.835 - 1.015 * asl - 84.6 * asw),
+    "de": ("amstad", lambda asl, asw: 180 - asl - 58.5 * asw),
+    "es": ("fernandez_huerta", lambda asl, asw: 206.84 - 60 * asw - 102 / asl),
+    "fr": ("kandel_moles", lambda asl, asw: 207 - 1.015 * asl - 73.6 * asw),
+    "it": ("flesch_vacca", lambda asl, asw: 206 - asl - 65 * asw),
+    "nl": ("flesch_douma", lambda asl, asw: 206.835 - 0.93 * asl - 77 * asw),
+    "pt": ("flesch_martins", lambda asl, asw: 248.835 - 1.015 * asl - 84.6 * asw),
+}
+
+# Keyword density bounds (percent) used for suggestions
+MAX_KEYWORD_DENSITY = 3.0
+
+
+@dataclass
+class ContentMetrics:
+    """Deterministic metrics of one document."""
+    word_count: int = 0
+    sentence_count: int = 0
+    syllable_count: int = 0
+    headings: List[Tuple[str, str]] = field(default_factory=list)
+    keyword_density: Dict[str, float] = field(default_factory=dict)
+    readability_score: Optional[int] = None
+    readability_formula: Optional[str] = None
+
+    def suggestions(self) -> List[str]:
+        """Get suggestions derived from the metrics alone."""
+        suggestions = []
+
+        for keyword, density in self.keyword_density.items():
+            if density == 0:
+                suggestions.append(f"Target keyword '{keyword}' does not appear in the content")
+            elif density > MAX_KEYWORD_DENSITY:
+                suggestions.append(
+                    f"Reduce keyword density for '{keyword}' from {density}% "
+                    f"to below {MAX_KEYWORD_DENSITY:g}%"
+                )
+
+        previous = 1
+        for tag, text in self.headings:
+            level = int(tag[1])
+            if level > previous + 1:
+                suggestions.append(f"Heading '{text}' skips from H{previous} to H{level}")
+            previous = level
+
+        return suggestions
+
+
+def language_code(language: str) -> str:
+    """Normalize a locale (e.g. "de_DE", "pt-BR") to its ISO 639-1 code."""
+    return language.replace("-", "_").split("_")[0].lower()
+
+
+def keyword_density(words: List[str], keywords: List[str]) -> Dict[str, float]:
+    """
+    Compute keyword density percentages.
+
+    Density is occurrences × words in the keyword / total words × 100,
+    with multi-word keywords matched as whole phrases.
+
+    Args:
+        words: Lowercase words of the document
+        keywords: Target keywords or phrases
+
+    Returns:
+        Density per keyword, rounded to 2 decimals
+    """
+    densities = {}
+    total = len(words)
+
+    for keyword in keywords:
+        phrase = tokenize_words(keyword)
+        if not phrase:
+            continue
+
+        size = len(phrase)
+        occurrences = 0
+        index = 0
+        while index <= total - size:
+            if words[index:index + size] == phrase:
+                occurrences += 1
+                index += size
+            else:
+                index += 1
+
+        densities[keyword] = round(occurrences * size / total * 100, 2) if total else 0.0
+
+    return densities
+
+
+def readability(
+    word_count: int,
+    sentence_count: int,
+    syllable_count: int,
+    language: str
+) -> Tuple[Optional[int], Optional[str]]:
+    """
+    Compute the reading ease score for a language.
+
+    Args:
+        word_count: Words in the document
+        sentence_count: Sentences in the document
+        syllable_count: Estimated syllables in the document
+        language: ISO 639-1 language code
+
+    Returns:
+        (score clamped to 0-100, formula name), or (None, None) when the
+        language has no calibrated formula or the text is empty
+    """
+    if language not in READABILITY_FORMULAS or not word_count or not sentence_count:
+        return None, None
+
+    name, formula = READABILITY_FORMULAS[language]
+    score = formula(word_count / sentence_count, syllable_count / word_count)
+
+    return int(round(min(100.0, max(0.0, score)))), name
+
+
+def analyze_content(content_html: str, keywords: List[str], language: str = "en") -> ContentMetrics:
+    """
+    Compute SEO metrics for an HTML document.
+
+    Args:
+        content_html: Content HTML
+        keywords: Target keywords
+        language: Content language or locale
+
+    Returns:
+        Content metrics
+    """
+    language = language_code(language)
+    text, headings = parse_html(content_html)
+    words = tokenize_words(text)
+    sentences = split_sentences(text)
+    syllables = sum(count_syllables(word, language) for word in words)
+
+    score, formula = readability(len(words), len(sentences), syllables, language)
+
+    return ContentMetrics(
+        word_count=len(words),
+        sentence_count=len(sentences),
+        syllable_count=syllables,
+        headings=headings,
+        keyword_density=keyword_density(words, keywords),
+        readability_score=score,
+        readability_formula=formula,
+    )
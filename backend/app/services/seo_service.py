@@ -2,27 +2,78 @@
 SEO optimization service.
 """
 
-from app.models.schemas import SEORequest, SEOData, SEOHeading, InternalLink
-from app.services.llm_provider import get_provider
+from app.models.schemas import SEORequest, SEOData, SEOHeading, InternalLink, DocumentHeading
+from app.services.cache import bypass_cache
+from app.services.field_repair import field_limits, repair_fields
+from app.services.llm_provider import LLMProvider, get_provider
+from app.services.output_schema import response_schema
+from app.services.seo_metrics import ContentMetrics, analyze_content
+from app.services.usage import UsageStats, track_usage
 from app.services import prompts
+from app.utils.concurrency import map_bounded
+from app.utils.text import chunk_html, html_to_text
+from typing import Any, Dict, List, Optional
 import logging
+import os
 
 logger = logging.getLogger(__name__)
 
+# Content over this many tokens is reviewed in sections of this size
+SEO_CHUNK_TOKENS = int(os.getenv("SEO_CHUNK_TOKENS", "2000"))
+
+# Maximum concurrent section reviews
+SEO_MAP_CONCURRENCY = int(os.getenv("SEO_MAP_CONCURRENCY", "4"))
+
+# Leading HTML used to extend a too-short meta description
+SEO_FILLER_CHARS = 2000
+
 
 class SEOService:
     """Service for SEO optimization."""
     
-    def __init__(self):
-        """Initialize SEO service."""
-        self.provider = get_provider()
+    # Expected top-level response fields; streamed output is aborted on mismatch
+    RESPONSE_FIELD_TYPES: Dict[str, type] = {
+        "seo_title": str,
+        "meta_desc": str,
+        "slug": str,
+        "suggested_headings": list,
+        "internal_links": list,
+        "schema_ld_json": dict,
+        "suggestions": list,
+    }
+    
+    SECTION_FIELD_TYPES: Dict[str, type] = {
+        "suggested_headings": list,
+        "internal_links": list,
+        "suggestions": list,
+    }
+    
+    # JSON schemas the provider constrains responses to
+    RESPONSE_SCHEMA = response_schema(SEOData, RESPONSE_FIELD_TYPES, "seo_optimization")
+    SECTION_SCHEMA = response_schema(SEOData, SECTION_FIELD_TYPES, "seo_section")
+    
+    # Length limits fixed after generation (SEO title, meta description)
+    FIELD_LIMITS = field_limits(SEOData, RESPONSE_FIELD_TYPES)
+    
+    def __init__(self, provider: Optional[LLMProvider] = None):
+        """
+        Initialize SEO service.
+        
+        Args:
+            provider: Shared LLM provider (defaults to a new PROVIDER instance)
+        """
+        self.provider = provider or get_provider()
         self.model_name = self.provider.model_name
-        self.last_tokens_used = 0
+        self.usage = UsageStats()
     
     async def optimize(self, request: SEORequest) -> SEOData:
         """
         Optimize content for SEO.
         
+        Readability, keyword density, heading structure and word counts
+        are computed locally; the LLM only writes the suggestions. Long
+        content is split on headings and its sections reviewed concurrently.
+        
         Args:
             request: SEO optimization parameters
             
@@ -35,30 +86,50 @@ class SEOService:
         logger.info(f"Optimizing SEO: post_type='{request.post_type}', language='{request.language}'")
         
         try:
-            # Build prompt
-            prompt = prompts.build_seo_optimization_prompt(
-                content_html=request.content_html,
-                current_title=request.current_title,
-                keywords=request.keywords,
-                language=request.language,
-                post_type=request.post_type
-            )
+            metrics = analyze_content(request.content_html, request.keywords, request.language)
             
             system_message = prompts.get_system_message("seo")
             
-            # Generate with LLM
-            response_json = await self.provider.generate_json(
-                prompt=prompt,
-                system_message=system_message,
-                temperature=0.5,  # Lower temperature for more consistent SEO
-                max_tokens=1500
-            )
+            chunk_tokens = self._chunk_budget(request, metrics, system_message)
             
-            # Track tokens
-            self.last_tokens_used = self.provider.last_tokens_used
+            with track_usage() as self.usage, bypass_cache(request.no_cache):
+                if self.provider.tokenizer.count(request.content_html) <= chunk_tokens:
+                    prompt = prompts.build_seo_optimization_prompt(
+                        content_html=request.content_html,
+                        current_title=request.current_title,
+                        keywords=request.keywords,
+                        language=request.language,
+                        post_type=request.post_type
+                    )
+                    response_json = await self.provider.generate_json(
+                        prompt=prompt,
+                        system_message=system_message,
+                        temperature=0.5,  # Lower temperature for more consistent SEO
+                        max_tokens=1200,
+                        field_types=self.RESPONSE_FIELD_TYPES,
+                        response_schema=self.RESPONSE_SCHEMA
+                    )
+                else:
+                    response_json = await self._optimize_sections(
+                        request, metrics, system_message, chunk_tokens
+                    )
+                
+                # Short descriptions are extended from the opening of the content
+                response_json = await repair_fields(
+                    self.provider,
+                    response_json,
+                    self.FIELD_LIMITS,
+                    language=request.language,
+                    context=(
+                        f"{request.current_title or request.post_type} "
+                        f"(keywords: {', '.join(request.keywords)})"
+                    ),
+                    system_message=system_message,
+                    fillers={"meta_desc": html_to_text(request.content_html[:SEO_FILLER_CHARS])}
+                )
             
             # Parse response
-            seo_data = self._parse_seo_response(response_json)
+            seo_data = self._parse_seo_response(response_json, metrics)
             
             logger.info(f"SEO optimization complete")
             
@@ -68,12 +139,151 @@ class SEOService:
             logger.error(f"SEO optimization failed: {str(e)}")
             raise Exception(f"Failed to optimize SEO: {str(e)}")
     
-    def _parse_seo_response(self, response: dict) -> SEOData:
+    async def _optimize_sections(
+        self,
+        request: SEORequest,
+        metrics: ContentMetrics,
+        system_message: str,
+        chunk_tokens: int
+    ) -> Dict[str, Any]:
+        """
+        Review long content section by section and merge the results.
+        
+        The opening section gets the full prompt (title, meta, slug, schema)
+        with the document outline; the other sections only get heading, link
+        and suggestion reviews. All calls run concurrently.
+        
+        Args:
+            request: SEO optimization parameters
+            metrics: Locally computed content metrics (for the outline)
+            system_message: System message
+            chunk_tokens: Token budget per section
+            
+        Returns:
+            Merged response in the single-call shape
+        """
+        chunks = chunk_html(request.content_html, chunk_tokens, self.provider.tokenizer)
+        outline = self._outline(metrics)
+        logger.info(f"SEO review in {len(chunks)} sections")
+        
+        async def review(index: int) -> Dict[str, Any]:
+            """Review one section."""
+            if index == 0:
+                prompt = prompts.build_seo_optimization_prompt(
+                    content_html=chunks[0],
+                    current_title=request.current_title,
+                    keywords=request.keywords,
+                    language=request.language,
+                    post_type=request.post_type,
+                    outline=outline
+                )
+                field_types = self.RESPONSE_FIELD_TYPES
+                schema = self.RESPONSE_SCHEMA
+            else:
+                prompt = prompts.build_seo_section_prompt(
+                    section_html=chunks[index],
+                    keywords=request.keywords,
+                    language=request.language,
+                    section_number=index + 1,
+                    total_sections=len(chunks)
+                )
+                field_types = self.SECTION_FIELD_TYPES
+                schema = self.SECTION_SCHEMA
+            
+            return await self.provider.generate_json(
+                prompt=prompt,
+                system_message=system_message,
+                temperature=0.5,
+                max_tokens=1200 if index == 0 else 800,
+                field_types=field_types,
+                response_schema=schema
+            )
+        
+        responses = await map_bounded(review, range(len(chunks)), SEO_MAP_CONCURRENCY)
+        
+        merged = dict(responses[0])
+        merged["suggested_headings"] = self._unique(
+            [item for response in responses for item in response.get("suggested_headings", [])],
+            "text"
+        )
+        merged["internal_links"] = self._unique(
+            [item for response in responses for item in response.get("internal_links", [])],
+            "anchor"
+        )
+        merged["suggestions"] = list(dict.fromkeys(
+            suggestion for response in responses for suggestion in response.get("suggestions", [])
+        ))
+        
+        return merged
+    
+    def _outline(self, metrics: ContentMetrics) -> List[str]:
+        """Format the document's headings for the opening-section prompt."""
+        return [f"{tag.upper()}: {text}" for tag, text in metrics.headings]
+    
+    def _chunk_budget(
+        self,
+        request: SEORequest,
+        metrics: ContentMetrics,
+        system_message: str
+    ) -> int:
+        """
+        Size content sections for the model's context window.
+        
+        The fixed part is the opening-section prompt with the full outline,
+        the largest prompt of a chunked review.
+        
+        Args:
+            request: SEO optimization parameters
+            metrics: Locally computed content metrics (for the outline)
+            system_message: System message
+            
+        Returns:
+            Token budget per section
+        """
+        count = self.provider.tokenizer.count
+        skeleton = prompts.build_seo_optimization_prompt(
+            content_html="",
+            current_title=request.current_title,
+            keywords=request.keywords,
+            language=request.language,
+            post_type=request.post_type,
+            outline=self._outline(metrics)
+        )
+        
+        return min(
+            SEO_CHUNK_TOKENS,
+            self.provider.prompt_budget(1200, count(system_message) + count(skeleton))
+        )
+    
+    def _unique(self, items: List[Any], field: str) -> List[Dict[str, Any]]:
+        """
+        Drop malformed items and repeats of the same (case-insensitive) field value.
+        
+        Args:
+            items: Suggested headings or links
+            field: Identifying field
+            
+        Returns:
+            First occurrence of each value, in order
+        """
+        seen = set()
+        unique = []
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            value = " ".join(str(item.get(field, "")).lower().split())
+            if value and value not in seen:
+                seen.add(value)
+                unique.append(item)
+        return unique
+    
+    def _parse_seo_response(self, response: dict, metrics: ContentMetrics) -> SEOData:
         """
         Parse LLM response into SEOData.
         
         Args:
             response: LLM JSON response
+            metrics: Locally computed content metrics
             
         Returns:
             Parsed SEOData
@@ -109,9 +319,16 @@ class SEOService:
                 suggested_headings=headings,
                 internal_links=internal_links,
                 schema_ld_json=response.get("schema_ld_json"),
-                readability_score=response.get("readability_score"),
-                keyword_density=response.get("keyword_density"),
-                suggestions=response.get("suggestions", [])
+                readability_score=metrics.readability_score,
+                readability_formula=metrics.readability_formula,
+                keyword_density=metrics.keyword_density or None,
+                word_count=metrics.word_count,
+                sentence_count=metrics.sentence_count,
+                heading_structure=[
+                    DocumentHeading(level=level, text=text)
+                    for level, text in metrics.headings
+                ],
+                suggestions=metrics.suggestions() + response.get("suggestions", [])
             )
             
             return seo_data
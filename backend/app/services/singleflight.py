@@ -0,0 +1,82 @@
+"""
+Single-flight request coalescing.
+
+Concurrent callers asking for the same key share one in-flight upstream
+call instead of each issuing a duplicate LLM request.
+"""
+
+from typing import Awaitable, Callable, Dict, TypeVar
+import asyncio
+import copy
+import logging
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """De-duplicates concurrent calls that share a key."""
+
+    def __init__(self):
+        """Initialize with no in-flight calls."""
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run fn once per key among concurrent callers.
+
+        The first caller starts fn in a task; callers arriving while it is
+        still running await the same task and receive a copy of its result
+        (or its exception). The task is shielded, so one caller cancelling
+        does not abort the call for the others.
+
+        Args:
+            key: Request key (e.g. cache key of the generation)
+            fn: Zero-argument coroutine function performing the call
+
+        Returns:
+            Result of fn
+        """
+        self.calls += 1
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._finish(key, t))
+            result: T = await asyncio.shield(task)
+            return result
+
+        self.coalesced += 1
+        logger.debug(f"Coalesced in-flight request: {key[:12]}")
+        shared: T = await asyncio.shield(task)
+        return copy.deepcopy(shared)
+
+    def _finish(self, key: str, task: asyncio.Task) -> None:
+        """Forget completed task and retrieve its exception."""
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+        # Mark exception as retrieved when every caller went away
+        if not task.cancelled():
+            task.exception()
+
+    def running(self, key: str) -> bool:
+        """Whether a call for key is in flight (so do() would join it)."""
+        return key in self._inflight
+
+    @property
+    def inflight(self) -> int:
+        """Number of distinct calls currently running."""
+        return len(self._inflight)
+
+    def stats(self) -> Dict[str, int]:
+        """Get coalescing metrics."""
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "inflight": self.inflight,
+        }
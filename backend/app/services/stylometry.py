@@ -0,0 +1,117 @@
+"""
+Local stylometry for brand voice training.
+
+Sentence and paragraph lengths, reading ease and characteristic words are
+counted over every sample in full, so BrandAnalysis is exact and
+repeatable instead of being estimated by the LLM from an excerpt.
+"""
+
+from collections import Counter
+from typing import Dict, FrozenSet, List
+
+from app.models.schemas import BrandAnalysis, BrandSample
+from app.services.seo_metrics import READABILITY_FORMULAS, language_code
+from app.utils.text import (
+    count_syllables, html_to_text, split_paragraphs, split_sentences, tokenize_words
+)
+
+# Function words excluded from common_words
+STOPWORDS: Dict[str, FrozenSet[str]] = {
+    "en": frozenset("""
+        a about above after again against all also am an and any are as at be because been
+        before being below between both but by can could did do does doing down during each
+        few for from further had has have having he her here hers herself him himself his how
+        i if in into is it its itself just let me more most my myself no nor not now of off on
+        once only or other our ours ourselves out over own same she should so some such than
+        that the their theirs them themselves then there these they this those through to too
+        under until up very was we were what when where which while who whom why will with
+        would you your yours yourself yourselves it's don't can't won't you're we're they're
+        i'm isn't aren't doesn't didn't that's there's
+    """.split()),
+    "de": frozenset("""
+        aber alle als also am an auch auf aus bei bin bis da dann das dass dem den der des die
+        dies diese dieser du durch ein eine einem einen einer es für hat haben ich ihr im in
+        ist ja kann mit nach nicht noch nur oder sich sie sind so um und uns von vor war was
+        wie wir wird zu zum zur über
+    """.split()),
+    "es": frozenset("""
+        a al algo como con de del el ella ellos en entre es esta este esto fue ha hay la las le
+        les lo los más me mi muy no nos o para pero por que se ser si sin sobre su sus también
+        te tu un una uno y ya
+    """.split()),
+    "fr": frozenset("""
+        au aux avec ce ces dans de des du elle en est et eux il ils je la le les leur lui ma
+        mais me même mes moi mon ne nos notre nous on ou par pas pour qu que qui sa se ses son
+        sur ta te tes toi ton tu un une vos votre vous y été être
+    """.split()),
+}
+
+# Words shorter than this are ignored in common_words
+MIN_WORD_LENGTH = 3
+
+
+def sample_text(sample: BrandSample) -> str:
+    """Get the plain prose of a sample (excerpt and body; titles are not sentences)."""
+    parts = [html_to_text(sample.excerpt)] if sample.excerpt else []
+    parts.append(html_to_text(sample.body))
+    return "\n\n".join(parts)
+
+
+def analyze_samples(
+    samples: List[BrandSample],
+    language: str = "en",
+    top_words: int = 15
+) -> BrandAnalysis:
+    """
+    Compute stylometric metrics over the full sample corpus.
+
+    Args:
+        samples: Brand content samples
+        language: Content language or locale
+        top_words: Number of common words to report
+
+    Returns:
+        Brand analysis metrics
+    """
+    language = language_code(language)
+    stopwords = STOPWORDS.get(language, frozenset())
+
+    word_counts: Counter = Counter()
+    total_words = 0
+    total_sentences = 0
+    total_paragraphs = 0
+
+    for sample in samples:
+        text = sample_text(sample)
+        words = tokenize_words(text)
+
+        word_counts.update(words)
+        total_words += len(words)
+        total_sentences += len(split_sentences(text))
+        total_paragraphs += len(split_paragraphs(text))
+
+    # Syllables are estimated once per distinct word, weighted by frequency
+    total_syllables = sum(
+        count_syllables(word, language) * count for word, count in word_counts.items()
+    )
+
+    avg_sentence_length = total_words / total_sentences if total_sentences else 0.0
+    avg_paragraph_length = total_sentences / total_paragraphs if total_paragraphs else 0.0
+
+    flesch_reading_ease = None
+    if language in READABILITY_FORMULAS and total_words and total_sentences:
+        formula = READABILITY_FORMULAS[language][1]
+        score = formula(avg_sentence_length, total_syllables / total_words)
+        flesch_reading_ease = round(min(100.0, max(0.0, score)), 1)
+
+    common_words = [
+        word for word, _ in word_counts.most_common()
+        if len(word) >= MIN_WORD_LENGTH and word not in stopwords
+    ][:top_words]
+
+    return BrandAnalysis(
+        avg_sentence_length=round(avg_sentence_length, 1),
+        avg_paragraph_length=round(avg_paragraph_length, 1),
+        flesch_reading_ease=flesch_reading_ease,
+        common_words=common_words,
+    )
@@ -0,0 +1,237 @@
+"""
+Token counting and context-window budgeting.
+
+Each provider gets a tokenizer for its model: tiktoken for OpenAI models
+when the package is installed, a characters-per-token heuristic otherwise.
+Prompts are sized against the model's context window and max_tokens is
+clamped to what the window has left after the prompt.
+"""
+
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Optional
+import logging
+import os
+
+from app.utils.text import estimate_tokens, truncate_to_tokens
+
+logger = logging.getLogger(__name__)
+
+# Context window (prompt + completion tokens) by model name prefix; the
+# longest matching prefix wins. LLM_CONTEXT_WINDOW overrides the table.
+CONTEXT_WINDOWS: Dict[str, int] = {
+    "gpt-4.1": 1047576,
+    "gpt-4o": 128000,
+    "gpt-4-turbo": 128000,
+    "gpt-4-1106": 128000,
+    "gpt-4-0125": 128000,
+    "gpt-4-32k": 32768,
+    "gpt-4": 8192,
+    "gpt-3.5-turbo": 16385,
+    "o1": 200000,
+    "o3": 200000,
+    "claude": 200000,
+    "llama3.1": 128000,
+    "llama3.2": 128000,
+    "llama3": 8192,
+    "llama2": 4096,
+    "mistral": 32768,
+    "mixtral": 32768,
+    "qwen2": 32768,
+    "gemma2": 8192,
+    "phi3": 4096,
+}
+DEFAULT_CONTEXT_WINDOW = 8192
+
+# Tokens reserved for chat formatting (role markers, separators)
+MESSAGE_OVERHEAD = 8
+
+# Smallest completion budget worth sending a request for
+MIN_COMPLETION_TOKENS = 256
+
+
+class Tokenizer(ABC):
+    """Counts and truncates text in a model's tokens."""
+
+    name = "base"
+
+    @abstractmethod
+    def count(self, text: str) -> int:
+        """Count tokens in text."""
+        pass
+
+    @abstractmethod
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Shorten text to at most max_tokens, ending on a whole word."""
+        pass
+
+
+class HeuristicTokenizer(Tokenizer):
+    """Fast estimate from a characters-per-token ratio."""
+
+    name = "heuristic"
+
+    def __init__(self, chars_per_token: float = 4.0):
+        """
+        Initialize heuristic tokenizer.
+
+        Args:
+            chars_per_token: Average characters per token for the model family
+        """
+        self.chars_per_token = chars_per_token
+
+    def count(self, text: str) -> int:
+        """Estimate tokens in text."""
+        return estimate_tokens(text, self.chars_per_token)
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Shorten text to about max_tokens at a word boundary."""
+        return truncate_to_tokens(text, max_tokens, self.chars_per_token)
+
+
+class TiktokenTokenizer(Tokenizer):
+    """Exact counts for OpenAI models via tiktoken."""
+
+    name = "tiktoken"
+
+    def __init__(self, model: str):
+        """
+        Initialize tiktoken tokenizer.
+
+        Args:
+            model: OpenAI model name (unknown models use o200k_base)
+
+        Raises:
+            ImportError: If tiktoken package is not installed
+        """
+        try:
+            import tiktoken
+        except ImportError:
+            raise ImportError("tiktoken package not installed. Run: pip install tiktoken")
+
+        try:
+            self.encoding = tiktoken.encoding_for_model(model)
+        except KeyError:
+            self.encoding = tiktoken.get_encoding("o200k_base")
+
+    def count(self, text: str) -> int:
+        """Count tokens in text."""
+        return len(self.encoding.encode(text, disallowed_special=()))
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Shorten text to at most max_tokens, ending on a whole word."""
+        tokens = self.encoding.encode(text, disallowed_special=())
+        if len(tokens) <= max_tokens:
+            return text
+
+        # A token boundary can fall inside a multibyte character: drop the
+        # partial bytes instead of decoding them to U+FFFD
+        raw: bytes = self.encoding.decode_bytes(tokens[:max_tokens])
+        cut = raw.decode("utf-8", errors="ignore")
+        boundary = cut.rfind(" ")
+        return (cut[:boundary] if boundary > 0 else cut).rstrip()
+
+
+def _openai_tokenizer(model: str) -> Tokenizer:
+    """tiktoken when installed, heuristic otherwise."""
+    try:
+        return TiktokenTokenizer(model)
+    except ImportError as e:
+        logger.info(f"{str(e)}; using heuristic token counts")
+        return HeuristicTokenizer(4.0)
+
+
+# Tokenizer factory per provider name; other providers use the heuristic
+TOKENIZERS: Dict[str, Callable[[str], Tokenizer]] = {
+    "openai": _openai_tokenizer,
+    "anthropic": lambda model: HeuristicTokenizer(3.5),
+}
+
+_tokenizers: Dict[str, Tokenizer] = {}
+
+
+def register_tokenizer(provider: str, factory: Callable[[str], Tokenizer]) -> None:
+    """
+    Register a tokenizer factory for a provider.
+
+    Args:
+        provider: Provider name (e.g. "ollama")
+        factory: Callable building a tokenizer for a model name
+    """
+    TOKENIZERS[provider] = factory
+    for key in [key for key in _tokenizers if key.startswith(f"{provider}:")]:
+        del _tokenizers[key]
+
+
+def get_tokenizer(provider: str, model: str) -> Tokenizer:
+    """
+    Get the (shared) tokenizer for a provider's model.
+
+    Args:
+        provider: Provider name
+        model: Model name
+
+    Returns:
+        Tokenizer instance
+    """
+    key = f"{provider}:{model}"
+    if key not in _tokenizers:
+        factory = TOKENIZERS.get(provider, lambda model: HeuristicTokenizer(4.0))
+        _tokenizers[key] = factory(model)
+    return _tokenizers[key]
+
+
+def context_window(model: str) -> int:
+    """
+    Get a model's context window in tokens.
+
+    Args:
+        model: Model name (Ollama tags such as "llama3.1:8b" are matched by prefix)
+
+    Returns:
+        LLM_CONTEXT_WINDOW if set, else the table entry, else DEFAULT_CONTEXT_WINDOW
+    """
+    override = os.getenv("LLM_CONTEXT_WINDOW")
+    if override:
+        return int(override)
+
+    name = model.lower()
+    matches = [prefix for prefix in CONTEXT_WINDOWS if name.startswith(prefix)]
+    if not matches:
+        return DEFAULT_CONTEXT_WINDOW
+    return CONTEXT_WINDOWS[max(matches, key=len)]
+
+
+def fit_max_tokens(
+    tokenizer: Tokenizer,
+    window: int,
+    prompt: str,
+    system_message: Optional[str],
+    max_tokens: int
+) -> int:
+    """
+    Clamp a completion budget to the room the prompt leaves in the window.
+
+    Args:
+        tokenizer: Model tokenizer
+        window: Context window in tokens
+        prompt: User prompt
+        system_message: System message (optional)
+        max_tokens: Requested completion tokens
+
+    Returns:
+        Completion tokens to request
+
+    Raises:
+        ValueError: If the prompt leaves less than MIN_COMPLETION_TOKENS
+    """
+    prompt_tokens = tokenizer.count(prompt) + MESSAGE_OVERHEAD
+    if system_message:
+        prompt_tokens += tokenizer.count(system_message) + MESSAGE_OVERHEAD
+
+    available = window - prompt_tokens
+    if available < min(max_tokens, MIN_COMPLETION_TOKENS):
+        raise ValueError(
+            f"Prompt of {prompt_tokens} tokens does not fit the {window}-token context window"
+        )
+
+    return min(max_tokens, available)
@@ -0,0 +1,178 @@
+"""
+Per-request usage tracking.
+
+Providers are shared across requests, so token counts are recorded into a
+context-local UsageStats instead of attributes on the provider instance.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Iterator, Optional
+
+
+@dataclass
+class UsageStats:
+    """Usage accumulated by one unit of work (usually one service call)."""
+    tokens_used: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_input_tokens: int = 0
+    llm_calls: int = 0
+    cache_hits: int = 0
+    attempts: int = 0
+    model: str = ""
+    parent: Optional["UsageStats"] = field(default=None, repr=False, compare=False)
+
+    @property
+    def cached(self) -> bool:
+        """Whether every LLM call in this scope was served from cache."""
+        return self.llm_calls > 0 and self.cache_hits == self.llm_calls
+
+    def add_tokens(
+        self,
+        prompt_tokens: int = 0,
+        completion_tokens: int = 0,
+        cached_input_tokens: int = 0
+    ) -> None:
+        """
+        Add consumed tokens to this scope and all enclosing scopes.
+
+        Args:
+            prompt_tokens: Input tokens consumed (cached ones included)
+            completion_tokens: Output tokens generated
+            cached_input_tokens: Input tokens served from the provider's prompt cache
+        """
+        self.prompt_tokens += int(prompt_tokens)
+        self.completion_tokens += int(completion_tokens)
+        self.cached_input_tokens += int(cached_input_tokens)
+        self.tokens_used += int(prompt_tokens) + int(completion_tokens)
+        if self.parent is not None:
+            self.parent.add_tokens(prompt_tokens, completion_tokens, cached_input_tokens)
+
+    def add_call(self, cached: bool = False) -> None:
+        """
+        Count an LLM call in this scope and all enclosing scopes.
+
+        Args:
+            cached: Whether the call was served from cache
+        """
+        self.llm_calls += 1
+        if cached:
+            self.cache_hits += 1
+        if self.parent is not None:
+            self.parent.add_call(cached)
+
+    def set_model(self, model: str) -> None:
+        """
+        Set the model that served the latest upstream call.
+
+        Args:
+            model: Model name
+        """
+        self.model = model
+        if self.parent is not None:
+            self.parent.set_model(model)
+
+    def add_attempt(self) -> None:
+        """Count an upstream request attempt (retries included)."""
+        self.attempts += 1
+        if self.parent is not None:
+            self.parent.add_attempt()
+
+
+_current_usage: ContextVar[Optional[UsageStats]] = ContextVar("llm_usage", default=None)
+
+
+@contextmanager
+def track_usage() -> Iterator[UsageStats]:
+    """
+    Open a usage scope for the current task.
+
+    Scopes nest: tokens recorded in an inner scope are also added to the
+    enclosing one. Tasks spawned inside the scope share it.
+
+    Yields:
+        UsageStats for this scope
+    """
+    usage = UsageStats(parent=_current_usage.get())
+    token = _current_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _current_usage.reset(token)
+
+
+@contextmanager
+def use_usage(usage: UsageStats) -> Iterator[UsageStats]:
+    """
+    Make an existing usage scope the active one again.
+
+    For work that outlives the code that opened the scope, such as a
+    streamed response body iterated after the endpoint returned.
+
+    Args:
+        usage: Scope to record into
+
+    Yields:
+        The same UsageStats
+    """
+    token = _current_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _current_usage.reset(token)
+
+
+def current_usage() -> Optional[UsageStats]:
+    """Get the innermost active usage scope, if any."""
+    return _current_usage.get()
+
+
+def record_tokens(
+    prompt_tokens: int = 0,
+    completion_tokens: int = 0,
+    cached_input_tokens: int = 0
+) -> None:
+    """
+    Record consumed tokens in the active usage scope.
+
+    Args:
+        prompt_tokens: Input tokens consumed (cached ones included)
+        completion_tokens: Output tokens generated
+        cached_input_tokens: Input tokens served from the provider's prompt cache
+    """
+    usage = _current_usage.get()
+    if usage is not None:
+        usage.add_tokens(prompt_tokens, completion_tokens, cached_input_tokens)
+
+
+def record_call(cached: bool = False) -> None:
+    """
+    Record an LLM call in the active usage scope.
+
+    Args:
+        cached: Whether the call was served from cache
+    """
+    usage = _current_usage.get()
+    if usage is not None:
+        usage.add_call(cached)
+
+
+def record_attempt() -> None:
+    """Record an upstream request attempt in the active usage scope."""
+    usage = _current_usage.get()
+    if usage is not None:
+        usage.add_attempt()
+
+
+def record_model(model: str) -> None:
+    """
+    Record the model that served an upstream call in the active usage scope.
+
+    Args:
+        model: Model name
+    """
+    usage = _current_usage.get()
+    if usage is not None:
+        usage.set_model(model)
@@ -0,0 +1,121 @@
+"""
+Bounded-concurrency helpers.
+"""
+
+from contextlib import asynccontextmanager
+from typing import (
+    Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple, TypeVar
+)
+import asyncio
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+async def map_as_completed(
+    fn: Callable[[T], Awaitable[R]],
+    items: Iterable[T],
+    limit: int
+) -> AsyncIterator[Tuple[int, R]]:
+    """
+    Run fn over items with at most `limit` calls in flight.
+
+    Results are yielded as soon as each call finishes, not in input order.
+    Pending calls are cancelled if the consumer stops iterating early.
+
+    Args:
+        fn: Coroutine function applied to each item
+        items: Input items
+        limit: Maximum concurrent calls
+
+    Yields:
+        (index, result) tuples in completion order
+    """
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def run(index: int, item: T) -> Tuple[int, R]:
+        async with semaphore:
+            return index, await fn(item)
+
+    tasks = [asyncio.ensure_future(run(i, item)) for i, item in enumerate(items)]
+
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def map_bounded(
+    fn: Callable[[T], Awaitable[R]],
+    items: Iterable[T],
+    limit: int
+) -> List[R]:
+    """
+    Run fn over items with at most `limit` calls in flight.
+
+    Args:
+        fn: Coroutine function applied to each item
+        items: Input items
+        limit: Maximum concurrent calls
+
+    Returns:
+        Results in input order
+
+    Raises:
+        Exception: First exception raised by fn (remaining calls are cancelled)
+    """
+    items = list(items)
+    results: List[Any] = [None] * len(items)
+
+    async for index, result in map_as_completed(fn, items, limit):
+        results[index] = result
+
+    return results
+
+
+class ConcurrencyLimiter:
+    """Caps how many operations run at once and reports saturation."""
+
+    def __init__(self, limit: int):
+        """
+        Initialize limiter.
+
+        Args:
+            limit: Maximum concurrent operations (0 disables the cap)
+        """
+        self.limit = limit
+        self.active = 0
+        self.waiting = 0
+        # Created on first use so it binds to the running event loop
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[None]:
+        """Wait for a free slot and hold it for the duration of the block."""
+        if self.limit > 0:
+            if self._semaphore is None:
+                self._semaphore = asyncio.Semaphore(self.limit)
+
+            self.waiting += 1
+            try:
+                await self._semaphore.acquire()
+            finally:
+                self.waiting -= 1
+
+        self.active += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+            if self._semaphore is not None:
+                self._semaphore.release()
+
+    def stats(self) -> Dict[str, int]:
+        """Get concurrency metrics."""
+        return {
+            "limit": self.limit,
+            "active": self.active,
+            "waiting": self.waiting,
+        }
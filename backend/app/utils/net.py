@@ -0,0 +1,273 @@
+"""
+Outbound request guards for caller-supplied URLs.
+
+Image downloads and job webhooks go to URLs chosen by API callers. To keep
+callers from reaching the backend's own network (localhost, private
+ranges, cloud metadata at 169.254.169.254), hosts are resolved and every
+address must be public. The check runs on each redirect hop and the
+connection is pinned to the checked address, so a DNS answer cannot change
+between check and connect.
+"""
+
+from collections import OrderedDict
+from typing import AsyncIterator, Callable, Dict, List, Optional, cast
+import asyncio
+import ipaddress
+import os
+import socket
+
+import httpx
+
+# Hosts exempt from the public-address check (e.g. a WordPress container on
+# the same Docker network), comma-separated
+OUTBOUND_ALLOWED_HOSTS = {
+    host.strip().lower()
+    for host in os.getenv("OUTBOUND_ALLOWED_HOSTS", "").split(",")
+    if host.strip()
+}
+
+# Hostnames that keep their own pinned connection pool; idle pools of the
+# least recently used hosts beyond this are closed
+OUTBOUND_POOL_HOSTS = int(os.getenv("OUTBOUND_POOL_HOSTS", "64"))
+
+
+class UnsafeURLError(ValueError):
+    """Raised when a caller-supplied URL points at a non-public address."""
+    pass
+
+
+def is_public_address(address: str) -> bool:
+    """
+    Whether an IP address is globally routable.
+
+    Loopback, private, link-local, shared (CGNAT), reserved, unspecified
+    and multicast addresses are not; IPv4-mapped IPv6 addresses are
+    judged by their IPv4 address.
+
+    Args:
+        address: IPv4 or IPv6 address (an IPv6 zone suffix is ignored)
+
+    Returns:
+        True if the address is public
+    """
+    try:
+        ip = ipaddress.ip_address(address.split("%", 1)[0])
+    except ValueError:
+        return False
+
+    if isinstance(ip, ipaddress.IPv6Address) and ip.ipv4_mapped:
+        ip = ip.ipv4_mapped
+
+    return ip.is_global and not ip.is_multicast
+
+
+def check_url(url: str) -> httpx.URL:
+    """
+    Check the form of a caller-supplied URL.
+
+    Args:
+        url: URL to check
+
+    Returns:
+        Parsed URL
+
+    Raises:
+        UnsafeURLError: If the URL is not http(s) with a host, or its host
+                        is a literal non-public address
+    """
+    try:
+        parsed = httpx.URL(url)
+    except httpx.InvalidURL as e:
+        raise UnsafeURLError(f"Invalid URL: {str(e)}")
+
+    if parsed.scheme not in ("http", "https") or not parsed.host:
+        raise UnsafeURLError(f"Unsupported URL: {url}")
+
+    host = parsed.host.lower()
+    if host not in OUTBOUND_ALLOWED_HOSTS and _is_ip(host) and not is_public_address(host):
+        raise UnsafeURLError(f"URL points to a non-public address: {url}")
+
+    return parsed
+
+
+async def resolve_public(host: str, port: Optional[int] = None) -> List[str]:
+    """
+    Resolve a host and require every address to be public.
+
+    Hosts in OUTBOUND_ALLOWED_HOSTS are not checked (an empty list is
+    returned so callers connect by name).
+
+    Args:
+        host: Hostname or IP address
+        port: Port the connection will use
+
+    Returns:
+        Resolved addresses
+
+    Raises:
+        UnsafeURLError: If any address is not public
+        OSError: If the host cannot be resolved
+    """
+    if host.lower() in OUTBOUND_ALLOWED_HOSTS:
+        return []
+
+    if _is_ip(host):
+        addresses = [host]
+    else:
+        loop = asyncio.get_running_loop()
+        infos = await loop.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        addresses = list(dict.fromkeys(str(info[4][0]) for info in infos))
+
+    blocked = [address for address in addresses if not is_public_address(address)]
+    if blocked or not addresses:
+        raise UnsafeURLError(f"Host {host} resolves to a non-public address")
+
+    return addresses
+
+
+async def ensure_public_url(url: str) -> None:
+    """
+    Check a caller-supplied URL before storing it (e.g. a webhook).
+
+    Args:
+        url: URL to check
+
+    Raises:
+        UnsafeURLError: If the URL is malformed, cannot be resolved or
+                        points to a non-public address
+    """
+    parsed = check_url(url)
+    try:
+        await resolve_public(parsed.host, parsed.port)
+    except OSError as e:
+        raise UnsafeURLError(f"Cannot resolve {parsed.host}: {str(e)}")
+
+
+class PublicTransport(httpx.AsyncBaseTransport):
+    """
+    HTTP transport that only connects to public addresses.
+
+    Each request (including every redirect the client follows) is resolved
+    and checked with resolve_public, then sent to the checked address with
+    the original Host header and TLS server name.
+
+    Pinned requests go to the IP address, so one connection pool would key
+    them by IP and port and could hand a TLS connection opened for one host
+    to another host on the same address. Every hostname therefore gets its
+    own pool.
+    """
+
+    def __init__(self, max_hosts: int = OUTBOUND_POOL_HOSTS, **kwargs):
+        """
+        Initialize transport.
+
+        Args:
+            max_hosts: Hostnames with their own pool (OUTBOUND_POOL_HOSTS)
+            **kwargs: Options of httpx.AsyncHTTPTransport (limits, http2, ...)
+        """
+        self.max_hosts = max_hosts
+        self._options = kwargs
+        # Requests that are not pinned (allowed hosts, literal IPs)
+        self._transport = httpx.AsyncHTTPTransport(**kwargs)
+        self._pinned: "OrderedDict[str, httpx.AsyncHTTPTransport]" = OrderedDict()
+        # Responses still streaming per pool
+        self._open: Dict[str, int] = {}
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        """Check the target address and send the request to it."""
+        url = request.url
+        if url.scheme not in ("http", "https"):
+            raise UnsafeURLError(f"Unsupported URL: {url}")
+
+        try:
+            addresses = await resolve_public(url.host, url.port)
+        except OSError as e:
+            raise httpx.ConnectError(f"Cannot resolve {url.host}: {str(e)}", request=request)
+
+        if not addresses or _is_ip(url.host):
+            response: httpx.Response = await self._transport.handle_async_request(request)
+            return response
+
+        # The Host header was set from the original URL
+        pinned = httpx.Request(
+            request.method,
+            url.copy_with(host=addresses[0]),
+            headers=request.headers,
+            stream=request.stream,
+            extensions={**request.extensions, "sni_hostname": url.host},
+        )
+
+        host = url.host.lower()
+        transport = await self._pool(host)
+        self._open[host] = self._open.get(host, 0) + 1
+        try:
+            response = await transport.handle_async_request(pinned)
+        except BaseException:
+            self._release(host)
+            raise
+
+        stream = cast(httpx.AsyncByteStream, response.stream)
+        return httpx.Response(
+            response.status_code,
+            headers=response.headers,
+            stream=_ReleasingStream(stream, lambda: self._release(host)),
+            extensions=response.extensions,
+        )
+
+    async def _pool(self, host: str) -> httpx.AsyncHTTPTransport:
+        """Get the pool of a hostname, closing idle pools beyond max_hosts."""
+        transport = self._pinned.get(host)
+        if transport is not None:
+            self._pinned.move_to_end(host)
+            return transport
+
+        transport = self._pinned[host] = httpx.AsyncHTTPTransport(**self._options)
+
+        idle = [name for name in self._pinned if name != host and not self._open.get(name)]
+        for name in idle[:max(0, len(self._pinned) - self.max_hosts)]:
+            await self._pinned.pop(name).aclose()
+
+        return transport
+
+    def _release(self, host: str) -> None:
+        """Record that a response of host finished streaming."""
+        remaining = self._open.get(host, 0) - 1
+        if remaining > 0:
+            self._open[host] = remaining
+        else:
+            self._open.pop(host, None)
+
+    async def aclose(self) -> None:
+        """Close the connection pools."""
+        await self._transport.aclose()
+        while self._pinned:
+            await self._pinned.popitem()[1].aclose()
+
+
+class _ReleasingStream(httpx.AsyncByteStream):
+    """Response stream that runs a callback once it is closed."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, on_close: Callable[[], None]):
+        self._stream = stream
+        self._on_close: Optional[Callable[[], None]] = on_close
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            on_close, self._on_close = self._on_close, None
+            if on_close is not None:
+                on_close()
+
+
+def _is_ip(host: str) -> bool:
+    """Whether host is a literal IP address."""
+    try:
+        ipaddress.ip_address(host.split("%", 1)[0])
+    except ValueError:
+        return False
+    return True
@@ -0,0 +1,374 @@
+"""
+Plain-text analysis helpers.
+
+HTML-to-text conversion, sentence/word tokenization and syllable
+estimation used by the local SEO and brand metrics, token estimates and
+HTML chunking for prompts over long content, and word-boundary length
+fitting for length-limited output fields.
+"""
+
+from html.parser import HTMLParser
+from typing import Any, Callable, List, Optional, Tuple
+import math
+import re
+
+# Elements that end a line of text
+BLOCK_TAGS = {
+    "address", "article", "aside", "blockquote", "br", "dd", "div", "dl", "dt",
+    "figcaption", "figure", "footer", "h1", "h2", "h3", "h4", "h5", "h6",
+    "header", "hr", "li", "main", "nav", "ol", "p", "pre", "section", "table",
+    "td", "th", "tr", "ul",
+}
+HEADING_TAGS = {"h1", "h2", "h3", "h4", "h5", "h6"}
+SKIPPED_TAGS = {"script", "style", "noscript", "template"}
+
+_WORD_RE = re.compile(r"[^\W\d_]+(?:['’\-][^\W\d_]+)*")
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?…。！？])[\"'”’)\]]*\s+")
+_PARAGRAPH_RE = re.compile(r"\n\s*\n")
+_SPACE_RE = re.compile(r"\s+")
+_HEADING_START_RE = re.compile(r"(?=<h[1-6][\s>])", re.IGNORECASE)
+_BLOCK_END_RE = re.compile(
+    r"</(?:p|ul|ol|dl|table|blockquote|pre|figure|div|section|article)\s*>", re.IGNORECASE
+)
+
+# Vowels (including common accented forms) per language family
+_VOWELS = {
+    "en": "aeiouy",
+    "de": "aeiouyäöü",
+    "es": "aeiouáéíóúü",
+    "fr": "aeiouyàâéèêëîïôûùü",
+    "it": "aeiouàèéìíòóùú",
+    "nl": "aeiouyë",
+    "pt": "aeiouáâãàéêíóôõú",
+}
+_DEFAULT_VOWELS = "aeiouyàáâãäåæèéêëìíîïòóôõöøùúûüý"
+
+
+class _TextExtractor(HTMLParser):
+    """Collects visible text and headings from an HTML fragment."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: List[str] = []
+        self.headings: List[Tuple[str, str]] = []
+        self._skip_depth = 0
+        self._heading: str = ""
+        self._heading_parts: List[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIPPED_TAGS:
+            self._skip_depth += 1
+        elif tag in BLOCK_TAGS:
+            self.parts.append("\n\n")
+            if tag in HEADING_TAGS:
+                self._heading = tag
+                self._heading_parts = []
+
+    def handle_endtag(self, tag):
+        if tag in SKIPPED_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag in BLOCK_TAGS:
+            self.parts.append("\n\n")
+            if tag == self._heading:
+                text = " ".join("".join(self._heading_parts).split())
+                if text:
+                    self.headings.append((tag, text))
+                self._heading = ""
+
+    def handle_data(self, data):
+        if self._skip_depth:
+            return
+        self.parts.append(data)
+        if self._heading:
+            self._heading_parts.append(data)
+
+
+def parse_html(html: str) -> Tuple[str, List[Tuple[str, str]]]:
+    """
+    Extract visible text and headings from HTML.
+
+    Block elements become paragraph breaks (blank lines); script and style
+    content is dropped.
+
+    Args:
+        html: HTML fragment
+
+    Returns:
+        (plain text, [(heading tag, heading text), ...]) in document order
+    """
+    extractor = _TextExtractor()
+    extractor.feed(html)
+    extractor.close()
+
+    text = "".join(extractor.parts)
+    paragraphs = [" ".join(block.split()) for block in _PARAGRAPH_RE.split(text)]
+    return "\n\n".join(p for p in paragraphs if p), extractor.headings
+
+
+def html_to_text(html: str) -> str:
+    """
+    Convert HTML to plain text with paragraphs separated by blank lines.
+
+    Args:
+        html: HTML fragment
+
+    Returns:
+        Plain text
+    """
+    return parse_html(html)[0]
+
+
+def split_paragraphs(text: str) -> List[str]:
+    """Split plain text into non-empty paragraphs (blank-line separated)."""
+    return [p.strip() for p in _PARAGRAPH_RE.split(text) if p.strip()]
+
+
+def split_sentences(text: str) -> List[str]:
+    """
+    Split plain text into sentences.
+
+    Paragraph breaks always end a sentence, so headings and list items
+    without final punctuation are not merged into the next sentence.
+
+    Args:
+        text: Plain text
+
+    Returns:
+        Sentences containing at least one word
+    """
+    sentences = []
+    for paragraph in split_paragraphs(text):
+        for sentence in _SENTENCE_END_RE.split(paragraph):
+            if _WORD_RE.search(sentence):
+                sentences.append(sentence.strip())
+    return sentences
+
+
+def tokenize_words(text: str) -> List[str]:
+    """
+    Split text into lowercase words.
+
+    Numbers and punctuation are dropped; apostrophes and hyphens inside a
+    word are kept ("don't", "e-commerce").
+
+    Args:
+        text: Plain text
+
+    Returns:
+        Words in order
+    """
+    return [word.lower() for word in _WORD_RE.findall(text)]
+
+
+def count_syllables(word: str, language: str = "en") -> int:
+    """
+    Estimate syllables as groups of consecutive vowels.
+
+    English drops a silent final "e" ("make") but keeps "-le" ("table").
+
+    Args:
+        word: Lowercase word
+        language: ISO 639-1 language code
+
+    Returns:
+        Estimated syllable count (at least 1)
+    """
+    vowels = _VOWELS.get(language, _DEFAULT_VOWELS)
+    count = 0
+    previous_vowel = False
+
+    for char in word:
+        is_vowel = char in vowels
+        if is_vowel and not previous_vowel:
+            count += 1
+        previous_vowel = is_vowel
+
+    if language == "en" and count > 1 and word.endswith("e") and not word.endswith("le"):
+        count -= 1
+
+    return max(1, count)
+
+
+def estimate_tokens(text: str, chars_per_token: float = 4.0) -> int:
+    """
+    Estimate LLM tokens in text from an average characters-per-token ratio.
+
+    Args:
+        text: Any text
+        chars_per_token: Average characters per token
+
+    Returns:
+        Estimated token count
+    """
+    return int(math.ceil(len(text) / chars_per_token))
+
+
+def truncate_to_tokens(text: str, max_tokens: int, chars_per_token: float = 4.0) -> str:
+    """
+    Shorten text to roughly max_tokens, cutting at a word boundary.
+
+    Args:
+        text: Text to shorten
+        max_tokens: Token budget
+        chars_per_token: Average characters per token
+
+    Returns:
+        Original text if it fits, otherwise a prefix ending on a whole word
+    """
+    max_chars = int(max_tokens * chars_per_token)
+    if len(text) <= max_chars:
+        return text
+
+    cut = text[:max_chars]
+    boundary = cut.rfind(" ")
+    return (cut[:boundary] if boundary > 0 else cut).rstrip()
+
+
+def fit_length(
+    text: str,
+    min_chars: Optional[int] = None,
+    max_chars: Optional[int] = None,
+    filler: str = ""
+) -> str:
+    """
+    Fit text into a character range at word boundaries.
+
+    Long text is cut after the last whole word that fits. Short text is
+    extended with whole sentences from filler, then with single words
+    when no further sentence fits.
+
+    Args:
+        text: Text to fit (whitespace is normalized)
+        min_chars: Minimum length
+        max_chars: Maximum length
+        filler: Text to extend short values from (e.g. an excerpt)
+
+    Returns:
+        Fitted text; may still be short when filler runs out
+    """
+    text = " ".join(text.split())
+
+    if max_chars is not None and len(text) > max_chars:
+        cut = text[:max_chars + 1]
+        boundary = cut.rfind(" ")
+        text = (cut[:boundary] if boundary > 0 else text[:max_chars]).rstrip(" ,;:-–—")
+
+    if not min_chars or len(text) >= min_chars or not filler:
+        return text
+
+    limit = max_chars if max_chars is not None else math.inf
+    if text and text[-1].isalnum():
+        text += "."
+
+    sentences = split_sentences(filler)
+    remaining: List[str] = []
+    for index, sentence in enumerate(sentences):
+        candidate = f"{text} {sentence}".strip()
+        if len(candidate) > limit:
+            remaining = sentences[index:]
+            break
+        text = candidate
+        if len(text) >= min_chars:
+            return text
+
+    for word in " ".join(remaining).split():
+        candidate = f"{text} {word}".strip()
+        if len(candidate) > limit:
+            break
+        text = candidate
+        if len(text) >= min_chars:
+            break
+
+    return text
+
+
+def _split_blocks(html: str) -> List[str]:
+    """Split HTML after each closing block tag."""
+    blocks = []
+    start = 0
+    for match in _BLOCK_END_RE.finditer(html):
+        blocks.append(html[start:match.end()])
+        start = match.end()
+    blocks.append(html[start:])
+    return [block for block in blocks if block.strip()]
+
+
+def _whole_prefix(text: str, max_tokens: int, count: Callable[[str], int]) -> str:
+    """
+    Longest prefix of whole sentences, else whole words, within max_tokens.
+
+    Falls back to the first character so callers always make progress.
+    """
+    for separator in (_SENTENCE_END_RE, _SPACE_RE):
+        head = ""
+        for match in separator.finditer(text):
+            candidate = text[:match.end()].rstrip()
+            if count(candidate) > max_tokens:
+                break
+            head = candidate
+        if head.strip():
+            return head
+    return text[:1]
+
+
+def chunk_html(html: str, max_tokens: int, tokenizer: Optional[Any] = None) -> List[str]:
+    """
+    Split HTML into chunks of roughly max_tokens, preferring heading boundaries.
+
+    The document is cut before every heading and consecutive sections are
+    packed into chunks. Sections over the budget are cut after closing
+    block tags, and single blocks over the budget with the tokenizer's
+    truncate(). If that does not return a non-empty prefix of the block
+    (e.g. a cut inside a multibyte character), the block is cut after
+    whole sentences or words instead.
+
+    Args:
+        html: HTML document
+        max_tokens: Token budget per chunk
+        tokenizer: Object with count(text) and truncate(text, max_tokens)
+            methods (defaults to the characters-per-token estimate)
+
+    Returns:
+        Non-empty chunks in document order
+
+    Raises:
+        ValueError: If max_tokens is not positive
+    """
+    if max_tokens < 1:
+        raise ValueError("Chunk budget must be at least one token")
+
+    count = tokenizer.count if tokenizer else estimate_tokens
+    truncate = tokenizer.truncate if tokenizer else truncate_to_tokens
+
+    pieces: List[str] = []
+    for section in _HEADING_START_RE.split(html):
+        if not section.strip():
+            continue
+        if count(section) <= max_tokens:
+            pieces.append(section)
+            continue
+
+        for block in _split_blocks(section):
+            block = block.strip()
+            while count(block) > max_tokens:
+                head = truncate(block, max_tokens)
+                if not head or not block.startswith(head):
+                    head = _whole_prefix(block, max_tokens, count)
+                rest = block[len(head):]
+                block = rest.lstrip()
+                # Keep the whitespace at the cut between packed pieces
+                pieces.append(head + rest[:len(rest) - len(block)])
+            if block:
+                pieces.append(block)
+
+    chunks: List[str] = []
+    budget = 0
+    for piece in pieces:
+        tokens = count(piece)
+        if not chunks or budget + tokens > max_tokens:
+            chunks.append("")
+            budget = 0
+        chunks[-1] += piece
+        budget += tokens
+
+    return [chunk.strip() for chunk in chunks]
@@ -0,0 +1,132 @@
+"""
+Micro-benchmark of prompt construction per endpoint.
+
+Measures building the user prompt and system message of a typical request,
+without any LLM call.
+
+Usage (from backend/):
+    python -m benchmarks.bench_prompts [--number 20000] [--repeat 5]
+"""
+
+import argparse
+import timeit
+from typing import Callable, Dict, Tuple
+
+from app.services import prompts
+
+BRAND_PROFILE = {
+    "enabled": True,
+    "tone": "friendly",
+    "sentence_length": "short",
+    "vocabulary_level": "intermediate",
+    "writing_style": "conversational",
+    "common_phrases": ["Here's the thing", "Let's dive in"],
+    "content_structure": "Hook, context, practical steps, recap",
+}
+
+ANALYSIS = {
+    "avg_sentence_length": 14.2,
+    "avg_paragraph_length": 3.1,
+    "flesch_reading_ease": 64.5,
+    "common_words": ["coffee", "roast", "brew", "beans", "morning"],
+}
+
+CONTENT_HTML = "".join(
+    f"<h2>Section {i}</h2><p>{'Freshly roasted beans make a better cup. ' * 20}</p>"
+    for i in range(6)
+)
+
+SAMPLES_TEXT = "\n---\n".join(
+    f"TITLE: Post {i}\nBODY: {'Our roasters pick every batch by hand. ' * 30}\n"
+    for i in range(10)
+)
+
+
+def content() -> Tuple[str, str]:
+    return (
+        prompts.build_content_prompt(
+            topic="How to brew pour-over coffee at home",
+            keywords=["pour-over coffee", "coffee brewing"],
+            tone="friendly",
+            length="medium",
+            language="en",
+            audience="Home baristas",
+            brand_profile=BRAND_PROFILE,
+        ),
+        prompts.get_system_message("general"),
+    )
+
+
+def product() -> Tuple[str, str]:
+    return (
+        prompts.build_product_prompt(
+            name="Ceramic Pour-Over Dripper",
+            category="Coffee Equipment",
+            attributes={"material": "ceramic", "capacity": "1-4 cups", "color": "white"},
+            features=["Spiral ribs for even extraction", "Fits most mugs"],
+            usp=["Handmade in Portugal", "Lifetime warranty"],
+            price=34.9,
+            keywords=["pour-over dripper"],
+            tone="enthusiastic",
+            language="en",
+            brand_profile=BRAND_PROFILE,
+        ),
+        prompts.get_system_message("product"),
+    )
+
+
+def image() -> Tuple[str, str]:
+    return (
+        prompts.build_image_analysis_prompt(context="product", language="en"),
+        prompts.get_system_message("image"),
+    )
+
+
+def seo() -> Tuple[str, str]:
+    return (
+        prompts.build_seo_optimization_prompt(
+            content_html=CONTENT_HTML,
+            current_title="Pour-over coffee guide",
+            keywords=["pour-over coffee"],
+            language="en",
+            post_type="post",
+        ),
+        prompts.get_system_message("seo"),
+    )
+
+
+def brand() -> Tuple[str, str]:
+    return (
+        prompts.build_brand_training_prompt(
+            samples_text=SAMPLES_TEXT,
+            language="en",
+            num_samples=10,
+            analysis=ANALYSIS,
+        ),
+        prompts.get_system_message("brand"),
+    )
+
+
+ENDPOINTS: Dict[str, Callable[[], Tuple[str, str]]] = {
+    "content": content,
+    "product": product,
+    "image": image,
+    "seo": seo,
+    "brand": brand,
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--number", type=int, default=20000, help="Calls per timing run")
+    parser.add_argument("--repeat", type=int, default=5, help="Timing runs (best is reported)")
+    args = parser.parse_args()
+
+    print(f"{'endpoint':<10} {'us/call':>10}")
+    for name, build in ENDPOINTS.items():
+        best = min(timeit.repeat(build, number=args.number, repeat=args.repeat))
+        print(f"{name:<10} {best / args.number * 1e6:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Tests for authentication and per-token budgets.
+"""
+
+import json
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+import pytest
+
+from app.deps.auth import UsageCharge, limiter_key, verify_token
+from app.deps.providers import get_provider_registry
+from app.routers import content, image, product
+from app.services.llm_provider import LLMProvider, RetryPolicy
+from app.services.rate_limit import MemoryRateLimiter
+from app.services.usage import UsageStats, current_usage, record_tokens
+
+
+class CountingProvider(LLMProvider):
+    """Provider answering every call with the same JSON for 150 tokens."""
+
+    name = "counting"
+
+    def __init__(self, response: dict):
+        super().__init__("model")
+        self.response = response
+        self.retry_policy = RetryPolicy(max_attempts=1)
+
+    def get_default_model(self) -> str:
+        return "model"
+
+    async def generate(self, prompt, system_message=None, **kwargs) -> str:
+        record_tokens(prompt_tokens=100, completion_tokens=50)
+        return json.dumps(self.response)
+
+
+class RecordingLimiter(MemoryRateLimiter):
+    """Limiter admitting everything and recording charged tokens."""
+
+    def __init__(self):
+        super().__init__(requests_per_minute=1000, tokens_per_minute=100000)
+        self.charges = []
+
+    async def charge(self, key: str, tokens: int) -> None:
+        self.charges.append((key, tokens))
+        await super().charge(key, tokens)
+
+
+@pytest.fixture
+def limiter():
+    return RecordingLimiter()
+
+
+@pytest.fixture
+def client(limiter):
+    provider = CountingProvider({
+        "seo_title": "Mug",
+        "title": "Coffee at home",
+        "meta": {"seo_title": "Coffee", "meta_desc": "m" * 150, "slug": "coffee-at-home"},
+        "body_html": "<h2>Coffee</h2><p>Brew it well.</p>",
+    })
+
+    class Registry:
+        def get(self):
+            return provider
+
+    app = FastAPI()
+    for router in (content.router, image.router, product.router):
+        app.include_router(router)
+    app.state.rate_limiter = limiter
+    app.dependency_overrides[verify_token] = lambda: "secret"
+    app.dependency_overrides[get_provider_registry] = lambda: Registry()
+    return TestClient(app)
+
+
+def charged(limiter) -> int:
+    assert {key for key, _ in limiter.charges} <= {limiter_key("secret")}
+    return sum(tokens for _, tokens in limiter.charges)
+
+
+def test_charges_tokens_of_regular_response(client, limiter):
+    response = client.post("/product/generate", json={"name": "Coffee mug", "category": "Kitchen"})
+
+    assert response.json()["metadata"]["tokens_used"] == 150
+    assert charged(limiter) == 150
+    assert "X-RateLimit-Remaining" in response.headers
+
+
+def test_charges_tokens_of_streamed_batch(client, limiter):
+    items = [{"name": f"Coffee mug {i}", "category": "Kitchen"} for i in range(3)]
+
+    response = client.post("/product/generate/batch", json={"items": items})
+
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert sum(line["metadata"]["tokens_used"] for line in lines) == 450
+    assert charged(limiter) == 450
+
+
+def test_charges_tokens_of_server_sent_events(client, limiter):
+    body = {"topic": "Coffee at home", "length": "short"}
+
+    response = client.post("/content/generate/stream", json=body)
+
+    result = [line for line in response.text.splitlines() if line.startswith("data:")][-1]
+    tokens = json.loads(result[len("data:"):])["metadata"]["tokens_used"]
+    assert tokens > 0
+    assert charged(limiter) == tokens
+
+
+async def body(scopes):
+    for chunk in ("a", "b"):
+        scopes.append(current_usage())
+        record_tokens(prompt_tokens=100, completion_tokens=50)
+        yield chunk
+
+
+async def test_stream_charges_body_running_after_dependency_exit(limiter):
+    usage, scopes = UsageStats(), []
+    charge = UsageCharge(limiter, "key", usage)
+
+    stream = charge.stream(body(scopes))
+    # FastAPI 0.106+ may run the dependency's exit before the body is sent
+    await charge.flush()
+
+    assert [chunk async for chunk in stream] == ["a", "b"]
+    await charge.flush()
+    assert scopes == [usage, usage]
+    assert current_usage() is None
+    assert limiter.charges == [("key", 300)]
+
+
+async def test_stream_charges_aborted_body(limiter):
+    charge = UsageCharge(limiter, "key", UsageStats())
+
+    stream = charge.stream(body([]))
+    assert await stream.__anext__() == "a"
+    await stream.aclose()
+
+    assert limiter.charges == [("key", 150)]
+
+
+def test_rejects_requests_over_budget(client, limiter):
+    client.app.state.rate_limiter = MemoryRateLimiter(requests_per_minute=1)
+
+    first = client.post("/product/generate", json={"name": "Mug one", "category": "K"})
+    response = client.post("/product/generate", json={"name": "Mug two", "category": "K"})
+
+    assert first.status_code == 200
+
+    assert response.status_code == 429
+    assert "Retry-After" in response.headers
@@ -0,0 +1,148 @@
+"""
+Tests for map-reduce brand training and its cached partial profiles.
+"""
+
+import re
+
+import pytest
+
+from app.models.schemas import BrandSample, BrandTrainRequest
+from app.services import brand_service
+from app.services.brand_service import BrandService
+from app.services.cache import MemoryCache
+from app.services.llm_provider import TruncatedResponse
+from app.services.tokenizer import HeuristicTokenizer
+
+PROFILE = {
+    "tone": "warm",
+    "sentence_length": "short",
+    "vocabulary_level": "plain",
+    "writing_style": "direct",
+}
+
+
+class BrandProvider:
+    """Stub provider recording which samples each partial-profile call covers."""
+
+    name = "stub"
+    model_name = "stub"
+
+    def __init__(self):
+        self.cache = MemoryCache()
+        self.tokenizer = HeuristicTokenizer(4.0)
+        self.partial_calls = []
+        self.merge_calls = 0
+        self.truncate = False
+
+    def prompt_budget(self, max_tokens: int, fixed_tokens: int) -> int:
+        return 100000
+
+    async def generate_json(self, prompt, system_message=None, **kwargs):
+        if kwargs["response_schema"]["name"] == "brand_partial":
+            self.partial_calls.append(set(re.findall(r"TITLE: (Sample \d+)", prompt)))
+            response = {"brand_profile": dict(PROFILE)}
+            return TruncatedResponse(response) if self.truncate else response
+
+        self.merge_calls += 1
+        return {"brand_profile": dict(PROFILE), "prompt_template": "Write warmly."}
+
+
+def sample(index: int, body: str = "") -> BrandSample:
+    return BrandSample(
+        title=f"Sample {index:02d}",
+        body=body or f"<p>Our coffee is roasted fresh every morning, batch {index:02d}.</p>",
+    )
+
+
+@pytest.fixture
+def provider(monkeypatch):
+    provider = BrandProvider()
+    document = BrandService(provider)._format_sample(sample(0), 1000)
+
+    # Map-reduce with groups of three samples
+    monkeypatch.setattr(brand_service, "BRAND_SINGLE_PASS_TOKENS", 0)
+    monkeypatch.setattr(brand_service, "BRAND_GROUP_TOKENS", 3 * provider.tokenizer.count(document))
+    return provider
+
+
+async def train(provider, samples, no_cache=False):
+    request = BrandTrainRequest(samples=samples, no_cache=no_cache)
+    return await BrandService(provider).train(request)
+
+
+def titles(*indexes):
+    return {f"Sample {index:02d}" for index in indexes}
+
+
+async def test_partials_are_profiled_per_group_and_merged(provider):
+    result = await train(provider, [sample(i) for i in range(12)])
+
+    assert provider.partial_calls == [
+        titles(0, 1, 2), titles(3, 4, 5), titles(6, 7, 8), titles(9, 10, 11)
+    ]
+    assert provider.merge_calls == 1
+    assert result.brand_profile.tone == "warm"
+    assert result.prompt_template == "Write warmly."
+
+
+async def test_repeated_training_reuses_partials(provider):
+    samples = [sample(i) for i in range(12)]
+    await train(provider, samples)
+    provider.partial_calls.clear()
+
+    await train(provider, samples)
+
+    assert provider.partial_calls == []
+    assert provider.merge_calls == 2
+
+
+async def test_added_samples_are_profiled_alone(provider):
+    await train(provider, [sample(i) for i in range(12)])
+    provider.partial_calls.clear()
+
+    await train(provider, [sample(i) for i in range(14)])
+
+    assert provider.partial_calls == [titles(12, 13)]
+
+
+async def test_edited_sample_reprofiles_only_its_group(provider):
+    samples = [sample(i) for i in range(12)]
+    await train(provider, samples)
+    provider.partial_calls.clear()
+
+    samples[4] = sample(4, "<p>Completely rewritten text about tea.</p>")
+    await train(provider, samples)
+
+    assert provider.partial_calls == [titles(3, 4, 5)]
+
+
+async def test_removed_sample_reprofiles_only_its_group(provider):
+    samples = [sample(i) for i in range(12)]
+    await train(provider, samples)
+    provider.partial_calls.clear()
+
+    await train(provider, samples[:4] + samples[5:])
+
+    assert provider.partial_calls == [titles(3, 5)]
+
+
+async def test_truncated_partials_are_not_cached(provider):
+    samples = [sample(i) for i in range(12)]
+    provider.truncate = True
+    await train(provider, samples)
+    provider.partial_calls.clear()
+
+    provider.truncate = False
+    await train(provider, samples)
+
+    assert len(provider.partial_calls) == 4
+
+
+async def test_no_cache_profiles_every_sample_again(provider):
+    samples = [sample(i) for i in range(12)]
+    await train(provider, samples)
+    provider.partial_calls.clear()
+
+    await train(provider, samples, no_cache=True)
+
+    assert len(provider.partial_calls) == 4
@@ -0,0 +1,214 @@
+"""
+Tests for the LLM response cache.
+
+The Redis cache runs against fakeredis; those cases are skipped when
+fakeredis is not installed.
+"""
+
+import json
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+import pytest
+
+from app.deps.auth import rate_limit
+from app.deps.providers import get_provider_registry
+from app.routers import product
+from app.services.cache import (
+    MemoryCache,
+    RedisCache,
+    bypass_cache,
+    cache_bypassed,
+    make_cache_key,
+)
+from app.services.llm_provider import LLMProvider, RetryPolicy
+from app.services.usage import record_tokens, track_usage
+
+
+class Clock:
+    """Manually advanced replacement for time.monotonic."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(time, "monotonic", clock)
+    return clock
+
+
+class CountingProvider(LLMProvider):
+    """Provider answering every call with the same JSON for 150 tokens."""
+
+    name = "counting"
+
+    def __init__(self, response: dict):
+        super().__init__("model")
+        self.response = response
+        self.calls = 0
+        self.retry_policy = RetryPolicy(max_attempts=1)
+
+    def get_default_model(self) -> str:
+        return "model"
+
+    async def generate(self, prompt, system_message=None, **kwargs) -> str:
+        self.calls += 1
+        record_tokens(prompt_tokens=100, completion_tokens=50)
+        return json.dumps(self.response)
+
+
+async def test_memory_cache_expires_entries(clock):
+    cache = MemoryCache(ttl=60)
+    await cache.set("a", {"v": 1})
+    await cache.set("b", {"v": 2}, ttl=120)
+
+    clock.now += 59
+    assert await cache.get("a") == {"v": 1}
+
+    clock.now += 1
+    assert await cache.get("a") is None
+    assert await cache.get("b") == {"v": 2}
+    assert len(cache) == 1
+
+
+async def test_memory_cache_evicts_least_recently_used(clock):
+    cache = MemoryCache(max_entries=2)
+    await cache.set("a", {"v": 1})
+    await cache.set("b", {"v": 2})
+
+    # Reading "a" makes "b" the least recently used entry
+    await cache.get("a")
+    await cache.set("c", {"v": 3})
+
+    assert len(cache) == 2
+    assert await cache.get("b") is None
+    assert await cache.get("a") == {"v": 1}
+    assert await cache.get("c") == {"v": 3}
+
+
+async def test_memory_cache_returns_copies():
+    cache = MemoryCache()
+    value = {"tags": ["a"]}
+    await cache.set("key", value)
+
+    value["tags"].append("b")
+    (await cache.get("key"))["tags"].append("c")
+
+    assert await cache.get("key") == {"tags": ["a"]}
+
+
+async def test_redis_cache(monkeypatch):
+    fakeredis = pytest.importorskip("fakeredis")
+    from redis import asyncio as aioredis
+
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(
+        aioredis, "from_url", lambda url: fakeredis.FakeAsyncRedis(server=server)
+    )
+    cache = RedisCache("redis://test", ttl=60)
+
+    assert await cache.get("key") is None
+    await cache.set("key", {"title": "Hello", "tags": ["a"]})
+
+    assert await cache.get("key") == {"title": "Hello", "tags": ["a"]}
+    assert 0 < await cache.client.ttl(cache.prefix + "key") <= 60
+    # Shared with other processes on the same server
+    assert await RedisCache("redis://test").get("key") == {"title": "Hello", "tags": ["a"]}
+
+
+async def test_redis_errors_are_misses():
+    class BrokenClient:
+        async def get(self, key):
+            raise ConnectionError("down")
+
+        async def set(self, key, value, ex=None):
+            raise ConnectionError("down")
+
+    cache = RedisCache.__new__(RedisCache)
+    cache.prefix, cache.ttl, cache.client = "p:", 60, BrokenClient()
+
+    await cache.set("key", {"v": 1})
+    assert await cache.get("key") is None
+
+
+def test_cache_key_normalizes_whitespace():
+    key = make_cache_key("openai", "gpt-4o", "Be brief.", "Write  about\n\ncoffee ", 0.7, 100)
+
+    assert key == make_cache_key("openai", "gpt-4o", " Be  brief.", "Write about coffee", 0.7, 100)
+    assert key != make_cache_key("openai", "gpt-4o", "Be brief.", "Write about tea", 0.7, 100)
+    assert key != make_cache_key("openai", "gpt-4o", "Be brief.", "Write about coffee", 0.2, 100)
+    assert key != make_cache_key("openai", "gpt-4o", None, "Write about coffee", 0.7, 100)
+    assert key != make_cache_key(
+        "openai", "gpt-4o", "Be brief.", "Write about coffee", 0.7, 100, response_schema={}
+    )
+
+
+def test_bypass_cache_nests():
+    assert not cache_bypassed()
+
+    with bypass_cache(False):
+        assert not cache_bypassed()
+        with bypass_cache():
+            assert cache_bypassed()
+            # An inner request without no_cache keeps the outer bypass
+            with bypass_cache(False):
+                assert cache_bypassed()
+        assert not cache_bypassed()
+
+
+async def test_provider_serves_hits_from_cache():
+    provider = CountingProvider({"title": "T"})
+    provider.cache = MemoryCache()
+
+    with track_usage() as first:
+        assert await provider.generate_json("prompt") == {"title": "T"}
+    with track_usage() as second:
+        assert await provider.generate_json("prompt") == {"title": "T"}
+
+    assert provider.calls == 1
+    assert first.tokens_used == 150 and not first.cached
+    assert second.tokens_used == 0 and second.cached
+
+
+async def test_bypass_refreshes_the_entry():
+    provider = CountingProvider({"title": "old"})
+    provider.cache = MemoryCache()
+    await provider.generate_json("prompt")
+
+    provider.response = {"title": "new"}
+    with bypass_cache():
+        assert await provider.generate_json("prompt") == {"title": "new"}
+    assert await provider.generate_json("prompt") == {"title": "new"}
+    assert provider.calls == 2
+
+
+def test_cached_response_metadata():
+    provider = CountingProvider({"seo_title": "Mug", "tags": ["mug"]})
+    provider.cache = MemoryCache()
+
+    class Registry:
+        def get(self):
+            return provider
+
+    app = FastAPI()
+    app.include_router(product.router)
+    app.dependency_overrides[rate_limit] = lambda: "token"
+    app.dependency_overrides[get_provider_registry] = lambda: Registry()
+    client = TestClient(app)
+    body = {"name": "Coffee mug", "category": "Kitchen"}
+
+    first = client.post("/product/generate", json=body).json()
+    second = client.post("/product/generate", json=body).json()
+    fresh = client.post("/product/generate", json={**body, "no_cache": True}).json()
+
+    assert first["metadata"]["cached"] is False and first["metadata"]["tokens_used"] == 150
+    assert second["metadata"]["cached"] is True and second["metadata"]["tokens_used"] == 0
+    assert second["data"] == first["data"]
+    assert fresh["metadata"]["cached"] is False and fresh["metadata"]["tokens_used"] == 150
+    assert provider.calls == 2
@@ -0,0 +1,164 @@
+"""
+Tests for the provider circuit breaker.
+"""
+
+import time
+
+import pytest
+
+from app.services.circuit_breaker import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    CircuitOpenError,
+)
+
+
+class Clock:
+    """Manually advanced replacement for time.monotonic."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(time, "monotonic", clock)
+    return clock
+
+
+def failing_breaker(**kwargs) -> CircuitBreaker:
+    """Breaker that opens after 4 calls at 50% errors."""
+    return CircuitBreaker("test", error_rate=0.5, min_calls=4, open_seconds=30, **kwargs)
+
+
+def admit(breaker: CircuitBreaker, ok: bool, latency: float = 0.1) -> None:
+    breaker.check()
+    breaker.record(ok, latency)
+
+
+def test_stays_closed_below_min_calls(clock):
+    breaker = failing_breaker()
+
+    for _ in range(3):
+        admit(breaker, False)
+
+    assert breaker.state == CLOSED
+
+
+def test_error_rate_at_limit_stays_closed(clock):
+    breaker = failing_breaker()
+
+    for ok in (True, False, True, False):
+        admit(breaker, ok)
+
+    assert breaker.state == CLOSED
+
+
+def test_opens_above_error_rate_and_fails_fast(clock):
+    breaker = failing_breaker()
+
+    for ok in (True, False, False, False):
+        admit(breaker, ok)
+
+    assert breaker.state == OPEN
+    assert not breaker.available
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+    with pytest.raises(CircuitOpenError):
+        breaker.ensure_available()
+
+
+def test_opens_on_slow_calls(clock):
+    breaker = failing_breaker(slow_call=2.0)
+
+    for _ in range(4):
+        admit(breaker, True, latency=5.0)
+
+    assert breaker.state == OPEN
+
+
+def test_admits_a_single_probe_after_cool_down(clock):
+    breaker = failing_breaker()
+    for _ in range(4):
+        admit(breaker, False)
+
+    clock.now += 30
+    assert breaker.available
+    breaker.check()
+
+    assert breaker.state == HALF_OPEN
+    assert not breaker.available
+    with pytest.raises(CircuitOpenError, match="probe in flight"):
+        breaker.check()
+
+
+def test_successful_probe_closes_with_fresh_window(clock):
+    breaker = failing_breaker()
+    for _ in range(4):
+        admit(breaker, False)
+
+    clock.now += 30
+    admit(breaker, True)
+
+    assert breaker.state == CLOSED
+    assert breaker.stats()["samples"] == 0
+
+    # Old failures no longer count towards re-opening
+    admit(breaker, False)
+    assert breaker.state == CLOSED
+
+
+def test_failed_probe_reopens(clock):
+    breaker = failing_breaker()
+    for _ in range(4):
+        admit(breaker, False)
+
+    clock.now += 30
+    admit(breaker, False)
+
+    assert breaker.state == OPEN
+    clock.now += 29
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+
+
+def test_slow_probe_reopens(clock):
+    breaker = failing_breaker(slow_call=2.0)
+    for _ in range(4):
+        admit(breaker, False)
+
+    clock.now += 30
+    admit(breaker, True, latency=3.0)
+
+    assert breaker.state == OPEN
+
+
+def test_released_probe_frees_the_slot(clock):
+    breaker = failing_breaker()
+    for _ in range(4):
+        admit(breaker, False)
+
+    clock.now += 30
+    breaker.check()
+    breaker.release()
+
+    assert breaker.state == HALF_OPEN
+    assert breaker.available
+    breaker.check()
+
+
+def test_old_failures_leave_the_window(clock):
+    breaker = failing_breaker(window=60)
+
+    for _ in range(3):
+        admit(breaker, False)
+    clock.now += 61
+    admit(breaker, False)
+
+    assert breaker.state == CLOSED
@@ -0,0 +1,100 @@
+"""
+Tests for outline-first content generation.
+"""
+
+import asyncio
+import re
+
+import pytest
+
+from app.models.schemas import ContentRequest
+from app.services.content_service import ContentService
+
+
+class OutlineProvider:
+    """Stub provider answering outline and section calls."""
+
+    model_name = "stub"
+
+    def __init__(self, headings, sections):
+        self.headings = headings
+        # Section heading -> (html, seconds until the answer)
+        self.sections = sections
+        self.section_calls = []
+        self.running = 0
+        self.max_running = 0
+
+    async def generate_json(self, prompt, system_message=None, **kwargs):
+        name = kwargs["response_schema"]["name"]
+        if name == "content_outline":
+            return {
+                "outline": [{"heading": heading, "points": ["point"]} for heading in self.headings],
+                "internal_links": [{"anchor": "a", "suggested_url": "/a/", "rationale": "r"}],
+            }
+
+        assert name == "content_outline_section"
+        heading = re.search(r"^HEADING: (.*)$", prompt, re.MULTILINE).group(1)
+        self.section_calls.append(heading)
+        html, delay = self.sections.get(heading, (f"<p>{heading} text</p>", 0))
+
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        await asyncio.sleep(delay)
+        self.running -= 1
+        return {"html": html}
+
+
+async def outlined_body(provider, length="long"):
+    service = ContentService(provider)
+    request = ContentRequest(topic="Coffee at home", keywords=["coffee"], length=length)
+    return dict([item async for item in service._generate_outlined_body(request, "system")])
+
+
+async def test_sections_are_written_concurrently_and_joined_in_order():
+    provider = OutlineProvider(
+        ["Intro", "Beans & Grind", "Brewing", "Wrap-up"],
+        {
+            "Intro": ("<h2>Intro</h2><p>Welcome.</p>", 0.03),
+            "Beans & Grind": ("<p>Grind fresh.</p>", 0.02),
+            "Brewing": ("<h3>Pour-over</h3><p>Slowly.</p>", 0.01),
+            "Wrap-up": ("<h2>Wrap-up</h2><p>Enjoy.</p>", 0),
+        },
+    )
+
+    result = await outlined_body(provider)
+
+    assert provider.max_running == 4
+    assert result["outline"] == ["Intro", "Beans & Grind", "Brewing", "Wrap-up"]
+    assert result["internal_links"][0]["anchor"] == "a"
+    # Sections without a leading H2 get their outline heading (escaped)
+    assert result["body_html"] == "\n".join([
+        "<h2>Intro</h2><p>Welcome.</p>",
+        "<h2>Beans &amp; Grind</h2>\n<p>Grind fresh.</p>",
+        "<h2>Brewing</h2>\n<h3>Pour-over</h3><p>Slowly.</p>",
+        "<h2>Wrap-up</h2><p>Enjoy.</p>",
+    ])
+    assert result["headings"] == ["Intro", "Beans & Grind", "Brewing", "Pour-over", "Wrap-up"]
+
+
+@pytest.mark.parametrize("length,sections", [("short", 4), ("medium", 6), ("long", 8)])
+async def test_outline_is_capped_per_length(length, sections):
+    provider = OutlineProvider([f"Section {i}" for i in range(20)], {})
+
+    result = await outlined_body(provider, length)
+
+    assert len(result["outline"]) == sections
+    assert sorted(provider.section_calls) == sorted(f"Section {i}" for i in range(sections))
+
+
+def test_outline_schema_caps_sections():
+    outline = ContentService.OUTLINE_SCHEMA["schema"]["properties"]["outline"]
+
+    assert outline["maxItems"] == 8
+
+
+async def test_empty_outline_is_rejected():
+    provider = OutlineProvider(["", "  "], {})
+
+    with pytest.raises(ValueError, match="no sections"):
+        await outlined_body(provider)
+    assert provider.section_calls == []
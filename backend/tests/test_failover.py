@@ -0,0 +1,157 @@
+"""
+Tests for the failover provider.
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from app.services.circuit_breaker import CircuitBreaker
+from app.services.llm_provider import (
+    FailoverProvider,
+    LLMProvider,
+    ProviderError,
+    RetryPolicy,
+)
+
+
+class Backend(LLMProvider):
+    """Backend that fails with `error` or answers after `delay` seconds."""
+
+    name = "fake"
+
+    def __init__(self, model: str, error=None, delay: float = 0.0):
+        super().__init__(model)
+        self.error = error
+        self.delay = delay
+        self.calls = 0
+        self.retry_policy = RetryPolicy(max_attempts=1)
+        self.breaker = CircuitBreaker(model, min_calls=10)
+
+    def get_default_model(self) -> str:
+        return "model"
+
+    async def generate(self, prompt, system_message=None, **kwargs) -> str:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return json.dumps({"backend": self.model_name})
+
+
+def outage() -> ProviderError:
+    return ProviderError("unavailable", retryable=True, status_code=503)
+
+
+def bad_request() -> ProviderError:
+    return ProviderError("bad request", retryable=False, status_code=400)
+
+
+async def generate(provider: FailoverProvider):
+    return await provider.generate_json("prompt", use_cache=False, coalesce=False)
+
+
+async def test_uses_first_backend_when_healthy():
+    first, second = Backend("m1"), Backend("m2")
+    provider = FailoverProvider([first, second], latency_slo=0, hedge=False)
+
+    assert await generate(provider) == {"backend": "m1"}
+    assert second.calls == 0
+
+
+async def test_fails_over_on_outage():
+    first, second = Backend("m1", error=outage()), Backend("m2")
+    provider = FailoverProvider([first, second], latency_slo=0, hedge=False)
+
+    assert await generate(provider) == {"backend": "m2"}
+    assert provider.health["fake:m1"].stats()["samples"] == 1
+
+
+async def test_bad_request_fails_without_failover():
+    first, second = Backend("m1", error=bad_request()), Backend("m2")
+    provider = FailoverProvider([first, second], latency_slo=0, hedge=False)
+
+    with pytest.raises(ProviderError, match="bad request"):
+        await generate(provider)
+    assert second.calls == 0
+    assert provider.health["fake:m1"].stats()["samples"] == 0
+
+
+async def test_invalid_output_fails_without_failover():
+    first, second = Backend("m1"), Backend("m2")
+    provider = FailoverProvider([first, second], latency_slo=0, hedge=False)
+
+    async def garbage(prompt, system_message=None, **kwargs):
+        first.calls += 1
+        return "not json"
+
+    first.generate = garbage
+
+    with pytest.raises(ValueError):
+        await generate(provider)
+    assert second.calls == 0
+
+
+async def test_last_error_raised_when_all_backends_fail():
+    backends = [Backend("m1", error=outage()), Backend("m2", error=outage())]
+    provider = FailoverProvider(backends, latency_slo=0, hedge=False)
+
+    with pytest.raises(ProviderError, match="unavailable"):
+        await generate(provider)
+    assert [backend.calls for backend in backends] == [1, 1]
+
+
+async def test_slow_backend_exceeding_slo_fails_over():
+    first, second = Backend("m1", delay=1.0), Backend("m2")
+    provider = FailoverProvider([first, second], latency_slo=0.05, hedge=False)
+
+    assert await generate(provider) == {"backend": "m2"}
+    assert provider.health["fake:m1"].stats()["samples"] == 1
+
+
+async def test_last_backend_has_no_slo():
+    first, second = Backend("m1", error=outage()), Backend("m2", delay=0.1)
+    provider = FailoverProvider([first, second], latency_slo=0.05, hedge=False)
+
+    assert await generate(provider) == {"backend": "m2"}
+
+
+async def test_unhealthy_backends_are_tried_last():
+    first, second = Backend("m1"), Backend("m2")
+    provider = FailoverProvider([first, second], latency_slo=0, hedge=False)
+    health = provider.health["fake:m1"]
+    for _ in range(health.min_samples):
+        health.record(False, 0.1)
+
+    assert await generate(provider) == {"backend": "m2"}
+    assert first.calls == 0
+
+
+async def test_hedge_returns_first_successful_response():
+    first, second = Backend("m1", delay=1.0), Backend("m2")
+    provider = FailoverProvider([first, second], latency_slo=0, hedge=True, hedge_delay=0.05)
+
+    assert await generate(provider) == {"backend": "m2"}
+    assert first.calls == 1 and second.calls == 1
+
+
+async def test_hedge_starts_next_backend_right_after_outage():
+    first, second = Backend("m1", error=outage()), Backend("m2")
+    provider = FailoverProvider([first, second], latency_slo=0, hedge=True, hedge_delay=10)
+
+    assert await asyncio.wait_for(generate(provider), timeout=1) == {"backend": "m2"}
+
+
+async def test_hedge_does_not_retry_bad_request():
+    first, second = Backend("m1", error=bad_request()), Backend("m2")
+    provider = FailoverProvider([first, second], latency_slo=0, hedge=True, hedge_delay=10)
+
+    with pytest.raises(ProviderError, match="bad request"):
+        await generate(provider)
+    assert second.calls == 0
+
+
+def test_requires_a_backend():
+    with pytest.raises(ValueError):
+        FailoverProvider([])
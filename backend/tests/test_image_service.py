@@ -0,0 +1,104 @@
+"""
+Tests for bulk image analysis.
+"""
+
+import asyncio
+from io import BytesIO
+
+import pytest
+
+from app.models.schemas import ImageBatchItem, ImageBatchRequest
+from app.services.image_service import ImageService
+from app.services.images import ImageError
+from app.services.usage import record_tokens
+
+Image = pytest.importorskip("PIL.Image")
+
+
+def picture(colour) -> bytes:
+    image = Image.new("RGB", (64, 48), colour)
+    image.paste((0, 0, 0), (0, 0, 32, 24))
+    output = BytesIO()
+    image.save(output, format="PNG")
+    return output.getvalue()
+
+
+class Fetcher:
+    """Stub downloader serving fixed bytes per URL."""
+
+    def __init__(self, images, delays=None):
+        self.images = images
+        self.delays = delays or {}
+        self.fetched = []
+
+    async def fetch(self, url: str) -> bytes:
+        self.fetched.append(url)
+        await asyncio.sleep(self.delays.get(url, 0))
+        if url not in self.images:
+            raise ImageError(f"Failed to download image {url}")
+        return self.images[url]
+
+
+class VisionProvider:
+    """Stub provider analyzing an image for 300 tokens."""
+
+    model_name = "vision"
+    vision_max_side = 512
+
+    def __init__(self):
+        self.analyzed = []
+
+    async def generate_json(self, prompt, system_message=None, images=(), **kwargs):
+        self.analyzed.extend(image.key for image in images)
+        record_tokens(prompt_tokens=250, completion_tokens=50)
+        return {"description": "A mug", "alt_text": "Red mug", "confidence": 0.9}
+
+
+async def analyze(service, urls):
+    request = ImageBatchRequest(
+        items=[ImageBatchItem(attachment_id=100 + i, image_url=url) for i, url in enumerate(urls)]
+    )
+    results = [result async for result in service.analyze_batch(request)]
+    return sorted(results, key=lambda result: result.index)
+
+
+async def test_identical_images_are_analyzed_once():
+    red, blue = picture((200, 0, 0)), picture((0, 0, 200))
+    fetcher = Fetcher(
+        {"https://a/red.png": red, "https://b/red-copy.png": red, "https://a/blue.png": blue},
+        delays={"https://b/red-copy.png": 0.01},
+    )
+    provider = VisionProvider()
+    service = ImageService(provider, fetcher)
+
+    results = await analyze(service, [
+        "https://a/red.png",
+        "https://a/red.png",
+        "https://b/red-copy.png",
+        "https://a/blue.png",
+    ])
+
+    assert len(provider.analyzed) == 2
+    assert sorted(fetcher.fetched) == [
+        "https://a/blue.png", "https://a/red.png", "https://b/red-copy.png"
+    ]
+    assert all(result.success for result in results)
+    assert [result.duplicate_of for result in results] == [None, 100, 100, None]
+    assert [result.metadata.tokens_used for result in results] == [300, 0, 0, 300]
+    assert [result.metadata.cached for result in results] == [False, True, True, False]
+    assert results[1].data == results[0].data
+    assert service.usage.tokens_used == 600
+
+
+async def test_failures_are_reported_per_image():
+    fetcher = Fetcher({"https://a/red.png": picture((200, 0, 0)), "https://a/bad.png": b"junk"})
+    service = ImageService(VisionProvider(), fetcher)
+
+    results = await analyze(
+        service, ["https://a/missing.png", "https://a/bad.png", "https://a/red.png"]
+    )
+
+    assert [result.success for result in results] == [False, False, True]
+    assert results[0].error["code"] == "IMAGE_UNAVAILABLE"
+    assert results[1].error["code"] == "IMAGE_UNAVAILABLE"
+    assert results[0].metadata.tokens_used == 0
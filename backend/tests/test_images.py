@@ -0,0 +1,107 @@
+"""
+Tests for image preprocessing and cache keys.
+"""
+
+from io import BytesIO
+import sys
+
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+
+from app.services import images  # noqa: E402
+from app.services.images import ImageError, prepare_image  # noqa: E402
+
+
+def picture(width=800, height=600, colour=(200, 40, 40), fmt="PNG", **save) -> bytes:
+    """Image with a gradient and a coloured block, encoded as fmt."""
+    image = Image.new("RGB", (width, height), (255, 255, 255))
+    for x in range(width):
+        shade = 255 * x // width
+        image.paste((shade, shade, shade), (x, 0, x + 1, height // 2))
+    image.paste(colour, (width // 4, height // 2, width // 2, height))
+    output = BytesIO()
+    image.save(output, format=fmt, **save)
+    return output.getvalue()
+
+
+def test_downscales_to_max_side_and_reencodes_as_jpeg():
+    prepared = prepare_image(picture(800, 600), max_side=400)
+
+    assert prepared.media_type == "image/jpeg"
+    assert (prepared.width, prepared.height) == (400, 300)
+    decoded = Image.open(BytesIO(prepared.data))
+    assert decoded.format == "JPEG" and decoded.size == (400, 300)
+
+
+def test_small_images_keep_their_size():
+    prepared = prepare_image(picture(200, 100), max_side=400)
+
+    assert (prepared.width, prepared.height) == (200, 100)
+
+
+def test_transparency_is_flattened_onto_white():
+    image = Image.new("RGBA", (10, 10), (0, 0, 0, 0))
+    output = BytesIO()
+    image.save(output, format="PNG")
+
+    prepared = prepare_image(output.getvalue(), max_side=100)
+
+    assert Image.open(BytesIO(prepared.data)).getpixel((5, 5)) >= (250, 250, 250)
+
+
+def test_key_is_stable_for_reencoded_and_resized_copies():
+    original = prepare_image(picture(), max_side=2048)
+    reencoded = prepare_image(picture(fmt="JPEG", quality=60), max_side=2048)
+    resized = prepare_image(picture(400, 300), max_side=2048)
+
+    assert original.key.startswith("img:")
+    assert reencoded.key == original.key
+    assert resized.key == original.key
+
+
+def test_key_differs_for_different_images():
+    original = prepare_image(picture(), max_side=2048)
+
+    assert prepare_image(picture(colour=(40, 40, 200)), max_side=2048).key != original.key
+    assert prepare_image(picture(800, 400), max_side=2048).key != original.key
+    flipped = Image.open(BytesIO(picture())).transpose(Image.Transpose.FLIP_LEFT_RIGHT)
+    output = BytesIO()
+    flipped.save(output, format="PNG")
+    assert prepare_image(output.getvalue(), max_side=2048).key != original.key
+
+
+def test_rejects_undecodable_data():
+    with pytest.raises(ImageError, match="Unsupported"):
+        prepare_image(b"not an image", max_side=100)
+
+    with pytest.raises(ImageError):
+        prepare_image(picture()[:200], max_side=100)
+
+
+@pytest.mark.filterwarnings("ignore::PIL.Image.DecompressionBombWarning")
+def test_rejects_images_pillow_only_warns_about(monkeypatch):
+    monkeypatch.setattr(Image, "MAX_IMAGE_PIXELS", 1000)
+
+    with pytest.raises(ImageError, match="too large"):
+        prepare_image(picture(40, 40), max_side=100)
+
+
+def test_maps_decompression_bomb_error(monkeypatch):
+    monkeypatch.setattr(Image, "MAX_IMAGE_PIXELS", 500)
+
+    with pytest.raises(ImageError, match="too large"):
+        prepare_image(picture(40, 40), max_side=100)
+
+
+def test_without_pillow_sends_bytes_by_content_hash(monkeypatch):
+    data = picture(20, 20)
+    monkeypatch.setitem(sys.modules, "PIL", None)
+
+    prepared = prepare_image(data, max_side=10)
+
+    assert prepared.data == data
+    assert prepared.media_type == "image/png"
+    assert prepared.key == images.content_hash(data)
+    with pytest.raises(ImageError):
+        prepare_image(b"unknown", max_side=10)
@@ -0,0 +1,284 @@
+"""
+Tests for background jobs.
+
+Store behaviour runs against the in-memory store and the Redis store on
+fakeredis; the Redis cases are skipped when fakeredis is not installed.
+"""
+
+import asyncio
+import hashlib
+import hmac
+import json
+
+import httpx
+import pytest
+from pydantic import BaseModel, ValidationError
+
+from app.services import jobs
+from app.services.jobs import JobManager, MemoryJobStore, RedisJobStore
+from app.services.usage import UsageStats, record_tokens, track_usage
+from app.utils.net import UnsafeURLError
+
+
+class EchoRequest(BaseModel):
+    text: str
+    fail: bool = False
+    block: bool = False
+
+
+class EchoResult(BaseModel):
+    text: str
+
+
+class EchoService:
+    """Service answering with the upper-cased text after using 15 tokens."""
+
+    started = None
+
+    def __init__(self, provider):
+        self.provider = provider
+        self.model_name = "echo-model"
+        self.usage = UsageStats()
+
+    async def run(self, request: EchoRequest) -> EchoResult:
+        with track_usage() as self.usage:
+            record_tokens(prompt_tokens=10, completion_tokens=5)
+            if request.block:
+                EchoService.started.set()
+                await asyncio.Event().wait()
+            if request.fail:
+                raise RuntimeError("boom")
+            return EchoResult(text=request.text.upper())
+
+
+class Registry:
+    def get(self):
+        return object()
+
+
+class RecordingLimiter:
+    def __init__(self):
+        self.charges = []
+
+    async def charge(self, key: str, tokens: int) -> None:
+        self.charges.append((key, tokens))
+
+
+@pytest.fixture(autouse=True)
+def echo_jobs(monkeypatch):
+    monkeypatch.setitem(jobs.JOB_TYPES, "echo", (EchoRequest, EchoService, "run"))
+    EchoService.started = asyncio.Event()
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    fakeredis = pytest.importorskip("fakeredis")
+    from redis import asyncio as aioredis
+
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(
+        aioredis, "from_url", lambda url: fakeredis.FakeAsyncRedis(server=server)
+    )
+
+
+@pytest.fixture(params=["memory", "redis"])
+def make_store(request):
+    """Factory of stores sharing one backend."""
+    if request.param == "memory":
+        store = MemoryJobStore()
+        return lambda: store
+
+    request.getfixturevalue("fake_redis")
+    return lambda: RedisJobStore("redis://test")
+
+
+@pytest.fixture
+def limiter():
+    return RecordingLimiter()
+
+
+@pytest.fixture
+def manager(make_store, limiter):
+    return JobManager(make_store(), Registry(), rate_limiter=limiter)
+
+
+async def run_next(manager: JobManager) -> str:
+    """Claim and run the next queued job."""
+    job_id = await manager.store.dequeue(timeout=1)
+    assert job_id is not None
+    await manager._run(job_id)
+    return job_id
+
+
+async def test_job_succeeds(manager, limiter):
+    submitted = await manager.submit("echo", {"text": "hi"}, rate_limit_key="client")
+    assert submitted.status == "queued"
+
+    await run_next(manager)
+
+    job = await manager.get(submitted.job_id)
+    assert job.status == "succeeded"
+    assert job.result == {"text": "HI"}
+    assert job.metadata.tokens_used == 15
+    assert job.metadata.model == "echo-model"
+    assert job.started_at <= job.finished_at
+    assert limiter.charges == [("client", 15)]
+
+
+async def test_job_fails(manager, limiter):
+    submitted = await manager.submit(
+        "echo", {"text": "hi", "fail": True}, rate_limit_key="client"
+    )
+
+    await run_next(manager)
+
+    job = await manager.get(submitted.job_id)
+    assert job.status == "failed"
+    assert job.error == {"code": "JOB_FAILED", "message": "boom"}
+    assert job.result is None
+    # Tokens spent before the failure are still charged
+    assert limiter.charges == [("client", 15)]
+
+
+async def test_jobs_without_key_are_not_charged(manager, limiter):
+    await manager.submit("echo", {"text": "hi"})
+
+    await run_next(manager)
+
+    assert limiter.charges == []
+
+
+async def test_submit_validates_input(manager, monkeypatch):
+    with pytest.raises(ValueError, match="Unknown job type"):
+        await manager.submit("unknown", {})
+    with pytest.raises(ValidationError):
+        await manager.submit("echo", {"fail": True})
+
+    async def refuse(url):
+        raise UnsafeURLError("private")
+
+    monkeypatch.setattr(jobs, "ensure_public_url", refuse)
+    with pytest.raises(UnsafeURLError):
+        await manager.submit("echo", {"text": "hi"}, webhook_url="http://10.0.0.1/hook")
+
+
+async def test_interrupted_job_is_queued_again(manager):
+    submitted = await manager.submit("echo", {"text": "hi", "block": True})
+    job_id = await manager.store.dequeue(timeout=1)
+
+    task = asyncio.ensure_future(manager._run(job_id))
+    await EchoService.started.wait()
+    assert (await manager.get(job_id)).status == "running"
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    job = await manager.get(submitted.job_id)
+    assert job.status == "queued" and job.started_at is None
+    assert await manager.store.dequeue(timeout=1) == job_id
+
+
+async def test_finished_job_is_not_run_again(manager, limiter):
+    submitted = await manager.submit("echo", {"text": "hi"}, rate_limit_key="client")
+    await run_next(manager)
+
+    # A recovered claim of a job that already finished is only acknowledged
+    await manager.store.enqueue(submitted.job_id)
+    await run_next(manager)
+
+    assert limiter.charges == [("client", 15)]
+
+
+async def test_workers_run_submitted_jobs(limiter):
+    # fakeredis does not wake a blocked BLMOVE on push, so workers run on memory
+    manager = JobManager(MemoryJobStore(), Registry(), rate_limiter=limiter)
+    await manager.start()
+    try:
+        submitted = await manager.submit("echo", {"text": "hi"})
+        for _ in range(100):
+            job = await manager.get(submitted.job_id)
+            if job.status == "succeeded":
+                break
+            await asyncio.sleep(0.01)
+    finally:
+        await manager.stop()
+
+    assert job.status == "succeeded"
+
+
+async def test_webhook_body_is_signed(manager, monkeypatch):
+    received = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        received.append(request)
+        return httpx.Response(204)
+
+    async def allow(url):
+        pass
+
+    monkeypatch.setenv("APP_SECRET", "s3cret")
+    monkeypatch.setattr(jobs, "ensure_public_url", allow)
+    manager._http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    submitted = await manager.submit(
+        "echo", {"text": "hi"}, webhook_url="https://hooks.example/done"
+    )
+    await run_next(manager)
+
+    [request] = received
+    expected = hmac.new(b"s3cret", request.content, hashlib.sha256).hexdigest()
+    assert str(request.url) == "https://hooks.example/done"
+    assert request.headers["content-type"] == "application/json"
+    assert request.headers["x-contentcraft-signature"] == f"sha256={expected}"
+
+    body = json.loads(request.content)
+    assert body["job_id"] == submitted.job_id and body["status"] == "succeeded"
+    assert "payload" not in body and "webhook_url" not in body
+
+
+async def test_webhook_failure_keeps_job_result(manager, monkeypatch):
+    async def allow(url):
+        pass
+
+    monkeypatch.setattr(jobs, "ensure_public_url", allow)
+    failing = httpx.MockTransport(lambda request: httpx.Response(500))
+    manager._http = httpx.AsyncClient(transport=failing)
+
+    submitted = await manager.submit("echo", {"text": "hi"}, webhook_url="https://hooks.example/")
+    await run_next(manager)
+
+    assert (await manager.get(submitted.job_id)).status == "succeeded"
+
+
+async def test_redis_claims_stay_in_processing_list_until_ack(fake_redis):
+    store = RedisJobStore("redis://test")
+    await store.enqueue("a")
+    await store.enqueue("b")
+
+    assert await store.dequeue(timeout=1) == "a"
+    assert await store.client.lrange(store.processing_key, 0, -1) == [b"a"]
+
+    await store.ack("a")
+    await store.requeue("b")
+    assert await store.client.llen(store.processing_key) == 0
+    assert await store.dequeue(timeout=1) == "b"
+
+
+async def test_redis_recovers_claims_of_dead_workers(fake_redis):
+    crashed, alive = RedisJobStore("redis://test"), RedisJobStore("redis://test")
+    for job_id in ("first", "second"):
+        await crashed.enqueue(job_id)
+    await crashed.heartbeat()
+    assert await crashed.dequeue(timeout=1) == "first"
+    assert await crashed.dequeue(timeout=1) == "second"
+
+    # The crashed worker's claims are kept while its heartbeat lives
+    await alive.heartbeat()
+    assert await alive.recover() == 0
+
+    await alive.client.delete(f"{crashed.prefix}worker:{crashed.owner}")
+    assert await alive.recover() == 2
+
+    assert await alive.dequeue(timeout=1) == "first"
+    assert await alive.dequeue(timeout=1) == "second"
+    assert await alive.client.exists(crashed.processing_key) == 0
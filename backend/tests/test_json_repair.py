@@ -0,0 +1,89 @@
+"""
+Tests for local JSON repair.
+"""
+
+import json
+
+import pytest
+
+from app.services.json_repair import (
+    JSONRepairError,
+    is_truncated,
+    loads_lenient,
+    repair_json,
+)
+
+
+def test_valid_json_is_parsed_unchanged():
+    assert loads_lenient('{"a": [1, 2]}') == {"a": [1, 2]}
+
+
+def test_strips_code_fences_and_surrounding_text():
+    text = 'Here you go:\n```json\n{"title": "T"}\n```\nAnything else?'
+
+    assert loads_lenient(text) == {"title": "T"}
+    assert not is_truncated(text)
+
+
+def test_removes_trailing_commas():
+    assert loads_lenient('{"outline": ["a", "b",],\n}') == {"outline": ["a", "b"]}
+
+
+def test_keeps_commas_and_brackets_inside_strings():
+    text = '{"body": "a, ] b }", "n": 1,}'
+
+    assert loads_lenient(text) == {"body": "a, ] b }", "n": 1}
+
+
+def test_truncated_string_value_is_dropped():
+    text = '{"title": "T", "excerpt": "E", "body_html": "<p>cut of'
+
+    assert is_truncated(text)
+    assert json.loads(repair_json(text)) == {"title": "T", "excerpt": "E"}
+
+
+def test_truncated_key_is_dropped():
+    text = '{"title": "T", "exce'
+
+    assert json.loads(repair_json(text)) == {"title": "T"}
+
+
+def test_truncated_nested_containers_are_closed():
+    text = '{"title": "T", "meta": {"seo_title": "S", "slug": "s'
+
+    assert json.loads(repair_json(text)) == {"title": "T", "meta": {"seo_title": "S"}}
+
+
+def test_truncated_array_keeps_complete_items():
+    text = '{"outline": ["one", "two", "thr'
+
+    assert json.loads(repair_json(text)) == {"outline": ["one", "two"]}
+
+
+def test_truncated_number_is_dropped():
+    assert json.loads(repair_json('{"a": 1, "b": 2')) == {"a": 1}
+
+
+def test_complete_numbers_before_comma_are_kept():
+    assert json.loads(repair_json('[1, 2, 3')) == [1, 2]
+
+
+def test_escaped_quote_does_not_end_string():
+    text = '{"title": "say \\"hi\\"", "body": "x'
+
+    assert json.loads(repair_json(text)) == {"title": 'say "hi"'}
+
+
+def test_no_json_raises():
+    with pytest.raises(JSONRepairError):
+        repair_json("Sorry, I cannot help with that.")
+
+    with pytest.raises(JSONRepairError):
+        loads_lenient("Sorry, I cannot help with that.")
+
+    assert not is_truncated("no json here")
+
+
+def test_mismatched_bracket_raises():
+    with pytest.raises(JSONRepairError):
+        repair_json('{"a": [1}')
@@ -0,0 +1,108 @@
+"""
+Tests for the incremental JSON field parser.
+"""
+
+import pytest
+
+from app.services.json_stream import JSONFieldStream, JSONStreamError
+
+
+def feed_all(stream: JSONFieldStream, text: str, size: int = 3):
+    """Feed text in fixed-size chunks and collect completed fields."""
+    fields = []
+    for start in range(0, len(text), size):
+        fields.extend(stream.feed(text[start:start + size]))
+    return fields
+
+
+def test_reports_fields_as_they_complete():
+    stream = JSONFieldStream()
+
+    assert stream.feed('{"title": "Hel') == []
+    assert stream.feed('lo", "outline": ["a", ') == [("title", "Hello")]
+    assert stream.feed('"b"], "count": 3}') == [("outline", ["a", "b"]), ("count", 3)]
+    assert stream.close() == {"title": "Hello", "outline": ["a", "b"], "count": 3}
+
+
+def test_handles_braces_and_escapes_inside_strings():
+    text = '{"body": "a } b \\" { c", "meta": {"slug": "x"}}'
+    stream = JSONFieldStream()
+
+    assert feed_all(stream, text, size=1) == [
+        ("body", 'a } b " { c'),
+        ("meta", {"slug": "x"}),
+    ]
+    assert stream.done
+
+
+def test_skips_code_fence_preamble():
+    stream = JSONFieldStream()
+
+    fields = feed_all(stream, '```json\n{"title": "T"}\n```')
+
+    assert fields == [("title", "T")]
+    assert stream.close() == {"title": "T"}
+
+
+def test_rejects_long_preamble():
+    stream = JSONFieldStream()
+
+    with pytest.raises(JSONStreamError):
+        stream.feed("x" * 500)
+
+
+def test_tolerates_trailing_commas():
+    stream = JSONFieldStream()
+
+    fields = feed_all(stream, '{"outline": ["a", "b",], "title": "T",}')
+
+    assert fields == [("outline", ["a", "b"]), ("title", "T")]
+    assert stream.done
+
+
+def test_checks_field_types():
+    stream = JSONFieldStream(field_types={"title": str, "score": float})
+
+    assert stream.feed('{"score": 7, ') == [("score", 7)]
+    with pytest.raises(JSONStreamError, match="title"):
+        stream.feed('"title": ["not", "a", "string"]}')
+
+
+def test_allows_null_for_typed_fields():
+    stream = JSONFieldStream(field_types={"schema_ld_json": str})
+
+    assert stream.feed('{"schema_ld_json": null}') == [("schema_ld_json", None)]
+
+
+def test_validator_aborts_stream():
+    def validator(key, value):
+        if key == "title" and len(value) > 5:
+            raise ValueError("too long")
+
+    stream = JSONFieldStream(validator=validator)
+
+    with pytest.raises(JSONStreamError, match="failed validation"):
+        stream.feed('{"title": "Far too long"}')
+
+
+def test_rejects_mismatched_brackets():
+    stream = JSONFieldStream()
+
+    with pytest.raises(JSONStreamError):
+        stream.feed('{"outline": ["a"}')
+
+
+def test_close_rejects_truncated_object():
+    stream = JSONFieldStream()
+    stream.feed('{"title": "T", "body_html": "<p>cut off')
+
+    with pytest.raises(JSONStreamError):
+        stream.close()
+
+
+def test_ignores_text_after_object():
+    stream = JSONFieldStream()
+
+    assert stream.feed('{"a": 1} trailing') == [("a", 1)]
+    assert stream.close() == {"a": 1}
+    assert stream.text.endswith("trailing")
@@ -0,0 +1,97 @@
+"""
+Tests for the public-address transport.
+"""
+
+import httpx
+import pytest
+
+from app.utils import net
+from app.utils.net import PublicTransport, UnsafeURLError, is_public_address
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """Stand-in for httpx.AsyncHTTPTransport recording pools and requests."""
+
+    instances: list = []
+
+    def __init__(self, **kwargs):
+        self.requests = []
+        self.closed = False
+        RecordingTransport.instances.append(self)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        return httpx.Response(200, stream=httpx.ByteStream(b"ok"))
+
+    async def aclose(self) -> None:
+        self.closed = True
+
+
+@pytest.fixture
+def pools(monkeypatch):
+    async def resolve(host, port=None):
+        return [] if host == "allowed.internal" else ["93.184.216.34"]
+
+    RecordingTransport.instances = []
+    monkeypatch.setattr(net.httpx, "AsyncHTTPTransport", RecordingTransport)
+    monkeypatch.setattr(net, "resolve_public", resolve)
+    return RecordingTransport.instances
+
+
+def test_is_public_address():
+    assert is_public_address("93.184.216.34")
+    assert not is_public_address("127.0.0.1")
+    assert not is_public_address("10.1.2.3")
+    assert not is_public_address("169.254.169.254")
+    assert not is_public_address("::ffff:192.168.0.1")
+    assert not is_public_address("not an ip")
+
+
+async def test_hosts_on_one_address_get_separate_pools(pools):
+    async with httpx.AsyncClient(transport=PublicTransport()) as client:
+        await client.get("https://a.example/x")
+        await client.get("https://b.example/y")
+        await client.get("https://a.example/z")
+
+    pinned = [pool for pool in pools if pool.requests]
+    assert len(pinned) == 2
+    for pool, host in zip(pinned, ["a.example", "b.example"]):
+        assert {request.extensions["sni_hostname"] for request in pool.requests} == {host}
+        assert {request.headers["host"] for request in pool.requests} == {host}
+        assert {request.url.host for request in pool.requests} == {"93.184.216.34"}
+    assert len(pinned[0].requests) == 2
+
+
+async def test_unpinned_requests_use_default_pool(pools):
+    transport = PublicTransport()
+    async with httpx.AsyncClient(transport=transport) as client:
+        await client.get("http://allowed.internal/x")
+        await client.get("http://93.184.216.34/y")
+
+    assert len(pools) == 1
+    assert len(pools[0].requests) == 2
+    assert "sni_hostname" not in pools[0].requests[0].extensions
+
+
+async def test_idle_pools_beyond_limit_are_closed(pools):
+    transport = PublicTransport(max_hosts=2)
+    async with httpx.AsyncClient(transport=transport) as client:
+        request = client.build_request("GET", "https://a.example/")
+        streaming = await client.send(request, stream=True)
+        await client.get("https://b.example/")
+        await client.get("https://c.example/")
+
+        # a.example is still streaming, so the idle b.example pool goes
+        a_pool, b_pool, c_pool = pools[1:]
+        assert not a_pool.closed and b_pool.closed and not c_pool.closed
+
+        await streaming.aclose()
+        await client.get("https://d.example/")
+        assert a_pool.closed
+
+    assert all(pool.closed for pool in pools)
+
+
+async def test_rejects_other_schemes(pools):
+    with pytest.raises(UnsafeURLError):
+        await PublicTransport().handle_async_request(httpx.Request("GET", "ftp://a.example/"))
@@ -0,0 +1,93 @@
+"""
+Tests for JSON schemas generated from response models.
+"""
+
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+from app.models.schemas import ContentData, ProductData
+from app.services.output_schema import UNSUPPORTED_KEYWORDS, response_schema
+
+
+class Meta(BaseModel):
+    slug: str = Field(..., max_length=60, description="URL slug")
+    note: Optional[str] = Field(None, description="Optional note")
+
+
+class Article(BaseModel):
+    title: str = Field(..., min_length=5, description="Title")
+    tags: List[str] = Field(default_factory=list, max_length=5, description="Tags")
+    meta: Meta = Field(..., description="Metadata")
+    links: List[Meta] = Field(default_factory=list, description="Links")
+    summary: Optional[str] = Field(None, description="Summary")
+    extra: Dict[str, Any] = Field(default_factory=dict, description="Free-form data")
+    internal: str = Field(default="", description="Not generated")
+
+
+def keywords(node: Any) -> set:
+    """All keys used anywhere in a schema."""
+    if isinstance(node, dict):
+        found = set(node)
+        for value in node.values():
+            found |= keywords(value)
+        return found
+    if isinstance(node, list):
+        return set().union(*(keywords(item) for item in node))
+    return set()
+
+
+def test_limits_schema_to_requested_fields():
+    result = response_schema(Article, ["title", "tags"], "article")
+    schema = result["schema"]
+
+    assert result["name"] == "article"
+    assert list(schema["properties"]) == ["title", "tags"]
+    assert schema["required"] == ["title", "tags"]
+    assert schema["additionalProperties"] is False
+
+
+def test_inlines_references_and_closes_nested_objects():
+    schema = response_schema(Article, ["meta", "links"], "article")["schema"]
+
+    meta = schema["properties"]["meta"]
+    assert "$ref" not in meta and "$defs" not in schema
+    assert meta["additionalProperties"] is False
+    assert meta["required"] == ["slug", "note"]
+    assert schema["properties"]["links"]["items"]["required"] == ["slug", "note"]
+
+
+def test_optional_fields_become_required_and_nullable():
+    schema = response_schema(Article, ["summary", "meta"], "article")["schema"]
+
+    summary_types = [option.get("type") for option in schema["properties"]["summary"]["anyOf"]]
+    note_types = [
+        option.get("type") for option in schema["properties"]["meta"]["properties"]["note"]["anyOf"]
+    ]
+    assert summary_types == ["string", "null"]
+    assert note_types == ["string", "null"]
+
+
+def test_drops_unsupported_keywords():
+    schema = response_schema(Article, ["title", "tags", "meta", "summary"], "article")["schema"]
+
+    assert not keywords(schema) & (UNSUPPORTED_KEYWORDS - {"title"})
+    # "title" is only removed as a keyword, not as a property name
+    assert "title" in schema["properties"]
+    assert "title" not in schema["properties"]["title"]
+
+
+def test_free_form_objects_make_schema_non_strict():
+    assert response_schema(Article, ["title", "meta"], "article")["strict"] is True
+    assert response_schema(Article, ["title", "extra"], "article")["strict"] is False
+
+
+def test_response_models_produce_strict_schemas():
+    content = response_schema(
+        ContentData, ["title", "excerpt", "outline", "body_html", "meta"], "content"
+    )
+    product = response_schema(ProductData, list(ProductData.model_fields), "product")
+
+    assert content["strict"] is True
+    assert set(content["schema"]["required"]) == set(content["schema"]["properties"])
+    assert product["schema"]["additionalProperties"] is False
@@ -0,0 +1,89 @@
+"""
+Tests for compiled prompt templates.
+"""
+
+import pytest
+
+from app.services import prompts
+from app.services.prompt_template import Prompt, PromptTemplate
+
+
+def test_render_matches_str_format():
+    text = "Write about {topic} in {language}.\nKeywords: {keywords}\n{topic} again"
+    template = PromptTemplate(text)
+
+    values = {"topic": "coffee", "language": "en", "keywords": "beans, grind"}
+
+    assert template.render(**values) == text.format(**values)
+    assert template.fields == ("topic", "language", "keywords")
+
+
+def test_literal_braces_are_kept():
+    template = PromptTemplate('Return JSON: {{"title": "{title}"}}')
+
+    assert template.render(title="T") == 'Return JSON: {"title": "T"}'
+    assert template.fields == ("title",)
+
+
+def test_values_are_not_reinterpreted():
+    template = PromptTemplate("Topic: {topic}")
+
+    assert template.render(topic="{secret} {{x}}") == "Topic: {secret} {{x}}"
+
+
+def test_render_requires_every_slot():
+    template = PromptTemplate("{a} and {b}")
+
+    with pytest.raises(TypeError):
+        template.render(a="x")
+    with pytest.raises(TypeError):
+        template.render(a="x", b="y", c="z")
+
+
+def test_template_without_slots():
+    template = PromptTemplate("Static only")
+
+    assert template.render() == "Static only"
+    assert template.prefix == "Static only"
+
+
+@pytest.mark.parametrize("placeholder", ["{a.b}", "{a[0]}", "{a!r}", "{a:>10}", "{_a}", "{class}"])
+def test_rejects_unsupported_placeholders(placeholder):
+    with pytest.raises(ValueError):
+        PromptTemplate(f"Text {placeholder}")
+
+
+def test_rendered_prompt_carries_static_prefix():
+    template = PromptTemplate("Instructions first.\nTOPIC: {topic}")
+
+    prompt = template.render(topic="coffee")
+
+    assert isinstance(prompt, Prompt)
+    assert prompt.prefix == "Instructions first.\nTOPIC: "
+    assert prompt.startswith(prompt.prefix)
+
+
+def test_template_starting_with_slot_has_no_prefix():
+    prompt = PromptTemplate("{topic} first").render(topic="coffee")
+
+    assert prompt.prefix == ""
+
+
+def test_static_segments_are_shared_between_renders():
+    first = PromptTemplate("A long invariant instruction block. {topic}")
+    second = PromptTemplate("A long invariant instruction block. {x}")
+
+    assert first.segments[0] is second.segments[0]
+
+
+def test_content_prompt_shares_prefix_across_topics():
+    first = prompts.build_content_prompt("Coffee at home", ["coffee"], "friendly", "short", "en")
+    second = prompts.build_content_prompt("Tea in the garden", ["tea"], "formal", "long", "de")
+
+    assert first.prefix and first.prefix == second.prefix
+    assert "Coffee at home" in first and "Tea in the garden" in second
+
+
+def test_system_messages_are_precomputed():
+    assert prompts.get_system_message("product") is prompts.get_system_message("product")
+    assert prompts.get_system_message("unknown") == prompts.SYSTEM_MESSAGE_BASE
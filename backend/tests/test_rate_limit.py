@@ -0,0 +1,169 @@
+"""
+Tests for the token-bucket rate limiters.
+
+The Redis limiter runs its Lua scripts against fakeredis; those cases are
+skipped when fakeredis (with Lua support) is not installed.
+"""
+
+import time
+
+import pytest
+
+from app.services.rate_limit import (
+    MemoryRateLimiter,
+    RateLimitResult,
+    RedisRateLimiter,
+    TokenBucket,
+    retry_after_header,
+)
+
+
+class Clock:
+    """Manually advanced replacement for time.time and time.monotonic."""
+
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(time, "monotonic", clock)
+    monkeypatch.setattr(time, "time", clock)
+    return clock
+
+
+@pytest.fixture(params=["memory", "redis"])
+def make_limiter(request, monkeypatch):
+    """Factory of limiters with the given budgets, for each backend."""
+    if request.param == "memory":
+        return MemoryRateLimiter
+
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    from redis import asyncio as aioredis
+
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(
+        aioredis, "from_url", lambda url: fakeredis.FakeAsyncRedis(server=server)
+    )
+
+    def create(requests_per_minute=60, tokens_per_minute=0):
+        return RedisRateLimiter("redis://test", requests_per_minute, tokens_per_minute)
+
+    return create
+
+
+async def test_admits_up_to_request_budget(clock, make_limiter):
+    limiter = make_limiter(requests_per_minute=3)
+
+    results = [await limiter.acquire("client") for _ in range(4)]
+
+    assert [r.allowed for r in results] == [True, True, True, False]
+    assert [r.remaining for r in results] == [2, 1, 0, 0]
+    assert results[-1].retry_after == pytest.approx(20.0)
+
+
+async def test_refills_continuously(clock, make_limiter):
+    limiter = make_limiter(requests_per_minute=3)
+    for _ in range(3):
+        await limiter.acquire("client")
+
+    clock.now += 19
+    assert not (await limiter.acquire("client")).allowed
+
+    clock.now += 1
+    assert (await limiter.acquire("client")).allowed
+    assert not (await limiter.acquire("client")).allowed
+
+
+async def test_idle_time_does_not_exceed_capacity(clock, make_limiter):
+    limiter = make_limiter(requests_per_minute=2)
+    await limiter.acquire("client")
+
+    clock.now += 3600
+    results = [await limiter.acquire("client") for _ in range(3)]
+
+    assert [r.allowed for r in results] == [True, True, False]
+
+
+async def test_keys_have_separate_budgets(clock, make_limiter):
+    limiter = make_limiter(requests_per_minute=1)
+
+    assert (await limiter.acquire("a")).allowed
+    assert (await limiter.acquire("b")).allowed
+    assert not (await limiter.acquire("a")).allowed
+
+
+async def test_disabled_request_budget_admits_everything(clock, make_limiter):
+    limiter = make_limiter(requests_per_minute=0)
+
+    results = [await limiter.acquire("client") for _ in range(100)]
+
+    assert all(r.allowed for r in results)
+    assert results[0].limit == 0
+
+
+async def test_token_debt_blocks_until_repaid(clock, make_limiter):
+    limiter = make_limiter(requests_per_minute=60, tokens_per_minute=100)
+    assert (await limiter.acquire("client")).allowed
+
+    await limiter.charge("client", 250)
+    denied = await limiter.acquire("client")
+
+    assert not denied.allowed
+    # Level -150 needs 151 tokens at 100 per minute
+    assert denied.retry_after == pytest.approx(90.6)
+
+    clock.now += 90.6
+    assert (await limiter.acquire("client")).allowed
+
+
+async def test_charge_ignores_zero_tokens_and_disabled_budget(clock, make_limiter):
+    limiter = make_limiter(requests_per_minute=60, tokens_per_minute=0)
+
+    await limiter.charge("client", 10_000)
+    assert (await limiter.acquire("client")).allowed
+
+    limiter = make_limiter(requests_per_minute=60, tokens_per_minute=100)
+    await limiter.charge("client", 0)
+    assert (await limiter.acquire("client")).allowed
+
+
+async def test_memory_limiter_purges_idle_keys(clock):
+    limiter = MemoryRateLimiter(requests_per_minute=10, max_keys=2)
+    await limiter.acquire("a")
+    await limiter.acquire("b")
+
+    clock.now += 60
+    await limiter.acquire("c")
+
+    assert set(limiter._buckets) == {"c"}
+
+
+async def test_redis_limiter_fails_open(clock):
+    fakeredis = pytest.importorskip("fakeredis")
+    limiter = RedisRateLimiter("redis://test", requests_per_minute=1)
+    limiter.client = fakeredis.FakeAsyncRedis(connected=False)
+    limiter._acquire = limiter.client.register_script("return 1")
+
+    result = await limiter.acquire("client")
+
+    assert result.allowed
+
+
+def test_token_bucket_wait_time():
+    bucket = TokenBucket(capacity=60, now=0.0)
+    bucket.level = -2.0
+
+    assert bucket.wait_time(1) == pytest.approx(3.0)
+    assert bucket.refill(2.0) == pytest.approx(0.0)
+    assert bucket.wait_time(0) == 0.0
+
+
+def test_retry_after_header_rounds_up_to_whole_seconds():
+    assert retry_after_header(RateLimitResult(False, 60, 0, retry_after=0.2)) == "1"
+    assert retry_after_header(RateLimitResult(False, 60, 0, retry_after=1.01)) == "2"
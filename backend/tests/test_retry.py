@@ -0,0 +1,176 @@
+"""
+Tests for retrying transient provider errors.
+"""
+
+import asyncio
+import json
+from email.utils import formatdate
+import time
+
+import httpx
+import pytest
+
+from app.services.circuit_breaker import CLOSED, OPEN, CircuitBreaker
+from app.services.llm_provider import (
+    LLMProvider,
+    ProviderError,
+    RetryPolicy,
+    counts_as_outage,
+    parse_retry_after,
+)
+from app.utils.concurrency import ConcurrencyLimiter
+
+
+class ScriptedProvider(LLMProvider):
+    """Provider returning (or raising) scripted outcomes in order."""
+
+    name = "scripted"
+
+    def __init__(self, outcomes, max_attempts: int = 3, min_calls: int = 10):
+        super().__init__("model")
+        self.outcomes = list(outcomes)
+        self.calls = 0
+        self.retry_policy = RetryPolicy(max_attempts=max_attempts, base_delay=0, max_delay=0)
+        self.breaker = CircuitBreaker(self.name, min_calls=min_calls)
+
+    def get_default_model(self) -> str:
+        return "model"
+
+    async def generate(self, prompt, system_message=None, **kwargs) -> str:
+        self.calls += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return outcome
+
+
+def transient(status_code: int = 503) -> ProviderError:
+    return ProviderError("unavailable", retryable=True, status_code=status_code)
+
+
+def fatal(status_code: int = 400) -> ProviderError:
+    return ProviderError("bad request", retryable=False, status_code=status_code)
+
+
+async def test_retries_transient_errors_until_success():
+    provider = ScriptedProvider([transient(), transient(429), json.dumps({"a": 1})])
+
+    assert await provider.generate_json("prompt", use_cache=False) == {"a": 1}
+    assert provider.calls == 3
+
+
+async def test_gives_up_after_max_attempts():
+    provider = ScriptedProvider([transient(), transient(), transient()])
+
+    with pytest.raises(ProviderError, match="unavailable"):
+        await provider.generate_json("prompt", use_cache=False)
+    assert provider.calls == 3
+
+
+async def test_fatal_errors_are_not_retried_or_counted():
+    provider = ScriptedProvider([fatal(), fatal(), fatal()])
+
+    for _ in range(3):
+        with pytest.raises(ProviderError):
+            await provider.generate_json("prompt", use_cache=False)
+
+    assert provider.calls == 3
+    assert provider.breaker.state == CLOSED
+    assert provider.breaker.stats()["samples"] == 0
+
+
+async def test_invalid_output_is_not_retried_or_counted():
+    provider = ScriptedProvider(["not json at all"])
+
+    with pytest.raises(ValueError, match="Invalid JSON"):
+        await provider.generate_json("prompt", use_cache=False)
+
+    assert provider.calls == 1
+    assert provider.breaker.stats()["samples"] == 0
+
+
+async def test_outages_open_the_breaker():
+    provider = ScriptedProvider([transient(), transient()], max_attempts=2, min_calls=2)
+
+    with pytest.raises(ProviderError):
+        await provider.generate_json("prompt", use_cache=False)
+
+    assert provider.breaker.state == OPEN
+
+
+async def test_backoff_gives_back_the_concurrency_slot():
+    busy = ProviderError("busy", retryable=True, status_code=429, retry_after=0.2)
+    provider = ScriptedProvider([busy, json.dumps({"a": 1})])
+    provider.retry_policy = RetryPolicy(max_attempts=2, base_delay=0)
+    provider.concurrency = ConcurrencyLimiter(1)
+
+    task = asyncio.ensure_future(provider.generate_json("prompt", use_cache=False))
+    await asyncio.sleep(0.05)
+
+    # Backing off: other calls can use the only slot meanwhile
+    assert provider.calls == 1
+    assert provider.concurrency.active == 0
+    async with provider.concurrency.acquire():
+        pass
+
+    assert await task == {"a": 1}
+    assert provider.calls == 2
+
+
+def test_delay_is_jittered_and_capped(monkeypatch):
+    policy = RetryPolicy(max_attempts=10, base_delay=0.5, max_delay=4.0)
+    monkeypatch.setattr("random.uniform", lambda low, high: high)
+
+    delays = [policy.delay(transient(), attempt, 0.0) for attempt in range(1, 6)]
+
+    assert delays == [0.5, 1.0, 2.0, 4.0, 4.0]
+
+
+def test_delay_honours_retry_after_and_deadline():
+    policy = RetryPolicy(max_attempts=4, base_delay=0.0, deadline=30.0)
+    error = ProviderError("rate limited", retryable=True, status_code=429, retry_after=12.0)
+
+    assert policy.delay(error, 1, 0.0) == 12.0
+    assert policy.delay(error, 1, 20.0) is None
+    assert policy.delay(error, 4, 0.0) is None
+    assert policy.delay(fatal(), 1, 0.0) is None
+
+
+def test_parse_retry_after():
+    assert parse_retry_after(None) is None
+    assert parse_retry_after({"retry-after": "7"}) == 7.0
+    assert parse_retry_after({"retry-after-ms": "1500", "retry-after": "7"}) == 1.5
+    assert parse_retry_after({"retry-after": "soon"}) is None
+
+    date = formatdate(time.time() + 60, usegmt=True)
+    assert 55 < parse_retry_after({"retry-after": date}) <= 60
+
+
+@pytest.mark.parametrize("status_code,retryable", [
+    (400, False), (401, False), (404, False), (408, True), (429, True), (500, True), (503, True),
+])
+def test_classifies_http_status(status_code, retryable):
+    provider = ScriptedProvider([])
+    request = httpx.Request("POST", "https://api.example.com")
+    response = httpx.Response(status_code, headers={"retry-after": "3"}, request=request)
+    error = httpx.HTTPStatusError("failed", request=request, response=response)
+
+    classified = provider._classify_error("call failed", error)
+
+    assert classified.retryable is retryable
+    assert classified.status_code == status_code
+    assert classified.retry_after == 3.0
+
+
+def test_classifies_transport_errors_as_retryable():
+    provider = ScriptedProvider([])
+
+    assert provider._classify_error("call failed", httpx.ConnectError("refused")).retryable
+    assert not provider._classify_error("call failed", RuntimeError("bug")).retryable
+
+
+def test_counts_as_outage():
+    assert counts_as_outage(transient())
+    assert counts_as_outage(httpx.ReadTimeout("slow"))
+    assert not counts_as_outage(fatal())
+    assert not counts_as_outage(ValueError("invalid JSON"))
@@ -0,0 +1,154 @@
+"""
+Tests for local SEO metrics and the chunked SEO review.
+"""
+
+import pytest
+
+from app.models.schemas import SEORequest
+from app.services.seo_metrics import (
+    analyze_content,
+    keyword_density,
+    language_code,
+    readability,
+)
+from app.services.seo_service import SEOService
+from app.services.tokenizer import HeuristicTokenizer
+from app.utils.text import count_syllables, tokenize_words
+
+
+# 100 words, 5 sentences, 140 syllables: 20 words per sentence, 1.4 syllables per word
+@pytest.mark.parametrize("language,score,formula", [
+    ("en", 68, "flesch_reading_ease"),
+    ("de", 78, "amstad"),
+    ("es", 100, "fernandez_huerta"),
+    ("fr", 84, "kandel_moles"),
+    ("it", 95, "flesch_vacca"),
+    ("nl", 80, "flesch_douma"),
+    ("pt", 100, "flesch_martins"),
+])
+def test_readability_uses_language_formula(language, score, formula):
+    assert readability(100, 5, 140, language) == (score, formula)
+
+
+def test_readability_is_clamped_and_needs_calibrated_language():
+    assert readability(100, 1, 400, "en") == (0, "flesch_reading_ease")
+    assert readability(100, 5, 140, "ja") == (None, None)
+    assert readability(0, 0, 0, "en") == (None, None)
+
+
+def test_language_code_normalizes_locales():
+    assert language_code("de_DE") == "de"
+    assert language_code("pt-BR") == "pt"
+    assert language_code("EN") == "en"
+
+
+def test_count_syllables():
+    assert count_syllables("make") == 1
+    assert count_syllables("table") == 2
+    assert count_syllables("water") == 2
+    assert count_syllables("rhythm") == 1
+    assert count_syllables("tschüss", "de") == 1
+
+
+def test_keyword_density_matches_whole_phrases():
+    words = tokenize_words("Coffee beans: fresh coffee beans beat old beans. Drink coffee daily!")
+
+    density = keyword_density(words, ["coffee beans", "coffee", "tea", "  "])
+
+    assert len(words) == 11
+    assert density == {"coffee beans": 36.36, "coffee": 27.27, "tea": 0.0}
+
+
+def test_keyword_density_does_not_count_overlaps():
+    assert keyword_density(["a", "a", "a"], ["a a"]) == {"a a": 66.67}
+    assert keyword_density([], ["a"]) == {"a": 0.0}
+
+
+def test_analyze_content_extracts_headings_and_counts():
+    html = (
+        "<h1>Brewing Coffee</h1><p>Good coffee takes time. Grind the beans.</p>"
+        "<script>var ignored = 'words';</script>"
+        "<h3>Water</h3><p>Use fresh water!</p>"
+    )
+
+    metrics = analyze_content(html, ["coffee", "espresso"], "en_US")
+
+    assert metrics.headings == [("h1", "Brewing Coffee"), ("h3", "Water")]
+    assert metrics.word_count == 13
+    assert metrics.sentence_count == 5
+    assert metrics.keyword_density == {"coffee": 15.38, "espresso": 0.0}
+    assert metrics.readability_formula == "flesch_reading_ease"
+    assert metrics.suggestions() == [
+        "Reduce keyword density for 'coffee' from 15.38% to below 3%",
+        "Target keyword 'espresso' does not appear in the content",
+        "Heading 'Water' skips from H1 to H3",
+    ]
+
+
+def test_suggests_lower_keyword_density():
+    metrics = analyze_content("<p>Coffee coffee coffee and tea.</p>", ["coffee"])
+
+    assert metrics.suggestions() == [
+        "Reduce keyword density for 'coffee' from 60.0% to below 3%"
+    ]
+
+
+class SectionProvider:
+    """Stub provider returning one scripted response per SEO section prompt."""
+
+    model_name = "stub"
+
+    def __init__(self, responses):
+        self.responses = responses
+        self.tokenizer = HeuristicTokenizer(4.0)
+        self.schemas = []
+
+    async def generate_json(self, prompt, system_message=None, **kwargs):
+        self.schemas.append(kwargs["response_schema"]["name"])
+        for marker, response in self.responses.items():
+            if marker in prompt:
+                return response
+        raise AssertionError("unexpected prompt")
+
+
+async def test_section_reviews_are_merged_without_repeats():
+    html = "".join(
+        f"<h2>Part {name}</h2><p>{' '.join([f'{name.lower()}word'] * 60)}</p>"
+        for name in ("One", "Two", "Three")
+    )
+    provider = SectionProvider({
+        "oneword": {
+            "seo_title": "Title",
+            "meta_desc": "Meta",
+            "slug": "slug",
+            "schema_ld_json": {},
+            "suggested_headings": [{"level": "h2", "text": "Brewing Basics", "rationale": "a"}],
+            "internal_links": [{"anchor": "Coffee Guide", "suggested_url": "/guide/"}],
+            "suggestions": ["Add images"],
+        },
+        "twoword": {
+            "suggested_headings": [
+                {"level": "h2", "text": "  brewing   basics ", "rationale": "repeat"},
+                {"level": "h3", "text": "Water", "rationale": "b"},
+                "not a heading",
+            ],
+            "internal_links": [{"anchor": "coffee guide", "suggested_url": "/other/"}],
+            "suggestions": ["Add images", "Shorten paragraphs"],
+        },
+        "threeword": {
+            "suggested_headings": [{"level": "h3", "text": ""}],
+            "internal_links": [{"anchor": "Grinders", "suggested_url": "/grinders/"}],
+            "suggestions": [],
+        },
+    })
+    service = SEOService(provider)
+    request = SEORequest(content_html=html, keywords=["coffee"])
+
+    merged = await service._optimize_sections(request, analyze_content(html, []), "system", 200)
+
+    assert provider.schemas.count("seo_optimization") == 1
+    assert provider.schemas.count("seo_section") == 2
+    assert merged["seo_title"] == "Title"
+    assert [item["text"] for item in merged["suggested_headings"]] == ["Brewing Basics", "Water"]
+    assert [item["suggested_url"] for item in merged["internal_links"]] == ["/guide/", "/grinders/"]
+    assert merged["suggestions"] == ["Add images", "Shorten paragraphs"]
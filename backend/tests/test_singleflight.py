@@ -0,0 +1,181 @@
+"""
+Tests for in-flight call coalescing.
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from app.services.llm_provider import LLMProvider, RetryPolicy
+from app.services.singleflight import SingleFlight
+from app.services.usage import record_tokens, track_usage
+
+
+class GatedProvider(LLMProvider):
+    """Provider whose calls wait for `release` and cost 150 tokens."""
+
+    name = "gated"
+
+    def __init__(self):
+        super().__init__("model")
+        self.calls = 0
+        self.release = asyncio.Event()
+        self.retry_policy = RetryPolicy(max_attempts=1)
+
+    def get_default_model(self) -> str:
+        return "model"
+
+    async def generate(self, prompt, system_message=None, **kwargs) -> str:
+        self.calls += 1
+        await self.release.wait()
+        record_tokens(prompt_tokens=100, completion_tokens=50)
+        return json.dumps({"title": "T"})
+
+
+async def generate(provider, **kwargs):
+    with track_usage() as usage:
+        result = await provider.generate_json("prompt", use_cache=False, **kwargs)
+    return result, usage
+
+
+async def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    started = 0
+    release = asyncio.Event()
+
+    async def call():
+        nonlocal started
+        started += 1
+        await release.wait()
+        return {"title": "T"}
+
+    callers = [asyncio.ensure_future(flight.do("k", call)) for _ in range(5)]
+    await asyncio.sleep(0)
+    assert flight.inflight == 1
+
+    release.set()
+    results = await asyncio.gather(*callers)
+
+    assert started == 1
+    assert results == [{"title": "T"}] * 5
+    assert flight.stats() == {"calls": 5, "coalesced": 4, "inflight": 0}
+
+
+async def test_followers_get_independent_copies():
+    flight = SingleFlight()
+    release = asyncio.Event()
+
+    async def call():
+        await release.wait()
+        return {"outline": ["a"]}
+
+    first = asyncio.ensure_future(flight.do("k", call))
+    second = asyncio.ensure_future(flight.do("k", call))
+    await asyncio.sleep(0)
+    release.set()
+    a, b = await asyncio.gather(first, second)
+
+    b["outline"].append("b")
+    assert a == {"outline": ["a"]}
+
+
+async def test_different_keys_run_separately():
+    flight = SingleFlight()
+    started = []
+
+    async def call(key):
+        started.append(key)
+        await asyncio.sleep(0)
+        return key
+
+    results = await asyncio.gather(
+        flight.do("a", lambda: call("a")),
+        flight.do("b", lambda: call("b")),
+    )
+
+    assert results == ["a", "b"]
+    assert sorted(started) == ["a", "b"]
+    assert flight.coalesced == 0
+
+
+async def test_sequential_calls_are_not_coalesced():
+    flight = SingleFlight()
+    count = 0
+
+    async def call():
+        nonlocal count
+        count += 1
+        return count
+
+    assert await flight.do("k", call) == 1
+    assert await flight.do("k", call) == 2
+    assert flight.inflight == 0
+
+
+async def test_error_reaches_every_caller():
+    flight = SingleFlight()
+    release = asyncio.Event()
+
+    async def call():
+        await release.wait()
+        raise ValueError("boom")
+
+    callers = [asyncio.ensure_future(flight.do("k", call)) for _ in range(3)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*callers, return_exceptions=True)
+
+    assert all(isinstance(r, ValueError) for r in results)
+    assert flight.inflight == 0
+
+
+async def test_cancelled_caller_does_not_abort_others():
+    flight = SingleFlight()
+    release = asyncio.Event()
+
+    async def call():
+        await release.wait()
+        return "done"
+
+    first = asyncio.ensure_future(flight.do("k", call))
+    second = asyncio.ensure_future(flight.do("k", call))
+    await asyncio.sleep(0)
+
+    first.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await first
+
+    release.set()
+    assert await second == "done"
+
+
+async def test_provider_marks_followers_as_cached():
+    provider = GatedProvider()
+
+    callers = [asyncio.ensure_future(generate(provider)) for _ in range(3)]
+    await asyncio.sleep(0)
+    provider.release.set()
+    (first, leader), *followers = await asyncio.gather(*callers)
+
+    assert provider.calls == 1
+    assert first == {"title": "T"}
+    assert (leader.tokens_used, leader.cached) == (150, False)
+    assert [(usage.tokens_used, usage.cached) for _, usage in followers] == [(0, True)] * 2
+
+
+async def test_provider_coalesces_only_same_field_types():
+    provider = GatedProvider()
+
+    callers = [
+        asyncio.ensure_future(generate(provider, field_types={"title": str})),
+        asyncio.ensure_future(generate(provider, field_types={"title": list})),
+        asyncio.ensure_future(generate(provider, field_types={"title": str})),
+    ]
+    await asyncio.sleep(0)
+    provider.release.set()
+    results = await asyncio.gather(*callers, return_exceptions=True)
+
+    assert provider.calls == 2
+    assert provider.inflight.stats()["coalesced"] == 1
+    assert results[2][1].cached
@@ -0,0 +1,50 @@
+"""
+Tests for brand voice stylometry.
+"""
+
+from app.models.schemas import BrandSample
+from app.services.stylometry import analyze_samples, sample_text
+
+
+SAMPLES = [
+    BrandSample(
+        title="Morning coffee rituals",
+        excerpt="<p>Coffee rituals matter.</p>",
+        body="<p>Fresh coffee wakes everyone. Grind fresh beans daily.</p>"
+             "<p>Coffee tastes better fresh.</p>",
+    ),
+    BrandSample(
+        title="Tea",
+        body="<h2>Brewing tea</h2><p>Brewing tea takes patience and fresh water.</p>",
+    ),
+]
+
+
+def test_sample_text_skips_title():
+    text = sample_text(SAMPLES[0])
+
+    assert "rituals" in text and "Morning" not in text
+    assert text.count("\n\n") == 2
+
+
+def test_sentence_and_paragraph_lengths():
+    analysis = analyze_samples(SAMPLES)
+
+    # 24 words in 6 sentences and 5 paragraphs (headings count as both)
+    assert analysis.avg_sentence_length == 4.0
+    assert analysis.avg_paragraph_length == 1.2
+    assert 0 <= analysis.flesch_reading_ease <= 100
+
+
+def test_common_words_skip_stopwords_and_short_words():
+    analysis = analyze_samples(SAMPLES, top_words=4)
+
+    assert analysis.common_words == ["fresh", "coffee", "brewing", "tea"]
+    assert "and" not in analyze_samples(SAMPLES).common_words
+
+
+def test_languages_without_formula_have_no_reading_ease():
+    analysis = analyze_samples(SAMPLES, language="ja")
+
+    assert analysis.flesch_reading_ease is None
+    assert analysis.avg_sentence_length == 4.0
@@ -0,0 +1,82 @@
+"""
+Tests for HTML chunking.
+"""
+
+import pytest
+
+from app.utils.text import chunk_html
+
+
+class ByteTokenizer:
+    """
+    Tokenizer counting two UTF-8 bytes per token.
+
+    Like byte-level BPE, a cut after max_tokens can land inside a multibyte
+    character; truncate() then decodes the partial bytes to U+FFFD.
+    """
+
+    def count(self, text: str) -> int:
+        return (len(text.encode("utf-8")) + 1) // 2
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        cut = text.encode("utf-8")[:max_tokens * 2].decode("utf-8", errors="replace")
+        boundary = cut.rfind(" ")
+        return (cut[:boundary] if boundary > 0 else cut).rstrip()
+
+
+def words(chunks):
+    return " ".join(chunks).split()
+
+
+def test_chunks_at_headings():
+    html = "<h2>One</h2><p>First section.</p><h2>Two</h2><p>Second section.</p>"
+
+    assert chunk_html(html, max_tokens=10) == [
+        "<h2>One</h2><p>First section.</p>",
+        "<h2>Two</h2><p>Second section.</p>",
+    ]
+    assert chunk_html(html, max_tokens=1000) == [html]
+
+
+def test_splits_long_blocks_at_word_boundaries():
+    html = "<p>" + " ".join(f"word{i}" for i in range(200)) + "</p>"
+
+    chunks = chunk_html(html, max_tokens=50)
+
+    assert len(chunks) > 1
+    assert words(chunks) == html.split()
+
+
+def test_packed_cuts_keep_separating_whitespace():
+    html = "<h2>One</h2><p>First section.</p><h2>Two</h2><p>Second section.</p>"
+
+    chunks = chunk_html(html, max_tokens=8)
+
+    assert "First section." in " ".join(chunks)
+    assert not any("Firstsection" in chunk for chunk in chunks)
+
+
+def test_multibyte_cut_falls_back_to_whole_words():
+    text = " ".join(["Größenänderung", "für", "Übergrößen", "äußerst", "schön"] * 20)
+    html = f"<p>{text}</p>"
+
+    chunks = chunk_html(html, max_tokens=15, tokenizer=ByteTokenizer())
+
+    assert "�" not in "".join(chunks)
+    assert words(chunks) == html.split()
+    assert all(ByteTokenizer().count(chunk) <= 15 for chunk in chunks)
+
+
+def test_multibyte_text_without_spaces_still_progresses():
+    html = "<p>" + "日本語のテキスト。" * 30 + "</p>"
+
+    chunks = chunk_html(html, max_tokens=10, tokenizer=ByteTokenizer())
+
+    assert "�" not in "".join(chunks)
+    assert "".join(chunks) == html
+    assert all(ByteTokenizer().count(chunk) <= 10 for chunk in chunks)
+
+
+def test_rejects_non_positive_budget():
+    with pytest.raises(ValueError):
+        chunk_html("<p>x</p>", max_tokens=0)
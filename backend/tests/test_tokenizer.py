@@ -0,0 +1,133 @@
+"""
+Tests for token counting and context-window budgeting.
+"""
+
+from typing import List
+
+import pytest
+
+from app.services import tokenizer as tokenizer_module
+from app.services.tokenizer import (
+    DEFAULT_CONTEXT_WINDOW,
+    MESSAGE_OVERHEAD,
+    HeuristicTokenizer,
+    TiktokenTokenizer,
+    context_window,
+    fit_max_tokens,
+    get_tokenizer,
+    register_tokenizer,
+)
+
+
+class ByteEncoding:
+    """Stand-in for a tiktoken encoding with one token per UTF-8 byte."""
+
+    def encode(self, text: str, disallowed_special=()) -> List[int]:
+        return list(text.encode("utf-8"))
+
+    def decode(self, tokens: List[int]) -> str:
+        return bytes(tokens).decode("utf-8", errors="replace")
+
+    def decode_bytes(self, tokens: List[int]) -> bytes:
+        return bytes(tokens)
+
+
+@pytest.fixture
+def byte_tokenizer() -> TiktokenTokenizer:
+    tokenizer = TiktokenTokenizer.__new__(TiktokenTokenizer)
+    tokenizer.encoding = ByteEncoding()
+    return tokenizer
+
+
+def test_heuristic_counts_and_truncates_at_words():
+    tokenizer = HeuristicTokenizer(4.0)
+
+    assert tokenizer.count("") == 0
+    assert tokenizer.count("abcde") == 2
+    assert tokenizer.truncate("one two three four", 3) == "one two"
+    assert tokenizer.truncate("short", 10) == "short"
+
+
+def test_tiktoken_truncate_ends_on_whole_word(byte_tokenizer):
+    assert byte_tokenizer.count("héllo") == 6
+    assert byte_tokenizer.truncate("hello wide world", 12) == "hello wide"
+    assert byte_tokenizer.truncate("fits", 10) == "fits"
+
+
+def test_tiktoken_truncate_never_splits_multibyte_characters(byte_tokenizer):
+    # "ü" is two bytes: a 3-token cut ends inside it
+    assert byte_tokenizer.truncate("grüße", 3) == "gr"
+    assert byte_tokenizer.truncate("日本語", 4) == "日"
+    assert byte_tokenizer.truncate("日本語", 2) == ""
+
+
+def test_get_tokenizer_shares_instances(monkeypatch):
+    monkeypatch.setattr(tokenizer_module, "_tokenizers", {})
+
+    first = get_tokenizer("anthropic", "claude-3-5-sonnet")
+
+    assert first is get_tokenizer("anthropic", "claude-3-5-sonnet")
+    assert first.chars_per_token == 3.5
+    assert get_tokenizer("unknown", "model").chars_per_token == 4.0
+
+
+def test_openai_falls_back_to_heuristic_without_tiktoken(monkeypatch):
+    def missing(model):
+        raise ImportError("tiktoken package not installed")
+
+    monkeypatch.setattr(tokenizer_module, "_tokenizers", {})
+    monkeypatch.setattr(tokenizer_module, "TiktokenTokenizer", missing)
+
+    assert get_tokenizer("openai", "gpt-4o").name == "heuristic"
+
+
+def test_register_tokenizer_replaces_cached_instances(monkeypatch):
+    monkeypatch.setattr(tokenizer_module, "_tokenizers", {})
+    monkeypatch.setattr(tokenizer_module, "TOKENIZERS", dict(tokenizer_module.TOKENIZERS))
+    before = get_tokenizer("ollama", "llama3")
+
+    register_tokenizer("ollama", lambda model: HeuristicTokenizer(3.0))
+
+    after = get_tokenizer("ollama", "llama3")
+    assert after is not before
+    assert after.chars_per_token == 3.0
+
+
+@pytest.mark.parametrize("model,window", [
+    ("gpt-4o-mini", 128000),
+    ("gpt-4-32k-0613", 32768),
+    ("gpt-4", 8192),
+    ("llama3.1:8b", 128000),
+    ("llama3:8b", 8192),
+    ("Claude-3-Opus", 200000),
+    ("something-new", DEFAULT_CONTEXT_WINDOW),
+])
+def test_context_window_uses_longest_prefix(monkeypatch, model, window):
+    monkeypatch.delenv("LLM_CONTEXT_WINDOW", raising=False)
+
+    assert context_window(model) == window
+
+
+def test_context_window_override(monkeypatch):
+    monkeypatch.setenv("LLM_CONTEXT_WINDOW", "32000")
+
+    assert context_window("gpt-4o") == 32000
+
+
+def test_fit_max_tokens_clamps_to_remaining_window():
+    tokenizer = HeuristicTokenizer(1.0)
+    prompt = "x" * 1000
+    used = 1000 + MESSAGE_OVERHEAD + 10 + MESSAGE_OVERHEAD
+
+    assert fit_max_tokens(tokenizer, 4096, prompt, "y" * 10, 500) == 500
+    assert fit_max_tokens(tokenizer, 2000, prompt, "y" * 10, 2000) == 2000 - used
+
+
+def test_fit_max_tokens_rejects_prompt_without_room():
+    tokenizer = HeuristicTokenizer(1.0)
+
+    with pytest.raises(ValueError, match="context window"):
+        fit_max_tokens(tokenizer, 1100, "x" * 1000, None, 2000)
+
+    # Small requests only need their own size
+    assert fit_max_tokens(tokenizer, 1100, "x" * 1000, None, 50) == 50
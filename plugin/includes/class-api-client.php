@@ -160,7 +160,7 @@ class API_Client {
 		}
 
 		// Check response code.
-		if ( $response_code !== 200 ) {
+		if ( $response_code < 200 || $response_code >= 300 ) {
 			$error_code    = isset( $data['error']['code'] ) ? $data['error']['code'] : 'UNKNOWN_ERROR';
 			$error_message = isset( $data['error']['message'] ) ? $data['error']['message'] : __( 'API request failed.', 'contentcraft-ai' );
 
@@ -256,6 +256,40 @@ class API_Client {
 		return $data;
 	}
 
+	/**
+	 * Submit a background generation job.
+	 *
+	 * Use for requests that may exceed the HTTP timeout (long-form content,
+	 * brand training). Poll the job with get_job() or pass a webhook URL.
+	 *
+	 * @param string      $type        Job type (content/product/seo/image/brand).
+	 * @param array       $payload     Request body for the matching endpoint.
+	 * @param string|null $webhook_url URL notified when the job finishes (optional).
+	 * @return array|WP_Error Job data or WP_Error on failure.
+	 */
+	public function submit_job( $type, $payload, $webhook_url = null ) {
+		$body = array(
+			'type'    => $type,
+			'payload' => $payload,
+		);
+
+		if ( $webhook_url ) {
+			$body['webhook_url'] = $webhook_url;
+		}
+
+		return $this->post( '/api/jobs', $body, 15 );
+	}
+
+	/**
+	 * Get background job status and result.
+	 *
+	 * @param string $job_id Job ID returned by submit_job().
+	 * @return array|WP_Error Job data or WP_Error on failure.
+	 */
+	public function get_job( $job_id ) {
+		return $this->get( '/api/jobs/' . rawurlencode( $job_id ) );
+	}
+
 	/**
 	 * Test connection to FastAPI.
 	 *